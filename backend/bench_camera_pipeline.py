@@ -0,0 +1,52 @@
+"""
+Reproducible CameraService benchmark driven by a recorded session.
+
+Replays a video file or a session directory written by
+``python -m services.video_source <dir>`` through the camera pipeline and
+prints fps, latency and dropped-frame numbers.
+
+Usage:
+    python bench_camera_pipeline.py recordings/session1 --model both --speed 1.0
+"""
+
+import argparse
+import json
+import os
+import time
+
+from services.model_manager import ModelManager
+from services.detection_service import DetectionService
+from services.camera_service import CameraService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording through CameraService")
+    parser.add_argument("source", help="Video file or recorded session directory")
+    parser.add_argument("--model", default="weapon", choices=["weapon", "fire_smoke", "both"])
+    parser.add_argument("--speed", type=float, default=1.0, help="1.0 = real time, 0 = max speed")
+    args = parser.parse_args()
+
+    model_manager = ModelManager()
+    model_manager.load_models()
+    camera_service = CameraService(model_manager, DetectionService())
+
+    # open_capture reads the replay speed from the environment
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    result = camera_service.start_camera(args.model, source=args.source)
+    if not result["success"]:
+        print(result["message"])
+        return
+
+    start = time.perf_counter()
+    while camera_service.is_running:
+        time.sleep(0.5)
+    elapsed = time.perf_counter() - start
+
+    stats = camera_service.get_pipeline_stats()
+    stats["wall_seconds"] = round(elapsed, 2)
+    stats["processed_fps"] = round(stats["frames_processed"] / elapsed, 2) if elapsed else 0.0
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Filtered /detections query latency on a large detections table.
+
+Seeds a scratch schema with N detections (one alert each) spread over a
+year across eight cameras, with common and rare types, partitions it,
+then times AsyncDatabaseManager.get_detections_page for the filters the
+Alerts and Analytics pages use and prints p50/p95 per filter. The seed is
+kept between runs unless --reseed is given.
+
+Usage:
+    python bench_detection_filters.py [--rows 2000000] [--runs 50] [--reseed]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+import psycopg2
+
+from services.async_database_manager import AsyncDatabaseManager
+from services.migrations import apply_migrations
+from services.partition_manager import ensure_partitions
+
+SCHEMA = "bench_filters"
+
+
+def seed(rows: int, reseed: bool):
+    connection = psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5432")),
+        database=os.getenv("DB_NAME", "cyberisai"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "your_postgres_password"),
+    )
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM pg_namespace WHERE nspname = %s", (SCHEMA,))
+    if cursor.fetchone()[0] and not reseed:
+        connection.close()
+        return
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    connection.autocommit = False
+    apply_migrations(cursor)
+    connection.commit()
+    connection.autocommit = True
+
+    start = time.perf_counter()
+    cursor.execute("""
+        INSERT INTO cameras (camera_id, location) SELECT i, 'Camera ' || i FROM generate_series(2, 8) AS i;
+        INSERT INTO detections (camera_id, type, confidence, timestamp, is_read)
+        SELECT 1 + i %% 8,
+               CASE WHEN i %% 100 = 0 THEN 'gun' WHEN i %% 100 < 4 THEN 'knife'
+                    WHEN i %% 100 < 10 THEN 'fight' WHEN i %% 100 < 25 THEN 'fire'
+                    WHEN i %% 100 < 40 THEN 'smoke' ELSE 'person' END,
+               0.3 + random() * 0.7,
+               now() - interval '365 days' * i / %s,
+               i > 2000
+        FROM generate_series(1, %s) AS i;
+        INSERT INTO alerts (detection_id, severity, created_at)
+        SELECT detection_id,
+               CASE WHEN confidence >= 0.8 THEN 'high' WHEN confidence >= 0.6 THEN 'medium' ELSE 'low' END,
+               timestamp
+        FROM detections;
+    """, (rows, rows))
+    connection.autocommit = False
+    ensure_partitions(cursor, "month")
+    connection.commit()
+    connection.autocommit = True
+    cursor.execute("VACUUM ANALYZE detections")
+    cursor.execute("VACUUM ANALYZE alerts")
+    print(f"seeded {rows} detections in {time.perf_counter() - start:.0f}s")
+    connection.close()
+
+
+def cases():
+    now = datetime.now()
+    return {
+        "newest": {},
+        "type": {"types": ["gun"]},
+        "types + week": {"types": ["gun", "knife"], "since": now - timedelta(days=7)},
+        "camera": {"camera_id": 3},
+        "camera + type": {"camera_id": 3, "types": ["fire"]},
+        "unread": {"is_read": False},
+        "severity high": {"severities": ["high"]},
+        "severity + unread": {"severities": ["high"], "is_read": False},
+        "confidence >= 0.9": {"min_confidence": 0.9},
+        "month window": {"since": now - timedelta(days=60), "until": now - timedelta(days=30)},
+        "type + old window": {"types": ["smoke"], "since": now - timedelta(days=300),
+                              "until": now - timedelta(days=299)},
+    }
+
+
+async def main(args):
+    seed(args.rows, args.reseed)
+    database = AsyncDatabaseManager()
+    database.pool = await asyncpg.create_pool(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5432")),
+        database=os.getenv("DB_NAME", "cyberisai"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "your_postgres_password"),
+        min_size=1, max_size=2, server_settings={"search_path": SCHEMA},
+    )
+    print(f"{'filter':<22}{'rows':>6}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, filters in cases().items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            page = await database.get_detections_page(args.limit, **filters)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p50, p95 = timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<22}{len(page['detections']):>6}{p50:>9.2f}{p95:>9.2f}")
+    await database.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--reseed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
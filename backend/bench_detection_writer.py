@@ -0,0 +1,55 @@
+"""
+Detection insert throughput: per-row commits vs write-behind batches.
+
+Writes N detections with one alert each against a running PostgreSQL, first
+the old way (save_detection then save_alert, two commits per detection),
+then through DetectionWriter, and prints rows per second for both.
+
+Usage:
+    python bench_detection_writer.py [--rows 5000] [--batch 500]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from services.database_manager import DatabaseManager
+from services.async_database_manager import AsyncDatabaseManager
+from services.detection_writer import DetectionWriter
+
+
+async def main(args):
+    # Creates the schema if needed
+    if not DatabaseManager().connect():
+        raise SystemExit("PostgreSQL is not reachable; set DB_HOST/DB_NAME/DB_USER/DB_PASSWORD")
+    database = AsyncDatabaseManager()
+    await database.connect()
+
+    start = time.perf_counter()
+    for _ in range(args.rows):
+        detection_id = await database.save_detection("bench", 0.5)
+        await database.save_alert(detection_id, "medium")
+    per_row = args.rows / (time.perf_counter() - start)
+    print(f"per-row commits: {per_row:10.0f} detections/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = DetectionWriter(database, batch_size=args.batch, flush_interval_ms=50,
+                                 spool_path=os.path.join(tmp, "spool.jsonl"))
+        writer.start()
+        start = time.perf_counter()
+        for _ in range(args.rows):
+            await writer.enqueue("bench", 0.5, "medium")
+        await writer.stop()
+        batched = args.rows / (time.perf_counter() - start)
+    print(f"write-behind:    {batched:10.0f} detections/s  ({batched / per_row:.0f}x, "
+          f"{writer.get_stats()['batches']} batches)")
+    await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""
+Event-loop lag under database load.
+
+Fires concurrent get_recent_detections calls at a running PostgreSQL, first
+through the synchronous DatabaseManager called from the loop (how handlers
+used to call it), then through AsyncDatabaseManager, while a ticker task
+measures how late the event loop wakes it up.
+
+Usage:
+    python bench_event_loop_lag.py [--requests 2000] [--concurrency 100] [--limit 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from services.database_manager import DatabaseManager
+from services.async_database_manager import AsyncDatabaseManager
+
+TICK_SECONDS = 0.005
+
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    """Record how far past TICK_SECONDS each sleep actually wakes."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        samples.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def run(name: str, query, requests: int, concurrency: int):
+    samples: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, samples))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await query()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    samples.sort()
+    lag_ms = [s * 1000 for s in samples] or [0.0]
+    print(f"{name:>6}: {requests / elapsed:8.0f} req/s   loop lag "
+          f"p50 {statistics.median(lag_ms):6.2f} ms   "
+          f"p99 {lag_ms[int(len(lag_ms) * 0.99) - 1]:7.2f} ms   max {lag_ms[-1]:7.2f} ms")
+
+
+async def main(args):
+    sync_manager = DatabaseManager()
+    async_manager = AsyncDatabaseManager()
+    if not sync_manager.connect() or not await async_manager.connect():
+        raise SystemExit("PostgreSQL is not reachable; set DB_HOST/DB_NAME/DB_USER/DB_PASSWORD")
+
+    async def sync_query():
+        sync_manager.get_recent_detections(args.limit)
+
+    async def async_query():
+        await async_manager.get_recent_detections(args.limit)
+
+    await run("sync", sync_query, args.requests, args.concurrency)
+    await run("async", async_query, args.requests, args.concurrency)
+
+    await async_manager.disconnect()
+    sync_manager.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Benchmark matrix for CPU thread-budget splits.
+
+Runs the "both" YOLO models plus fight detection on synthetic frames once per
+budget split, each in a fresh subprocess (thread pools can only be sized once
+per process), and prints the resulting throughput.
+
+Usage:
+    python bench_thread_budget.py [--frames 60] [--budget 8]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Relative shares handed to CPU_THREAD_SPLIT for each run
+SPLITS = [
+    "torch=1,tensorflow=1,opencv=1,mediapipe=1",
+    "torch=2,tensorflow=1,opencv=1,mediapipe=1",
+    "torch=4,tensorflow=1,opencv=1,mediapipe=2",
+    "torch=1,tensorflow=2,opencv=1,mediapipe=2",
+]
+
+
+def run_worker(frames: int):
+    """Measure one split inside the current process and print JSON to stdout."""
+    from services.thread_budget import get_thread_budget
+    get_thread_budget().configure_environment()
+    import numpy as np
+    from services.model_manager import ModelManager
+    from services.detection_service import DetectionService
+    from services.fight_detection_service import FightDetectionService
+
+    model_manager = ModelManager()
+    model_manager.load_models()
+    detection_service = DetectionService()
+    fight_service = FightDetectionService()
+    fight_service.load_model()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    # Warm up so lazy initialisation is not measured
+    detection_service.process_frame_with_dual_models(
+        model_manager.weapon_model, model_manager.fire_smoke_model, frame)
+    fight_service.detect_fight(frame, force_predict=True)
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(frames):
+        detection_service.process_frame_with_dual_models(
+            model_manager.weapon_model, model_manager.fire_smoke_model, frame)
+        fight_service.detect_fight(frame, force_predict=True)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    fight_service.cleanup()
+    print(json.dumps({
+        "fps": frames / wall,
+        "ms_per_frame": wall / frames * 1000,
+        "cpu_utilisation": cpu / wall,
+        "allocation": model_manager.thread_budget.allocation,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread budget benchmark matrix")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.frames)
+        return
+
+    print(f"Thread budget: {args.budget} threads, {args.frames} frames per run")
+    print(f"{'split':<45} {'fps':>7} {'ms/frame':>9} {'cpu':>6}  allocation")
+    for split in SPLITS:
+        env = dict(os.environ, CPU_THREAD_BUDGET=str(args.budget), CPU_THREAD_SPLIT=split)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", "--frames", str(args.frames)],
+            env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{split:<45} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{split:<45} {result['fps']:>7.2f} {result['ms_per_frame']:>9.1f} "
+              f"{result['cpu_utilisation']:>6.2f}  {result['allocation']}")
+
+
+if __name__ == "__main__":
+    main()
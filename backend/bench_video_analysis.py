@@ -0,0 +1,37 @@
+"""
+Throughput of offline video analysis as the worker count grows.
+
+Usage:
+    python bench_video_analysis.py recordings/lobby.mp4 --models weapon,fire_smoke --workers 1 2 4
+"""
+
+import argparse
+import json
+
+from services.video_analysis import VideoAnalysisService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunked video analysis")
+    parser.add_argument("video", help="Video file to analyse")
+    parser.add_argument("--models", default="weapon,fire_smoke,fight")
+    parser.add_argument("--sample-fps", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    service = VideoAnalysisService()
+    baseline = None
+    for workers in args.workers:
+        result = service.analyze(args.video, args.models.split(","), args.sample_fps, workers)
+        if not result.get("success"):
+            print(json.dumps(result))
+            return
+        baseline = baseline or result["frames_per_second"]
+        print(f"workers={workers:2d}  chunks={result['chunks']:3d}  "
+              f"wall={result['wall_seconds']:7.2f}s  cpu={result['cpu_seconds']:7.2f}s  "
+              f"fps={result['frames_per_second']:7.2f}  speedup={result['frames_per_second'] / baseline:4.2f}x  "
+              f"events={len(result['timeline'])}")
+
+
+if __name__ == "__main__":
+    main()
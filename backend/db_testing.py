@@ -0,0 +1,25 @@
+"""
+Helpers for test scripts whose checks need a scratch PostgreSQL database.
+"""
+
+import os
+import sys
+from typing import Optional
+
+
+def require_test_database(checks: str) -> Optional[str]:
+    """
+    URL of the scratch database named by TEST_DATABASE_URL.
+
+    Without one the checks are skipped: reported as skipped under pytest,
+    announced (returning None) when the file runs as a script.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        return url
+    message = f"TEST_DATABASE_URL not set; skipping {checks}"
+    if "pytest" in sys.modules:
+        import pytest
+        pytest.skip(message)
+    print(message)
+    return None
@@ -5,12 +5,13 @@ Script to initialize the PostgreSQL database for the CyberisAl project.
 import psycopg2
 import os
 from dotenv import load_dotenv
+from services.migrations import apply_migrations, latest_version
 
 # Load environment variables
 load_dotenv()
 
 def init_database():
-    """Initialize the PostgreSQL database with required tables."""
+    """Initialize or upgrade the PostgreSQL database schema."""
     
     # Database connection parameters
     db_host = os.getenv("DB_HOST", "localhost")
@@ -34,80 +35,16 @@ def init_database():
         
         cursor = connection.cursor()
         
-        # Create cameras table
-        create_cameras_table = """
-        CREATE TABLE IF NOT EXISTS cameras (
-            camera_id SERIAL PRIMARY KEY,
-            location VARCHAR(255),
-            ip_address VARCHAR(45),
-            status BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-        
-        # Create detections table
-        create_detections_table = """
-        CREATE TABLE IF NOT EXISTS detections (
-            detection_id SERIAL PRIMARY KEY,
-            camera_id INTEGER REFERENCES cameras(camera_id),
-            type VARCHAR(50),
-            confidence FLOAT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            image_url VARCHAR(500)
-        );
-        """
-        
-        # Create alerts table
-        create_alerts_table = """
-        CREATE TABLE IF NOT EXISTS alerts (
-            alert_id SERIAL PRIMARY KEY,
-            detection_id INTEGER REFERENCES detections(detection_id),
-            severity VARCHAR(20),
-            status VARCHAR(20) DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-        
-        # Create users table
-        create_users_table = """
-        CREATE TABLE IF NOT EXISTS users (
-            user_id SERIAL PRIMARY KEY,
-            full_name VARCHAR(100) NOT NULL,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            role VARCHAR(20) DEFAULT 'user',
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-        
-        # Execute table creation queries
-        cursor.execute(create_cameras_table)
-        cursor.execute(create_detections_table)
-        cursor.execute(create_alerts_table)
-        cursor.execute(create_users_table)
-        
-        # Insert default camera if not exists
-        cursor.execute("SELECT COUNT(*) FROM cameras WHERE camera_id = 1")
-        result = cursor.fetchone()
-        if result:
-            count = result[0]
-            
-            if count == 0:
-                insert_camera = """
-                INSERT INTO cameras (camera_id, location, ip_address, status)
-                VALUES (1, 'Default Webcam', NULL, TRUE);
-                """
-                cursor.execute(insert_camera)
+        # Create or upgrade tables, indexes and the default camera
+        applied = apply_migrations(cursor)
         
         # Commit changes
         connection.commit()
         
         print("Database initialized successfully!")
-        print("- Created tables: cameras, detections, alerts")
-        print("- Added default camera record")
+        if applied:
+            print(f"- Applied migrations: {', '.join(str(v) for v in applied)}")
+        print(f"- Schema at version {latest_version()}")
         
     except Exception as e:
         print(f"Error initializing database: {e}")
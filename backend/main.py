@@ -1,34 +1,54 @@
+# Thread-count environment must be exported before cv2/torch/TensorFlow load OpenMP
+from dotenv import load_dotenv
+load_dotenv()
+from services import thread_budget
+thread_budget.get_thread_budget().configure_environment()
+
 import cv2
 import numpy as np
 import asyncio
-from fastapi import FastAPI, File, UploadFile, Form, Depends, HTTPException, Header
+from fastapi import FastAPI, File, UploadFile, Form, Depends, HTTPException, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from ultralytics import YOLO
 import os
-from dotenv import load_dotenv
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import base64
 import logging
+import time
+import zipfile
+import tempfile
 import socketio
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 # Import our services
 from services.model_manager import ModelManager
 from services.detection_service import DetectionService
 from services.database_manager import DatabaseManager
+from services.async_database_manager import AsyncDatabaseManager
+from services.detection_writer import DetectionWriter
+from services.detection_cache import DetectionCache, etag_matches
+from services.pagination import encode_cursor
 from services.fight_detection_service import FightDetectionService
 from services.auth_service import AuthService
+from services.motion_gate import MotionGateRegistry
+from services.roi_service import RoiService, validate_polygon
+from services.model_cadence import ModelCadenceRegistry
+from services.clip_recorder import ClipRecorder
+from services.image_output import ImageEncoder, ImageCache, build_multipart
+from services.video_analysis import VideoAnalysisService
+from services.job_service import JobService, LocalJobStore
+from services.admission_control import AdmissionController, AdmissionRejected
+from services.inference_scheduler import InferenceScheduler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 # ── CORS allowed origins ─────────────────────────────────────
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -54,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 # Wrap FastAPI with Socket.IO ASGI app
@@ -89,15 +110,25 @@ async def socket_app(scope, receive, send):
 model_manager = ModelManager()
 detection_service = DetectionService()
 database_manager = DatabaseManager()
+async_database_manager = AsyncDatabaseManager()
+detection_cache = DetectionCache(async_database_manager)
+detection_writer = DetectionWriter(async_database_manager, on_written=detection_cache.record_written)
 fight_detection_service = FightDetectionService()
 auth_service = AuthService()
+motion_gates = MotionGateRegistry()
+roi_service = RoiService(database_manager)
+model_cadences = ModelCadenceRegistry()
+clip_recorder = ClipRecorder()
+image_encoder = ImageEncoder()
+image_cache = ImageCache(image_encoder)
+video_analysis_service = VideoAnalysisService()
+job_service = JobService()
+admission = AdmissionController()
+inference_scheduler = InferenceScheduler()
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
-# Global variable for current model
-current_model = "weapon"
-
 
 # ── Pydantic models for auth ─────────────────────────────────
 class SignUpRequest(BaseModel):
@@ -126,6 +157,11 @@ class UserResponse(BaseModel):
     email: str
     role: str
 
+class RegionRequest(BaseModel):
+    name: str = "region"
+    polygon: List[List[float]]
+    enabled: bool = True
+
 
 # ── Auth dependency ──────────────────────────────────────────
 async def get_current_user(authorization: Optional[str] = Header(None)):
@@ -143,7 +179,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
     # Fetch full user from DB to ensure they still exist / are active
-    user = database_manager.get_user_by_id(payload.get("user_id"))
+    user = await async_database_manager.get_user_by_id(payload.get("user_id"))
     if not user or not user.get("is_active"):
         raise HTTPException(status_code=401, detail="User not found or inactive")
 
@@ -168,7 +204,9 @@ async def emit_alert(detection_type: str, confidence: float, severity: str, dete
     }
     severity_label = "Critical" if severity == "high" else "Warning" if severity == "medium" else "Info"
     alert_payload = {
+        # detection_id is None while the database is unreachable; the row is written on replay
         "id": detection_id or int(datetime.now().timestamp() * 1000),
+        "detection_id": detection_id,
         "type": type_labels.get(detection_type.lower(),
                                 f"{detection_type.capitalize()} Detected"),
         "severity": severity_label,
@@ -184,17 +222,467 @@ async def emit_alert(detection_type: str, confidence: float, severity: str, dete
     logger.info(f"[Socket.IO] Emitted new_alert: {detection_type} ({confidence:.1%})")
 
 
+# ── Shared detection helpers ─────────────────────────────────
+# Used by the HTTP upload endpoints and the /frames Socket.IO namespace.
+
+# Inference runs in worker threads; YOLO/TensorFlow models are not safe to
+# call concurrently, so inference_scheduler hands out one model slot at a
+# time, choosing between the live, interactive and bulk lanes.
+
+WEAPON_CLASSES = {'weapon', 'gun', 'knife', 'pistol', 'rifle', 'handgun', 'sword', 'bomb', 'grenade', 'firearm'}
+FIRE_SMOKE_CLASSES = {'fire', 'smoke', 'flame', 'blaze'}
+
+
+def severity_for(confidence: float) -> str:
+    """Map a detection confidence to an alert severity."""
+    if confidence >= 0.8:
+        return "high"
+    elif confidence >= 0.6:
+        return "medium"
+    return "low"
+
+
+def decode_image(contents: bytes) -> Optional[np.ndarray]:
+    """Decode uploaded JPEG/PNG bytes into a BGR frame, or None."""
+    if not contents:
+        return None
+    return cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+
+
+# How annotated images are returned: inline base64 (default, for existing
+# clients), a short-lived URL, raw bytes in a multipart/mixed response, or
+# "none" for annotations only (no drawing or encoding; the client renders
+# the overlay on the frame it already has)
+IMAGE_MODES = {"base64", "url", "multipart", "none"}
+DEFAULT_IMAGE_MODE = os.getenv("IMAGE_RESPONSE_MODE", "base64")
+
+
+def negotiate_image_mode(image_mode: Optional[str], accept: Optional[str]) -> str:
+    """Pick the image response mode from the image_mode field, then the Accept header."""
+    if image_mode in IMAGE_MODES:
+        return image_mode
+    if accept and "multipart/mixed" in accept:
+        return "multipart"
+    return DEFAULT_IMAGE_MODE if DEFAULT_IMAGE_MODE in IMAGE_MODES else "base64"
+
+
+def image_response(payload: Dict[str, Any], images: Dict[str, np.ndarray], image_mode: str,
+                   image_format: Optional[str] = None, image_quality: Optional[int] = None):
+    """
+    Attach annotated images to a detection payload.
+    
+    base64 sets payload[key] to the encoded image, url sets payload[key + "_url"]
+    to a short-lived /images link, and multipart returns a multipart/mixed
+    response with the JSON payload followed by one binary part per image.
+    """
+    if image_mode == "none":
+        return payload
+    if image_mode == "url":
+        for key, image in images.items():
+            payload[f"{key}_url"] = f"/images/{image_cache.put(image, image_format, image_quality)}"
+        return payload
+    
+    encoded = {key: image_encoder.encode(image, image_format, image_quality) for key, image in images.items()}
+    if image_mode == "multipart":
+        body, content_type = build_multipart(jsonable_encoder(payload), encoded)
+        return Response(content=body, media_type=content_type)
+    
+    for key, (data, media_type) in encoded.items():
+        payload[key] = base64.b64encode(data).decode('utf-8')
+        payload["image_media_type"] = media_type
+    return payload
+
+
+def split_dual_detections(weapon_detections: List[Dict], fire_smoke_detections: List[Dict]):
+    """
+    Filter detections to only include relevant classes per model.
+    
+    This prevents cross-contamination (e.g., weapon model detecting "fire").
+    Classes outside both known sets stay under their original model, in case
+    models have custom class names we didn't list.
+    """
+    def kind(detection):
+        name = detection["class"].lower()
+        return "weapon" if name in WEAPON_CLASSES else "fire_smoke" if name in FIRE_SMOKE_CLASSES else None
+    
+    weapon = ([d for d in weapon_detections if kind(d) == "weapon"]
+              + [d for d in weapon_detections if kind(d) is None]
+              + [d for d in fire_smoke_detections if kind(d) == "weapon"])
+    fire_smoke = ([d for d in fire_smoke_detections if kind(d) == "fire_smoke"]
+                  + [d for d in fire_smoke_detections if kind(d) is None]
+                  + [d for d in weapon_detections if kind(d) == "fire_smoke"])
+    return weapon, fire_smoke
+
+
+def run_single_model(img: np.ndarray, camera_id: str, model_name: str,
+                     lane: str = "interactive", stream: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Motion gate + ROI inference with one YOLO model.
+    
+    The motion gate belongs to stream; one-off frames without a stream
+    always run inference. Returns a dict with detections, fresh (detections
+    that have not been saved yet) and motion_gate (None without a stream),
+    or error/details on failure.
+    """
+    model = model_manager.get_model(model_name)
+    if model is None:
+        return {"error": "Model not loaded"}
+    
+    # Skip inference when the stream's scene has not changed since the last run
+    gate = motion_gates.get(stream)
+    run_inference, gate_info = gate.check(img, key=model_name) if gate else (True, None)
+    
+    if run_inference:
+        inference_start = time.perf_counter()
+        with inference_scheduler.slot(lane):
+            detection_result = detection_service.detect_objects_in_regions(
+                model, img, roi_service.get_regions(camera_id)
+            )
+        if not detection_result["success"]:
+            logger.error(f"Detection failed: {detection_result.get('error')}")
+            return {"error": "Detection failed", "details": detection_result.get("error")}
+        if gate:
+            gate.record_result(detection_result, time.perf_counter() - inference_start)
+    else:
+        logger.info(f"Static scene on stream {stream}, reusing last result")
+        detection_result = gate.last_result()
+    
+    detections = detection_result["detections"]
+    return {
+        "detections": detections,
+        # Reused results were already saved
+        "fresh": detections if run_inference else [],
+        "motion_gate": gate_info,
+    }
+
+
+def run_dual_models(img: np.ndarray, camera_id: str, lane: str = "interactive",
+                    stream: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Motion gate + ROI inference with both YOLO models.
+    
+    The motion gate and the per-model cadence (carrying a model's last
+    result forward between runs) belong to a continuous stream: a /frames
+    connection or one tab's live HTTP feed. One-off uploads without a stream
+    always run both models.
+    
+    Returns a dict with weapon_detections, fire_smoke_detections, fresh,
+    models_run, model_ages and motion_gate (None without a stream), or
+    error/details on failure.
+    """
+    weapon_model = model_manager.get_model("weapon")
+    fire_smoke_model = model_manager.get_model("fire_smoke")
+    if weapon_model is None or fire_smoke_model is None:
+        logger.error(f"Weapon model loaded: {weapon_model is not None}, Fire/Smoke model loaded: {fire_smoke_model is not None}")
+        return {"error": "Both weapon and fire/smoke models must be loaded for dual detection"}
+    
+    gate = motion_gates.get(stream)
+    run_inference, gate_info = gate.check(img, key="both") if gate else (True, None)
+    
+    if run_inference:
+        inference_start = time.perf_counter()
+        with inference_scheduler.slot(lane):
+            results = detection_service.process_frame_with_dual_models(
+                weapon_model,
+                fire_smoke_model,
+                img,
+                regions=roi_service.get_regions(camera_id),
+                cadence=model_cadences.get(stream) if stream else None
+            )
+        if not results["success"]:
+            logger.error(f"Dual model detection failed: {results.get('error')}")
+            return {"error": "Detection failed", "details": results.get("error")}
+        if gate:
+            gate.record_result(results, time.perf_counter() - inference_start)
+    else:
+        logger.info(f"Static scene on stream {stream}, reusing last dual-model result")
+        results = gate.last_result()
+    
+    weapon_detections, fire_smoke_detections = split_dual_detections(
+        results["weapon_detections"], results["fire_smoke_detections"]
+    )
+    logger.info(f"Filtered - Weapon detections: {len(weapon_detections)}, Fire/Smoke detections: {len(fire_smoke_detections)}")
+    
+    # Reused and carried-forward results were already saved
+    all_detections = weapon_detections + fire_smoke_detections
+    return {
+        "weapon_detections": weapon_detections,
+        "fire_smoke_detections": fire_smoke_detections,
+        "fresh": [d for d in all_detections if not d.get("carried")] if run_inference else [],
+        "models_run": results.get("models_run", []) if run_inference else [],
+        "model_ages": results.get("model_ages", {}),
+        "motion_gate": gate_info,
+    }
+
+
+def run_fight_model(img: np.ndarray, force_predict: bool = False, annotate: bool = True,
+                    include_keypoints: bool = False, lane: str = "interactive",
+                    stream: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Pose + LSTM fight detection on one frame, extending the stream's pose
+    sequence (a fresh one for one-off frames without a stream).
+    """
+    with inference_scheduler.slot(lane):
+        return fight_detection_service.detect_fight(
+            img, force_predict=force_predict, annotate=annotate,
+            include_keypoints=include_keypoints, stream=stream
+        )
+
+
+def run_model_set(img: np.ndarray, camera_id: str, model_names: List[str], lane: str = "interactive",
+                  force_predict: bool = True, include_keypoints: bool = False,
+                  stream: Optional[str] = None, annotate_fight: bool = False) -> Dict[str, Any]:
+    """
+    Run any set of models on one frame.
+    
+    Weapon + fire/smoke go through the dual-model path (the motion gate and
+    per-model cadence of stream); fight runs on the pose
+    sequence of stream. One-off frames without a stream skip the gate and
+    get a fresh pose sequence. Returns detections, fresh, motion_gate and, when fight ran,
+    fight (the fight result) and fight_frame (the pose-annotated frame if
+    annotate_fight).
+    """
+    yolo_models = [name for name in model_names if name != "fight"]
+    outcome: Dict[str, Any] = {"detections": [], "fresh": [], "motion_gate": None}
+    if len(yolo_models) == 2:
+        dual = run_dual_models(img, camera_id, lane, stream)
+        if "error" in dual:
+            return dual
+        outcome["detections"] = dual["weapon_detections"] + dual["fire_smoke_detections"]
+        outcome["fresh"] = dual["fresh"]
+        outcome["motion_gate"] = dual["motion_gate"]
+    elif yolo_models:
+        single = run_single_model(img, camera_id, yolo_models[0], lane, stream)
+        if "error" in single:
+            return single
+        # Copies, since a reused motion-gate result must not gain the fight detection
+        outcome["detections"] = list(single["detections"])
+        outcome["fresh"] = list(single["fresh"])
+        outcome["motion_gate"] = single["motion_gate"]
+    
+    if "fight" in model_names:
+        fight_result = run_fight_model(img, force_predict, annotate_fight, include_keypoints, lane, stream)
+        if not fight_result["success"]:
+            return {"error": "Fight detection failed", "details": fight_result.get("error")}
+        outcome["fight_frame"] = fight_result.pop("annotated_frame", None)
+        outcome["fight"] = fight_result
+        if fight_result.get("is_fight", False):
+            detection = {"class": "fight", "confidence": fight_result["fight_probability"],
+                         "box": fight_result.get("box")}
+            outcome["detections"].append(detection)
+            outcome["fresh"] = outcome["fresh"] + [detection]
+    return outcome
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+async def admit_inference(
+    request: Request,
+    x_client_id: Optional[str] = Header(None),
+    x_deadline_ms: Optional[float] = Header(None)
+):
+    """Hold an admission slot for the request; clients may shorten the deadline with X-Deadline-Ms."""
+    client = x_client_id or (request.client.host if request.client else "unknown")
+    async with admission.slot(client, x_deadline_ms):
+        yield
+
+
+def live_stream_key(x_client_id: Optional[str], camera_id: str) -> Optional[str]:
+    """
+    Key for the frames one browser tab posts continuously over HTTP, or None.
+    
+    camera_id alone is a constant the frontend sends from every tab, so only
+    requests carrying the tab's X-Client-Id form a stream of their own (pose
+    sequence and clip ring).
+    """
+    return f"http:{x_client_id}:{camera_id}" if x_client_id else None
+
+
+async def save_detections(detections: List[Dict], clip_stream: Optional[str] = None):
+    """
+    Queue detections with alerts for writing, link them to an event clip of
+    clip_stream (a live stream's frame ring, if any) and broadcast them.
+    """
+    if not detections:
+        return
+    clip_url = clip_recorder.trigger(clip_stream) if clip_stream else None
+    for detection in detections:
+        confidence = detection["confidence"]
+        severity = severity_for(confidence)
+        
+        # Queue the detection and its alert; the writer persists them in batches
+        detection_id = await detection_writer.enqueue(
+            detection_type=detection["class"],
+            confidence=confidence,
+            severity=severity,
+            image_url=clip_url
+        )
+        
+        # Emit real-time alert via Socket.IO
+        await emit_alert(detection["class"], confidence, severity, detection_id)
+
+
+# ── Binary frame ingestion (/frames namespace) ───────────────
+class FrameNamespace(socketio.AsyncNamespace):
+    """
+    Live frames pushed as binary JPEG over Socket.IO.
+    
+    Clients emit "frame" with {"image": <jpeg bytes>, "seq", "model",
+    "camera_id"} and receive one compact "detections" event per processed
+    frame. Results are annotations only; "configure" with {"keypoints": true}
+    adds compact pose keypoints to fight results for client-side drawing,
+    and {"model": ...} sets the session's model (a name, "both" or a
+    comma-separated set) for frames that don't name one. Each connection has
+    its own fight pose sequence and at most one frame in flight; a frame that
+    arrives while the previous one is being analysed replaces any frame
+    already waiting, so a slow model drops stale frames instead of queueing
+    them.
+    """
+    
+    def __init__(self, namespace: str):
+        super().__init__(namespace)
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+    
+    async def on_connect(self, sid, environ, auth=None):
+        self.sessions[sid] = {"sid": sid, "pending": None, "busy": False, "processed": 0, "dropped": 0,
+                              "keypoints": False, "model": None}
+        logger.info(f"[Socket.IO] Frame client connected: {sid}")
+    
+    async def on_configure(self, sid, data):
+        session = self.sessions.get(sid)
+        if session is not None and isinstance(data, dict):
+            session["keypoints"] = bool(data.get("keypoints", session["keypoints"]))
+            session["model"] = data.get("model", session["model"])
+    
+    async def on_disconnect(self, sid, *args):
+        self.sessions.pop(sid, None)
+        fight_detection_service.drop_stream(sid)
+        model_cadences.drop(sid)
+        motion_gates.drop(sid)
+        logger.info(f"[Socket.IO] Frame client disconnected: {sid}")
+    
+    async def on_frame(self, sid, data):
+        session = self.sessions.get(sid)
+        if session is None or not isinstance(data, dict) or not data.get("image"):
+            return
+        self.frames_received += 1
+        
+        if session["pending"] is not None:
+            session["dropped"] += 1
+            self.frames_dropped += 1
+        session["pending"] = data
+        if session["busy"]:
+            return
+        
+        # This handler drains the connection until no newer frame is waiting
+        session["busy"] = True
+        try:
+            while session["pending"] is not None and sid in self.sessions:
+                frame, session["pending"] = session["pending"], None
+                try:
+                    async with admission.slot(sid):
+                        result = await self._process(frame, session)
+                except AdmissionRejected as e:
+                    # Tell the client to back off rather than queueing a stale frame
+                    session["dropped"] += 1
+                    self.frames_dropped += 1
+                    await self.emit("detections", {"seq": frame.get("seq"), "error": e.reason,
+                                                   "retry_after": e.retry_after}, to=sid)
+                    continue
+                session["processed"] += 1
+                self.frames_processed += 1
+                await self.emit("detections", result, to=sid)
+        finally:
+            session["busy"] = False
+    
+    async def _process(self, frame: Dict[str, Any], session: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        contents = bytes(frame["image"])
+        camera_id = str(frame.get("camera_id") or "live_feed")
+        model_name = frame.get("model") or session["model"] or model_manager.default_model
+        result = {"seq": frame.get("seq"), "model": model_name}
+        model_names = model_manager.resolve_models(model_name)
+        if not model_names:
+            return {**result, "error": f"Invalid model: {model_name}"}
+        
+        if len(contents) > 10 * 1024 * 1024:
+            return {**result, "error": "Frame too large"}
+        img = await asyncio.to_thread(decode_image, contents)
+        if img is None:
+            return {**result, "error": "Invalid frame"}
+        clip_recorder.push(session["sid"], contents)
+        
+        include_keypoints = bool(frame.get("keypoints", session["keypoints"]))
+        try:
+            outcome = await asyncio.to_thread(
+                run_model_set, img, camera_id, model_names, "live", False, include_keypoints, session["sid"]
+            )
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing streamed frame: {e}", exc_info=True)
+            return {**result, "error": str(e)}
+        if "error" in outcome:
+            return {**result, "error": outcome["error"]}
+        
+        detections = outcome["detections"]
+        fresh = outcome["fresh"]
+        if outcome["motion_gate"] is not None:
+            result["static"] = outcome["motion_gate"]["skipped"]
+        fight_result = outcome.get("fight")
+        if fight_result is not None:
+            box = fight_result.get("box")
+            if box:
+                result["pose"] = {"box": [box["x1"], box["y1"], box["x2"], box["y2"]]}
+                if include_keypoints:
+                    result["pose"]["keypoints"] = fight_result.get("keypoints")
+            result["fight_probability"] = round(fight_result.get("fight_probability", 0.0), 3)
+        
+        await save_detections(fresh, session["sid"])
+        
+        # [class, confidence, x1, y1, x2, y2] per detection
+        result["boxes"] = [
+            [d["class"], round(d["confidence"], 3)]
+            + ([d["box"]["x1"], d["box"]["y1"], d["box"]["x2"], d["box"]["y2"]] if d.get("box") else [])
+            for d in detections
+        ]
+        result["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.sessions),
+            "frames_received": self.frames_received,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+        }
+
+
+frame_namespace = FrameNamespace("/frames")
+sio.register_namespace(frame_namespace)
+
 # Load models on startup
 @app.on_event("startup")
 async def load_models():
+    # Start background clip encoder
+    clip_recorder.start()
+    
     # Load ML models
     result = model_manager.load_models()
     if not result.get("weapon_loaded") and not result.get("fire_smoke_loaded"):
         logger.error("No models loaded successfully")
     else:
         logger.info("Models loaded successfully")
-        global current_model
-        current_model = model_manager.current_model
     
     # Load fight detection model
     if fight_detection_service.load_model():
@@ -202,18 +690,39 @@ async def load_models():
     else:
         logger.warning("Failed to load fight detection model")
     
+    # Rows in partitions dropped by retention must leave the detection cache too
+    loop = asyncio.get_running_loop()
+    database_manager.on_partitions_dropped = lambda dropped: loop.call_soon_threadsafe(detection_cache.invalidate)
+    
     # Connect to database
     if database_manager.connect():
         logger.info("Database connected successfully")
     else:
         logger.error("Failed to connect to database")
+    
+    # Request handlers use the async pool; the synchronous one above serves
+    # schema setup and background threads
+    await async_database_manager.connect()
+    detection_writer.start()
+    await detection_cache.prime()
+    
+    # Start background jobs, persisted in PostgreSQL or a local file without it
+    job_service.start(database_manager if database_manager.db_connected else LocalJobStore())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    # Stop background jobs; unfinished ones resume on next start
+    job_service.stop()
+    
     # Clean up fight detection service
     fight_detection_service.cleanup()
     
-    # Disconnect from database
+    # Finish clips that are still collecting post-event frames
+    clip_recorder.stop()
+    
+    # Write queued detections, then disconnect from database
+    await detection_writer.stop()
+    await async_database_manager.disconnect()
     database_manager.disconnect()
 
 # Health check endpoint
@@ -228,26 +737,50 @@ async def root():
 async def get_models():
     return {
         "models": model_manager.get_available_models(),
-        "current_model": model_manager.current_model
+        "default_model": model_manager.default_model
     }
 
-# Switch between models
+# CPU thread budget applied to PyTorch/TensorFlow/OpenCV/MediaPipe
+@app.get("/system/threads")
+async def get_thread_budget():
+    return model_manager.thread_budget.describe()
+
+# Change the default model for requests that don't name one; requests that
+# do (the "model" form field or socket frame field) are unaffected
 @app.post("/models/switch")
 async def switch_model(model_name: str = Form(...)):
     if model_manager.switch_model(model_name):
-        return {"message": f"Switched to {model_name} model", "current_model": model_name}
+        return {"message": f"Default model set to {model_name}", "default_model": model_name}
     else:
         return {"error": "Invalid model name. Use 'weapon', 'fire_smoke', 'fight', or 'both'"}
 
 # Reset fight detection buffer
 @app.post("/fight/reset")
-async def reset_fight_buffer():
-    fight_detection_service.reset_buffer()
+async def reset_fight_buffer(camera_id: Optional[str] = Form(None), x_client_id: Optional[str] = Header(None)):
+    if x_client_id:
+        # Only this tab's pose sequences; other clients keep theirs
+        if camera_id:
+            fight_detection_service.reset_buffer(live_stream_key(x_client_id, camera_id))
+        else:
+            fight_detection_service.reset_buffer(prefix=live_stream_key(x_client_id, ""))
+    else:
+        fight_detection_service.reset_buffer(camera_id)
     return {"message": "Fight detection buffer reset successfully"}
 
 # Detect fight in video
 @app.post("/detect/fight")
-async def detect_fight(file: UploadFile = File(...)):
+async def detect_fight(
+    file: UploadFile = File(...),
+    camera_id: str = Form("default"),
+    image_mode: Optional[str] = Form(None),
+    image_format: Optional[str] = Form(None),
+    image_quality: Optional[int] = Form(None),
+    keypoints: bool = Form(False),
+    lane: str = Form("interactive"),
+    accept: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None),
+    _admission: None = Depends(admit_inference)
+):
     try:
         # Read video file with size limit
         contents = await file.read()
@@ -256,6 +789,11 @@ async def detect_fight(file: UploadFile = File(...)):
         if len(contents) > 10 * 1024 * 1024:
             return {"error": "File too large. Maximum size is 10MB."}
         
+        # Keep the encoded frame for pre-event clips of this tab's live feed
+        live_stream = live_stream_key(x_client_id, camera_id) if lane == "live" else None
+        if live_stream:
+            clip_recorder.push(live_stream, contents)
+        
         nparr = np.frombuffer(contents, np.uint8)
         frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
@@ -264,56 +802,46 @@ async def detect_fight(file: UploadFile = File(...)):
             return {"error": "Invalid video frame. Please upload a valid image file (JPEG, PNG, etc.)."}
         
         # Run fight detection with force_predict for single image uploads
-        fight_result = fight_detection_service.detect_fight(frame, force_predict=True)
+        image_mode = negotiate_image_mode(image_mode, accept)
+        fight_result = await asyncio.to_thread(
+            run_fight_model, frame, True, image_mode != "none", keypoints, lane, live_stream
+        )
         
         if not fight_result["success"]:
             return {"error": "Fight detection failed", "details": fight_result.get("error")}
         
         # Save fight detection to database
         if fight_result.get("is_fight", False):
-            detection_id = database_manager.save_detection(
-                detection_type="fight",
-                confidence=fight_result["fight_probability"]
-            )
-            
-            # Save alert if detection_id was successfully created
-            if detection_id:
-                # Determine severity based on confidence
-                confidence = fight_result["fight_probability"]
-                if confidence >= 0.8:
-                    severity = "high"
-                elif confidence >= 0.6:
-                    severity = "medium"
-                else:
-                    severity = "low"
-                
-                database_manager.save_alert(
-                    detection_id=detection_id,
-                    severity=severity
-                )
-                # Emit real-time alert via Socket.IO
-                await emit_alert("fight", confidence, severity, detection_id)
+            fight = {"class": "fight", "confidence": fight_result["fight_probability"]}
+            await save_detections([fight], live_stream)
         
-        # Encode annotated frame as base64 image
+        # Attach the annotated frame in the negotiated format
         annotated_frame = fight_result.pop("annotated_frame", None)
-        if annotated_frame is not None:
-            _, buffer = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            fight_result["image"] = base64.b64encode(buffer.tobytes()).decode('utf-8')
-        
-        return fight_result
+        images = {"image": annotated_frame} if annotated_frame is not None else {}
+        return image_response(fight_result, images, image_mode, image_format, image_quality)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error in fight detection: {e}")
         return {"error": "Fight detection failed", "details": str(e)}
 
 # Detect fight in video stream (sequence of frames)
 @app.post("/detect/fight/stream")
-async def detect_fight_stream(file: UploadFile = File(...)):
+async def detect_fight_stream(
+    file: UploadFile = File(...),
+    camera_id: str = Form("default"),
+    x_client_id: Optional[str] = Header(None),
+    _admission: None = Depends(admit_inference)
+):
     # For streaming detection, we'll process each frame individually
     # In a real implementation, you might want to handle this differently
     # This is a simplified version that processes a single frame
     
     # Read video file
     contents = await file.read()
+    live_stream = live_stream_key(x_client_id, camera_id)
+    if live_stream:
+        clip_recorder.push(live_stream, contents)
     nparr = np.frombuffer(contents, np.uint8)
     frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     
@@ -321,8 +849,8 @@ async def detect_fight_stream(file: UploadFile = File(...)):
     if frame is None:
         return {"error": "Invalid video frame. Please upload a valid image file (JPEG, PNG, etc.)."}
     
-    # Run fight detection
-    fight_result = fight_detection_service.detect_fight(frame)
+    # Run fight detection (annotations only; the annotated frame was never returned)
+    fight_result = await asyncio.to_thread(run_fight_model, frame, False, False, False, "live", live_stream)
     
     # For streaming, we might want to keep the buffer alive between calls
     # But for this API endpoint, we'll return the result directly
@@ -332,91 +860,37 @@ async def detect_fight_stream(file: UploadFile = File(...)):
     
     # Save fight detection to database (only if fight detected)
     if fight_result.get("is_fight", False):
-        detection_id = database_manager.save_detection(
-            detection_type="fight",
-            confidence=fight_result["fight_probability"]
-        )
-        
-        # Save alert if detection_id was successfully created
-        if detection_id:
-            # Determine severity based on confidence
-            confidence = fight_result["fight_probability"]
-            if confidence >= 0.8:
-                severity = "high"
-            elif confidence >= 0.6:
-                severity = "medium"
-            else:
-                severity = "low"
-            
-            database_manager.save_alert(
-                detection_id=detection_id,
-                severity=severity
-            )
-            # Emit real-time alert via Socket.IO
-            await emit_alert("fight", confidence, severity, detection_id)
+        fight = {"class": "fight", "confidence": fight_result["fight_probability"]}
+        await save_detections([fight], live_stream)
     
+    fight_result.pop("annotated_frame", None)
     return fight_result
 
-# Detect objects in an image
+# Detect objects in an image with the model, or set of models, the request names
 @app.post("/detect")
 async def detect_objects(
     file: UploadFile = File(...),
-    camera_id: str = Form("default")  # NEW: Optional camera ID
+    camera_id: str = Form("default"),  # NEW: Optional camera ID
+    model: Optional[str] = Form(None),
+    image_mode: Optional[str] = Form(None),
+    image_format: Optional[str] = Form(None),
+    image_quality: Optional[int] = Form(None),
+    keypoints: bool = Form(False),
+    lane: str = Form("interactive"),
+    accept: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None),
+    _admission: None = Depends(admit_inference)
 ):
-    global current_model
-    
-    logger.info(f"Detecting objects with current model: {model_manager.current_model}")
-    
-    # Handle fight model separately - it uses pose estimation, not YOLO
-    if model_manager.current_model == "fight":
-        logger.info("Redirecting to fight detection for fight model")
-        try:
-            contents = await file.read()
-            if len(contents) > 10 * 1024 * 1024:
-                return {"error": "File too large. Maximum size is 10MB."}
-            nparr = np.frombuffer(contents, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            if frame is None:
-                return {"error": "Invalid image file."}
-            fight_result = fight_detection_service.detect_fight(frame, force_predict=True)
-            if not fight_result["success"]:
-                return {"error": "Fight detection failed", "details": fight_result.get("error")}
-            # Convert fight result to standard detection format for consistency
-            detections = []
-            box = fight_result.get("box") or {"x1": 0, "y1": 0, "x2": frame.shape[1], "y2": frame.shape[0]}
-            if fight_result.get("is_fight", False):
-                detections.append({
-                    "class": "fight",
-                    "confidence": fight_result["fight_probability"],
-                    "box": box
-                })
-            # Encode annotated image (with pose + bounding box drawn)
-            annotated_frame = fight_result.get("annotated_frame")
-            img_to_encode = annotated_frame if annotated_frame is not None else frame
-            _, buffer = cv2.imencode('.jpg', img_to_encode, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            img_bytes = buffer.tobytes()
-            return {
-                "detections": detections,
-                "image": base64.b64encode(img_bytes).decode('utf-8'),
-                "model_used": "fight",
-                "fight_probability": fight_result.get("fight_probability", 0.0),
-                "no_fight_probability": fight_result.get("no_fight_probability", 1.0),
-                "is_fight": fight_result.get("is_fight", False),
-                "message": fight_result.get("message", "")
-            }
-        except Exception as e:
-            logger.error(f"Error in fight detection via /detect: {e}", exc_info=True)
-            return {"error": "Fight detection failed", "details": str(e)}
-    
-    # Select model based on current selection
-    model = model_manager.get_current_model()
-    if model is None:
-        # Handle "both" case - this endpoint is not meant for dual model processing
-        if model_manager.current_model == "both":
-            logger.warning("Attempted to use single model endpoint for 'both' mode")
-            return {"error": "Use /detect/both endpoint for dual model detection"}
-        logger.error("No model loaded for detection")
-        return {"error": "Model not loaded"}
+    model_used = model or model_manager.default_model
+    model_names = model_manager.resolve_models(model_used)
+    logger.info(f"Detecting objects with model(s): {model_names}")
+    if not model_names:
+        return {"error": "Invalid model name. Use 'weapon', 'fire_smoke', 'fight', 'both' or a comma-separated set"}
+    missing = [name for name in model_names if name != "fight" and model_manager.get_model(name) is None]
+    if missing:
+        logger.error(f"Model not loaded for detection: {missing}")
+        return {"error": f"Model not loaded: {', '.join(missing)}"}
+    image_mode = negotiate_image_mode(image_mode, accept)
     
     try:
         # Read image file with size limit
@@ -433,8 +907,12 @@ async def detect_objects(
             logger.error("Empty file received")
             return {"error": "Empty file received"}
         
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Keep the encoded frame for pre-event clips of this tab's live feed
+        live_stream = live_stream_key(x_client_id, camera_id) if lane == "live" else None
+        if live_stream:
+            clip_recorder.push(live_stream, contents)
+        
+        img = decode_image(contents)
         
         # Check if image was decoded successfully
         if img is None:
@@ -443,57 +921,51 @@ async def detect_objects(
         
         logger.info(f"Decoded image shape: {img.shape}")
         
-        # Run object detection using detection service with optimized settings
-        detection_result = detection_service.detect_objects(model, img)
-        
-        if not detection_result["success"]:
-            logger.error(f"Detection failed: {detection_result.get('error')}")
-            return {"error": "Detection failed", "details": detection_result.get("error")}
+        # Run the selected models off the event loop; fight predicts even on a short sequence
+        outcome = await asyncio.to_thread(
+            run_model_set, img, camera_id, model_names, lane, True, keypoints, live_stream, image_mode != "none"
+        )
+        if "error" in outcome:
+            return outcome
         
-        detections = detection_result["detections"]
+        detections = outcome["detections"]
         logger.info(f"Found {len(detections)} detections")
         
-        # Draw bounding boxes using detection service
-        processed_img = detection_service.draw_detections(img, detections)
-        logger.info(f"Processed image shape: {processed_img.shape}")
-        
-        # Save detections to database
-        for detection in detections:
-            # Determine severity based on confidence
-            confidence = detection["confidence"]
-            if confidence >= 0.8:
-                severity = "high"
-            elif confidence >= 0.6:
-                severity = "medium"
+        # Draw bounding boxes using detection service (skipped for annotations only);
+        # the fight box is already on the pose-annotated frame
+        images = {}
+        if image_mode != "none":
+            base = outcome.get("fight_frame")
+            if base is None:
+                images["image"] = detection_service.draw_detections(img, detections)
             else:
-                severity = "low"
-            
-            # Save detection to database
-            detection_id = database_manager.save_detection(
-                detection_type=detection["class"],
-                confidence=confidence
-            )
-            
-            # Save alert if detection_id was successfully created
-            if detection_id:
-                database_manager.save_alert(
-                    detection_id=detection_id,
-                    severity=severity
+                images["image"] = detection_service.draw_detections(
+                    base, [d for d in detections if d["class"] != "fight"]
                 )
-                # Emit real-time alert via Socket.IO
-                await emit_alert(detection["class"], confidence, severity, detection_id)
-        
-        # Convert image back to bytes with compression
-        _, buffer = cv2.imencode('.jpg', processed_img, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        img_bytes = buffer.tobytes()
         
-        logger.info(f"Encoded image size: {len(img_bytes)} bytes")
+        # Save detections to database
+        await save_detections(outcome["fresh"], live_stream)
         
-        return {
+        payload = {
             "detections": detections,
-            "image": base64.b64encode(img_bytes).decode('utf-8'),
-            "model_used": model_manager.current_model
+            "model_used": model_used,
+            "models_used": model_names,
+            "motion_gate": outcome["motion_gate"]
         }
+        fight_result = outcome.get("fight")
+        if fight_result is not None:
+            payload.update({
+                "fight_probability": fight_result.get("fight_probability", 0.0),
+                "no_fight_probability": fight_result.get("no_fight_probability", 1.0),
+                "is_fight": fight_result.get("is_fight", False),
+                "message": fight_result.get("message", ""),
+                "box": fight_result.get("box")
+            })
+            if keypoints:
+                payload["keypoints"] = fight_result.get("keypoints")
+        return image_response(payload, images, image_mode, image_format, image_quality)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error in object detection: {e}", exc_info=True)
         return {"error": "Detection failed", "details": str(e)}
@@ -502,7 +974,14 @@ async def detect_objects(
 @app.post("/detect/both")
 async def detect_both_models(
     file: UploadFile = File(...),
-    camera_id: str = Form("default")  # NEW: Optional camera ID
+    camera_id: str = Form("default"),  # NEW: Optional camera ID
+    image_mode: Optional[str] = Form(None),
+    image_format: Optional[str] = Form(None),
+    image_quality: Optional[int] = Form(None),
+    lane: str = Form("interactive"),
+    accept: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None),
+    _admission: None = Depends(admit_inference)
 ):
     logger.info("Detecting with both models")
     
@@ -510,14 +989,6 @@ async def detect_both_models(
         logger.error("No models loaded")
         return {"error": "One or both models not loaded"}
     
-    # Check specifically for both models
-    weapon_model = model_manager.get_model("weapon")
-    fire_smoke_model = model_manager.get_model("fire_smoke")
-    
-    if weapon_model is None or fire_smoke_model is None:
-        logger.error(f"Weapon model loaded: {weapon_model is not None}, Fire/Smoke model loaded: {fire_smoke_model is not None}")
-        return {"error": "Both weapon and fire/smoke models must be loaded for dual detection"}
-    
     try:
         # Read image file with size limit
         contents = await file.read()
@@ -533,8 +1004,12 @@ async def detect_both_models(
             logger.error("Empty file received for dual model detection")
             return {"error": "Empty file received"}
         
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Keep the encoded frame for pre-event clips of this tab's live feed
+        live_stream = live_stream_key(x_client_id, camera_id) if lane == "live" else None
+        if live_stream:
+            clip_recorder.push(live_stream, contents)
+        
+        img = decode_image(contents)
         
         # Check if image was decoded successfully
         if img is None:
@@ -543,126 +1018,551 @@ async def detect_both_models(
         
         logger.info(f"Decoded image shape: {img.shape}")
         
-        # Use the detection service to process with both models
-        results = detection_service.process_frame_with_dual_models(
-            weapon_model, 
-            fire_smoke_model, 
-            img
-        )
-        
-        if not results["success"]:
-            logger.error(f"Dual model detection failed: {results.get('error')}")
-            return {"error": "Detection failed", "details": results.get("error")}
-        
-        weapon_detections = results["weapon_detections"]
-        fire_smoke_detections = results["fire_smoke_detections"]
-        
-        # Filter detections to only include relevant classes per model
-        # This prevents cross-contamination (e.g., weapon model detecting "fire")
-        WEAPON_CLASSES = {'weapon', 'gun', 'knife', 'pistol', 'rifle', 'handgun', 'sword', 'bomb', 'grenade', 'firearm'}
-        FIRE_SMOKE_CLASSES = {'fire', 'smoke', 'flame', 'blaze'}
-        
-        # Filter weapon detections: keep only weapon-related classes
-        filtered_weapon = [d for d in weapon_detections if d["class"].lower() in WEAPON_CLASSES]
-        # Filter fire/smoke detections: keep only fire/smoke-related classes
-        filtered_fire_smoke = [d for d in fire_smoke_detections if d["class"].lower() in FIRE_SMOKE_CLASSES]
-        
-        # If a model has classes not in either known set, keep them under their original model
-        # (in case models have custom class names we didn't list)
-        unknown_weapon = [d for d in weapon_detections if d["class"].lower() not in WEAPON_CLASSES and d["class"].lower() not in FIRE_SMOKE_CLASSES]
-        unknown_fire_smoke = [d for d in fire_smoke_detections if d["class"].lower() not in FIRE_SMOKE_CLASSES and d["class"].lower() not in WEAPON_CLASSES]
-        
-        # Also move any fire/smoke detections from weapon model to fire_smoke list
-        misplaced_fire = [d for d in weapon_detections if d["class"].lower() in FIRE_SMOKE_CLASSES]
-        # And any weapon detections from fire_smoke model to weapon list
-        misplaced_weapon = [d for d in fire_smoke_detections if d["class"].lower() in WEAPON_CLASSES]
+        # Use both models off the event loop
+        outcome = await asyncio.to_thread(run_dual_models, img, camera_id, lane, live_stream)
+        if "error" in outcome:
+            return outcome
         
-        weapon_detections = filtered_weapon + unknown_weapon + misplaced_weapon
-        fire_smoke_detections = filtered_fire_smoke + unknown_fire_smoke + misplaced_fire
+        weapon_detections = outcome["weapon_detections"]
+        fire_smoke_detections = outcome["fire_smoke_detections"]
+        image_mode = negotiate_image_mode(image_mode, accept)
         
-        logger.info(f"Filtered - Weapon detections: {len(weapon_detections)}, Fire/Smoke detections: {len(fire_smoke_detections)}")
-        
-        # Draw weapon detections (red)
-        img_weapon = detection_service.draw_detections(
-            img, 
-            weapon_detections, 
-            (0, 0, 255)  # Red
-        )
-        
-        # Draw fire/smoke detections (blue)
-        img_fire_smoke = detection_service.draw_detections(
-            img, 
-            fire_smoke_detections, 
-            (255, 0, 0)  # Blue
-        )
-        
-        # Save detections to database
-        all_detections = weapon_detections + fire_smoke_detections
-        for detection in all_detections:
-            # Determine severity based on confidence
-            confidence = detection["confidence"]
-            if confidence >= 0.8:
-                severity = "high"
-            elif confidence >= 0.6:
-                severity = "medium"
-            else:
-                severity = "low"
-            
-            # Save detection to database
-            detection_id = database_manager.save_detection(
-                detection_type=detection["class"],
-                confidence=confidence
+        images = {}
+        if image_mode != "none":
+            # Draw weapon detections (red)
+            images["weapon_image"] = detection_service.draw_detections(
+                img, 
+                weapon_detections, 
+                (0, 0, 255)  # Red
             )
             
-            # Save alert if detection_id was successfully created
-            if detection_id:
-                database_manager.save_alert(
-                    detection_id=detection_id,
-                    severity=severity
-                )
-                # Emit real-time alert via Socket.IO
-                await emit_alert(detection["class"], confidence, severity, detection_id)
-        
-        # Convert images back to bytes with compression
-        _, buffer_weapon = cv2.imencode('.jpg', img_weapon, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        img_bytes_weapon = buffer_weapon.tobytes()
-        
-        _, buffer_fire_smoke = cv2.imencode('.jpg', img_fire_smoke, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        img_bytes_fire_smoke = buffer_fire_smoke.tobytes()
+            # Draw fire/smoke detections (blue)
+            images["fire_smoke_image"] = detection_service.draw_detections(
+                img, 
+                fire_smoke_detections, 
+                (255, 0, 0)  # Blue
+            )
         
-        logger.info(f"Encoded weapon image size: {len(img_bytes_weapon)} bytes")
-        logger.info(f"Encoded fire/smoke image size: {len(img_bytes_fire_smoke)} bytes")
+        # Save detections to database
+        await save_detections(outcome["fresh"], live_stream)
         
-        return {
+        return image_response({
             "weapon_detections": weapon_detections,
             "fire_smoke_detections": fire_smoke_detections,
-            "weapon_image": base64.b64encode(img_bytes_weapon).decode('utf-8'),
-            "fire_smoke_image": base64.b64encode(img_bytes_fire_smoke).decode('utf-8')
-        }
+            "models_run": outcome["models_run"],
+            "model_ages": outcome["model_ages"],
+            "motion_gate": outcome["motion_gate"]
+        }, images, image_mode, image_format, image_quality)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error in dual model detection: {e}", exc_info=True)
         return {"error": "Detection failed", "details": str(e)}
 
+# ── Batch detection ──────────────────────────────────────────
+# Images are decoded one at a time into a bounded queue and grouped into
+# batched YOLO calls, so memory stays flat however many images are sent.
+BATCH_SIZE = int(os.getenv("BATCH_INFERENCE_SIZE", "8"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", str(BATCH_SIZE * 2)))
+# Images per bulk-lane model slot; bounds how long a live frame waits behind a batch
+BULK_SLICE_SIZE = int(os.getenv("INFERENCE_BULK_SLICE", "4"))
+BATCH_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+async def iter_batch_uploads(files: Optional[List[UploadFile]], archive: Optional[UploadFile]):
+    """Yield (filename, bytes) one image at a time from uploaded files and a zip archive."""
+    for upload in files or []:
+        contents = await upload.read()
+        await upload.close()
+        yield upload.filename, contents
+    
+    if archive is not None:
+        # The archive is spooled to disk by the form parser; entries are read lazily
+        zf = await asyncio.to_thread(zipfile.ZipFile, archive.file)
+        try:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(BATCH_IMAGE_EXTENSIONS):
+                    continue
+                if info.file_size > MAX_IMAGE_BYTES:
+                    yield info.filename, None
+                    continue
+                yield info.filename, await asyncio.to_thread(zf.read, info)
+        finally:
+            zf.close()
+
+
+def batch_model_results(model_name: str, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+    """One model over a batch in the bulk lane, a slice at a time so live frames can run in between."""
+    model = model_manager.get_model(model_name)
+    results = []
+    for start in range(0, len(images), BULK_SLICE_SIZE):
+        with inference_scheduler.slot("bulk"):
+            results.extend(detection_service.detect_objects_batch(model, images[start:start + BULK_SLICE_SIZE]))
+    return results
+
+
+def run_batch_inference(model_name: str, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+    """Batched inference with one model or both; one result per image."""
+    if model_name == "both":
+        weapon_results = batch_model_results("weapon", images)
+        fire_smoke_results = batch_model_results("fire_smoke", images)
+        results = []
+        for weapon, fire_smoke in zip(weapon_results, fire_smoke_results):
+            if not weapon["success"] or not fire_smoke["success"]:
+                results.append({"error": weapon.get("error") or fire_smoke.get("error")})
+                continue
+            weapon_detections, fire_smoke_detections = split_dual_detections(
+                weapon["detections"], fire_smoke["detections"]
+            )
+            results.append({
+                "weapon_detections": weapon_detections,
+                "fire_smoke_detections": fire_smoke_detections
+            })
+        return results
+    
+    return [
+        {"detections": r["detections"]} if r["success"] else {"error": r.get("error")}
+        for r in batch_model_results(model_name, images)
+    ]
+
+
+# Detect objects in many stills, streaming one NDJSON line per image
+@app.post("/detect/batch")
+async def detect_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    model: str = Form("weapon"),
+    save: bool = Form(False),
+    camera_id: str = Form("batch")
+):
+    if model not in ("weapon", "fire_smoke", "both"):
+        return {"error": "Invalid model name. Use 'weapon', 'fire_smoke' or 'both' for batch detection"}
+    required = ["weapon", "fire_smoke"] if model == "both" else [model]
+    if any(model_manager.get_model(name) is None for name in required):
+        return {"error": f"Model not loaded: {model}"}
+    if not files and archive is None:
+        return {"error": "No images uploaded. Send 'files' or a zip 'archive'."}
+    
+    async def decode_stage(queue: asyncio.Queue):
+        index = 0
+        try:
+            async for filename, contents in iter_batch_uploads(files, archive):
+                if contents is None or len(contents) > MAX_IMAGE_BYTES:
+                    item = (index, filename, None, "File too large. Maximum size is 10MB.")
+                else:
+                    img = await asyncio.to_thread(decode_image, contents)
+                    item = (index, filename, img, None if img is not None else "Invalid image file")
+                await queue.put(item)
+                index += 1
+        except Exception as e:
+            logger.error(f"Error reading batch upload: {e}", exc_info=True)
+            await queue.put((index, None, None, f"Failed to read upload: {e}"))
+        finally:
+            await queue.put(None)
+    
+    async def generate():
+        queue: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+        producer = asyncio.create_task(decode_stage(queue))
+        start = time.perf_counter()
+        images = errors = detections_found = 0
+        finished = False
+        try:
+            while not finished:
+                item = await queue.get()
+                if item is None:
+                    break
+                # Take whatever is already decoded, up to one batch, without waiting
+                batch = [item]
+                while len(batch) < BATCH_SIZE and not queue.empty():
+                    item = queue.get_nowait()
+                    if item is None:
+                        finished = True
+                        break
+                    batch.append(item)
+                
+                decoded = [entry for entry in batch if entry[2] is not None]
+                results = await asyncio.to_thread(run_batch_inference, model, [entry[2] for entry in decoded])
+                by_index = {entry[0]: result for entry, result in zip(decoded, results)}
+                
+                for index, filename, _, error in batch:
+                    line = {"index": index, "filename": filename}
+                    result = by_index.get(index, {"error": error})
+                    line.update(result)
+                    images += 1
+                    if "error" in result:
+                        errors += 1
+                    else:
+                        found = result.get("detections", []) + result.get("weapon_detections", []) \
+                            + result.get("fire_smoke_detections", [])
+                        detections_found += len(found)
+                        if save:
+                            await save_detections(found)
+                    yield json.dumps(line) + "\n"
+            
+            elapsed = time.perf_counter() - start
+            yield json.dumps({
+                "done": True,
+                "images": images,
+                "errors": errors,
+                "detections": detections_found,
+                "seconds": round(elapsed, 2),
+                "images_per_second": round(images / elapsed, 2) if elapsed else 0.0
+            }) + "\n"
+        finally:
+            producer.cancel()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# ── Offline video analysis ───────────────────────────────────
+VIDEO_MAX_UPLOAD_BYTES = int(os.getenv("VIDEO_MAX_UPLOAD_MB", "500")) * 1024 * 1024
+
+
+def copy_upload_to_temp(upload: UploadFile, max_bytes: int, directory: Optional[str] = None) -> Optional[str]:
+    """Copy an upload to a temporary file in 1MB pieces; None if it exceeds max_bytes."""
+    suffix = os.path.splitext(upload.filename or "")[1] or ".mp4"
+    written = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as tmp:
+        while True:
+            piece = upload.file.read(1024 * 1024)
+            if not piece:
+                break
+            written += len(piece)
+            if written > max_bytes:
+                tmp.close()
+                os.remove(tmp.name)
+                return None
+            tmp.write(piece)
+    return tmp.name
+
+
+# Analyse a recorded video in parallel chunks and return an event timeline
+@app.post("/analyze/video")
+async def analyze_video(
+    file: UploadFile = File(...),
+    models: str = Form("weapon,fire_smoke,fight"),
+    sample_fps: Optional[float] = Form(None),
+    workers: Optional[int] = Form(None)
+):
+    path = await asyncio.to_thread(copy_upload_to_temp, file, VIDEO_MAX_UPLOAD_BYTES)
+    if path is None:
+        return {"error": f"File too large. Maximum size is {VIDEO_MAX_UPLOAD_BYTES // (1024 * 1024)}MB."}
+    try:
+        return await asyncio.to_thread(
+            video_analysis_service.analyze,
+            path,
+            [m.strip() for m in models.split(",") if m.strip()],
+            sample_fps,
+            workers
+        )
+    except Exception as e:
+        logger.error(f"Error in video analysis: {e}", exc_info=True)
+        return {"error": "Video analysis failed", "details": str(e)}
+    finally:
+        os.remove(path)
+
+# ── Background analysis jobs ─────────────────────────────────
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", "job_uploads")
+os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+
+
+def video_analysis_job(ctx) -> Dict[str, Any]:
+    params = ctx.params
+    result = video_analysis_service.analyze(
+        params["input_path"],
+        params["models"],
+        params.get("sample_fps"),
+        params.get("workers"),
+        progress=ctx.progress,
+        cancel_event=ctx.cancel_event
+    )
+    ctx.items = result.get("frames_sampled", 0)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+def batch_detection_job(ctx) -> Dict[str, Any]:
+    model_name = ctx.params["model"]
+    results = []
+    with zipfile.ZipFile(ctx.params["input_path"]) as zf:
+        entries = [
+            info for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(BATCH_IMAGE_EXTENSIONS)
+        ]
+        for start in range(0, len(entries), BATCH_SIZE):
+            if ctx.cancelled:
+                break
+            group = entries[start:start + BATCH_SIZE]
+            decoded = []
+            for info in group:
+                img = decode_image(zf.read(info)) if info.file_size <= MAX_IMAGE_BYTES else None
+                if img is None:
+                    results.append({"filename": info.filename, "error": "Invalid or oversized image file"})
+                else:
+                    decoded.append((info.filename, img))
+            batch_results = run_batch_inference(model_name, [img for _, img in decoded])
+            for (filename, _), result in zip(decoded, batch_results):
+                results.append({"filename": filename, **result})
+            ctx.items += len(group)
+            ctx.progress((start + len(group)) / len(entries))
+    return {"model": model_name, "images": len(results), "results": results}
+
+
+job_service.register("video", video_analysis_job)
+job_service.register("batch", batch_detection_job)
+
+
+def submit_job(job_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    job = job_service.submit(job_type, params)
+    if job is None:
+        os.remove(params["input_path"])
+        raise HTTPException(status_code=429, detail="Job queue is full, try again later")
+    return job
+
+
+# Queue a video analysis; poll /jobs/{job_id} for progress
+@app.post("/jobs/video", status_code=202)
+async def submit_video_job(
+    file: UploadFile = File(...),
+    models: str = Form("weapon,fire_smoke,fight"),
+    sample_fps: Optional[float] = Form(None),
+    workers: Optional[int] = Form(None)
+):
+    path = await asyncio.to_thread(copy_upload_to_temp, file, VIDEO_MAX_UPLOAD_BYTES, JOB_UPLOAD_DIR)
+    if path is None:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {VIDEO_MAX_UPLOAD_BYTES // (1024 * 1024)}MB.")
+    return submit_job("video", {
+        "input_path": path,
+        "filename": file.filename,
+        "models": [m.strip() for m in models.split(",") if m.strip()],
+        "sample_fps": sample_fps,
+        "workers": workers
+    })
+
+
+# Queue detection over a zip of images; results are kept with the job
+@app.post("/jobs/batch", status_code=202)
+async def submit_batch_job(
+    archive: UploadFile = File(...),
+    model: str = Form("weapon")
+):
+    if model not in ("weapon", "fire_smoke", "both"):
+        raise HTTPException(status_code=400, detail="Invalid model name. Use 'weapon', 'fire_smoke' or 'both'")
+    path = await asyncio.to_thread(copy_upload_to_temp, archive, VIDEO_MAX_UPLOAD_BYTES, JOB_UPLOAD_DIR)
+    if path is None:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {VIDEO_MAX_UPLOAD_BYTES // (1024 * 1024)}MB.")
+    if not zipfile.is_zipfile(path):
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Archive is not a zip file")
+    return submit_job("batch", {"input_path": path, "filename": archive.filename, "model": model})
+
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50, status: Optional[str] = None):
+    return await asyncio.to_thread(job_service.list, limit, status)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_service.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result", None)
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await asyncio.to_thread(job_service.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ("completed", "cancelled") or job.get("result") is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, no result available")
+    return job["result"]
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await asyncio.to_thread(job_service.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result", None)
+    return job
+
+# ── Camera inference regions ─────────────────────────────────
+
+@app.get("/cameras/{camera_id}/regions")
+async def get_camera_regions(camera_id: int):
+    return {"regions": await async_database_manager.get_camera_regions(camera_id)}
+
+@app.post("/cameras/{camera_id}/regions")
+async def create_camera_region(camera_id: int, req: RegionRequest):
+    error = validate_polygon(req.polygon)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    region = await async_database_manager.save_camera_region(camera_id, req.name, req.polygon, req.enabled)
+    if not region:
+        raise HTTPException(status_code=500, detail="Failed to save region")
+    roi_service.invalidate(str(camera_id))
+    return {"region": region}
+
+@app.delete("/cameras/{camera_id}/regions/{region_id}")
+async def delete_camera_region(camera_id: int, region_id: int):
+    if not await async_database_manager.delete_camera_region(camera_id, region_id):
+        raise HTTPException(status_code=404, detail="Region not found")
+    roi_service.invalidate(str(camera_id))
+    return {"message": f"Region {region_id} deleted"}
+
+# Clip recorder ring memory and encoder throughput
+@app.get("/recorder/stats")
+async def get_recorder_stats():
+    return clip_recorder.get_stats()
+
+# Motion gate decisions and CPU saved per stream
+@app.get("/motion/stats")
+async def get_motion_stats():
+    return {"streams": list(motion_gates.get_stats().values())}
+
+# Per-model analysis rates and carry-forward counts per live stream in "both" mode
+@app.get("/cadence/stats")
+async def get_cadence_stats():
+    return {"streams": list(model_cadences.get_stats().values())}
+
+# Per-lane queue depth, waits and deadline misses in the inference scheduler
+@app.get("/scheduler/stats")
+async def get_scheduler_stats():
+    return inference_scheduler.get_stats()
+
+# Database pool sizes, checkout wait times and utilisation, and write-behind progress
+@app.get("/database/stats")
+async def get_database_stats():
+    return {
+        "async": async_database_manager.get_pool_stats(),
+        "sync": database_manager.get_pool_stats(),
+        "writer": detection_writer.get_stats(),
+        "cache": detection_cache.get_stats(),
+    }
+
+# Inference slots in use, queue depth and rejections
+@app.get("/admission/stats")
+async def get_admission_stats():
+    return admission.get_stats()
+
+# Frames received, processed and dropped on the /frames Socket.IO namespace
+@app.get("/frames/stats")
+async def get_frame_stats():
+    return frame_namespace.get_stats()
+
+# Annotated-image cache usage
+@app.get("/images/stats")
+async def get_image_cache_stats():
+    return image_cache.get_stats()
+
+# Pre/post-event clips recorded around live detections
+@app.get(f"{clip_recorder.url_prefix}/{{filename}}")
+async def get_clip(filename: str, current_user: dict = Depends(get_current_user)):
+    """Pre/post-event clip referenced by a detection's image_url; signed-in users only."""
+    path = clip_recorder.clip_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return FileResponse(path, media_type="video/x-msvideo", headers={"Cache-Control": "private, max-age=3600"})
+
+# Short-lived annotated images returned by image_mode=url
+@app.get("/images/{token}")
+async def get_cached_image(token: str):
+    cached = await asyncio.to_thread(image_cache.get, token)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Image expired or not found")
+    data, media_type = cached
+    return Response(content=data, media_type=media_type, headers={"Cache-Control": "private, max-age=60"})
+
+def cached_response(request: Request, body: Dict[str, Any]) -> Response:
+    """JSON response carrying the detection cache ETag, or 304 if the client already has it."""
+    etag = detection_cache.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else {}
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        detection_cache.note_not_modified()
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(body), headers=headers)
+
+
 # Get recent detections
 @app.get("/detections")
-async def get_recent_detections(limit: int = 50):
-    detections = database_manager.get_recent_detections(limit)
-    return {"detections": detections}
-
-# Get detection by ID
+async def get_recent_detections(request: Request, limit: int = 50, cursor: Optional[str] = None,
+                                type: Optional[str] = None, camera_id: Optional[int] = None,
+                                min_confidence: Optional[float] = None, max_confidence: Optional[float] = None,
+                                severity: Optional[str] = None, is_read: Optional[bool] = None,
+                                since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Detections newest first. Pass the returned "next" as cursor, with the
+    same filters, to get the following page; "next" is null on the last page.
+    type and severity take comma-separated lists (severity: high, medium, low).
+    The unfiltered first page is served from the detection cache with an ETag.
+    """
+    limit = max(1, min(limit, 1000))
+    filtered = any(value is not None for value in (cursor, type, camera_id, min_confidence, max_confidence,
+                                                   severity, is_read, since, until))
+    if not filtered:
+        if detection_cache.etag and etag_matches(request.headers.get("if-none-match"), detection_cache.etag):
+            return cached_response(request, {})
+        detections = await detection_cache.recent(limit + 1)
+        if detections is not None:
+            # Only rows the cache holds are known; past them the client follows "next" to the database
+            page = detections[:limit]
+            next_cursor = None
+            if len(detections) > limit:
+                last = page[-1]
+                next_cursor = encode_cursor(datetime.fromisoformat(last["timestamp"]), last["detection_id"])
+            return cached_response(request, {"detections": page, "next": next_cursor})
+    try:
+        return await async_database_manager.get_detections_page(
+            limit, cursor,
+            types=[t for t in type.split(",") if t] if type else None,
+            camera_id=camera_id,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence,
+            severities=[s for s in severity.split(",") if s] if severity else None,
+            is_read=is_read,
+            since=since,
+            until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Count unread detections (declared before /detections/{detection_id})
+@app.get("/detections/unread-count")
+async def get_unread_count(request: Request):
+    unread = await detection_cache.unread_count()
+    if unread is None:
+        return {"unread": await async_database_manager.count_unread_detections()}
+    return cached_response(request, {"unread": unread})
+
+# Several detections with their cameras and alerts (declared before /detections/{detection_id})
+@app.get("/detections/details")
+async def get_detection_details(ids: str):
+    """ids: comma-separated detection IDs, at most 200; results keep their order."""
+    try:
+        detection_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(detection_ids) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 ids per request")
+    return {"details": await async_database_manager.get_detection_details(detection_ids)}
+
+# Get detection by ID, with its camera and alerts
 @app.get("/detections/{detection_id}")
 async def get_detection(detection_id: int):
-    detection = database_manager.get_detection_by_id(detection_id)
-    if detection:
-        alerts = database_manager.get_alerts_for_detection(detection_id)
-        return {"detection": detection, "alerts": alerts}
+    detail = await async_database_manager.get_detection_detail(detection_id)
+    if detail:
+        return detail
     else:
         return {"error": "Detection not found"}
 
 # Mark a single detection as read
 @app.patch("/detections/{detection_id}/read")
 async def mark_detection_read(detection_id: int):
-    success = database_manager.mark_detection_read(detection_id)
+    success = await detection_cache.mark_read(detection_id)
     if success:
         return {"message": f"Detection {detection_id} marked as read"}
     else:
@@ -671,12 +1571,54 @@ async def mark_detection_read(detection_id: int):
 # Mark all detections as read
 @app.patch("/detections/read-all")
 async def mark_all_detections_read():
-    success = database_manager.mark_all_detections_read()
+    success = await detection_cache.mark_all_read()
     if success:
         return {"message": "All detections marked as read"}
     else:
         return {"error": "Failed to mark all detections as read"}
 
+# ── Analytics endpoints ──────────────────────────────────────
+
+def analytics_window(since: Optional[datetime], until: Optional[datetime], days: int = 7):
+    """Default an analytics time window to the last `days` days, in server local time."""
+    def local(value):
+        return value.astimezone().replace(tzinfo=None) if value and value.tzinfo else value
+    until = local(until) or datetime.now()
+    return local(since) or until - timedelta(days=days), until
+
+
+@app.get("/analytics/summary")
+async def get_analytics_summary(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                camera_id: Optional[int] = None):
+    """Detection totals by type, severity, camera and hour of day; defaults to the last 7 days."""
+    since, until = analytics_window(since, until)
+    return await async_database_manager.get_analytics_summary(since, until, camera_id)
+
+
+@app.get("/analytics/timeseries")
+async def get_analytics_timeseries(bucket: Optional[str] = None, since: Optional[datetime] = None,
+                                   until: Optional[datetime] = None, type: Optional[str] = None,
+                                   camera_id: Optional[int] = None):
+    """
+    Detection counts per time bucket (hour, day, week or month). Without a
+    bucket, one is picked from the window length. Windows of more than 400
+    buckets are refused.
+    """
+    since, until = analytics_window(since, until)
+    if bucket is None:
+        span = until - since
+        bucket = ("hour" if span <= timedelta(days=2) else "day" if span <= timedelta(days=90)
+                  else "week" if span <= timedelta(days=730) else "month")
+    try:
+        points = await async_database_manager.get_detection_timeseries(
+            bucket, since, until,
+            types=[t for t in type.split(",") if t] if type else None,
+            camera_id=camera_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bucket": bucket, "points": points}
+
 # ── Auth endpoints ───────────────────────────────────────────
 
 @app.post("/api/auth/signup")
@@ -700,7 +1642,7 @@ async def signup(req: SignUpRequest):
             raise HTTPException(status_code=400, detail="Full name is required")
 
         # Check if user already exists
-        existing = database_manager.get_user_by_email(req.email.lower().strip())
+        existing = await async_database_manager.get_user_by_email(req.email.lower().strip())
         if existing:
             raise HTTPException(status_code=409, detail="An account with this email already exists")
 
@@ -711,7 +1653,7 @@ async def signup(req: SignUpRequest):
 
         # Create user in DB
         logger.info("Creating user in database...")
-        user = database_manager.create_user(
+        user = await async_database_manager.create_user(
             full_name=req.fullName.strip(),
             email=req.email.lower().strip(),
             password_hash=password_hash,
@@ -755,7 +1697,7 @@ async def login(req: LoginRequest):
     Authenticate user and return JWT tokens.
     """
     # Look up user by email
-    user = database_manager.get_user_by_email(req.email.lower().strip())
+    user = await async_database_manager.get_user_by_email(req.email.lower().strip())
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -811,7 +1753,7 @@ async def refresh_token(req: RefreshRequest):
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
     # Ensure user still exists
-    user = database_manager.get_user_by_id(payload.get("user_id"))
+    user = await async_database_manager.get_user_by_id(payload.get("user_id"))
     if not user or not user.get("is_active"):
         raise HTTPException(status_code=401, detail="User not found or inactive")
 
@@ -839,7 +1781,7 @@ async def forgot_password(req: ForgotPasswordRequest):
     logger.info(f"Password reset requested for: {email}")
 
     # Look up user – but always respond with 200 to prevent enumeration
-    user = database_manager.get_user_by_email(email)
+    user = await async_database_manager.get_user_by_email(email)
 
     if user and user.get("is_active"):
         try:
@@ -873,7 +1815,7 @@ async def reset_password(req: ResetPasswordRequest):
 
     # Hash new password and update in DB
     new_hash = auth_service.hash_password(req.new_password)
-    updated = database_manager.update_user_password(email, new_hash)
+    updated = await async_database_manager.update_user_password(email, new_hash)
 
     if not updated:
         raise HTTPException(status_code=500, detail="Failed to update password. Please try again.")
@@ -0,0 +1,146 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque, Counter
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused; maps to a 429/503 with Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission control in front of the inference endpoints.
+
+    At most max_in_flight requests run inference at once and at most
+    max_queue wait for a slot, in arrival order. Each client may hold
+    per_client slots (running or waiting). A request that cannot get a slot
+    within its deadline is dropped instead of being processed late, so live
+    clients get a fresh result or a fast rejection, never a stale one.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queue: Optional[int] = None,
+                 per_client: Optional[int] = None, deadline_ms: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.max_in_flight = max_in_flight or int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+        self.per_client = per_client or int(os.getenv("ADMISSION_PER_CLIENT", "2"))
+        self.deadline_ms = deadline_ms or float(os.getenv("ADMISSION_DEADLINE_MS", "1000"))
+
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._clients: Counter = Counter()
+        # Smoothed time a request holds a slot, used for Retry-After
+        self._service_seconds = 0.1
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_client_limit = 0
+        self.deadline_drops = 0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, given the current queue."""
+        backlog = (len(self._waiters) + 1) * self._service_seconds / self.max_in_flight
+        return max(1, math.ceil(backlog))
+
+    @asynccontextmanager
+    async def slot(self, client: str, deadline_ms: Optional[float] = None):
+        """
+        Hold an inference slot for the duration of the block.
+
+        Args:
+            client: Client key for the per-client limit
+            deadline_ms: Longest wait for a slot; capped at the configured deadline
+
+        Raises:
+            AdmissionRejected: 429 over the client limit, 503 when the queue
+                is full or the deadline passed while waiting
+        """
+        if not self.enabled:
+            yield
+            return
+
+        await self._acquire(client, deadline_ms)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._service_seconds += 0.2 * (elapsed - self._service_seconds)
+            self._clients[client] -= 1
+            if self._clients[client] <= 0:
+                del self._clients[client]
+            self._release()
+
+    async def _acquire(self, client: str, deadline_ms: Optional[float]):
+        if self._clients[client] >= self.per_client:
+            self.rejected_client_limit += 1
+            raise AdmissionRejected(429, "Too many concurrent requests from this client", self.retry_after())
+
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._clients[client] += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(503, "Inference queue is full", self.retry_after())
+
+        deadline = min(deadline_ms or self.deadline_ms, self.deadline_ms) / 1000.0
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._clients[client] += 1
+        try:
+            await asyncio.wait_for(waiter, deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            self._clients[client] -= 1
+            if self._clients[client] <= 0:
+                del self._clients[client]
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended; pass it on
+                self._release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.deadline_drops += 1
+            raise AdmissionRejected(503, "Deadline passed while waiting for inference", self.retry_after())
+        self.admitted += 1
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "clients": len(self._clients),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "per_client": self.per_client,
+            "deadline_ms": self.deadline_ms,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_client_limit": self.rejected_client_limit,
+            "deadline_drops": self.deadline_drops,
+            "avg_service_ms": round(self._service_seconds * 1000, 1),
+        }
@@ -0,0 +1,1126 @@
+import asyncpg
+import os
+import json
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+from .pagination import encode_cursor, decode_cursor
+
+# Time buckets for get_detection_timeseries, and how many one request may span
+ROLLUP_BUCKETS = ("hour", "day", "week", "month")
+MAX_TIMESERIES_BUCKETS = 400
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _rowcount(status: str) -> int:
+    """Rows affected, from a command status such as "UPDATE 3"."""
+    try:
+        return int(status.split()[-1])
+    except (ValueError, IndexError, AttributeError):
+        return 0
+
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_ceil(value: datetime) -> datetime:
+    floor = _hour_floor(value)
+    return floor if floor == value else floor + timedelta(hours=1)
+
+
+def _day_floor(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _day_ceil(value: datetime) -> datetime:
+    floor = _day_floor(value)
+    return floor if floor == value else floor + timedelta(days=1)
+
+
+def timeseries_bucket_count(bucket: str, since, until) -> int:
+    """Number of buckets get_detection_timeseries returns for a window (at most one too many)."""
+    since, until = _timestamp(since), _timestamp(until)
+    if until <= since:
+        return 0
+    if bucket == "month":
+        return (until.year - since.year) * 12 + until.month - since.month + 1
+    step = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}[bucket]
+    # The first bucket starts before since, at its truncated boundary
+    return (until - since) // step + 2
+
+
+def _timestamp(value) -> Optional[datetime]:
+    # asyncpg wants datetime objects for TIMESTAMP parameters, not ISO strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    # Columns are TIMESTAMP in server local time
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class AsyncDatabaseManager:
+    """
+    Non-blocking counterpart of DatabaseManager for request handlers.
+
+    Same methods and return values, awaited instead of called, running on an
+    asyncpg pool so a database round trip never stalls the event loop. The
+    schema is still created by DatabaseManager at startup; background job
+    threads keep using that synchronous manager.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.pool: Optional[asyncpg.Pool] = None
+        self.min_connections = int(os.getenv("DB_ASYNC_POOL_MIN", os.getenv("DB_POOL_MIN", "1")))
+        self.max_connections = int(os.getenv("DB_ASYNC_POOL_MAX", os.getenv("DB_POOL_MAX", "10")))
+        self.acquire_timeout = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+        self.connect_timeout = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+        self.reconnect_interval = float(os.getenv("DB_RECONNECT_INTERVAL", "10"))
+        self._reconnect_lock = asyncio.Lock()
+        self._last_connect_attempt = 0.0
+
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    @property
+    def db_connected(self) -> bool:
+        return self.pool is not None
+
+    async def connect(self) -> bool:
+        """
+        Create the connection pool.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        self._last_connect_attempt = time.monotonic()
+        try:
+            self.pool = await asyncpg.create_pool(
+                host=os.getenv("DB_HOST", "localhost"),
+                port=int(os.getenv("DB_PORT", "5432")),
+                database=os.getenv("DB_NAME", "cyberisai"),
+                user=os.getenv("DB_USER", "postgres"),
+                password=os.getenv("DB_PASSWORD", "your_postgres_password"),
+                min_size=self.min_connections,
+                max_size=self.max_connections,
+                timeout=self.connect_timeout,
+            )
+            self.logger.info(f"Async database pool ready "
+                             f"({self.min_connections}-{self.max_connections} connections)")
+            return True
+        except Exception as e:
+            self.pool = None
+            self.logger.error(f"Error creating async database pool: {e}")
+            return False
+
+    async def ensure_connected(self) -> bool:
+        """Check the pool exists, re-creating it at most once per DB_RECONNECT_INTERVAL."""
+        if self.pool is not None:
+            return True
+        async with self._reconnect_lock:
+            if self.pool is not None:
+                return True
+            if time.monotonic() - self._last_connect_attempt < self.reconnect_interval:
+                return False
+            if await self.connect():
+                self.reconnects += 1
+                return True
+            return False
+
+    async def disconnect(self):
+        """Close all pooled connections."""
+        try:
+            if self.pool:
+                await self.pool.close()
+            self.pool = None
+            self.logger.info("Async database pool closed")
+        except Exception as e:
+            self.logger.error(f"Error closing async database pool: {e}")
+
+    @asynccontextmanager
+    async def _connection(self):
+        """
+        Check out a connection and run the block in one transaction.
+
+        asyncpg's pool already replaces connections that break, so this only
+        adds the wait-time accounting DatabaseManager reports too.
+        """
+        pool = self.pool
+        if pool is None:
+            raise asyncpg.InterfaceError("Database not connected")
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - start
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            async with connection.transaction():
+                yield connection
+        finally:
+            await pool.release(connection)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Pool size, checkout wait times and utilisation."""
+        pool = self.pool
+        size = pool.get_size() if pool else 0
+        in_use = size - pool.get_idle_size() if pool else 0
+        return {
+            "connected": pool is not None,
+            "min_connections": self.min_connections,
+            "max_connections": self.max_connections,
+            "open_connections": size,
+            "in_use": in_use,
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "timeouts": self.timeouts,
+            "reconnects": self.reconnects,
+            "utilisation": round(in_use / self.max_connections, 3),
+        }
+
+    # ── Detection and alert methods ──────────────────────────────
+
+    async def save_detection(self, detection_type: str, confidence: float,
+                             timestamp: Optional[datetime] = None,
+                             image_url: Optional[str] = None) -> Optional[int]:
+        """
+        Save a detection record; returns its ID, or None.
+
+        The same statement counts it in the hourly and daily rollups under
+        severity "none" until save_alert gives it one.
+        """
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Skipping detection save.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                detection_id = await connection.fetchval(
+                    """
+                    WITH inserted AS (
+                        INSERT INTO detections (camera_id, type, confidence, timestamp, image_url)
+                        VALUES ($1, $2, $3, $4, $5)
+                        RETURNING detection_id, camera_id, type, confidence, timestamp
+                    ), hourly AS (
+                        INSERT INTO detection_rollups_hourly AS r
+                            (bucket, camera_id, type, severity, count, confidence_sum)
+                        SELECT date_trunc('hour', timestamp), camera_id, COALESCE(type, 'unknown'),
+                               'none', 1, COALESCE(confidence, 0)
+                        FROM inserted
+                        ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                        SET count = r.count + EXCLUDED.count,
+                            confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                    ), daily AS (
+                        INSERT INTO detection_rollups_daily AS r
+                            (bucket, camera_id, type, severity, count, confidence_sum)
+                        SELECT date_trunc('day', timestamp), camera_id, COALESCE(type, 'unknown'),
+                               'none', 1, COALESCE(confidence, 0)
+                        FROM inserted
+                        ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                        SET count = r.count + EXCLUDED.count,
+                            confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                    )
+                    SELECT detection_id FROM inserted;
+                    """,
+                    1, detection_type, confidence, timestamp or datetime.now(), image_url
+                )
+            self.logger.info(f"Detection saved with ID: {detection_id}")
+            return detection_id
+        except Exception as e:
+            self.logger.error(f"Error saving detection: {e}")
+            return None
+
+    async def save_alert(self, detection_id: int, severity: str, status: str = "pending") -> bool:
+        """
+        Save an alert record for a detection.
+
+        The alert is stamped with the detection's time, so it never predates
+        its detection. A detection's first alert also moves it from severity
+        "none" to this severity in the rollups.
+        """
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Skipping alert save.")
+            return False
+
+        try:
+            async with self._connection() as connection:
+                await connection.execute(
+                    """
+                    WITH detection AS (
+                        SELECT COALESCE(camera_id, 1) AS camera_id, COALESCE(type, 'unknown') AS type,
+                               COALESCE(confidence, 0) AS confidence, timestamp
+                        FROM detections WHERE detection_id = $1
+                        ORDER BY timestamp DESC LIMIT 1
+                    ), first_alert AS (
+                        SELECT * FROM detection
+                        WHERE NOT EXISTS (SELECT 1 FROM alerts WHERE detection_id = $1)
+                    ), alerted AS (
+                        INSERT INTO alerts (detection_id, severity, status, created_at)
+                        SELECT $1, $2::varchar, $3::varchar,
+                               COALESCE((SELECT timestamp FROM detection), CURRENT_TIMESTAMP)
+                    ), hourly_unrated AS (
+                        UPDATE detection_rollups_hourly r
+                        SET count = r.count - 1, confidence_sum = r.confidence_sum - f.confidence
+                        FROM first_alert f
+                        WHERE r.bucket = date_trunc('hour', f.timestamp) AND r.camera_id = f.camera_id
+                          AND r.type = f.type AND r.severity = 'none'
+                    ), hourly AS (
+                        INSERT INTO detection_rollups_hourly AS r
+                            (bucket, camera_id, type, severity, count, confidence_sum)
+                        SELECT date_trunc('hour', timestamp), camera_id, type, $2::varchar, 1, confidence
+                        FROM first_alert
+                        ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                        SET count = r.count + EXCLUDED.count,
+                            confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                    ), daily_unrated AS (
+                        UPDATE detection_rollups_daily r
+                        SET count = r.count - 1, confidence_sum = r.confidence_sum - f.confidence
+                        FROM first_alert f
+                        WHERE r.bucket = date_trunc('day', f.timestamp) AND r.camera_id = f.camera_id
+                          AND r.type = f.type AND r.severity = 'none'
+                    )
+                    INSERT INTO detection_rollups_daily AS r
+                        (bucket, camera_id, type, severity, count, confidence_sum)
+                    SELECT date_trunc('day', timestamp), camera_id, type, $2::varchar, 1, confidence
+                    FROM first_alert
+                    ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                    SET count = r.count + EXCLUDED.count,
+                        confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum;
+                    """,
+                    detection_id, severity, status
+                )
+            self.logger.info(f"Alert saved for detection ID: {detection_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving alert: {e}")
+            return False
+
+    async def reserve_detection_ids(self, count: int) -> List[int]:
+        """Take count values from the detections ID sequence for rows written later."""
+        if not await self.ensure_connected():
+            return []
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    "SELECT nextval(pg_get_serial_sequence('detections', 'detection_id')) "
+                    "FROM generate_series(1, $1)",
+                    count
+                )
+            return [row[0] for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error reserving detection IDs: {e}")
+            return []
+
+    async def save_detection_batch(self, records: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Insert detections and one alert each in a single statement.
+
+        Records carry detection_id (reserved with reserve_detection_ids),
+        camera_id, type, confidence, timestamp, image_url and severity. Each
+        alert takes its detection's timestamp, so both land in the same
+        period's partitions. The same statement adds the inserted rows to
+        the hourly and daily rollups. Rows already present are skipped and
+        not counted again, so replaying a batch is harmless.
+
+        Returns:
+            Number of detections inserted, or None if the write failed
+        """
+        if not await self.ensure_connected():
+            return None
+
+        try:
+            columns = ("detection_id", "camera_id", "type", "confidence", "timestamp", "image_url", "severity")
+            arrays = [[record[column] for record in records] for column in columns]
+            async with self._connection() as connection:
+                return await connection.fetchval(
+                    """
+                    WITH batch AS (
+                        SELECT * FROM unnest($1::int[], $2::int[], $3::varchar[], $4::float8[],
+                                             $5::timestamp[], $6::varchar[], $7::varchar[])
+                            AS b(id, camera, kind, conf, ts, url, severity)
+                    ), inserted AS (
+                        INSERT INTO detections (detection_id, camera_id, type, confidence, timestamp, image_url)
+                        SELECT id, camera, kind, conf, ts, url FROM batch
+                        ON CONFLICT (detection_id, timestamp) DO NOTHING
+                        RETURNING detection_id
+                    ), fresh AS (
+                        SELECT batch.* FROM inserted JOIN batch ON batch.id = inserted.detection_id
+                    ), alerted AS (
+                        INSERT INTO alerts (detection_id, severity, status, created_at)
+                        SELECT id, severity, 'pending', ts FROM fresh
+                    ), hourly AS (
+                        INSERT INTO detection_rollups_hourly AS r
+                            (bucket, camera_id, type, severity, count, confidence_sum)
+                        SELECT date_trunc('hour', ts), camera, kind, severity, COUNT(*), SUM(conf)
+                        FROM fresh GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+                        ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                        SET count = r.count + EXCLUDED.count,
+                            confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                    ), daily AS (
+                        INSERT INTO detection_rollups_daily AS r
+                            (bucket, camera_id, type, severity, count, confidence_sum)
+                        SELECT date_trunc('day', ts), camera, kind, severity, COUNT(*), SUM(conf)
+                        FROM fresh GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+                        ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                        SET count = r.count + EXCLUDED.count,
+                            confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                    )
+                    SELECT COUNT(*) FROM fresh;
+                    """,
+                    *arrays
+                )
+        except Exception as e:
+            self.logger.error(f"Error saving detection batch: {e}")
+            return None
+
+    @staticmethod
+    def _row_to_detection(row) -> Dict[str, Any]:
+        return {
+            "detection_id": row["detection_id"],
+            "type": row["type"],
+            "confidence": row["confidence"],
+            "timestamp": _isoformat(row["timestamp"]),
+            "image_url": row["image_url"],
+            "camera_location": row["location"],
+            "camera_id": row["camera_id"],
+            "is_read": row["is_read"] if row["is_read"] is not None else False,
+        }
+
+    async def get_recent_detections(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent detection records, newest first."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty detections list.")
+            return []
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    """
+                    SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                           c.location, c.camera_id, d.is_read
+                    FROM detections d
+                    JOIN cameras c ON d.camera_id = c.camera_id
+                    ORDER BY d.timestamp DESC, d.detection_id DESC
+                    LIMIT $1;
+                    """,
+                    limit
+                )
+            return [self._row_to_detection(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving detections: {e}")
+            return []
+
+    async def get_detections_page(self, limit: int = 50, cursor: Optional[str] = None,
+                                  types: Optional[List[str]] = None, camera_id: Optional[int] = None,
+                                  min_confidence: Optional[float] = None, max_confidence: Optional[float] = None,
+                                  severities: Optional[List[str]] = None, is_read: Optional[bool] = None,
+                                  since: Optional[datetime] = None,
+                                  until: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        One page of detections, newest first, continuing after cursor.
+
+        Every filter is optional; severities match detections with at least
+        one alert of those severities. A cursor is only meaningful with the
+        same filters as the page that returned it.
+
+        Raises:
+            ValueError: If cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        page: Dict[str, Any] = {"detections": [], "next": None}
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty detections page.")
+            return page
+
+        conditions, args = [], []
+
+        def condition(sql: str, *values):
+            # Each "?" becomes the next positional parameter
+            for value in values:
+                args.append(value)
+                sql = sql.replace("?", f"${len(args)}", 1)
+            conditions.append(sql)
+
+        if after:
+            condition("(d.timestamp, d.detection_id) < (?, ?)", after[0], after[1])
+        if types:
+            condition("d.type = ANY(?)", list(types))
+        if camera_id is not None:
+            condition("d.camera_id = ?", camera_id)
+        if min_confidence is not None:
+            condition("d.confidence >= ?", min_confidence)
+        if max_confidence is not None:
+            condition("d.confidence <= ?", max_confidence)
+        if is_read is not None:
+            # A literal, not a parameter, so the planner can match the partial unread index
+            condition("d.is_read = TRUE" if is_read else "d.is_read = FALSE")
+        if since is not None:
+            condition("d.timestamp >= ?", _timestamp(since))
+        if until is not None:
+            condition("d.timestamp < ?", _timestamp(until))
+        if severities:
+            # Alerts are never older than their detection (every write path
+            # stamps them so, and migration 8 fixed older rows); saying so
+            # lets the probe skip older alerts partitions
+            condition("EXISTS (SELECT 1 FROM alerts a WHERE a.detection_id = d.detection_id "
+                      "AND a.created_at >= d.timestamp AND a.severity = ANY(?))", list(severities))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        args.append(limit + 1)
+
+        try:
+            # One extra row tells whether another page follows
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    f"""
+                    SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                           c.location, c.camera_id, d.is_read
+                    FROM detections d
+                    JOIN cameras c ON d.camera_id = c.camera_id
+                    {where}
+                    ORDER BY d.timestamp DESC, d.detection_id DESC
+                    LIMIT ${len(args)};
+                    """,
+                    *args
+                )
+            if len(rows) > limit:
+                rows = rows[:limit]
+                page["next"] = encode_cursor(rows[-1]["timestamp"], rows[-1]["detection_id"])
+            page["detections"] = [self._row_to_detection(row) for row in rows]
+            return page
+        except Exception as e:
+            self.logger.error(f"Error retrieving detections page: {e}")
+            return page
+
+    async def get_detection_by_id(self, detection_id: int) -> Optional[Dict[str, Any]]:
+        """Detection record, or None if not found."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning None for detection lookup.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                           c.location, c.camera_id, d.is_read
+                    FROM detections d
+                    JOIN cameras c ON d.camera_id = c.camera_id
+                    WHERE d.detection_id = $1;
+                    """,
+                    detection_id
+                )
+            return self._row_to_detection(row) if row else None
+        except Exception as e:
+            self.logger.error(f"Error retrieving detection: {e}")
+            return None
+
+    async def get_alerts_for_detection(self, detection_id: int) -> List[Dict[str, Any]]:
+        """Alerts for a detection, newest first."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty alerts list.")
+            return []
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    """
+                    SELECT alert_id, severity, status, created_at
+                    FROM alerts
+                    WHERE detection_id = $1
+                    ORDER BY created_at DESC;
+                    """,
+                    detection_id
+                )
+            return [{
+                "alert_id": row["alert_id"],
+                "severity": row["severity"],
+                "status": row["status"],
+                "created_at": _isoformat(row["created_at"]),
+            } for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving alerts: {e}")
+            return []
+
+    @classmethod
+    def _row_to_detail(cls, row) -> Dict[str, Any]:
+        return {
+            "detection": cls._row_to_detection(row),
+            "camera": {
+                "camera_id": row["camera_id"],
+                "location": row["location"],
+                "ip_address": row["ip_address"],
+                "status": row["camera_status"],
+            },
+            "alerts": [
+                # JSON timestamps drop trailing zeros; re-format them like the rest of the API
+                {**alert, "created_at": _isoformat(datetime.fromisoformat(alert["created_at"]))
+                 if alert["created_at"] else None}
+                for alert in json.loads(row["alerts"])
+            ],
+        }
+
+    async def get_detection_detail(self, detection_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Detection with its camera and alerts in one round trip.
+
+        Returns:
+            {"detection", "camera", "alerts"} with alerts newest first, or
+            None if not found
+        """
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning None for detection detail.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url, d.is_read,
+                           c.camera_id, c.location, c.ip_address, c.status AS camera_status,
+                           COALESCE((
+                               SELECT json_agg(json_build_object(
+                                          'alert_id', a.alert_id, 'severity', a.severity,
+                                          'status', a.status, 'created_at', a.created_at)
+                                      ORDER BY a.created_at DESC)
+                               FROM alerts a
+                               WHERE a.detection_id = d.detection_id
+                           ), '[]') AS alerts
+                    FROM detections d
+                    JOIN cameras c ON d.camera_id = c.camera_id
+                    WHERE d.detection_id = $1;
+                    """,
+                    detection_id
+                )
+            return self._row_to_detail(row) if row else None
+        except Exception as e:
+            self.logger.error(f"Error retrieving detection detail: {e}")
+            return None
+
+    async def get_detection_details(self, detection_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        get_detection_detail for many detections in one round trip, in the
+        order of detection_ids; IDs that do not exist are left out.
+        """
+        if not detection_ids:
+            return []
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty detection details.")
+            return []
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    """
+                    SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url, d.is_read,
+                           c.camera_id, c.location, c.ip_address, c.status AS camera_status,
+                           COALESCE((
+                               SELECT json_agg(json_build_object(
+                                          'alert_id', a.alert_id, 'severity', a.severity,
+                                          'status', a.status, 'created_at', a.created_at)
+                                      ORDER BY a.created_at DESC)
+                               FROM alerts a
+                               WHERE a.detection_id = d.detection_id
+                           ), '[]') AS alerts
+                    FROM unnest($1::int[]) WITH ORDINALITY AS wanted(detection_id, position)
+                    JOIN detections d ON d.detection_id = wanted.detection_id
+                    JOIN cameras c ON d.camera_id = c.camera_id
+                    ORDER BY wanted.position;
+                    """,
+                    list(detection_ids)
+                )
+            return [self._row_to_detail(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving detection details: {e}")
+            return []
+
+    async def mark_detection_read(self, detection_id: int) -> bool:
+        """Mark a single detection as read."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot mark detection as read.")
+            return False
+
+        try:
+            async with self._connection() as connection:
+                await connection.execute(
+                    "UPDATE detections SET is_read = TRUE WHERE detection_id = $1", detection_id
+                )
+            self.logger.info(f"Detection {detection_id} marked as read")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error marking detection as read: {e}")
+            return False
+
+    async def mark_all_detections_read(self) -> bool:
+        """Mark all unread detections as read."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot mark detections as read.")
+            return False
+
+        try:
+            async with self._connection() as connection:
+                status = await connection.execute(
+                    "UPDATE detections SET is_read = TRUE WHERE is_read = FALSE"
+                )
+            self.logger.info(f"Marked {_rowcount(status)} detections as read")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error marking all detections as read: {e}")
+            return False
+
+    async def count_unread_detections(self) -> int:
+        """Number of detections not yet marked as read."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning 0 unread detections.")
+            return 0
+
+        try:
+            async with self._connection() as connection:
+                return await connection.fetchval("SELECT COUNT(*) FROM detections WHERE is_read = FALSE")
+        except Exception as e:
+            self.logger.error(f"Error counting unread detections: {e}")
+            return 0
+
+    # ── Analytics methods ────────────────────────────────────────
+
+    async def get_analytics_summary(self, since: datetime, until: datetime,
+                                    camera_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Detection totals between since and until from the rollup tables.
+
+        Whole days are read from the daily rollups and the hours at either
+        end from the hourly ones, so the cost depends on the number of days,
+        not detections. Times are rounded out to whole hours.
+
+        Returns:
+            Totals, average confidence, counts by type, severity and camera,
+            and counts by hour of day (by_hour, 24 entries)
+        """
+        summary: Dict[str, Any] = {
+            "since": _isoformat(since), "until": _isoformat(until),
+            "total": 0, "average_confidence": 0.0,
+            "by_type": {}, "by_severity": {}, "by_camera": {}, "by_hour": [0] * 24,
+        }
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty analytics summary.")
+            return summary
+
+        first_hour, end_hour = _hour_floor(_timestamp(since)), _hour_ceil(_timestamp(until))
+        first_day, end_day = _day_ceil(first_hour), _day_floor(end_hour)
+        if first_day >= end_day:
+            first_day = end_day = end_hour
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    """
+                    WITH r AS (
+                        SELECT camera_id, type, severity, count, confidence_sum
+                        FROM detection_rollups_daily
+                        WHERE bucket >= $3 AND bucket < $4 AND ($5::int IS NULL OR camera_id = $5)
+                          AND count > 0
+                        UNION ALL
+                        SELECT camera_id, type, severity, count, confidence_sum
+                        FROM detection_rollups_hourly
+                        WHERE ((bucket >= $1 AND bucket < $3) OR (bucket >= $4 AND bucket < $2))
+                          AND ($5::int IS NULL OR camera_id = $5) AND count > 0
+                    )
+                    SELECT type, severity, camera_id, SUM(count)::bigint AS count,
+                           SUM(confidence_sum) AS confidence_sum,
+                           GROUPING(type, severity, camera_id) AS grouping
+                    FROM r
+                    GROUP BY GROUPING SETS ((type), (severity), (camera_id), ());
+                    """,
+                    first_hour, end_hour, first_day, end_day, camera_id
+                )
+                hours = await connection.fetch(
+                    """
+                    SELECT extract(hour FROM bucket)::int AS hour, SUM(count)::bigint AS count
+                    FROM detection_rollups_hourly
+                    WHERE bucket >= $1 AND bucket < $2 AND ($3::int IS NULL OR camera_id = $3)
+                    GROUP BY 1;
+                    """,
+                    first_hour, end_hour, camera_id
+                )
+        except Exception as e:
+            self.logger.error(f"Error retrieving analytics summary: {e}")
+            return summary
+
+        # GROUPING() sets a bit for each column the row is not grouped by
+        for row in rows:
+            if row["grouping"] == 0b011:
+                summary["by_type"][row["type"]] = row["count"]
+            elif row["grouping"] == 0b101:
+                summary["by_severity"][row["severity"]] = row["count"]
+            elif row["grouping"] == 0b110:
+                summary["by_camera"][row["camera_id"]] = row["count"]
+            elif row["count"]:
+                summary["total"] = row["count"]
+                summary["average_confidence"] = round(row["confidence_sum"] / row["count"], 4)
+        for row in hours:
+            summary["by_hour"][row["hour"]] = row["count"]
+        return summary
+
+    async def get_detection_timeseries(self, bucket: str, since: datetime, until: datetime,
+                                       types: Optional[List[str]] = None,
+                                       camera_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Detection counts per time bucket, oldest first, with empty buckets included.
+
+        Args:
+            bucket: One of ROLLUP_BUCKETS; hour reads the hourly rollups,
+                the others the daily ones
+
+        Returns:
+            List of {"bucket", "total", "types": {type: count}}
+
+        Raises:
+            ValueError: for an unknown bucket, or a window of more than
+                MAX_TIMESERIES_BUCKETS buckets
+        """
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unknown bucket {bucket!r}; use one of {', '.join(ROLLUP_BUCKETS)}")
+        if timeseries_bucket_count(bucket, since, until) > MAX_TIMESERIES_BUCKETS:
+            raise ValueError(f"Window spans more than {MAX_TIMESERIES_BUCKETS} {bucket} buckets; "
+                             f"use a coarser bucket or a shorter window")
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty timeseries.")
+            return []
+
+        table = "detection_rollups_hourly" if bucket == "hour" else "detection_rollups_daily"
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    f"""
+                    WITH series AS (
+                        SELECT generate_series(date_trunc($1, $2::timestamp),
+                                               $3::timestamp - interval '1 microsecond',
+                                               ('1 ' || $1)::interval) AS bucket
+                    ), totals AS (
+                        SELECT date_trunc($1, bucket) AS bucket, type, SUM(count)::bigint AS count
+                        FROM {table}
+                        WHERE bucket >= date_trunc($1, $2::timestamp) AND bucket < $3
+                          AND ($4::varchar[] IS NULL OR type = ANY($4))
+                          AND ($5::int IS NULL OR camera_id = $5)
+                        GROUP BY 1, 2
+                    )
+                    SELECT s.bucket, t.type, t.count
+                    FROM series s LEFT JOIN totals t ON t.bucket = s.bucket
+                    ORDER BY s.bucket, t.type;
+                    """,
+                    bucket, _timestamp(since), _timestamp(until), types, camera_id
+                )
+        except Exception as e:
+            self.logger.error(f"Error retrieving detection timeseries: {e}")
+            return []
+
+        points: Dict[datetime, Dict[str, Any]] = {}
+        for row in rows:
+            point = points.setdefault(row["bucket"], {"bucket": _isoformat(row["bucket"]), "total": 0, "types": {}})
+            if row["type"] is not None:
+                point["types"][row["type"]] = row["count"]
+                point["total"] += row["count"]
+        return list(points.values())
+
+    # ── Camera region methods ────────────────────────────────────
+
+    async def get_camera_regions(self, camera_id: int) -> List[Dict[str, Any]]:
+        """Inference regions configured for a camera."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty regions list.")
+            return []
+
+        try:
+            async with self._connection() as connection:
+                rows = await connection.fetch(
+                    """
+                    SELECT region_id, camera_id, name, polygon, enabled, created_at
+                    FROM camera_regions
+                    WHERE camera_id = $1
+                    ORDER BY region_id;
+                    """,
+                    camera_id
+                )
+            return [{
+                "region_id": row["region_id"],
+                "camera_id": row["camera_id"],
+                "name": row["name"],
+                "polygon": json.loads(row["polygon"]) if isinstance(row["polygon"], str) else row["polygon"],
+                "enabled": row["enabled"] if row["enabled"] is not None else True,
+                "created_at": _isoformat(row["created_at"]),
+            } for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving camera regions: {e}")
+            return []
+
+    async def save_camera_region(self, camera_id: int, name: str, polygon: List[List[float]],
+                                 enabled: bool = True) -> Optional[Dict[str, Any]]:
+        """Save a new inference region for a camera."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot save camera region.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    INSERT INTO camera_regions (camera_id, name, polygon, enabled)
+                    VALUES ($1, $2, $3, $4)
+                    RETURNING region_id, created_at;
+                    """,
+                    camera_id, name, json.dumps(polygon), enabled
+                )
+            if row:
+                self.logger.info(f"Region {row['region_id']} saved for camera {camera_id}")
+                return {
+                    "region_id": row["region_id"],
+                    "camera_id": camera_id,
+                    "name": name,
+                    "polygon": polygon,
+                    "enabled": enabled,
+                    "created_at": _isoformat(row["created_at"]),
+                }
+            return None
+        except Exception as e:
+            self.logger.error(f"Error saving camera region: {e}")
+            return None
+
+    async def delete_camera_region(self, camera_id: int, region_id: int) -> bool:
+        """Delete an inference region; True if one was deleted."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot delete camera region.")
+            return False
+
+        try:
+            async with self._connection() as connection:
+                status = await connection.execute(
+                    "DELETE FROM camera_regions WHERE camera_id = $1 AND region_id = $2",
+                    camera_id, region_id
+                )
+            return _rowcount(status) > 0
+        except Exception as e:
+            self.logger.error(f"Error deleting camera region: {e}")
+            return False
+
+    # ── Analysis job methods ─────────────────────────────────────
+
+    _JOB_COLUMNS = ("job_id", "job_type", "status", "progress", "params", "result", "error",
+                    "cpu_seconds", "items_processed", "items_per_second",
+                    "created_at", "started_at", "finished_at")
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        job = {column: row[column] for column in self._JOB_COLUMNS}
+        for key in ("params", "result"):
+            if isinstance(job[key], str):
+                job[key] = json.loads(job[key])
+        for key in ("created_at", "started_at", "finished_at"):
+            job[key] = _isoformat(job[key])
+        return job
+
+    async def save_job(self, job: Dict[str, Any]) -> bool:
+        """Insert or update an analysis job record."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot save job.")
+            return False
+
+        try:
+            placeholders = ", ".join(f"${i + 1}" for i in range(len(self._JOB_COLUMNS)))
+            values = [job.get(column) for column in self._JOB_COLUMNS]
+            values[4] = json.dumps(job.get("params"), default=str)
+            values[5] = json.dumps(job["result"], default=str) if job.get("result") is not None else None
+            values[10:13] = [_timestamp(value) for value in values[10:13]]
+            async with self._connection() as connection:
+                await connection.execute(
+                    f"""
+                    INSERT INTO analysis_jobs ({", ".join(self._JOB_COLUMNS)})
+                    VALUES ({placeholders})
+                    ON CONFLICT (job_id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        progress = EXCLUDED.progress,
+                        result = EXCLUDED.result,
+                        error = EXCLUDED.error,
+                        cpu_seconds = EXCLUDED.cpu_seconds,
+                        items_processed = EXCLUDED.items_processed,
+                        items_per_second = EXCLUDED.items_per_second,
+                        started_at = EXCLUDED.started_at,
+                        finished_at = EXCLUDED.finished_at;
+                    """,
+                    *values
+                )
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving job: {e}")
+            return False
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Analysis job by ID, or None."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot get job.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    f"SELECT {', '.join(self._JOB_COLUMNS)} FROM analysis_jobs WHERE job_id = $1",
+                    job_id
+                )
+            return self._row_to_job(row) if row else None
+        except Exception as e:
+            self.logger.error(f"Error retrieving job: {e}")
+            return None
+
+    async def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent analysis jobs, newest first."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty jobs list.")
+            return []
+
+        try:
+            query = f"SELECT {', '.join(self._JOB_COLUMNS)} FROM analysis_jobs"
+            params: List[Any] = []
+            if status:
+                params.append(status)
+                query += f" WHERE status = ${len(params)}"
+            params.append(limit)
+            query += f" ORDER BY created_at DESC LIMIT ${len(params)}"
+            async with self._connection() as connection:
+                rows = await connection.fetch(query, *params)
+            return [self._row_to_job(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving jobs: {e}")
+            return []
+
+    # ── User management methods ──────────────────────────────────
+
+    async def create_user(self, full_name: str, email: str, password_hash: str,
+                          role: str = "user") -> Optional[Dict[str, Any]]:
+        """Create a user; None if the email is taken or the insert fails."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot create user.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    INSERT INTO users (full_name, email, password_hash, role)
+                    VALUES ($1, $2, $3, $4)
+                    RETURNING user_id, full_name, email, role, is_active, created_at;
+                    """,
+                    full_name, email, password_hash, role
+                )
+            if row:
+                self.logger.info(f"User created: {email} (ID: {row['user_id']})")
+                return {
+                    "user_id": row["user_id"],
+                    "full_name": row["full_name"],
+                    "email": row["email"],
+                    "role": row["role"],
+                    "is_active": row["is_active"],
+                    "created_at": _isoformat(row["created_at"]),
+                }
+            return None
+        except asyncpg.UniqueViolationError:
+            self.logger.warning(f"User with email {email} already exists")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error creating user: {e}")
+            return None
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """User (including password_hash) by email, or None."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot look up user.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    SELECT user_id, full_name, email, password_hash, role, is_active, created_at
+                    FROM users
+                    WHERE email = $1;
+                    """,
+                    email
+                )
+            if row:
+                user = dict(row)
+                user["created_at"] = _isoformat(row["created_at"])
+                return user
+            return None
+        except Exception as e:
+            self.logger.error(f"Error looking up user by email: {e}")
+            return None
+
+    async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """User (without password_hash) by ID, or None."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot look up user.")
+            return None
+
+        try:
+            async with self._connection() as connection:
+                row = await connection.fetchrow(
+                    """
+                    SELECT user_id, full_name, email, role, is_active, created_at
+                    FROM users
+                    WHERE user_id = $1;
+                    """,
+                    user_id
+                )
+            if row:
+                user = dict(row)
+                user["created_at"] = _isoformat(row["created_at"])
+                return user
+            return None
+        except Exception as e:
+            self.logger.error(f"Error looking up user by ID: {e}")
+            return None
+
+    async def update_user_password(self, email: str, new_password_hash: str) -> bool:
+        """Update an active user's password hash."""
+        if not await self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot update password.")
+            return False
+
+        try:
+            async with self._connection() as connection:
+                status = await connection.execute(
+                    """
+                    UPDATE users
+                    SET password_hash = $1, updated_at = CURRENT_TIMESTAMP
+                    WHERE email = $2 AND is_active = TRUE;
+                    """,
+                    new_password_hash, email
+                )
+            if _rowcount(status) > 0:
+                self.logger.info(f"Password updated for user: {email}")
+                return True
+            self.logger.warning(f"No active user found with email: {email}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error updating user password: {e}")
+            return False
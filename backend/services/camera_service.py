@@ -2,6 +2,7 @@ import cv2
 import asyncio
 import threading
 import time
+from collections import deque
 from typing import Optional, Callable, Dict, Any
 import logging
 import os
@@ -9,31 +10,52 @@ import base64
 from datetime import datetime
 from .detection_service import DetectionService
 from .model_manager import ModelManager
+from .motion_gate import MotionGate
+from .roi_service import RoiService
+from .model_cadence import ModelCadence
+from .video_source import open_capture, ReplaySource, SessionRecorder
+from .clip_recorder import ClipRecorder
 from ultralytics import YOLO
 import numpy as np
 
 class CameraService:
     """Handles camera feed and real-time object detection."""
     
-    def __init__(self, model_manager: ModelManager, detection_service: DetectionService):
+    def __init__(self, model_manager: ModelManager, detection_service: DetectionService,
+                 roi_service: Optional[RoiService] = None, clip_recorder: Optional[ClipRecorder] = None):
         self.model_manager = model_manager
         self.detection_service = detection_service
+        self.roi_service = roi_service
+        self.clip_recorder = clip_recorder
         self.camera: Optional[cv2.VideoCapture] = None
         self.is_running = False
         self.camera_index = int(os.getenv("CAMERA_INDEX", "0"))
+        # A video file or recorded session directory replaces the physical camera
+        self.camera_source = os.getenv("CAMERA_SOURCE") or str(self.camera_index)
+        self.record_dir = os.getenv("CAMERA_RECORD_DIR")
+        self.recorder: Optional[SessionRecorder] = None
+        self.camera_id = os.getenv("CAMERA_ID", "1")  # Row in the cameras table
         self.frame_skip = int(os.getenv("FRAME_SKIP", "3"))  # Process every Nth frame
+        self.model_name = model_manager.default_model  # This camera's own model selection
         self.clients = set()
+        self.motion_gate = MotionGate()
+        self.cadence = ModelCadence()
         self.logger = logging.getLogger(__name__)
         self.fps = 0.0
         self.frame_count = 0
         self.start_time = time.time()
+        self.frames_read = 0
+        self.frames_processed = 0
+        self.latencies = deque(maxlen=500)  # Capture-to-result latency in seconds
     
-    def start_camera(self, model_name: str = "weapon") -> Dict[str, Any]:
+    def start_camera(self, model_name: str = "weapon", source: Optional[str] = None) -> Dict[str, Any]:
         """
         Start the camera feed.
         
         Args:
             model_name: Model to use for detection ("weapon", "fire_smoke", or "both")
+            source: Camera index, video file or recorded session directory
+                    (defaults to CAMERA_SOURCE / CAMERA_INDEX)
             
         Returns:
             Dictionary with status information
@@ -42,20 +64,30 @@ class CameraService:
             if self.is_running:
                 return {"success": False, "message": "Camera already running"}
             
-            # Set model
+            # Set this camera's model without touching other clients' selection
             if model_name in ["weapon", "fire_smoke", "both"]:
-                self.model_manager.current_model = model_name
+                self.model_name = model_name
             else:
                 return {"success": False, "message": "Invalid model name"}
             
-            # Initialize camera
-            self.camera = cv2.VideoCapture(self.camera_index)
+            # Initialize camera (physical device or replayed recording)
+            if source is not None:
+                self.camera_source = str(source)
+            self.camera = open_capture(self.camera_source)
             if not self.camera.isOpened():
                 return {"success": False, "message": "Could not open camera"}
             
+            # Optionally record the live session for later replay
+            if self.record_dir and not isinstance(self.camera, ReplaySource):
+                session_dir = os.path.join(self.record_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+                self.recorder = SessionRecorder(session_dir)
+            
             self.is_running = True
             self.frame_count = 0
             self.start_time = time.time()
+            self.frames_read = 0
+            self.frames_processed = 0
+            self.latencies.clear()
             
             # Start camera loop in a separate thread
             self.camera_thread = threading.Thread(target=self._camera_loop, daemon=True)
@@ -79,6 +111,10 @@ class CameraService:
                 self.camera.release()
                 self.camera = None
             
+            if self.recorder:
+                self.recorder.close()
+                self.recorder = None
+            
             return {"success": True, "message": "Camera stopped"}
         except Exception as e:
             self.logger.error(f"Error stopping camera: {e}")
@@ -95,9 +131,18 @@ class CameraService:
                 
                 ret, frame = self.camera.read()
                 if not ret:
+                    if isinstance(self.camera, ReplaySource):
+                        self.logger.info("Replay source finished")
+                        self.is_running = False
+                        break
                     self.logger.warning("Could not read frame from camera")
                     continue
                 
+                captured_at = time.monotonic()
+                self.frames_read += 1
+                if self.recorder:
+                    self.recorder.write(frame, captured_at)
+                
                 frame_counter += 1
                 
                 # Skip frames for performance
@@ -111,16 +156,37 @@ class CameraService:
                 processed_frame = frame.copy()
                 detection_data = {}
                 
-                # Run detection based on current model
-                current_model = self.model_manager.current_model
+                # Run detection based on this camera's model
+                current_model = self.model_name
+                
+                # Restrict inference to the camera's configured regions, if any
+                regions = self.roi_service.get_regions(self.camera_id) if self.roi_service else []
+                
+                # Reuse the last result while the scene is static
+                run_inference, gate_info = self.motion_gate.check(frame, key=current_model)
+                inference_start = time.perf_counter()
                 
-                if current_model == "both":
+                if not run_inference:
+                    detection_data = self.motion_gate.last_result() or {}
+                    processed_frame = self.detection_service.draw_detections(
+                        processed_frame,
+                        detection_data.get("detections", []) + detection_data.get("weapon_detections", []),
+                        (0, 0, 255) if current_model == "both" else (0, 255, 0)
+                    )
+                    processed_frame = self.detection_service.draw_detections(
+                        processed_frame,
+                        detection_data.get("fire_smoke_detections", []),
+                        (255, 0, 0)  # Blue
+                    )
+                elif current_model == "both":
                     # Use both models
                     if self.model_manager.weapon_model and self.model_manager.fire_smoke_model:
                         results = self.detection_service.process_frame_with_dual_models(
                             self.model_manager.weapon_model,
                             self.model_manager.fire_smoke_model,
-                            frame
+                            frame,
+                            regions=regions,
+                            cadence=self.cadence
                         )
                         
                         if results["success"]:
@@ -143,9 +209,9 @@ class CameraService:
                             }
                 else:
                     # Use single model
-                    model = self.model_manager.get_current_model()
+                    model = self.model_manager.get_model(current_model)
                     if model:
-                        results = self.detection_service.detect_objects(model, frame)
+                        results = self.detection_service.detect_objects_in_regions(model, frame, regions)
                         if results["success"]:
                             # Draw detections (green for single model)
                             processed_frame = self.detection_service.draw_detections(
@@ -158,10 +224,26 @@ class CameraService:
                                 "detections": results["detections"]
                             }
                 
+                if run_inference and detection_data:
+                    self.motion_gate.record_result(detection_data, time.perf_counter() - inference_start)
+                
                 # Encode frame to JPEG
                 _, buffer = cv2.imencode('.jpg', processed_frame)
                 frame_base64 = buffer.tobytes()
                 
+                # Reuse the encoded frame for the pre/post-event clip ring
+                if self.clip_recorder:
+                    self.clip_recorder.push(self.camera_id, frame_base64)
+                    fresh = [
+                        d for key in ("detections", "weapon_detections", "fire_smoke_detections")
+                        for d in detection_data.get(key, []) if not d.get("carried")
+                    ]
+                    if run_inference and fresh:
+                        detection_data["clip_url"] = self.clip_recorder.trigger(self.camera_id)
+                
+                self.frames_processed += 1
+                self.latencies.append(time.monotonic() - captured_at)
+                
                 # Send to all connected clients
                 # Note: This is running in a thread, so we can't directly await
                 # In a real implementation, you'd want to use a queue or similar
@@ -192,13 +274,32 @@ class CameraService:
         # For now, we'll just log that a frame was processed
         self.logger.debug(f"Processed frame with {len(detection_data)} detections")
     
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Throughput, capture-to-result latency and dropped-frame counts."""
+        latencies = sorted(self.latencies)
+        stats = {
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "latency_ms_avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else 0.0,
+            "frames_dropped": 0,
+        }
+        if isinstance(self.camera, ReplaySource):
+            stats["frames_dropped"] = self.camera.frames_dropped
+            stats["replay"] = self.camera.get_stats()
+        return stats
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current camera status."""
         return {
             "running": self.is_running,
-            "model": self.model_manager.current_model,
+            "model": self.model_name,
             "fps": round(self.fps, 2),
-            "camera_index": self.camera_index
+            "camera_index": self.camera_index,
+            "camera_source": self.camera_source,
+            "pipeline": self.get_pipeline_stats(),
+            "motion_gate": self.motion_gate.get_stats(),
+            "cadence": self.cadence.get_stats()
         }
     
     def add_client(self, client_id: str):
@@ -0,0 +1,258 @@
+import cv2
+import numpy as np
+import os
+import time
+import queue
+import secrets
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class FrameRing:
+    """
+    Bounded in-memory ring of recent frames for one stream.
+
+    Frames are stored as already-encoded JPEG bytes, so memory is bounded by
+    both a time window and a byte budget rather than by raw frame size.
+    """
+
+    def __init__(self, max_seconds: float, max_bytes: int):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self._frames: deque = deque()  # (timestamp, jpeg_bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.frames_pushed = 0
+        self.frames_evicted = 0
+        self.last_push = time.time()
+
+    def push(self, jpeg_bytes: bytes, timestamp: Optional[float] = None):
+        """Append an encoded frame, evicting the oldest beyond the time or byte budget."""
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            self._frames.append((timestamp, jpeg_bytes))
+            self._bytes += len(jpeg_bytes)
+            self.frames_pushed += 1
+            self.last_push = time.time()
+            while self._frames and (
+                self._bytes > self.max_bytes or timestamp - self._frames[0][0] > self.max_seconds
+            ):
+                _, old = self._frames.popleft()
+                self._bytes -= len(old)
+                self.frames_evicted += 1
+
+    def window(self, start: float, end: float) -> List[Tuple[float, bytes]]:
+        """Frames with start <= timestamp <= end, oldest first."""
+        with self._lock:
+            return [(ts, data) for ts, data in self._frames if start <= ts <= end]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            span = self._frames[-1][0] - self._frames[0][0] if len(self._frames) > 1 else 0.0
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "seconds_buffered": round(span, 2),
+                "frames_pushed": self.frames_pushed,
+                "frames_evicted": self.frames_evicted,
+            }
+
+
+class ClipRecorder:
+    """
+    Writes pre/post-event clips from per-stream frame rings.
+
+    A stream is one continuous frame source: a server-side camera, a /frames
+    connection or one browser tab posting live frames. Client-chosen camera
+    IDs are shared between users, so they never key a ring on their own.
+
+    trigger() returns the clip's URL immediately so it can be stored with the
+    detection; a background worker waits for the post-event window to fill
+    and encodes the clip without blocking capture or inference. Clip names
+    are random, and rings idle for CLIP_RING_IDLE_SECONDS are dropped.
+    """
+
+    def __init__(self, clip_dir: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.clip_dir = clip_dir or os.getenv("CLIP_DIR", "clips")
+        self.url_prefix = os.getenv("CLIP_URL_PREFIX", "/clips")
+        self.pre_seconds = float(os.getenv("CLIP_PRE_SECONDS", "5"))
+        self.post_seconds = float(os.getenv("CLIP_POST_SECONDS", "5"))
+        # Memory budget per stream for the encoded-frame ring
+        self.ring_max_bytes = int(os.getenv("CLIP_RING_MAX_BYTES", str(32 * 1024 * 1024)))
+        self.ring_idle_seconds = float(os.getenv("CLIP_RING_IDLE_SECONDS", "60"))
+        self.max_pending = int(os.getenv("CLIP_MAX_PENDING", "16"))
+        self.enabled = os.getenv("CLIP_RECORDING_ENABLED", "true").lower() == "true"
+        os.makedirs(self.clip_dir, exist_ok=True)
+
+        self._rings: Dict[str, FrameRing] = {}
+        self._pending: Dict[str, Tuple[float, str]] = {}  # stream -> (trigger time, url)
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, float, str]]]" = queue.Queue(maxsize=self.max_pending)
+        self._worker: Optional[threading.Thread] = None
+
+        self.clips_written = 0
+        self.clips_dropped = 0
+        self.rings_evicted = 0
+        self.frames_encoded = 0
+        self.bytes_written = 0
+        self.encode_seconds = 0.0
+
+    def start(self):
+        """Start the background encoding worker."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Stop the worker after pending clips are written."""
+        if self._worker and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout=self.post_seconds + 10)
+
+    def _ring(self, stream: str) -> FrameRing:
+        with self._lock:
+            ring = self._rings.get(stream)
+            if ring is None:
+                ring = FrameRing(self.pre_seconds + self.post_seconds + 1.0, self.ring_max_bytes)
+                self._rings[stream] = ring
+            return ring
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop rings that received no frame for ring_idle_seconds and have no clip pending."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._last_sweep = now
+            idle = [stream for stream, ring in self._rings.items()
+                    if now - ring.last_push > self.ring_idle_seconds and stream not in self._pending]
+            for stream in idle:
+                del self._rings[stream]
+            self.rings_evicted += len(idle)
+        return len(idle)
+
+    def push(self, stream: str, jpeg_bytes: bytes, timestamp: Optional[float] = None):
+        """Add an encoded frame to a stream's ring."""
+        if not self.enabled or not jpeg_bytes:
+            return
+        self._ring(stream).push(jpeg_bytes, timestamp)
+        if time.time() - self._last_sweep > self.ring_idle_seconds:
+            self.evict_idle()
+
+    def trigger(self, stream: str) -> Optional[str]:
+        """
+        Request a clip around the current moment.
+
+        Alerts that fire while a clip for the same stream is still collecting
+        post-event frames share that clip.
+
+        Returns:
+            URL the clip will be served from, or None if recording is disabled
+            or the encoder is saturated
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            if stream not in self._rings:
+                return None
+            pending = self._pending.get(stream)
+            if pending and now - pending[0] <= self.post_seconds:
+                return pending[1]
+
+            # Unguessable, so a clip URL cannot be derived from a camera and a time
+            filename = f"{secrets.token_urlsafe(16)}.avi"
+            url = f"{self.url_prefix}/{filename}"
+            try:
+                self._queue.put_nowait((stream, now, filename))
+            except queue.Full:
+                self.clips_dropped += 1
+                self.logger.warning(f"Clip encoder saturated, dropping clip for stream {stream}")
+                return None
+            self._pending[stream] = (now, url)
+
+        self.start()
+        return url
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            stream, trigger_time, filename = job
+            # Wait for the post-event window to fill before encoding
+            remaining = trigger_time + self.post_seconds - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+            try:
+                self._write_clip(stream, trigger_time, filename)
+            except Exception as e:
+                self.logger.error(f"Error writing clip {filename}: {e}")
+            finally:
+                with self._lock:
+                    pending = self._pending.get(stream)
+                    if pending and pending[0] == trigger_time:
+                        del self._pending[stream]
+
+    def clip_path(self, filename: str) -> Optional[str]:
+        """Path of a written clip, or None for names this recorder could not have produced."""
+        name, extension = os.path.splitext(filename)
+        if extension != ".avi" or not name or not all(c.isalnum() or c in "-_" for c in name):
+            return None
+        path = os.path.join(self.clip_dir, filename)
+        return path if os.path.isfile(path) else None
+
+    def _write_clip(self, stream: str, trigger_time: float, filename: str):
+        with self._lock:
+            ring = self._rings.get(stream)
+        frames = ring.window(trigger_time - self.pre_seconds, trigger_time + self.post_seconds) if ring else []
+        if not frames:
+            self.logger.warning(f"No buffered frames for clip {filename}")
+            return
+
+        start = time.perf_counter()
+        span = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / span if span > 0 else 1.0
+        path = os.path.join(self.clip_dir, filename)
+        writer = None
+        size = None
+        for _, data in frames:
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            if writer is None:
+                size = (frame.shape[1], frame.shape[0])
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), max(1.0, fps), size)
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size)
+            writer.write(frame)
+            self.frames_encoded += 1
+        if writer is None:
+            return
+        writer.release()
+
+        self.encode_seconds += time.perf_counter() - start
+        self.clips_written += 1
+        self.bytes_written += os.path.getsize(path) if os.path.exists(path) else 0
+        self.logger.info(f"Clip written: {path} ({len(frames)} frames, {fps:.1f} fps)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ring memory per stream and encoder throughput."""
+        with self._lock:
+            rings = dict(self._rings)
+        return {
+            # Stream keys include client and connection IDs, so rings are listed without them
+            "streams": [ring.get_stats() for ring in rings.values()],
+            "total_ring_bytes": sum(ring.get_stats()["bytes"] for ring in rings.values()),
+            "rings_evicted": self.rings_evicted,
+            "clips_written": self.clips_written,
+            "clips_dropped": self.clips_dropped,
+            "clips_pending": self._queue.qsize(),
+            "frames_encoded": self.frames_encoded,
+            "bytes_written": self.bytes_written,
+            "encode_fps": round(self.frames_encoded / self.encode_seconds, 1) if self.encode_seconds else 0.0,
+        }
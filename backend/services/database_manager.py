@@ -1,26 +1,89 @@
 import psycopg2
+import psycopg2.pool
 import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 import json
 
+from .migrations import apply_migrations, latest_version
+from .partition_manager import INTERVALS, ensure_partitions, apply_retention
+
+
+class PoolExhausted(Exception):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT."""
+
+
 class DatabaseManager:
-    """Handles PostgreSQL database operations for detections and alerts."""
+    """
+    Handles PostgreSQL database operations for detections and alerts.
+
+    Connections come from a thread-safe pool. Every operation checks one out
+    for the duration of a single cursor, so request handlers, job threads and
+    the snapshot writer never share a cursor or a transaction. Connections
+    that have been idle for a while are health-checked before use, broken
+    ones are discarded, and if the database is unreachable the pool is
+    re-created on a later call instead of staying disconnected.
+    """
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.connection = None
-        self.cursor = None
-        self.db_connected = False
+        self.pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+        self.min_connections = int(os.getenv("DB_POOL_MIN", "1"))
+        self.max_connections = int(os.getenv("DB_POOL_MAX", "10"))
+        self.acquire_timeout = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+        self.connect_timeout = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+        self.healthcheck_interval = float(os.getenv("DB_HEALTHCHECK_INTERVAL", "30"))
+        self.reconnect_interval = float(os.getenv("DB_RECONNECT_INTERVAL", "10"))
+
+        # Time partitioning of detections/alerts; retention 0 keeps everything
+        self.partition_interval = os.getenv("PARTITION_INTERVAL", "month")
+        if self.partition_interval not in INTERVALS:
+            self.partition_interval = "month"
+        self.partition_premake = int(os.getenv("PARTITION_PREMAKE", "2"))
+        self.retention_days = float(os.getenv("PARTITION_RETENTION_DAYS", "0"))
+        self.archive_dir = os.getenv("PARTITION_ARCHIVE_DIR") or None
+        self.maintenance_interval = float(os.getenv("PARTITION_MAINTENANCE_SECONDS", "3600"))
+        self._maintenance_stop = threading.Event()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        # Called (from the maintenance thread) with the partitions retention dropped
+        self.on_partitions_dropped: Optional[Callable[[List[str]], None]] = None
+
+        # ThreadedConnectionPool raises instead of blocking when it is empty,
+        # so checkouts wait on a semaphore sized to the pool first
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+        self._reconnect_lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._last_connect_attempt = 0.0
+
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+        self.reconnects = 0
+        self._busy_seconds = 0.0
+        self._busy_since = time.monotonic()
+        self._created_at = time.monotonic()
+
+    @property
+    def db_connected(self) -> bool:
+        return self.pool is not None
         
     def connect(self) -> bool:
         """
-        Establish connection to PostgreSQL database.
+        Create the connection pool.
         
         Returns:
             True if successful, False otherwise
         """
+        self._last_connect_attempt = time.monotonic()
         try:
             # Database connection parameters
             db_host = os.getenv("DB_HOST", "localhost")
@@ -29,147 +92,209 @@ class DatabaseManager:
             db_user = os.getenv("DB_USER", "postgres")
             db_password = os.getenv("DB_PASSWORD", "your_postgres_password")
             
-            # Establish connection
-            self.connection = psycopg2.connect(
+            # Opens min_connections right away, so a bad config fails here
+            self.pool = psycopg2.pool.ThreadedConnectionPool(
+                self.min_connections,
+                self.max_connections,
                 host=db_host,
                 port=db_port,
                 database=db_name,
                 user=db_user,
-                password=db_password
+                password=db_password,
+                connect_timeout=self.connect_timeout
             )
             
-            self.cursor = self.connection.cursor()
-            self.db_connected = True
-            self.logger.info("Connected to PostgreSQL database successfully")
+            self.logger.info(f"Connected to PostgreSQL database successfully "
+                             f"(pool {self.min_connections}-{self.max_connections})")
             
-            # Create tables if they don't exist
-            self._create_tables()
+            # Create or upgrade tables, indexes and the default camera
+            self._apply_migrations()
             
-            # Insert default camera if not exists
-            self._insert_default_camera()
+            # Create upcoming partitions now and keep them (and retention) up to date
+            self.maintain_partitions()
+            self._start_partition_maintenance()
             
             return True
         except Exception as e:
-            self.db_connected = False
+            # Migrations or partition setup failed after the pool opened its connections
+            if self.pool is not None:
+                try:
+                    self.pool.closeall()
+                except Exception as close_error:
+                    self.logger.error(f"Error closing connection pool: {close_error}")
+            self.pool = None
             self.logger.error(f"Error connecting to database: {e}")
             return False
+
+    def ensure_connected(self) -> bool:
+        """
+        Check the pool exists, re-creating it if the database was unreachable.
+
+        Reconnects are attempted at most once per DB_RECONNECT_INTERVAL so an
+        outage does not add a connect timeout to every request.
+        """
+        if self.pool is not None:
+            return True
+        with self._reconnect_lock:
+            if self.pool is not None:
+                return True
+            if time.monotonic() - self._last_connect_attempt < self.reconnect_interval:
+                return False
+            self.logger.info("Attempting to reconnect to PostgreSQL database")
+            if self.connect():
+                self.reconnects += 1
+                return True
+            return False
     
     def disconnect(self):
-        """Close database connection."""
+        """Close all pooled connections."""
         try:
-            if self.cursor:
-                self.cursor.close()
-            if self.connection:
-                self.connection.close()
-            self.db_connected = False
+            self._maintenance_stop.set()
+            if self.pool:
+                self.pool.closeall()
+            self.pool = None
+            self._last_used.clear()
             self.logger.info("Disconnected from PostgreSQL database")
         except Exception as e:
             self.logger.error(f"Error disconnecting from database: {e}")
-    
-    def _create_tables(self):
-        """Create required tables if they don't exist."""
-        if not self.db_connected or not self.cursor or not self.connection:
-            self.logger.warning("Database not connected. Skipping table creation.")
-            return
-            
+
+    # ── Connection pool ──────────────────────────────────────────
+
+    def _track_busy(self, delta: int):
+        """Adjust the checked-out count, integrating it over time for utilisation."""
+        now = time.monotonic()
+        self._busy_seconds += self.in_use * (now - self._busy_since)
+        self._busy_since = now
+        self.in_use += delta
+
+    def _healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        last_used = self._last_used.get(id(connection))
+        # New connections were just opened; only ones left idle need a round trip
+        if last_used is None or time.monotonic() - last_used < self.healthcheck_interval:
+            return True
         try:
-            # Create cameras table
-            create_cameras_table = """
-            CREATE TABLE IF NOT EXISTS cameras (
-                camera_id SERIAL PRIMARY KEY,
-                location VARCHAR(255),
-                ip_address VARCHAR(45),
-                status BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-            
-            # Create detections table
-            create_detections_table = """
-            CREATE TABLE IF NOT EXISTS detections (
-                detection_id SERIAL PRIMARY KEY,
-                camera_id INTEGER REFERENCES cameras(camera_id),
-                type VARCHAR(50),
-                confidence FLOAT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                image_url VARCHAR(500),
-                is_read BOOLEAN DEFAULT FALSE
-            );
-            """
-            
-            # Create alerts table
-            create_alerts_table = """
-            CREATE TABLE IF NOT EXISTS alerts (
-                alert_id SERIAL PRIMARY KEY,
-                detection_id INTEGER REFERENCES detections(detection_id),
-                severity VARCHAR(20),
-                status VARCHAR(20) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-            
-            # Create users table
-            create_users_table = """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id SERIAL PRIMARY KEY,
-                full_name VARCHAR(100) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                role VARCHAR(20) DEFAULT 'user',
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-
-            # Execute table creation queries
-            self.cursor.execute(create_cameras_table)
-            self.cursor.execute(create_detections_table)
-            self.cursor.execute(create_alerts_table)
-            self.cursor.execute(create_users_table)
-            
-            # Add is_read column if it doesn't exist (for existing databases)
-            self.cursor.execute("""
-                ALTER TABLE detections ADD COLUMN IF NOT EXISTS is_read BOOLEAN DEFAULT FALSE;
-            """)
-            
-            # Commit changes
-            self.connection.commit()
-            self.logger.info("Database tables created/verified successfully")
-            
-        except Exception as e:
-            self.logger.error(f"Error creating tables: {e}")
-            if self.connection:
-                self.connection.rollback()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, pool, connection):
+        self._last_used.pop(id(connection), None)
+        with self._lock:
+            self.discarded += 1
+        try:
+            pool.putconn(connection, close=True)
+        except Exception:
+            pass
+
+    def _checkout(self, pool):
+        """Take a connection from the pool, replacing dead ones."""
+        for _ in range(self.max_connections + 1):
+            connection = pool.getconn()
+            if self._healthy(connection):
+                return connection
+            self.logger.warning("Discarding broken database connection")
+            self._discard(pool, connection)
+        raise psycopg2.OperationalError("No healthy database connection available")
+
+    @contextmanager
+    def _cursor(self):
+        """
+        Check out a connection and yield a fresh cursor on it.
+
+        The transaction is committed when the block exits normally and rolled
+        back when it raises. Connections that fail with a connection-level
+        error are closed instead of being returned to the pool.
+
+        Raises:
+            PoolExhausted: No connection freed up within DB_POOL_TIMEOUT
+        """
+        pool = self.pool
+        if pool is None:
+            raise psycopg2.InterfaceError("Database not connected")
+
+        start = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                self._track_busy(1)
+        if not acquired:
+            raise PoolExhausted(f"No database connection free after {self.acquire_timeout}s")
+
+        connection = None
+        try:
+            connection = self._checkout(pool)
+            try:
+                with connection.cursor() as cursor:
+                    yield cursor
+                connection.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self._discard(pool, connection)
+                connection = None
+                raise
+            except BaseException:
+                if not connection.closed:
+                    connection.rollback()
+                raise
+        finally:
+            if connection is not None:
+                self._last_used[id(connection)] = time.monotonic()
+                pool.putconn(connection, close=bool(connection.closed))
+            with self._lock:
+                self._track_busy(-1)
+            self._slots.release()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Pool size, checkout wait times and utilisation since start."""
+        with self._lock:
+            self._track_busy(0)
+            elapsed = time.monotonic() - self._created_at
+            pool = self.pool
+            return {
+                "connected": pool is not None,
+                "min_connections": self.min_connections,
+                "max_connections": self.max_connections,
+                "open_connections": len(pool._used) + len(pool._pool) if pool else 0,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "timeouts": self.timeouts,
+                "discarded_connections": self.discarded,
+                "reconnects": self.reconnects,
+                "utilisation": round(self.in_use / self.max_connections, 3),
+                "avg_utilisation": round(self._busy_seconds / (elapsed * self.max_connections), 3) if elapsed else 0.0,
+            }
     
-    def _insert_default_camera(self):
-        """Insert default camera if it doesn't exist."""
-        if not self.db_connected or not self.cursor or not self.connection:
-            self.logger.warning("Database not connected. Skipping default camera insertion.")
+    def _apply_migrations(self):
+        """Bring the schema up to date with services/migrations.py."""
+        if not self.db_connected:
+            self.logger.warning("Database not connected. Skipping migrations.")
             return
             
         try:
-            # Check if default camera exists
-            self.cursor.execute("SELECT COUNT(*) FROM cameras WHERE camera_id = 1")
-            result = self.cursor.fetchone()
-            if result:
-                count = result[0]
-                
-                if count == 0:
-                    # Insert default camera
-                    insert_camera = """
-                    INSERT INTO cameras (camera_id, location, ip_address, status)
-                    VALUES (1, 'Default Webcam', NULL, TRUE);
-                    """
-                    self.cursor.execute(insert_camera)
-                    self.connection.commit()
-                    self.logger.info("Default camera inserted successfully")
-                
+            with self._cursor() as cursor:
+                applied = apply_migrations(cursor)
+            if applied:
+                self.logger.info(f"Applied database migrations: {applied}")
+            self.logger.info(f"Database schema at version {latest_version()}")
+            
         except Exception as e:
-            self.logger.error(f"Error inserting default camera: {e}")
-            if self.connection:
-                self.connection.rollback()
+            self.logger.error(f"Error applying migrations: {e}")
     
     def save_detection(self, detection_type: str, confidence: float, 
                       timestamp: Optional[datetime] = None, image_url: Optional[str] = None) -> Optional[int]:
@@ -186,36 +311,56 @@ class DatabaseManager:
             Detection ID if successful, None otherwise
         """
         # If database is not connected, just return None without error
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Skipping detection save.")
             return None
             
         try:
-            if not timestamp:
-                timestamp = datetime.now()
-            
-            # Insert detection record
-            insert_detection = """
-            INSERT INTO detections (camera_id, type, confidence, timestamp, image_url)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING detection_id;
-            """
-            
-            self.cursor.execute(insert_detection, (1, detection_type, confidence, timestamp, image_url))
-            result = self.cursor.fetchone()
-            if result:
-                detection_id = result[0]
-            else:
-                return None
-            self.connection.commit()
+            with self._cursor() as cursor:
+                if not timestamp:
+                    timestamp = datetime.now()
             
-            self.logger.info(f"Detection saved with ID: {detection_id}")
-            return detection_id
+                # Insert detection record, counted in the rollups under severity "none" until it has an alert
+                insert_detection = """
+                WITH inserted AS (
+                    INSERT INTO detections (camera_id, type, confidence, timestamp, image_url)
+                    VALUES (%(camera_id)s, %(type)s, %(confidence)s, %(timestamp)s, %(image_url)s)
+                    RETURNING detection_id, camera_id, type, confidence, timestamp
+                ), hourly AS (
+                    INSERT INTO detection_rollups_hourly AS r
+                        (bucket, camera_id, type, severity, count, confidence_sum)
+                    SELECT date_trunc('hour', timestamp), camera_id, COALESCE(type, 'unknown'),
+                           'none', 1, COALESCE(confidence, 0)
+                    FROM inserted
+                    ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                    SET count = r.count + EXCLUDED.count,
+                        confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                ), daily AS (
+                    INSERT INTO detection_rollups_daily AS r
+                        (bucket, camera_id, type, severity, count, confidence_sum)
+                    SELECT date_trunc('day', timestamp), camera_id, COALESCE(type, 'unknown'),
+                           'none', 1, COALESCE(confidence, 0)
+                    FROM inserted
+                    ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                    SET count = r.count + EXCLUDED.count,
+                        confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                )
+                SELECT detection_id FROM inserted;
+                """
+            
+                cursor.execute(insert_detection, {"camera_id": 1, "type": detection_type, "confidence": confidence,
+                                                  "timestamp": timestamp, "image_url": image_url})
+                result = cursor.fetchone()
+                if result:
+                    detection_id = result[0]
+                else:
+                    return None
+            
+                self.logger.info(f"Detection saved with ID: {detection_id}")
+                return detection_id
             
         except Exception as e:
             self.logger.error(f"Error saving detection: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
     
     def save_alert(self, detection_id: int, severity: str, status: str = "pending") -> bool:
@@ -231,27 +376,64 @@ class DatabaseManager:
             True if successful, False otherwise
         """
         # If database is not connected, just return False without error
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Skipping alert save.")
             return False
             
         try:
-            # Insert alert record
-            insert_alert = """
-            INSERT INTO alerts (detection_id, severity, status)
-            VALUES (%s, %s, %s);
-            """
+            with self._cursor() as cursor:
+                # Insert alert record, stamped with the detection's time so it never predates it;
+                # a first alert moves the detection from severity "none" to this one in the rollups
+                insert_alert = """
+                WITH detection AS (
+                    SELECT COALESCE(camera_id, 1) AS camera_id, COALESCE(type, 'unknown') AS type,
+                           COALESCE(confidence, 0) AS confidence, timestamp
+                    FROM detections WHERE detection_id = %(detection_id)s
+                    ORDER BY timestamp DESC LIMIT 1
+                ), first_alert AS (
+                    SELECT * FROM detection
+                    WHERE NOT EXISTS (SELECT 1 FROM alerts WHERE detection_id = %(detection_id)s)
+                ), alerted AS (
+                    INSERT INTO alerts (detection_id, severity, status, created_at)
+                    SELECT %(detection_id)s, %(severity)s::varchar, %(status)s::varchar,
+                           COALESCE((SELECT timestamp FROM detection), CURRENT_TIMESTAMP)
+                ), hourly_unrated AS (
+                    UPDATE detection_rollups_hourly r
+                    SET count = r.count - 1, confidence_sum = r.confidence_sum - f.confidence
+                    FROM first_alert f
+                    WHERE r.bucket = date_trunc('hour', f.timestamp) AND r.camera_id = f.camera_id
+                      AND r.type = f.type AND r.severity = 'none'
+                ), hourly AS (
+                    INSERT INTO detection_rollups_hourly AS r
+                        (bucket, camera_id, type, severity, count, confidence_sum)
+                    SELECT date_trunc('hour', timestamp), camera_id, type, %(severity)s::varchar, 1, confidence
+                    FROM first_alert
+                    ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                    SET count = r.count + EXCLUDED.count,
+                        confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum
+                ), daily_unrated AS (
+                    UPDATE detection_rollups_daily r
+                    SET count = r.count - 1, confidence_sum = r.confidence_sum - f.confidence
+                    FROM first_alert f
+                    WHERE r.bucket = date_trunc('day', f.timestamp) AND r.camera_id = f.camera_id
+                      AND r.type = f.type AND r.severity = 'none'
+                )
+                INSERT INTO detection_rollups_daily AS r
+                    (bucket, camera_id, type, severity, count, confidence_sum)
+                SELECT date_trunc('day', timestamp), camera_id, type, %(severity)s::varchar, 1, confidence
+                FROM first_alert
+                ON CONFLICT (bucket, camera_id, type, severity) DO UPDATE
+                SET count = r.count + EXCLUDED.count,
+                    confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum;
+                """
             
-            self.cursor.execute(insert_alert, (detection_id, severity, status))
-            self.connection.commit()
+                cursor.execute(insert_alert, {"detection_id": detection_id, "severity": severity, "status": status})
             
-            self.logger.info(f"Alert saved for detection ID: {detection_id}")
-            return True
+                self.logger.info(f"Alert saved for detection ID: {detection_id}")
+                return True
             
         except Exception as e:
             self.logger.error(f"Error saving alert: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
     
     def get_recent_detections(self, limit: int = 50) -> List[Dict[str, Any]]:
@@ -265,37 +447,38 @@ class DatabaseManager:
             List of detection records
         """
         # If database is not connected, return empty list
-        if not self.db_connected or not self.cursor:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Returning empty detections list.")
             return []
             
         try:
-            query = """
-            SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
-                   c.location, c.camera_id, d.is_read
-            FROM detections d
-            JOIN cameras c ON d.camera_id = c.camera_id
-            ORDER BY d.timestamp DESC
-            LIMIT %s;
-            """
-            
-            self.cursor.execute(query, (limit,))
-            rows = self.cursor.fetchall()
-            
-            detections = []
-            for row in rows:
-                detections.append({
-                    "detection_id": row[0],
-                    "type": row[1],
-                    "confidence": row[2],
-                    "timestamp": row[3].isoformat() if row[3] else None,
-                    "image_url": row[4],
-                    "camera_location": row[5],
-                    "camera_id": row[6],
-                    "is_read": row[7] if row[7] is not None else False
-                })
-            
-            return detections
+            with self._cursor() as cursor:
+                query = """
+                SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                       c.location, c.camera_id, d.is_read
+                FROM detections d
+                JOIN cameras c ON d.camera_id = c.camera_id
+                ORDER BY d.timestamp DESC, d.detection_id DESC
+                LIMIT %s;
+                """
+            
+                cursor.execute(query, (limit,))
+                rows = cursor.fetchall()
+            
+                detections = []
+                for row in rows:
+                    detections.append({
+                        "detection_id": row[0],
+                        "type": row[1],
+                        "confidence": row[2],
+                        "timestamp": row[3].isoformat() if row[3] else None,
+                        "image_url": row[4],
+                        "camera_location": row[5],
+                        "camera_id": row[6],
+                        "is_read": row[7] if row[7] is not None else False
+                    })
+            
+                return detections
             
         except Exception as e:
             self.logger.error(f"Error retrieving detections: {e}")
@@ -312,35 +495,36 @@ class DatabaseManager:
             Detection record or None if not found
         """
         # If database is not connected, return None
-        if not self.db_connected or not self.cursor:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Returning None for detection lookup.")
             return None
             
         try:
-            query = """
-            SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
-                   c.location, c.camera_id, d.is_read
-            FROM detections d
-            JOIN cameras c ON d.camera_id = c.camera_id
-            WHERE d.detection_id = %s;
-            """
-            
-            self.cursor.execute(query, (detection_id,))
-            row = self.cursor.fetchone()
-            
-            if row:
-                return {
-                    "detection_id": row[0],
-                    "type": row[1],
-                    "confidence": row[2],
-                    "timestamp": row[3].isoformat() if row[3] else None,
-                    "image_url": row[4],
-                    "camera_location": row[5],
-                    "camera_id": row[6],
-                    "is_read": row[7] if row[7] is not None else False
-                }
+            with self._cursor() as cursor:
+                query = """
+                SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                       c.location, c.camera_id, d.is_read
+                FROM detections d
+                JOIN cameras c ON d.camera_id = c.camera_id
+                WHERE d.detection_id = %s;
+                """
             
-            return None
+                cursor.execute(query, (detection_id,))
+                row = cursor.fetchone()
+            
+                if row:
+                    return {
+                        "detection_id": row[0],
+                        "type": row[1],
+                        "confidence": row[2],
+                        "timestamp": row[3].isoformat() if row[3] else None,
+                        "image_url": row[4],
+                        "camera_location": row[5],
+                        "camera_id": row[6],
+                        "is_read": row[7] if row[7] is not None else False
+                    }
+            
+                return None
             
         except Exception as e:
             self.logger.error(f"Error retrieving detection: {e}")
@@ -357,31 +541,32 @@ class DatabaseManager:
             List of alert records
         """
         # If database is not connected, return empty list
-        if not self.db_connected or not self.cursor:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Returning empty alerts list.")
             return []
             
         try:
-            query = """
-            SELECT alert_id, severity, status, created_at
-            FROM alerts
-            WHERE detection_id = %s
-            ORDER BY created_at DESC;
-            """
-            
-            self.cursor.execute(query, (detection_id,))
-            rows = self.cursor.fetchall()
-            
-            alerts = []
-            for row in rows:
-                alerts.append({
-                    "alert_id": row[0],
-                    "severity": row[1],
-                    "status": row[2],
-                    "created_at": row[3].isoformat() if row[3] else None
-                })
-            
-            return alerts
+            with self._cursor() as cursor:
+                query = """
+                SELECT alert_id, severity, status, created_at
+                FROM alerts
+                WHERE detection_id = %s
+                ORDER BY created_at DESC;
+                """
+            
+                cursor.execute(query, (detection_id,))
+                rows = cursor.fetchall()
+            
+                alerts = []
+                for row in rows:
+                    alerts.append({
+                        "alert_id": row[0],
+                        "severity": row[1],
+                        "status": row[2],
+                        "created_at": row[3].isoformat() if row[3] else None
+                    })
+            
+                return alerts
             
         except Exception as e:
             self.logger.error(f"Error retrieving alerts: {e}")
@@ -397,22 +582,20 @@ class DatabaseManager:
         Returns:
             True if successful, False otherwise
         """
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot mark detection as read.")
             return False
             
         try:
-            self.cursor.execute(
-                "UPDATE detections SET is_read = TRUE WHERE detection_id = %s",
-                (detection_id,)
-            )
-            self.connection.commit()
-            self.logger.info(f"Detection {detection_id} marked as read")
-            return True
+            with self._cursor() as cursor:
+                cursor.execute(
+                    "UPDATE detections SET is_read = TRUE WHERE detection_id = %s",
+                    (detection_id,)
+                )
+                self.logger.info(f"Detection {detection_id} marked as read")
+                return True
         except Exception as e:
             self.logger.error(f"Error marking detection as read: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
     def mark_all_detections_read(self) -> bool:
@@ -422,22 +605,308 @@ class DatabaseManager:
         Returns:
             True if successful, False otherwise
         """
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot mark detections as read.")
             return False
             
         try:
-            self.cursor.execute("UPDATE detections SET is_read = TRUE WHERE is_read = FALSE")
-            affected = self.cursor.rowcount
-            self.connection.commit()
-            self.logger.info(f"Marked {affected} detections as read")
-            return True
+            with self._cursor() as cursor:
+                cursor.execute("UPDATE detections SET is_read = TRUE WHERE is_read = FALSE")
+                affected = cursor.rowcount
+                self.logger.info(f"Marked {affected} detections as read")
+                return True
         except Exception as e:
             self.logger.error(f"Error marking all detections as read: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
+    def count_unread_detections(self) -> int:
+        """
+        Count detections not yet marked as read.
+        
+        Returns:
+            Number of unread detections (0 if the database is unavailable)
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Returning 0 unread detections.")
+            return 0
+            
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM detections WHERE is_read = FALSE")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Error counting unread detections: {e}")
+            return 0
+
+    # ── Partition maintenance ────────────────────────────────────
+
+    def maintain_partitions(self) -> Dict[str, List[str]]:
+        """
+        Create upcoming detections/alerts partitions and drop expired ones.
+        
+        Returns:
+            Dictionary with the partitions created and dropped
+        """
+        result: Dict[str, List[str]] = {"created": [], "dropped": []}
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Skipping partition maintenance.")
+            return result
+            
+        try:
+            with self._cursor() as cursor:
+                result["created"] = ensure_partitions(cursor, self.partition_interval, self.partition_premake)
+            if self.retention_days > 0:
+                with self._cursor() as cursor:
+                    result["dropped"] = apply_retention(cursor, self.retention_days, self.archive_dir)
+        except Exception as e:
+            self.logger.error(f"Error maintaining partitions: {e}")
+        if result["dropped"] and self.on_partitions_dropped:
+            try:
+                self.on_partitions_dropped(result["dropped"])
+            except Exception as e:
+                self.logger.error(f"Error handling dropped partitions: {e}")
+        return result
+
+    def _start_partition_maintenance(self):
+        if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+            return
+        self._maintenance_stop.clear()
+
+        def run():
+            while not self._maintenance_stop.wait(self.maintenance_interval):
+                self.maintain_partitions()
+
+        self._maintenance_thread = threading.Thread(target=run, name="partition-maintenance", daemon=True)
+        self._maintenance_thread.start()
+
+    # ── Camera region methods ────────────────────────────────────
+
+    def get_camera_regions(self, camera_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the inference regions configured for a camera.
+
+        Args:
+            camera_id: ID of the camera
+
+        Returns:
+            List of region records (polygon as a list of [x, y] points)
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty regions list.")
+            return []
+
+        try:
+            with self._cursor() as cursor:
+                query = """
+                SELECT region_id, camera_id, name, polygon, enabled, created_at
+                FROM camera_regions
+                WHERE camera_id = %s
+                ORDER BY region_id;
+                """
+                cursor.execute(query, (camera_id,))
+                rows = cursor.fetchall()
+
+                regions = []
+                for row in rows:
+                    regions.append({
+                        "region_id": row[0],
+                        "camera_id": row[1],
+                        "name": row[2],
+                        "polygon": row[3] if not isinstance(row[3], str) else json.loads(row[3]),
+                        "enabled": row[4] if row[4] is not None else True,
+                        "created_at": row[5].isoformat() if row[5] else None,
+                    })
+                return regions
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving camera regions: {e}")
+            return []
+
+    def save_camera_region(self, camera_id: int, name: str, polygon: List[List[float]],
+                           enabled: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Save a new inference region for a camera.
+
+        Args:
+            camera_id: ID of the camera
+            name: Human-readable region name
+            polygon: List of normalized [x, y] points
+            enabled: Whether the region is used for inference
+
+        Returns:
+            Region dict if successful, None otherwise
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot save camera region.")
+            return None
+
+        try:
+            with self._cursor() as cursor:
+                insert_region = """
+                INSERT INTO camera_regions (camera_id, name, polygon, enabled)
+                VALUES (%s, %s, %s, %s)
+                RETURNING region_id, created_at;
+                """
+                cursor.execute(insert_region, (camera_id, name, json.dumps(polygon), enabled))
+                row = cursor.fetchone()
+
+                if row:
+                    self.logger.info(f"Region {row[0]} saved for camera {camera_id}")
+                    return {
+                        "region_id": row[0],
+                        "camera_id": camera_id,
+                        "name": name,
+                        "polygon": polygon,
+                        "enabled": enabled,
+                        "created_at": row[1].isoformat() if row[1] else None,
+                    }
+                return None
+
+        except Exception as e:
+            self.logger.error(f"Error saving camera region: {e}")
+            return None
+
+    def delete_camera_region(self, camera_id: int, region_id: int) -> bool:
+        """
+        Delete an inference region.
+
+        Args:
+            camera_id: ID of the camera owning the region
+            region_id: ID of the region to delete
+
+        Returns:
+            True if a region was deleted, False otherwise
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot delete camera region.")
+            return False
+
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM camera_regions WHERE camera_id = %s AND region_id = %s",
+                    (camera_id, region_id)
+                )
+                affected = cursor.rowcount
+                return affected > 0
+        except Exception as e:
+            self.logger.error(f"Error deleting camera region: {e}")
+            return False
+
+    # ── Analysis job methods ─────────────────────────────────────
+
+    _JOB_COLUMNS = ("job_id", "job_type", "status", "progress", "params", "result", "error",
+                    "cpu_seconds", "items_processed", "items_per_second",
+                    "created_at", "started_at", "finished_at")
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        job = dict(zip(self._JOB_COLUMNS, row))
+        for key in ("params", "result"):
+            if isinstance(job[key], str):
+                job[key] = json.loads(job[key])
+        for key in ("created_at", "started_at", "finished_at"):
+            if job[key] is not None and not isinstance(job[key], str):
+                job[key] = job[key].isoformat()
+        return job
+
+    def save_job(self, job: Dict[str, Any]) -> bool:
+        """
+        Insert or update an analysis job record.
+
+        Args:
+            job: Job record as produced by JobService
+
+        Returns:
+            True if saved, False otherwise
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot save job.")
+            return False
+
+        try:
+            with self._cursor() as cursor:
+                upsert_job = f"""
+                INSERT INTO analysis_jobs ({", ".join(self._JOB_COLUMNS)})
+                VALUES ({", ".join(["%s"] * len(self._JOB_COLUMNS))})
+                ON CONFLICT (job_id) DO UPDATE SET
+                    status = EXCLUDED.status,
+                    progress = EXCLUDED.progress,
+                    result = EXCLUDED.result,
+                    error = EXCLUDED.error,
+                    cpu_seconds = EXCLUDED.cpu_seconds,
+                    items_processed = EXCLUDED.items_processed,
+                    items_per_second = EXCLUDED.items_per_second,
+                    started_at = EXCLUDED.started_at,
+                    finished_at = EXCLUDED.finished_at;
+                """
+                values = [job.get(column) for column in self._JOB_COLUMNS]
+                values[4] = json.dumps(job.get("params"), default=str)
+                values[5] = json.dumps(job["result"], default=str) if job.get("result") is not None else None
+                cursor.execute(upsert_job, values)
+                return True
+
+        except Exception as e:
+            self.logger.error(f"Error saving job: {e}")
+            return False
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get an analysis job by ID.
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Job dict if found, None otherwise
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Cannot get job.")
+            return None
+
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {', '.join(self._JOB_COLUMNS)} FROM analysis_jobs WHERE job_id = %s",
+                    (job_id,)
+                )
+                row = cursor.fetchone()
+                return self._row_to_job(row) if row else None
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving job: {e}")
+            return None
+
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recent analysis jobs.
+
+        Args:
+            limit: Maximum number of jobs to return
+            status: Only return jobs in this status
+
+        Returns:
+            List of job dicts, newest first
+        """
+        if not self.ensure_connected():
+            self.logger.warning("Database not connected. Returning empty jobs list.")
+            return []
+
+        try:
+            with self._cursor() as cursor:
+                query = f"SELECT {', '.join(self._JOB_COLUMNS)} FROM analysis_jobs"
+                params: List[Any] = []
+                if status:
+                    query += " WHERE status = %s"
+                    params.append(status)
+                query += " ORDER BY created_at DESC LIMIT %s"
+                params.append(limit)
+                cursor.execute(query, params)
+                return [self._row_to_job(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving jobs: {e}")
+            return []
+
     # ── User management methods ──────────────────────────────────
 
     def create_user(self, full_name: str, email: str, password_hash: str, role: str = "user") -> Optional[Dict[str, Any]]:
@@ -453,42 +922,38 @@ class DatabaseManager:
         Returns:
             User dict if successful, None otherwise
         """
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot create user.")
             return None
 
         try:
-            insert_user = """
-            INSERT INTO users (full_name, email, password_hash, role)
-            VALUES (%s, %s, %s, %s)
-            RETURNING user_id, full_name, email, role, is_active, created_at;
-            """
-            self.cursor.execute(insert_user, (full_name, email, password_hash, role))
-            row = self.cursor.fetchone()
-            self.connection.commit()
-
-            if row:
-                user = {
-                    "user_id": row[0],
-                    "full_name": row[1],
-                    "email": row[2],
-                    "role": row[3],
-                    "is_active": row[4],
-                    "created_at": row[5].isoformat() if row[5] else None,
-                }
-                self.logger.info(f"User created: {email} (ID: {user['user_id']})")
-                return user
-            return None
+            with self._cursor() as cursor:
+                insert_user = """
+                INSERT INTO users (full_name, email, password_hash, role)
+                VALUES (%s, %s, %s, %s)
+                RETURNING user_id, full_name, email, role, is_active, created_at;
+                """
+                cursor.execute(insert_user, (full_name, email, password_hash, role))
+                row = cursor.fetchone()
+
+                if row:
+                    user = {
+                        "user_id": row[0],
+                        "full_name": row[1],
+                        "email": row[2],
+                        "role": row[3],
+                        "is_active": row[4],
+                        "created_at": row[5].isoformat() if row[5] else None,
+                    }
+                    self.logger.info(f"User created: {email} (ID: {user['user_id']})")
+                    return user
+                return None
 
         except psycopg2.errors.UniqueViolation:
             self.logger.warning(f"User with email {email} already exists")
-            if self.connection:
-                self.connection.rollback()
             return None
         except Exception as e:
             self.logger.error(f"Error creating user: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
 
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
@@ -501,30 +966,31 @@ class DatabaseManager:
         Returns:
             User dict (including password_hash) or None
         """
-        if not self.db_connected or not self.cursor:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot look up user.")
             return None
 
         try:
-            query = """
-            SELECT user_id, full_name, email, password_hash, role, is_active, created_at
-            FROM users
-            WHERE email = %s;
-            """
-            self.cursor.execute(query, (email,))
-            row = self.cursor.fetchone()
-
-            if row:
-                return {
-                    "user_id": row[0],
-                    "full_name": row[1],
-                    "email": row[2],
-                    "password_hash": row[3],
-                    "role": row[4],
-                    "is_active": row[5],
-                    "created_at": row[6].isoformat() if row[6] else None,
-                }
-            return None
+            with self._cursor() as cursor:
+                query = """
+                SELECT user_id, full_name, email, password_hash, role, is_active, created_at
+                FROM users
+                WHERE email = %s;
+                """
+                cursor.execute(query, (email,))
+                row = cursor.fetchone()
+
+                if row:
+                    return {
+                        "user_id": row[0],
+                        "full_name": row[1],
+                        "email": row[2],
+                        "password_hash": row[3],
+                        "role": row[4],
+                        "is_active": row[5],
+                        "created_at": row[6].isoformat() if row[6] else None,
+                    }
+                return None
 
         except Exception as e:
             self.logger.error(f"Error looking up user by email: {e}")
@@ -540,29 +1006,30 @@ class DatabaseManager:
         Returns:
             User dict (without password_hash) or None
         """
-        if not self.db_connected or not self.cursor:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot look up user.")
             return None
 
         try:
-            query = """
-            SELECT user_id, full_name, email, role, is_active, created_at
-            FROM users
-            WHERE user_id = %s;
-            """
-            self.cursor.execute(query, (user_id,))
-            row = self.cursor.fetchone()
-
-            if row:
-                return {
-                    "user_id": row[0],
-                    "full_name": row[1],
-                    "email": row[2],
-                    "role": row[3],
-                    "is_active": row[4],
-                    "created_at": row[5].isoformat() if row[5] else None,
-                }
-            return None
+            with self._cursor() as cursor:
+                query = """
+                SELECT user_id, full_name, email, role, is_active, created_at
+                FROM users
+                WHERE user_id = %s;
+                """
+                cursor.execute(query, (user_id,))
+                row = cursor.fetchone()
+
+                if row:
+                    return {
+                        "user_id": row[0],
+                        "full_name": row[1],
+                        "email": row[2],
+                        "role": row[3],
+                        "is_active": row[4],
+                        "created_at": row[5].isoformat() if row[5] else None,
+                    }
+                return None
 
         except Exception as e:
             self.logger.error(f"Error looking up user by ID: {e}")
@@ -579,29 +1046,27 @@ class DatabaseManager:
         Returns:
             True if successful, False otherwise
         """
-        if not self.db_connected or not self.cursor or not self.connection:
+        if not self.ensure_connected():
             self.logger.warning("Database not connected. Cannot update password.")
             return False
 
         try:
-            query = """
-            UPDATE users
-            SET password_hash = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE email = %s AND is_active = TRUE;
-            """
-            self.cursor.execute(query, (new_password_hash, email))
-            affected = self.cursor.rowcount
-            self.connection.commit()
-
-            if affected > 0:
-                self.logger.info(f"Password updated for user: {email}")
-                return True
-            else:
-                self.logger.warning(f"No active user found with email: {email}")
-                return False
+            with self._cursor() as cursor:
+                query = """
+                UPDATE users
+                SET password_hash = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE email = %s AND is_active = TRUE;
+                """
+                cursor.execute(query, (new_password_hash, email))
+                affected = cursor.rowcount
+
+                if affected > 0:
+                    self.logger.info(f"Password updated for user: {email}")
+                    return True
+                else:
+                    self.logger.warning(f"No active user found with email: {email}")
+                    return False
 
         except Exception as e:
             self.logger.error(f"Error updating user password: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
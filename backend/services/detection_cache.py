@@ -0,0 +1,175 @@
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+
+class DetectionCache:
+    """
+    Write-through cache of the newest detections and the unread count.
+
+    Filled from the database once, then kept current by the code paths that
+    change detections: DetectionWriter reports each batch it writes, and
+    marking detections read goes through mark_read() and mark_all_read().
+    Dashboard polls are then answered from memory, and the ETag (latest
+    detection ID plus a version bumped on read-state changes) lets clients
+    revalidate with a 304.
+
+    State is per process: with several server workers each keeps its own
+    copy, which only sees the writes made by that worker.
+    """
+
+    def __init__(self, database, capacity: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.database = database
+        self.capacity = capacity or int(os.getenv("DETECTION_CACHE_SIZE", "200"))
+
+        self._rows: List[Dict[str, Any]] = []
+        self._locations: Dict[int, Optional[str]] = {}
+        self._unread = 0
+        self._latest_id = 0
+        self._version = 0
+        self._primed = False
+        # Bumped on every change, so a fill racing with a write is discarded
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.fills = 0
+        self.invalidations = 0
+
+    @property
+    def primed(self) -> bool:
+        return self._primed
+
+    @property
+    def etag(self) -> Optional[str]:
+        return f'"{self._latest_id}-{self._version}"' if self._primed else None
+
+    async def prime(self) -> bool:
+        """Load the newest detections and the unread count from the database."""
+        generation = self._generation
+        if not await self.database.ensure_connected():
+            return False
+        rows = await self.database.get_recent_detections(self.capacity)
+        unread = await self.database.count_unread_detections()
+        if generation != self._generation:
+            return False
+        self._rows = rows
+        self._locations = {row["camera_id"]: row["camera_location"] for row in rows}
+        self._unread = unread
+        self._latest_id = max((row["detection_id"] for row in rows), default=0)
+        self._version += 1
+        self._primed = True
+        self.fills += 1
+        return True
+
+    def invalidate(self):
+        """Drop the cached state; the next read fills it again."""
+        self._primed = False
+        self._generation += 1
+        self._version += 1
+        self.invalidations += 1
+
+    async def recent(self, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest detections, or None if the cache cannot answer (too many rows or no database)."""
+        if limit > self.capacity or (not self._primed and not await self.prime()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [dict(row) for row in self._rows[:limit]]
+
+    async def unread_count(self) -> Optional[int]:
+        if not self._primed and not await self.prime():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._unread
+
+    def record_written(self, records: List[Dict[str, Any]], written: int):
+        """Add a batch DetectionWriter has just stored."""
+        self._generation += 1
+        if not self._primed:
+            return
+        # Some rows already existed (a replay), or a camera we have no location for
+        if written != len(records) or any(r["camera_id"] not in self._locations for r in records):
+            self.invalidate()
+            return
+
+        rows = [{
+            "detection_id": r["detection_id"],
+            "type": r["type"],
+            "confidence": r["confidence"],
+            "timestamp": r["timestamp"].isoformat() if isinstance(r["timestamp"], datetime) else r["timestamp"],
+            "image_url": r["image_url"],
+            "camera_location": self._locations[r["camera_id"]],
+            "camera_id": r["camera_id"],
+            "is_read": False,
+        } for r in records]
+        self._rows = sorted(self._rows + rows, key=lambda row: (row["timestamp"], row["detection_id"]),
+                            reverse=True)[:self.capacity]
+        self._unread += len(rows)
+        newest = max(row["detection_id"] for row in rows)
+        # Older IDs arriving late (spool replay) would not move the ETag otherwise
+        if min(row["detection_id"] for row in rows) <= self._latest_id:
+            self._version += 1
+        self._latest_id = max(self._latest_id, newest)
+
+    async def mark_read(self, detection_id: int) -> bool:
+        """Mark a detection read in the database and in the cache."""
+        generation = self._generation
+        if not await self.database.mark_detection_read(detection_id):
+            return False
+        unread = await self.database.count_unread_detections()
+        # A batch written meanwhile may or may not be in that count
+        if generation != self._generation:
+            self.invalidate()
+            return True
+        self._generation += 1
+        for row in self._rows:
+            if row["detection_id"] == detection_id:
+                row["is_read"] = True
+        self._unread = unread
+        self._version += 1
+        return True
+
+    async def mark_all_read(self) -> bool:
+        """Mark every detection read in the database and in the cache."""
+        generation = self._generation
+        if not await self.database.mark_all_detections_read():
+            return False
+        if generation != self._generation:
+            self.invalidate()
+            return True
+        self._generation += 1
+        for row in self._rows:
+            row["is_read"] = True
+        self._unread = 0
+        self._version += 1
+        return True
+
+    def note_not_modified(self):
+        self.not_modified += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "primed": self._primed,
+            "rows": len(self._rows),
+            "capacity": self.capacity,
+            "unread": self._unread,
+            "etag": self.etag,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "fills": self.fills,
+            "invalidations": self.invalidations,
+        }
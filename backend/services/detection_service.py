@@ -5,6 +5,8 @@ from ultralytics import YOLO
 from typing import List, Dict, Any, Optional, Tuple
 import base64
 import logging
+from .roi_service import RegionOfInterest, crop_to_region, offset_detections, suppress_duplicates
+from .model_cadence import ModelCadence
 
 class DetectionService:
     """Handles object detection using YOLO models."""
@@ -56,38 +58,8 @@ class DetectionService:
             
             # Process results
             detections = []
-            detection_count = 0
-            
             for r in results:
-                boxes = r.boxes
-                for box in boxes:
-                    # Limit number of detections
-                    if detection_count >= self.max_detections:
-                        self.logger.info(f"Reached max detections limit: {self.max_detections}")
-                        break
-                        
-                    confidence = float(box.conf)
-                    if confidence < self.confidence_threshold:
-                        continue
-                        
-                    b = box.xyxy[0].tolist()  # get box coordinates
-                    c = box.cls
-                    class_name = model.names[int(c)]
-                    
-                    self.logger.info(f"Detected {class_name} with confidence {confidence}")
-                    
-                    detections.append({
-                        "class": class_name,
-                        "confidence": confidence,
-                        "box": {
-                            "x1": int(b[0]),
-                            "y1": int(b[1]),
-                            "x2": int(b[2]),
-                            "y2": int(b[3])
-                        }
-                    })
-                    
-                    detection_count += 1
+                detections.extend(self._collect_detections(model, r, self.max_detections - len(detections)))
             
             self.logger.info(f"Total detections found: {len(detections)}")
             return {
@@ -102,6 +74,101 @@ class DetectionService:
                 "error": str(e)
             }
     
+    def _collect_detections(self, model: YOLO, result, limit: int) -> List[Dict]:
+        """Convert one YOLO result into detection dicts, keeping at most limit boxes."""
+        detections = []
+        for box in result.boxes:
+            # Limit number of detections
+            if len(detections) >= limit:
+                self.logger.info(f"Reached max detections limit: {self.max_detections}")
+                break
+                
+            confidence = float(box.conf)
+            if confidence < self.confidence_threshold:
+                continue
+                
+            b = box.xyxy[0].tolist()  # get box coordinates
+            c = box.cls
+            class_name = model.names[int(c)]
+            
+            self.logger.info(f"Detected {class_name} with confidence {confidence}")
+            
+            detections.append({
+                "class": class_name,
+                "confidence": confidence,
+                "box": {
+                    "x1": int(b[0]),
+                    "y1": int(b[1]),
+                    "x2": int(b[2]),
+                    "y2": int(b[3])
+                }
+            })
+        return detections
+    
+    def detect_objects_batch(self, model: YOLO, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Run object detection on several images in one model call.
+        
+        Args:
+            model: YOLO model to use for detection
+            images: Input images as numpy arrays
+            
+        Returns:
+            One result dictionary per image, in input order
+        """
+        if not images:
+            return []
+        try:
+            results = model(images, verbose=False, conf=self.confidence_threshold)
+            return [
+                {"detections": self._collect_detections(model, r, self.max_detections), "success": True}
+                for r in results
+            ]
+        except Exception as e:
+            self.logger.error(f"Error in batch object detection: {e}", exc_info=True)
+            return [{"detections": [], "success": False, "error": str(e)} for _ in images]
+    
+    def detect_objects_in_regions(self, model: YOLO, image: np.ndarray,
+                                  regions: Optional[List[RegionOfInterest]] = None) -> Dict[str, Any]:
+        """
+        Run object detection only inside the given regions of interest.
+        
+        Each region is cropped to its bounding rectangle, pixels outside the
+        polygon are masked out, and boxes are mapped back to full-frame
+        coordinates. Without regions the full frame is analysed.
+        
+        Args:
+            model: YOLO model to use for detection
+            image: Input image as numpy array
+            regions: Regions of interest for the camera
+            
+        Returns:
+            Dictionary containing detections in full-frame coordinates
+        """
+        if not regions:
+            return self.detect_objects(model, image)
+        
+        if image is None or len(image.shape) != 3 or image.shape[2] != 3:
+            return self.detect_objects(model, image)
+        
+        detections = []
+        for region in regions:
+            crop, offset = crop_to_region(image, region)
+            if crop is None:
+                continue
+            result = self.detect_objects(model, crop)
+            if not result["success"]:
+                return result
+            detections.extend(offset_detections(result["detections"], offset, region.name))
+        
+        # Overlapping regions can report the same object twice
+        detections = suppress_duplicates(detections)[:self.max_detections]
+        self.logger.info(f"Region detections found: {len(detections)} in {len(regions)} region(s)")
+        return {
+            "detections": detections,
+            "success": True
+        }
+    
     def draw_detections(self, image: np.ndarray, detections: List[Dict], color: Tuple[int, int, int] = (0, 255, 0)) -> np.ndarray:
         """
         Draw bounding boxes on image.
@@ -153,7 +220,9 @@ class DetectionService:
             self.logger.error(f"Error drawing detections: {e}")
             return image
     
-    def process_frame_with_dual_models(self, weapon_model: YOLO, fire_smoke_model: YOLO, image: np.ndarray) -> Dict[str, Any]:
+    def process_frame_with_dual_models(self, weapon_model: YOLO, fire_smoke_model: YOLO, image: np.ndarray,
+                                       regions: Optional[List[RegionOfInterest]] = None,
+                                       cadence: Optional[ModelCadence] = None) -> Dict[str, Any]:
         """
         Process frame with both models.
         
@@ -161,6 +230,9 @@ class DetectionService:
             weapon_model: Weapon detection model
             fire_smoke_model: Fire/smoke detection model
             image: Input image
+            regions: Optional regions of interest to restrict inference to
+            cadence: Optional per-model rates; a model that is not due has its
+                     last result carried forward with its age attached
             
         Returns:
             Dictionary containing detections from both models
@@ -188,18 +260,33 @@ class DetectionService:
                     "error": f"Invalid image dimensions: {image.shape}. Expected 3-channel image."
                 }
             
-            # Run detection with both models
-            self.logger.info("Running weapon detection")
-            weapon_results = self.detect_objects(weapon_model, image)
-            
-            self.logger.info("Running fire/smoke detection")
-            fire_smoke_results = self.detect_objects(fire_smoke_model, image)
+            # Run each model that is due on this frame, carry the other forward
+            detections = {}
+            model_ages = {}
+            models_run = []
+            for model_name, model in (("weapon", weapon_model), ("fire_smoke", fire_smoke_model)):
+                if cadence is not None and not cadence.due(model_name, shape=image.shape):
+                    detections[model_name], age = cadence.carry_forward(model_name)
+                    model_ages[model_name] = round(age, 3)
+                    continue
+                
+                self.logger.info(f"Running {model_name} detection")
+                results = self.detect_objects_in_regions(model, image, regions)
+                if not results["success"]:
+                    self.logger.warning(f"{model_name} detection failed: {results.get('error')}")
+                elif cadence is not None:
+                    cadence.record(model_name, results["detections"], shape=image.shape)
+                detections[model_name] = results["detections"]
+                model_ages[model_name] = 0.0
+                models_run.append(model_name)
             
-            self.logger.info(f"Weapon results: {weapon_results['success']}, Fire/Smoke results: {fire_smoke_results['success']}")
+            self.logger.info(f"Dual model detection ran: {models_run}")
             
             return {
-                "weapon_detections": weapon_results["detections"],
-                "fire_smoke_detections": fire_smoke_results["detections"],
+                "weapon_detections": detections["weapon"],
+                "fire_smoke_detections": detections["fire_smoke"],
+                "models_run": models_run,
+                "model_ages": model_ages,
                 "success": True
             }
         except Exception as e:
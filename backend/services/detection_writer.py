@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+
+class DetectionWriter:
+    """
+    Write-behind persistence for detections and their alerts.
+
+    Handlers enqueue a detection and get its ID back immediately; IDs are
+    reserved from the detections sequence in blocks, so alerts broadcast
+    before the row is written still link to it. The flush task tops the
+    block up before it runs out, so handlers never wait on the database;
+    with no ID in hand they get None and the row is numbered when it is
+    written. A background task writes
+    the buffer in multi-row batches (one statement for detections and
+    alerts) when it reaches batch_size or every flush_interval. Batches
+    that cannot be written go to an append-only spool file, replayed once
+    the database accepts writes again.
+    """
+
+    REPLAY_RETRY_SECONDS = 5.0
+
+    def __init__(self, database, batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None, spool_path: Optional[str] = None,
+                 id_block: Optional[int] = None,
+                 on_written: Optional[Callable[[List[Dict[str, Any]], int], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.database = database
+        # Called with each stored batch and the number of rows it inserted
+        self.on_written = on_written
+        self.batch_size = batch_size or int(os.getenv("DETECTION_BATCH_SIZE", "500"))
+        self.flush_interval = (flush_interval_ms or float(os.getenv("DETECTION_FLUSH_INTERVAL_MS", "250"))) / 1000.0
+        self.spool_path = spool_path or os.getenv("DETECTION_SPOOL_PATH", os.path.join("spool", "detections.jsonl"))
+        self.id_block = id_block or int(os.getenv("DETECTION_ID_BLOCK", "256"))
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._ids: deque = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._replay_after = 0.0
+        self._refill_after = 0.0
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        """Start the background flush task on the running event loop."""
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write whatever is buffered and stop the flush task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    def _reserve_id(self) -> Optional[int]:
+        # Below half a block, wake the flush task to reserve more
+        if len(self._ids) <= self.id_block // 2 and self._wake is not None:
+            self._wake.set()
+        # No ID while the database is down; one is assigned when the record is written
+        return self._ids.popleft() if self._ids else None
+
+    async def _refill_ids(self):
+        """Reserve another block of IDs once fewer than half a block are left."""
+        if len(self._ids) > self.id_block // 2 or time.monotonic() < self._refill_after:
+            return
+        ids = await self.database.reserve_detection_ids(self.id_block)
+        if ids:
+            self._ids.extend(ids)
+        else:
+            self._refill_after = time.monotonic() + self.REPLAY_RETRY_SECONDS
+
+    async def enqueue(self, detection_type: str, confidence: float, severity: str,
+                      image_url: Optional[str] = None, camera_id: int = 1) -> Optional[int]:
+        """
+        Queue a detection and its alert for writing.
+
+        Returns:
+            The detection ID the row will be written with, or None while the
+            database is unreachable
+        """
+        record = {
+            "detection_id": self._reserve_id(),
+            "camera_id": camera_id,
+            "type": detection_type,
+            "confidence": float(confidence),
+            "timestamp": datetime.now(),
+            "image_url": image_url,
+            "severity": severity,
+        }
+        self._buffer.append(record)
+        self.enqueued += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+        return record["detection_id"]
+
+    async def _run(self):
+        await self._refill_ids_safely()
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0.0, next_flush - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            await self._refill_ids_safely()
+            # A wake-up only to reserve IDs does not flush a partial batch early
+            if not (self._stopping or len(self._buffer) >= self.batch_size or time.monotonic() >= next_flush):
+                continue
+            next_flush = time.monotonic() + self.flush_interval
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Detection flush failed: {e}", exc_info=True)
+            # Records enqueued while the last flush was in flight still need writing
+            if self._stopping and not self._buffer:
+                return
+
+    async def _refill_ids_safely(self):
+        try:
+            await self._refill_ids()
+        except Exception as e:
+            self.logger.error(f"Reserving detection IDs failed: {e}", exc_info=True)
+            self._refill_after = time.monotonic() + self.REPLAY_RETRY_SECONDS
+
+    async def flush(self):
+        """Write the buffer in batches, spooling what the database rejects."""
+        if not self._buffer:
+            await self._replay_spool()
+            return
+        pending, self._buffer = self._buffer, []
+        start = time.perf_counter()
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset:offset + self.batch_size]
+            if not await self._write(batch):
+                # Keep arrival order: everything from the failed batch on goes to the spool
+                self._spool(pending[offset:])
+                return
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+        await self._replay_spool()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        missing = [record for record in batch if record["detection_id"] is None]
+        if missing:
+            ids = await self.database.reserve_detection_ids(len(missing))
+            if len(ids) < len(missing):
+                return False
+            for record, detection_id in zip(missing, ids):
+                record["detection_id"] = detection_id
+        written = await self.database.save_detection_batch(batch)
+        if written is None:
+            return False
+        self.written += len(batch)
+        self.batches += 1
+        if self.on_written:
+            self.on_written(batch, written)
+        return True
+
+    def _spool(self, records: List[Dict[str, Any]], requeue: bool = False):
+        os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+        with open(self.spool_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+        if requeue:
+            return
+        self.spooled += len(records)
+        self.logger.warning(f"Database unavailable; spooled {len(records)} detections to {self.spool_path}")
+
+    async def _replay_spool(self):
+        """Write spooled records back once the database accepts writes again."""
+        replay_path = f"{self.spool_path}.replay"
+        if not (os.path.exists(self.spool_path) or os.path.exists(replay_path)):
+            return
+        if not self.database.db_connected or time.monotonic() < self._replay_after:
+            return
+        # Replaying a renamed copy lets new failures append to a fresh spool meanwhile
+        if not os.path.exists(replay_path):
+            os.replace(self.spool_path, replay_path)
+        with open(replay_path, "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        for record in records:
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+
+        for offset in range(0, len(records), self.batch_size):
+            batch = records[offset:offset + self.batch_size]
+            if not await self._write(batch):
+                self._spool(records[offset:], requeue=True)
+                os.remove(replay_path)
+                self._replay_after = time.monotonic() + self.REPLAY_RETRY_SECONDS
+                return
+            self.replayed += len(batch)
+        os.remove(replay_path)
+        self.logger.info(f"Replayed {len(records)} spooled detections")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "last_flush_ms": self.last_flush_ms,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "spool_pending": os.path.exists(self.spool_path) or os.path.exists(f"{self.spool_path}.replay"),
+            "reserved_ids": len(self._ids),
+        }
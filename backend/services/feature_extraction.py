@@ -1,3 +1,6 @@
+import os
+import time
+import threading
 import numpy as np
 from collections import deque
 import pickle
@@ -96,4 +99,76 @@ class FeatureExtraction:
         """
         Clear buffer.
         """
-        self.frame_buffer.clear()
\ No newline at end of file
+        self.frame_buffer.clear()
+
+
+class PoseSequences:
+    """
+    One pose sequence per stream, so concurrent streams don't mix frames.
+
+    A stream is a /frames connection or one client's live HTTP feed.
+    Sequences unused for idle_seconds are dropped, except "default" (the
+    single local stream). get(None) returns a throwaway sequence for one-off
+    uploads that must not extend anyone else's.
+    """
+
+    def __init__(self, sequence_length=30, idle_seconds=None):
+        self.sequence_length = sequence_length
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(
+            os.getenv("FIGHT_STREAM_IDLE_SECONDS", "60"))
+        self._streams = {"default": FeatureExtraction(sequence_length)}
+        self._last_used = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, stream, now=None):
+        """Sequence for a stream, created on first use; a new unshared one for None."""
+        if stream is None:
+            return FeatureExtraction(self.sequence_length)
+        now = now if now is not None else time.monotonic()
+        if now - self._last_sweep > self.idle_seconds:
+            self.evict_idle(now)
+        with self._lock:
+            sequence = self._streams.get(stream)
+            if sequence is None:
+                sequence = self._streams[stream] = FeatureExtraction(self.sequence_length)
+            self._last_used[stream] = now
+            return sequence
+
+    def evict_idle(self, now=None):
+        """Drop sequences unused for idle_seconds; returns how many were dropped."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            idle = [stream for stream, used in self._last_used.items()
+                    if stream != "default" and now - used > self.idle_seconds]
+            for stream in idle:
+                self._drop(stream)
+            self.evicted += len(idle)
+        return len(idle)
+
+    def _drop(self, stream):
+        if stream != "default":
+            self._streams.pop(stream, None)
+            self._last_used.pop(stream, None)
+
+    def drop(self, stream):
+        """Forget a finished stream's sequence."""
+        with self._lock:
+            self._drop(stream)
+
+    def reset(self, stream=None, prefix=None):
+        """Clear one stream's sequence, those whose key starts with prefix, or all of them."""
+        with self._lock:
+            for name, sequence in self._streams.items():
+                if (stream is None and prefix is None) or name == stream or (prefix and name.startswith(prefix)):
+                    sequence.reset()
+
+    def __contains__(self, stream):
+        with self._lock:
+            return stream in self._streams
+
+    def __len__(self):
+        with self._lock:
+            return len(self._streams)
@@ -5,7 +5,9 @@ import logging
 from typing import Dict, Any, Optional, List
 import tensorflow as tf
 from .pose_estimation import PoseEstimation
-from .feature_extraction import FeatureExtraction
+from .feature_extraction import FeatureExtraction, PoseSequences
+from .thread_budget import get_thread_budget
+from .video_source import open_capture
 
 
 class FightDetectionService:
@@ -13,8 +15,13 @@ class FightDetectionService:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Apply the shared thread budget before MediaPipe/TensorFlow start their pools
+        self.thread_budget = get_thread_budget()
+        self.thread_budget.apply(["tensorflow", "mediapipe", "opencv"])
         self.pose_estimator = PoseEstimation()
-        self.feature_extractor = FeatureExtraction()
+        # One pose sequence per stream so concurrent clients don't mix frames
+        self.streams = PoseSequences()
+        self.feature_extractor = self.streams.get("default")
         self.model = None
         self.scaler_path = "models/scaler.pkl"
         self.model_path = "models/fight_detection_model.h5"
@@ -106,7 +113,17 @@ class FightDetectionService:
         
         return annotated
 
-    def detect_fight(self, frame: np.ndarray, force_predict: bool = False) -> Dict[str, Any]:
+    @staticmethod
+    def _compact_keypoints(keypoints: np.ndarray) -> List[List[float]]:
+        """33 landmarks as [x, y, visibility], normalized to the frame, for client-side drawing."""
+        return [
+            [round(float(keypoints[i * 4]), 3), round(float(keypoints[i * 4 + 1]), 3), round(float(keypoints[i * 4 + 3]), 2)]
+            for i in range(33)
+        ]
+
+    def detect_fight(self, frame: np.ndarray, force_predict: bool = False,
+                     annotate: bool = True, include_keypoints: bool = False,
+                     stream: Optional[str] = "default") -> Dict[str, Any]:
         """
         Detect fight in a video frame using BlazePose + LSTM.
         
@@ -114,6 +131,11 @@ class FightDetectionService:
             frame: Input video frame as numpy array (BGR)
             force_predict: If True, pad the buffer to make a prediction even with fewer than 30 frames.
                            Useful for single-image uploads or when immediate results are needed.
+            annotate: If False, skip drawing (and the second pose pass it needs);
+                      annotated_frame is None and the client draws the overlay
+            include_keypoints: If True, add compact pose keypoints to the result
+            stream: Stream whose pose sequence this frame extends; None uses a
+                    fresh sequence that is not kept (one-off uploads)
             
         Returns:
             Dictionary containing fight detection results, annotated frame, and bounding box
@@ -145,21 +167,23 @@ class FightDetectionService:
             
             # Derive bounding box from pose keypoints
             box = self._get_pose_bounding_box(keypoints, h, w)
+            extra = {"keypoints": self._compact_keypoints(keypoints)} if include_keypoints else {}
             
-            # Add keypoints to feature extractor buffer
-            self.feature_extractor.add_frame(keypoints)
+            # Add keypoints to this stream's feature extractor buffer
+            extractor = self.streams.get(stream)
+            extractor.add_frame(keypoints)
             
             # Check if we have enough frames for prediction OR if force_predict is enabled
-            buffer_ready = self.feature_extractor.is_ready()
-            buffer_len = len(self.feature_extractor.frame_buffer)
+            buffer_ready = extractor.is_ready()
+            buffer_len = len(extractor.frame_buffer)
             
             if buffer_ready or (force_predict and buffer_len > 0):
                 # Get sequence
-                sequence = self.feature_extractor.get_sequence()
+                sequence = extractor.get_sequence()
                 
                 # If we don't have 30 frames yet, pad the sequence by repeating existing frames
                 if not buffer_ready and force_predict:
-                    seq_len = self.feature_extractor.sequence_length
+                    seq_len = extractor.sequence_length
                     current_len = sequence.shape[0]
                     if current_len < seq_len:
                         # Repeat the existing frames to fill the sequence
@@ -169,7 +193,7 @@ class FightDetectionService:
                         self.logger.info(f"Padded sequence from {current_len} to {seq_len} frames for prediction")
                 
                 # Normalize sequence
-                normalized_sequence = self.feature_extractor.normalize_sequence(
+                normalized_sequence = extractor.normalize_sequence(
                     sequence, self.scaler_path
                 )
                 
@@ -195,15 +219,15 @@ class FightDetectionService:
                 is_fight = fight_probability > 0.5
                 
                 # Draw annotations on frame
-                annotated_frame = self._draw_fight_annotations(frame, box, fight_probability, is_fight)
+                annotated_frame = self._draw_fight_annotations(frame, box, fight_probability, is_fight) if annotate else None
                 
                 # Use sliding window: don't fully reset, just remove oldest frames
                 if buffer_ready:
-                    half = self.feature_extractor.sequence_length // 2
-                    remaining = list(self.feature_extractor.frame_buffer)
-                    self.feature_extractor.reset()
+                    half = extractor.sequence_length // 2
+                    remaining = list(extractor.frame_buffer)
+                    extractor.reset()
                     for f in remaining[half:]:
-                        self.feature_extractor.add_frame(f)
+                        extractor.add_frame(f)
                 else:
                     pass
                 
@@ -214,11 +238,12 @@ class FightDetectionService:
                     "no_fight_probability": no_fight_probability,
                     "confidence": max(fight_probability, no_fight_probability),
                     "annotated_frame": annotated_frame,
-                    "box": box
+                    "box": box,
+                    **extra
                 }
             else:
                 # Not enough frames yet — still draw pose skeleton and box
-                annotated_frame = self._draw_fight_annotations(frame, box, 0.0, False)
+                annotated_frame = self._draw_fight_annotations(frame, box, 0.0, False) if annotate else None
                 
                 return {
                     "success": True,
@@ -226,9 +251,10 @@ class FightDetectionService:
                     "fight_probability": 0.0,
                     "no_fight_probability": 1.0,
                     "confidence": 1.0,
-                    "message": f"Buffering frames for prediction ({buffer_len}/{self.feature_extractor.sequence_length})",
+                    "message": f"Buffering frames for prediction ({buffer_len}/{extractor.sequence_length})",
                     "annotated_frame": annotated_frame,
-                    "box": box
+                    "box": box,
+                    **extra
                 }
                 
         except Exception as e:
@@ -243,9 +269,9 @@ class FightDetectionService:
         Process a video stream for real-time fight detection.
         
         Args:
-            video_source: Video source (camera index or video file path)
+            video_source: Camera index, video file, or recorded session directory
         """
-        cap = cv2.VideoCapture(video_source)
+        cap = open_capture(video_source)
         
         if not cap.isOpened():
             self.logger.error("Error opening video source")
@@ -281,9 +307,13 @@ class FightDetectionService:
         cap.release()
         cv2.destroyAllWindows()
     
-    def reset_buffer(self):
-        """Reset the feature extraction buffer."""
-        self.feature_extractor.reset()
+    def drop_stream(self, stream: str):
+        """Forget a finished stream's pose sequence."""
+        self.streams.drop(stream)
+
+    def reset_buffer(self, stream: Optional[str] = None, prefix: Optional[str] = None):
+        """Reset one stream's feature extraction buffer, those starting with prefix, or all of them."""
+        self.streams.reset(stream, prefix)
     
     def cleanup(self):
         """Clean up resources."""
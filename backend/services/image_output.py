@@ -0,0 +1,165 @@
+import cv2
+import numpy as np
+import os
+import json
+import time
+import uuid
+import secrets
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# format name -> (OpenCV extension, media type, quality flag)
+IMAGE_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+class ImageEncoder:
+    """Encodes annotated frames in the configured output format and quality."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.default_format = os.getenv("IMAGE_FORMAT", "jpeg").lower()
+        if self.default_format not in IMAGE_FORMATS:
+            self.logger.warning(f"Unknown IMAGE_FORMAT '{self.default_format}', using jpeg")
+            self.default_format = "jpeg"
+        self.default_quality = int(os.getenv("IMAGE_QUALITY", "80"))
+
+    def resolve(self, image_format: Optional[str] = None, quality: Optional[int] = None) -> Tuple[str, int]:
+        """Validate a per-request format/quality, falling back to the defaults."""
+        image_format = (image_format or self.default_format).lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format not in IMAGE_FORMATS:
+            image_format = self.default_format
+        quality = self.default_quality if quality is None else max(1, min(100, int(quality)))
+        return image_format, quality
+
+    def encode(self, image: np.ndarray, image_format: Optional[str] = None,
+               quality: Optional[int] = None) -> Tuple[bytes, str]:
+        """
+        Encode a BGR image.
+
+        Returns:
+            (encoded bytes, media type)
+        """
+        image_format, quality = self.resolve(image_format, quality)
+        extension, media_type, quality_flag = IMAGE_FORMATS[image_format]
+        ok, buffer = cv2.imencode(extension, image, [quality_flag, quality])
+        if not ok:
+            raise ValueError(f"Failed to encode image as {image_format}")
+        return buffer.tobytes(), media_type
+
+
+class ImageCache:
+    """
+    Short-lived in-memory store for annotated images served by URL.
+
+    Frames are kept un-encoded and encoded on first fetch, so an image the
+    client never requests costs nothing to encode. Entries expire after a TTL
+    and the oldest are evicted beyond a byte budget.
+    """
+
+    def __init__(self, encoder: ImageEncoder, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.encoder = encoder
+        self.ttl = ttl if ttl is not None else float(os.getenv("IMAGE_CACHE_TTL", "60"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+        )
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.encoded = 0
+
+    def put(self, image: np.ndarray, image_format: Optional[str] = None, quality: Optional[int] = None) -> str:
+        """Store an image and return the token it can be fetched with."""
+        image_format, quality = self.encoder.resolve(image_format, quality)
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._entries[token] = {
+                "expires": now + self.ttl,
+                "image": image,
+                "data": None,
+                "media_type": IMAGE_FORMATS[image_format][1],
+                "format": image_format,
+                "quality": quality,
+                "size": image.nbytes,
+            }
+            self._bytes += image.nbytes
+            self._evict(now)
+        return token
+
+    def get(self, token: str) -> Optional[Tuple[bytes, str]]:
+        """Encoded bytes and media type for a token, or None if unknown or expired."""
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if entry["data"] is not None:
+                return entry["data"], entry["media_type"]
+            image = entry["image"]
+
+        data, media_type = self.encoder.encode(image, entry["format"], entry["quality"])
+        with self._lock:
+            if self._entries.get(token) is entry and entry["data"] is None:
+                self._bytes += len(data) - entry["size"]
+                entry.update(data=data, image=None, size=len(data))
+                self.encoded += 1
+        return data, media_type
+
+    def _evict(self, now: float):
+        while self._entries:
+            token, entry = next(iter(self._entries.items()))
+            if entry["expires"] > now and self._bytes <= self.max_bytes:
+                break
+            del self._entries[token]
+            self._bytes -= entry["size"]
+            self.evicted += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+                "encoded": self.encoded,
+            }
+
+
+def build_multipart(metadata: Dict[str, Any], images: Dict[str, Tuple[bytes, str]]) -> Tuple[bytes, str]:
+    """
+    Build a multipart/mixed body: a JSON metadata part followed by one part
+    per image, each named after its response key.
+
+    Returns:
+        (body, content type including the boundary)
+    """
+    boundary = uuid.uuid4().hex
+    parts = [
+        (f"--{boundary}\r\nContent-Type: application/json\r\n"
+         f"Content-Disposition: inline; name=\"metadata\"\r\n\r\n").encode()
+        + json.dumps(metadata).encode() + b"\r\n"
+    ]
+    for name, (data, media_type) in images.items():
+        parts.append(
+            (f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+             f"Content-Disposition: inline; name=\"{name}\"\r\n"
+             f"Content-Length: {len(data)}\r\n\r\n").encode()
+            + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/mixed; boundary={boundary}"
@@ -0,0 +1,173 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from .admission_control import AdmissionRejected
+
+# lane -> (default weight, default deadline in ms)
+LANES = {
+    "live": (8, 500),
+    "interactive": (3, 2000),
+    "bulk": (1, 60000),
+}
+
+
+class DeadlineMissed(AdmissionRejected):
+    """A live frame whose deadline passed before it reached a model."""
+
+    def __init__(self, lane: str):
+        super().__init__(503, f"Deadline passed in the {lane} inference lane", 1)
+        self.lane = lane
+
+
+class _Ticket:
+    __slots__ = ("lane", "deadline", "enqueued", "granted", "dropped")
+
+    def __init__(self, lane: str, deadline: float):
+        self.lane = lane
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.dropped = False
+
+
+class InferenceScheduler:
+    """
+    Decides which waiting request runs next on the models.
+
+    Requests wait in one of three lanes: live (camera frames and alerting),
+    interactive (uploads) and bulk (batch and background jobs). Within a
+    lane the earliest deadline runs first; across lanes, slots are shared by
+    weight with stride scheduling, so an idle lane's share goes to the
+    others and bulk work soaks up whatever the live lane does not use. Live
+    frames whose deadline passes while waiting are dropped.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        # Models are not safe to call concurrently, so one slot by default
+        self.concurrency = concurrency or int(os.getenv("INFERENCE_CONCURRENCY", "1"))
+        self.lanes: Dict[str, Dict[str, Any]] = {}
+        for name, (weight, deadline_ms) in LANES.items():
+            self.lanes[name] = {
+                "weight": float(os.getenv(f"INFERENCE_{name.upper()}_WEIGHT", str(weight))),
+                "deadline": float(os.getenv(f"INFERENCE_{name.upper()}_DEADLINE_MS", str(deadline_ms))) / 1000.0,
+                "drop_expired": name == "live",
+                "queue": [],
+                "pass": 0.0,
+                "submitted": 0,
+                "started": 0,
+                "completed": 0,
+                "dropped": 0,
+                "deadline_misses": 0,
+                "wait_seconds": 0.0,
+                "max_depth": 0,
+            }
+        self._cond = threading.Condition()
+        self._running = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def resolve_lane(self, lane: Optional[str]) -> str:
+        return lane if lane in self.lanes else "interactive"
+
+    @contextmanager
+    def slot(self, lane: str = "interactive", deadline_ms: Optional[float] = None):
+        """
+        Block the calling thread until the scheduler grants a model slot.
+
+        Args:
+            lane: "live", "interactive" or "bulk"
+            deadline_ms: Deadline from now; defaults to the lane's SLO
+
+        Raises:
+            DeadlineMissed: A live request's deadline passed while waiting
+        """
+        lane = self.resolve_lane(lane)
+        state = self.lanes[lane]
+        deadline = time.monotonic() + (deadline_ms / 1000.0 if deadline_ms else state["deadline"])
+        ticket = _Ticket(lane, deadline)
+
+        with self._cond:
+            if not state["queue"]:
+                # A lane returning from idle does not get credit for the time it was idle
+                state["pass"] = max(state["pass"], self._virtual_time)
+            heapq.heappush(state["queue"], (deadline, next(self._seq), ticket))
+            state["submitted"] += 1
+            state["max_depth"] = max(state["max_depth"], len(state["queue"]))
+            self._dispatch()
+            while not ticket.granted and not ticket.dropped:
+                remaining = ticket.deadline - time.monotonic()
+                if state["drop_expired"] and remaining <= 0:
+                    self._drop(state, ticket)
+                    break
+                self._cond.wait(timeout=remaining if state["drop_expired"] else None)
+
+        if ticket.dropped:
+            raise DeadlineMissed(lane)
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                state["completed"] += 1
+                if time.monotonic() > ticket.deadline:
+                    state["deadline_misses"] += 1
+                self._dispatch()
+
+    def _drop(self, state: Dict[str, Any], ticket: _Ticket):
+        state["queue"] = [entry for entry in state["queue"] if entry[2] is not ticket]
+        heapq.heapify(state["queue"])
+        ticket.dropped = True
+        state["dropped"] += 1
+        state["deadline_misses"] += 1
+
+    def _dispatch(self):
+        """Grant free slots; called with the condition held."""
+        now = time.monotonic()
+        granted = False
+        while self._running < self.concurrency:
+            active = [state for state in self.lanes.values() if state["queue"]]
+            if not active:
+                break
+            state = min(active, key=lambda s: s["pass"])
+            _, _, ticket = heapq.heappop(state["queue"])
+            if state["drop_expired"] and ticket.deadline <= now:
+                ticket.dropped = True
+                state["dropped"] += 1
+                state["deadline_misses"] += 1
+                granted = True
+                continue
+            self._virtual_time = state["pass"]
+            state["pass"] += 1.0 / state["weight"]
+            state["wait_seconds"] += now - ticket.enqueued
+            state["started"] += 1
+            ticket.granted = True
+            self._running += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            lanes = {}
+            for name, state in self.lanes.items():
+                started = state["started"]
+                lanes[name] = {
+                    "weight": state["weight"],
+                    "deadline_ms": round(state["deadline"] * 1000),
+                    "queued": len(state["queue"]),
+                    "max_depth": state["max_depth"],
+                    "submitted": state["submitted"],
+                    "completed": state["completed"],
+                    "dropped": state["dropped"],
+                    "deadline_misses": state["deadline_misses"],
+                    "avg_wait_ms": round(state["wait_seconds"] / started * 1000, 1) if started else 0.0,
+                }
+            return {"concurrency": self.concurrency, "running": self._running, "lanes": lanes}
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class LocalJobStore:
+    """
+    Stand-in job store used when PostgreSQL is unavailable.
+
+    Jobs are kept in one JSON file rewritten atomically on every save, which
+    is enough for the handful of long-running jobs a single server holds.
+    Only the newest max_finished finished jobs are kept, so the file (and
+    each rewrite) stays bounded.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_finished: Optional[int] = None):
+        self.path = path or os.getenv("JOB_STORE_PATH", os.path.join("jobs", "jobs.json"))
+        self.max_finished = max_finished or int(os.getenv("JOB_STORE_MAX_FINISHED", "100"))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self._jobs = json.load(f)
+
+    def save_job(self, job: Dict[str, Any]) -> bool:
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            if job["status"] in FINISHED_STATUSES:
+                self._prune()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._jobs, f, default=str)
+            os.replace(tmp_path, self.path)
+        return True
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_finished."""
+        finished = sorted((j for j in self._jobs.values() if j["status"] in FINISHED_STATUSES),
+                          key=lambda j: j.get("finished_at") or j["created_at"], reverse=True)
+        for job in finished[self.max_finished:]:
+            del self._jobs[job["job_id"]]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if status is None or j["status"] == status]
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)[:limit]
+
+
+class JobContext:
+    """Handed to a job handler: parameters, progress reporting and cancellation."""
+
+    def __init__(self, service: "JobService", job: Dict[str, Any], cancel_event: threading.Event):
+        self._service = service
+        self.job_id = job["job_id"]
+        self.params = job["params"]
+        self.cancel_event = cancel_event
+        self.items = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def progress(self, fraction: float):
+        """Report completion in [0, 1]; persisted at most once per second."""
+        self._service._update_progress(self.job_id, fraction, self.items)
+
+
+class JobService:
+    """
+    Background jobs for long-running analysis.
+
+    Jobs run on a bounded thread pool so the interactive endpoints keep their
+    own capacity. Every state change is persisted, and jobs that were queued
+    or running when the server stopped are requeued on start. Only queued and
+    running jobs are held in memory; finished ones are read from the store.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.max_queued = max_queued or int(os.getenv("JOB_MAX_QUEUED", "32"))
+        self.store = None
+        self.handlers: Dict[str, Callable[[JobContext], Dict[str, Any]]] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._last_persist: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopping = False
+
+    def register(self, job_type: str, handler: Callable[[JobContext], Dict[str, Any]]):
+        """Register the function that runs jobs of a type."""
+        self.handlers[job_type] = handler
+
+    def start(self, store):
+        """Attach the persistent store, start the pool and requeue unfinished jobs."""
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        for status in ("running", "queued"):
+            for job in reversed(store.list_jobs(limit=self.max_queued * 4, status=status)):
+                self.logger.info(f"Requeueing {status} job {job['job_id']} after restart")
+                job.update(status="queued", progress=0.0, started_at=None)
+                self._enqueue(job)
+
+    def stop(self):
+        """Cancel running jobs and stop the pool; unfinished jobs resume on next start."""
+        if self._executor is None:
+            return
+        with self._lock:
+            self._stopping = True
+            for event in self._cancel_events.values():
+                event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _persist(self, job: Dict[str, Any]) -> bool:
+        if self.store is None:
+            return False
+        return bool(self.store.save_job(job))
+
+    def _finish(self, job: Dict[str, Any]):
+        """Persist a finished job, release it from memory and remove its uploaded input."""
+        with self._lock:
+            self._cancel_events.pop(job["job_id"], None)
+            self._last_persist.pop(job["job_id"], None)
+        if self._persist(job):
+            with self._lock:
+                self._jobs.pop(job["job_id"], None)
+        else:
+            # Keep it in memory so get() can still answer until the store is back
+            self.logger.warning(f"Could not persist finished job {job['job_id']}; keeping it in memory")
+        input_path = job["params"].get("input_path")
+        if input_path and os.path.exists(input_path):
+            os.remove(input_path)
+
+    def _enqueue(self, job: Dict[str, Any]):
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._cancel_events[job["job_id"]] = threading.Event()
+        self._persist(job)
+        self._executor.submit(self._run, job["job_id"])
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["status"] in ("queued", "running"))
+
+    def submit(self, job_type: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Queue a job.
+
+        Returns:
+            The job record, or None if the queue is full
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if self._executor is None:
+            raise RuntimeError("Job service not started")
+        if self.queued_count() >= self.max_queued:
+            return None
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "job_type": job_type,
+            "status": "queued",
+            "progress": 0.0,
+            "params": params,
+            "result": None,
+            "error": None,
+            "cpu_seconds": 0.0,
+            "items_processed": 0,
+            "items_per_second": 0.0,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        snapshot = dict(job)
+        self._enqueue(job)
+        return snapshot
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            cancel_event = self._cancel_events.get(job_id)
+        if job is None or job["status"] != "queued":
+            return
+
+        job.update(status="running", started_at=datetime.utcnow().isoformat())
+        self._persist(job)
+        context = JobContext(self, job, cancel_event)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            result = self.handlers[job["job_type"]](context)
+            status = "cancelled" if context.cancelled else "completed"
+            error = None
+        except Exception as e:
+            self.logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            result, status, error = None, "failed", str(e)
+
+        elapsed = time.perf_counter() - wall_start
+        if status == "cancelled" and self._stopping:
+            # Interrupted by shutdown rather than by a user: resume on next start
+            job.update(status="queued", progress=0.0, started_at=None)
+            self._persist(job)
+            return
+
+        # Handlers that fan out to worker processes report that CPU time themselves
+        cpu_seconds = time.thread_time() - cpu_start + ((result or {}).get("cpu_seconds") or 0.0)
+        job.update(
+            status=status,
+            progress=1.0 if status == "completed" else job["progress"],
+            result=result,
+            error=error,
+            cpu_seconds=round(cpu_seconds, 2),
+            items_processed=context.items,
+            items_per_second=round(context.items / elapsed, 2) if elapsed else 0.0,
+            finished_at=datetime.utcnow().isoformat(),
+        )
+        self._finish(job)
+        self.logger.info(f"Job {job_id} {status} in {elapsed:.1f}s ({context.items} items)")
+
+    def _update_progress(self, job_id: str, fraction: float, items: int):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["progress"] = round(max(0.0, min(1.0, fraction)), 4)
+            job["items_processed"] = items
+            now = time.monotonic()
+            due = now - self._last_persist.get(job_id, 0.0) >= 1.0
+            if due:
+                self._last_persist[job_id] = now
+        if due:
+            self._persist(job)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job, or ask a running one to stop."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            event = self._cancel_events.get(job_id)
+            was_queued = job is not None and job["status"] == "queued"
+            if was_queued:
+                job.update(status="cancelled", finished_at=datetime.utcnow().isoformat())
+            if event is not None:
+                event.set()
+        # A job no longer in memory has finished already: nothing to cancel
+        if was_queued:
+            self._finish(job)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record from memory, falling back to the store for older jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self.store.get_job(job_id) if self.store is not None else None
+
+    def list(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent jobs without their results."""
+        if self.store is None:
+            return []
+        return [{k: v for k, v in job.items() if k != "result"}
+                for job in self.store.list_jobs(limit=limit, status=status)]
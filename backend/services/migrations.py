@@ -0,0 +1,276 @@
+"""
+Versioned schema migrations.
+
+DatabaseManager applies these at startup and init_db.py applies them from
+the command line, so the schema is defined once. Each migration runs at
+most once per database; applied versions are recorded in
+schema_migrations. Add changes as new migrations at the end of MIGRATIONS
+rather than editing applied ones.
+"""
+
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Serialises concurrent starts (several workers) on the same database
+MIGRATION_LOCK_ID = 4_317_001
+
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "baseline tables", [
+        """
+        CREATE TABLE IF NOT EXISTS cameras (
+            camera_id SERIAL PRIMARY KEY,
+            location VARCHAR(255),
+            ip_address VARCHAR(45),
+            status BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS detections (
+            detection_id SERIAL PRIMARY KEY,
+            camera_id INTEGER REFERENCES cameras(camera_id),
+            type VARCHAR(50),
+            confidence FLOAT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            image_url VARCHAR(500),
+            is_read BOOLEAN DEFAULT FALSE
+        );
+        """,
+        # Databases created before is_read existed
+        "ALTER TABLE detections ADD COLUMN IF NOT EXISTS is_read BOOLEAN DEFAULT FALSE;",
+        """
+        CREATE TABLE IF NOT EXISTS alerts (
+            alert_id SERIAL PRIMARY KEY,
+            detection_id INTEGER REFERENCES detections(detection_id),
+            severity VARCHAR(20),
+            status VARCHAR(20) DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        # Inference ROIs, normalized polygon points
+        """
+        CREATE TABLE IF NOT EXISTS camera_regions (
+            region_id SERIAL PRIMARY KEY,
+            camera_id INTEGER REFERENCES cameras(camera_id) ON DELETE CASCADE,
+            name VARCHAR(100) DEFAULT 'region',
+            polygon JSONB NOT NULL,
+            enabled BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id SERIAL PRIMARY KEY,
+            full_name VARCHAR(100) NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            role VARCHAR(20) DEFAULT 'user',
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        # Background job state, survives restarts
+        """
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            job_id VARCHAR(36) PRIMARY KEY,
+            job_type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            progress FLOAT DEFAULT 0,
+            params JSONB,
+            result JSONB,
+            error TEXT,
+            cpu_seconds FLOAT DEFAULT 0,
+            items_processed INTEGER DEFAULT 0,
+            items_per_second FLOAT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+        """,
+    ]),
+    (2, "default camera", [
+        """
+        INSERT INTO cameras (camera_id, location, ip_address, status)
+        VALUES (1, 'Default Webcam', NULL, TRUE)
+        ON CONFLICT (camera_id) DO NOTHING;
+        """,
+    ]),
+    (3, "indexes for recent, unread and alerts-by-detection queries", [
+        # get_recent_detections: ORDER BY timestamp DESC LIMIT n
+        "CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections (timestamp DESC);",
+        # Unread count and mark-all-read touch only unread rows, a small fraction of the table
+        "CREATE INDEX IF NOT EXISTS idx_detections_unread ON detections (detection_id) WHERE is_read = FALSE;",
+        # get_alerts_for_detection: WHERE detection_id = ? ORDER BY created_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_alerts_detection ON alerts (detection_id, created_at DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_created ON analysis_jobs (created_at DESC);",
+    ]),
+    # Range partitions themselves are created by services/partition_manager.py.
+    # Unique keys on a partitioned table must include the partition key, so
+    # the primary keys gain the timestamp and alerts loses its foreign key.
+    (4, "partition detections and alerts by time", [
+        "ALTER TABLE alerts RENAME TO alerts_unpartitioned;",
+        "ALTER TABLE detections RENAME TO detections_unpartitioned;",
+        "ALTER SEQUENCE detections_detection_id_seq OWNED BY NONE;",
+        "ALTER SEQUENCE alerts_alert_id_seq OWNED BY NONE;",
+        """
+        CREATE TABLE detections (
+            detection_id INTEGER NOT NULL DEFAULT nextval('detections_detection_id_seq'),
+            camera_id INTEGER REFERENCES cameras(camera_id),
+            type VARCHAR(50),
+            confidence FLOAT,
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            image_url VARCHAR(500),
+            is_read BOOLEAN DEFAULT FALSE,
+            PRIMARY KEY (detection_id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
+        """,
+        "ALTER SEQUENCE detections_detection_id_seq OWNED BY detections.detection_id;",
+        "CREATE TABLE detections_default PARTITION OF detections DEFAULT;",
+        """
+        CREATE TABLE alerts (
+            alert_id INTEGER NOT NULL DEFAULT nextval('alerts_alert_id_seq'),
+            detection_id INTEGER,
+            severity VARCHAR(20),
+            status VARCHAR(20) DEFAULT 'pending',
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (alert_id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        """,
+        "ALTER SEQUENCE alerts_alert_id_seq OWNED BY alerts.alert_id;",
+        "CREATE TABLE alerts_default PARTITION OF alerts DEFAULT;",
+        # Existing rows go to the default partitions until their partitions are created
+        """
+        INSERT INTO detections
+        SELECT detection_id, camera_id, type, confidence, COALESCE(timestamp, CURRENT_TIMESTAMP),
+               image_url, is_read
+        FROM detections_unpartitioned;
+        """,
+        """
+        INSERT INTO alerts
+        SELECT alert_id, detection_id, severity, status, COALESCE(created_at, CURRENT_TIMESTAMP)
+        FROM alerts_unpartitioned;
+        """,
+        "DROP TABLE alerts_unpartitioned;",
+        "DROP TABLE detections_unpartitioned;",
+        "CREATE INDEX idx_detections_timestamp ON detections (timestamp DESC);",
+        "CREATE INDEX idx_detections_unread ON detections (detection_id) WHERE is_read = FALSE;",
+        "CREATE INDEX idx_alerts_detection ON alerts (detection_id, created_at DESC);",
+    ]),
+    # Keyset pages seek on (timestamp, detection_id); this index also serves
+    # the plain ORDER BY timestamp DESC, so the old one is dropped
+    (5, "composite index for keyset pagination of detections", [
+        "CREATE INDEX IF NOT EXISTS idx_detections_timestamp_id ON detections (timestamp DESC, detection_id DESC);",
+        "DROP INDEX IF EXISTS idx_detections_timestamp;",
+    ]),
+    # Filtered listings: each index leads with the filter column and keeps the
+    # keyset order, so a page is still one range scan per partition
+    (6, "indexes for filtered detection listings", [
+        "CREATE INDEX IF NOT EXISTS idx_detections_type_timestamp ON detections (type, timestamp DESC, detection_id DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_detections_camera_timestamp ON detections (camera_id, timestamp DESC, detection_id DESC);",
+        # Also serves the unread count and mark-all-read, replacing idx_detections_unread
+        """
+        CREATE INDEX IF NOT EXISTS idx_detections_unread_timestamp ON detections (timestamp DESC, detection_id DESC)
+        WHERE is_read = FALSE;
+        """,
+        "DROP INDEX IF EXISTS idx_detections_unread;",
+        # Severity filters probe alerts per detection; carrying severity makes the probe index-only
+        "CREATE INDEX IF NOT EXISTS idx_alerts_detection_severity ON alerts (detection_id, created_at DESC) INCLUDE (severity);",
+        "DROP INDEX IF EXISTS idx_alerts_detection;",
+    ]),
+    # Detection counts per hour and per day, kept up to date by
+    # save_detection_batch so analytics never scan raw detections. Rollups
+    # outlive the partitions dropped by retention.
+    (7, "hourly and daily detection rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS detection_rollups_hourly (
+            bucket TIMESTAMP NOT NULL,
+            camera_id INTEGER NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            severity VARCHAR(20) NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            confidence_sum FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, camera_id, type, severity)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS detection_rollups_daily (
+            bucket TIMESTAMP NOT NULL,
+            camera_id INTEGER NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            severity VARCHAR(20) NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            confidence_sum FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, camera_id, type, severity)
+        );
+        """,
+        # Backfill from the detections already stored, with their first alert's severity
+        """
+        INSERT INTO detection_rollups_hourly (bucket, camera_id, type, severity, count, confidence_sum)
+        SELECT date_trunc('hour', d.timestamp), COALESCE(d.camera_id, 1), COALESCE(d.type, 'unknown'),
+               COALESCE(a.severity, 'none'), COUNT(*), COALESCE(SUM(d.confidence), 0)
+        FROM detections d
+        LEFT JOIN LATERAL (
+            SELECT severity FROM alerts WHERE alerts.detection_id = d.detection_id
+            ORDER BY created_at LIMIT 1
+        ) a ON TRUE
+        GROUP BY 1, 2, 3, 4;
+        """,
+        """
+        INSERT INTO detection_rollups_daily (bucket, camera_id, type, severity, count, confidence_sum)
+        SELECT date_trunc('day', bucket), camera_id, type, severity, SUM(count), SUM(confidence_sum)
+        FROM detection_rollups_hourly
+        GROUP BY 1, 2, 3, 4;
+        """,
+    ]),
+    # Older alerts took the database server's clock while their detections
+    # took the app host's; the severity filter assumes an alert is never
+    # older than its detection, so skewed ones move up to the detection's time
+    (8, "alerts never predate their detection", [
+        """
+        UPDATE alerts a SET created_at = d.timestamp
+        FROM detections d
+        WHERE a.detection_id = d.detection_id AND a.created_at < d.timestamp;
+        """,
+    ]),
+]
+
+
+def apply_migrations(cursor) -> List[int]:
+    """
+    Apply pending migrations inside the caller's transaction.
+
+    Args:
+        cursor: psycopg2 cursor; the caller commits or rolls back
+
+    Returns:
+        Versions applied by this call
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    newly_applied = []
+    for version, name, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"Applying migration {version}: {name}")
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        newly_applied.append(version)
+    return newly_applied
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0]
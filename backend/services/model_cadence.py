@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+
+def _rate_from_env(model_name: str, default: str) -> float:
+    return float(os.getenv(f"MODEL_RATE_{model_name.upper()}", default))
+
+
+class ModelCadence:
+    """
+    Per-model analysis rates for one live stream in "both" mode.
+
+    Weapons appear briefly and need a high rate, while fire and smoke evolve
+    over seconds. A model that is not due on a frame has its most recent
+    result carried forward, tagged with its age.
+
+    Carrying forward assumes consecutive frames of one continuous stream, so
+    a cadence belongs to a single camera or connection, never to unrelated
+    uploads. A frame of a different shape always runs the model.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.logger = logging.getLogger(__name__)
+        # Analyses per second per model; 0 means "every frame"
+        self.rates = rates if rates is not None else {
+            "weapon": _rate_from_env("weapon", "5"),
+            "fire_smoke": _rate_from_env("fire_smoke", "1"),
+        }
+        self._lock = threading.Lock()
+        self._last_run: Dict[str, float] = {}
+        self._last_result: Dict[str, List[Dict]] = {}
+        self._last_shape: Dict[str, Tuple[int, ...]] = {}
+        self.runs: Dict[str, int] = {name: 0 for name in self.rates}
+        self.carried: Dict[str, int] = {name: 0 for name in self.rates}
+
+    def due(self, model_name: str, now: Optional[float] = None,
+            shape: Optional[Tuple[int, ...]] = None) -> bool:
+        """Whether a model should run on the current frame (of the given shape)."""
+        now = now if now is not None else time.monotonic()
+        rate = self.rates.get(model_name, 0)
+        with self._lock:
+            last = self._last_run.get(model_name)
+            if rate <= 0 or last is None or model_name not in self._last_result:
+                return True
+            # Boxes from a frame of another size do not line up with this one
+            if shape is not None and tuple(shape) != self._last_shape.get(model_name):
+                return True
+            # Small tolerance so frame jitter does not push a run to the next frame
+            return now - last >= (1.0 / rate) * 0.95
+
+    def record(self, model_name: str, detections: List[Dict], now: Optional[float] = None,
+               shape: Optional[Tuple[int, ...]] = None):
+        """Store a fresh result for a model, computed on a frame of the given shape."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._last_run[model_name] = now
+            self._last_result[model_name] = detections
+            if shape is not None:
+                self._last_shape[model_name] = tuple(shape)
+            self.runs[model_name] = self.runs.get(model_name, 0) + 1
+
+    def carry_forward(self, model_name: str, now: Optional[float] = None) -> Tuple[List[Dict], float]:
+        """
+        Most recent result of a model that is not due, with each detection
+        tagged as carried and its age in milliseconds.
+
+        Returns:
+            (detections, age_seconds)
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            age = now - self._last_run.get(model_name, now)
+            self.carried[model_name] = self.carried.get(model_name, 0) + 1
+            detections = [
+                {**d, "carried": True, "age_ms": int(age * 1000)}
+                for d in self._last_result.get(model_name, [])
+            ]
+        return detections, age
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rates and how often each model ran or was carried forward."""
+        with self._lock:
+            return {
+                "rates": dict(self.rates),
+                "runs": dict(self.runs),
+                "carried": dict(self.carried),
+            }
+
+
+class ModelCadenceRegistry:
+    """
+    Holds one ModelCadence per live stream: a /frames connection or one
+    client's live HTTP feed. Cadences unused for idle_seconds are dropped.
+    """
+
+    def __init__(self, idle_seconds: Optional[float] = None):
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(
+            os.getenv("MODEL_CADENCE_IDLE_SECONDS", "60"))
+        self._cadences: Dict[str, ModelCadence] = {}
+        self._last_used: Dict[str, float] = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, stream: str, now: Optional[float] = None) -> ModelCadence:
+        """Return the cadence for a stream, creating it on first use."""
+        now = now if now is not None else time.monotonic()
+        if now - self._last_sweep > self.idle_seconds:
+            self.evict_idle(now)
+        with self._lock:
+            cadence = self._cadences.get(stream)
+            if cadence is None:
+                cadence = ModelCadence()
+                self._cadences[stream] = cadence
+            self._last_used[stream] = now
+            return cadence
+
+    def drop(self, stream: str):
+        """Forget a stream's cadence once its connection closes."""
+        with self._lock:
+            self._cadences.pop(stream, None)
+            self._last_used.pop(stream, None)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop cadences unused for idle_seconds; returns how many were dropped."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            idle = [stream for stream, used in self._last_used.items() if now - used > self.idle_seconds]
+            for stream in idle:
+                self._cadences.pop(stream, None)
+                self._last_used.pop(stream, None)
+            self.evicted += len(idle)
+        return len(idle)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Stats for every open stream."""
+        with self._lock:
+            cadences = dict(self._cadences)
+        return {stream: cadence.get_stats() for stream, cadence in cadences.items()}
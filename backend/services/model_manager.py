@@ -1,22 +1,35 @@
 import os
 from ultralytics import YOLO
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 import tensorflow as tf
+from .thread_budget import get_thread_budget
+
+MODEL_NAMES = ("weapon", "fire_smoke", "fight")
 
 class ModelManager:
-    """Manages YOLO and TensorFlow model loading and switching."""
+    """
+    Manages YOLO and TensorFlow model loading and per-request model selection.
+    
+    All loaded models are available at once; each request names the model
+    or set of models it wants. default_model only applies to requests that
+    don't choose.
+    """
     
     def __init__(self):
         self.weapon_model: Optional[YOLO] = None
         self.fire_smoke_model: Optional[YOLO] = None
         self.fight_model: Optional[tf.keras.Model] = None
-        self.current_model: str = "weapon"
+        self.default_model: str = os.getenv("DEFAULT_MODEL", "weapon")
         self.logger = logging.getLogger(__name__)
+        self.thread_budget = get_thread_budget()
     
     def load_models(self) -> Dict[str, Any]:
         """Load all configured models from disk."""
         try:
+            # Size framework thread pools before any model allocates them
+            self.thread_budget.apply(["torch", "tensorflow", "opencv"])
+            
             weapon_model_path = os.getenv("MODEL_WEAPON_PATH", "models/weapon.pt")
             fire_smoke_model_path = os.getenv("MODEL_FIRE_SMOKE_PATH", "models/fire_smoke.pt")
             fight_model_path = os.getenv("MODEL_FIGHT_PATH", "models/fight_detection_model.h5")
@@ -85,17 +98,27 @@ class ModelManager:
                 "error": str(e)
             }
     
-    def get_current_model(self) -> Optional[object]:
-        """Get the currently selected model."""
-        if self.current_model == "weapon" and self.weapon_model:
-            return self.weapon_model
-        elif self.current_model == "fire_smoke" and self.fire_smoke_model:
-            return self.fire_smoke_model
-        elif self.current_model == "fight" and self.fight_model:
-            return self.fight_model
-        # For "both" mode, we don't return a single model
-        # The camera service handles this case separately
-        return None
+    def resolve_models(self, selection: Optional[str] = None) -> List[str]:
+        """
+        Turn a request's model selection into a list of model names.
+        
+        Args:
+            selection: A model name, "both" (weapon + fire_smoke) or a
+                comma-separated set such as "weapon,fight"; None for the default
+        
+        Returns:
+            Model names in canonical order, or an empty list if any name is invalid
+        """
+        names = set()
+        for name in (selection or self.default_model).split(","):
+            name = name.strip()
+            if name == "both":
+                names.update(("weapon", "fire_smoke"))
+            elif name in MODEL_NAMES:
+                names.add(name)
+            elif name:
+                return []
+        return [name for name in MODEL_NAMES if name in names]
     
     def get_model(self, model_name: str) -> Optional[object]:
         """Get a specific model by name."""
@@ -114,10 +137,10 @@ class ModelManager:
                 self.fight_model is not None)
     
     def switch_model(self, model_name: str) -> bool:
-        """Switch to a different model."""
-        if model_name in ["weapon", "fire_smoke", "fight", "both"]:
-            self.current_model = model_name
-            self.logger.info(f"Switched to model: {model_name}")
+        """Change the default model used by requests that don't choose one."""
+        if self.resolve_models(model_name):
+            self.default_model = model_name
+            self.logger.info(f"Default model set to: {model_name}")
             return True
         self.logger.warning(f"Invalid model name: {model_name}")
         return False
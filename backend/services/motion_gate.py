@@ -0,0 +1,221 @@
+import cv2
+import numpy as np
+import os
+import time
+import threading
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+
+class MotionGate:
+    """
+    Cheap frame-difference gate that skips inference on static scenes.
+
+    Each frame is reduced to a small blurred grayscale thumbnail and compared
+    with the thumbnail of the last frame that was actually inferred. If the
+    fraction of changed pixels stays below the threshold, the previous result
+    is reused. A forced refresh interval guarantees inference still runs
+    periodically even when nothing appears to move.
+
+    A frame only becomes the reference once record_result() stores what
+    inference found on it; if inference fails or is dropped, the gate keeps
+    comparing against the last frame that actually has a result.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, pixel_threshold: Optional[int] = None,
+                 refresh_interval: Optional[float] = None, width: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        # Fraction of thumbnail pixels that must change to trigger inference
+        self.threshold = threshold if threshold is not None else float(os.getenv("MOTION_THRESHOLD", "0.01"))
+        # Per-pixel intensity difference that counts as "changed"
+        self.pixel_threshold = pixel_threshold if pixel_threshold is not None else int(os.getenv("MOTION_PIXEL_THRESHOLD", "25"))
+        # Seconds after which inference is forced regardless of motion
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("MOTION_REFRESH_INTERVAL", "5.0"))
+        self.width = width if width is not None else int(os.getenv("MOTION_GATE_WIDTH", "160"))
+        self.enabled = os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true"
+
+        self._lock = threading.Lock()
+        self._reference: Optional[np.ndarray] = None
+        self._reference_shape: Optional[Tuple[int, ...]] = None
+        self._last_key: Optional[str] = None
+        # Frame passed by check() to the calling thread, awaiting record_result()
+        self._pending = threading.local()
+        self._last_result: Optional[Dict[str, Any]] = None
+        self._last_inference_time = 0.0
+        self._avg_inference_seconds = 0.0
+
+        self.frames_checked = 0
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.forced_refreshes = 0
+        self.gate_seconds = 0.0
+        self.cpu_seconds_saved = 0.0
+        self.last_change = 0.0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale to a blurred grayscale thumbnail."""
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, frame: np.ndarray, key: str = "default") -> Tuple[bool, Dict[str, Any]]:
+        """
+        Decide whether a frame needs inference.
+
+        Args:
+            frame: BGR frame
+            key: Identifies what the cached result was computed with (e.g. model
+                 name); a different key always forces inference
+
+        Returns:
+            (run_inference, info) where info describes the gate decision
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.frames_checked += 1
+            thumb = self._thumbnail(frame)
+            now = time.time()
+
+            reason = None
+            change = 1.0
+            if not self.enabled:
+                reason = "disabled"
+            elif self._reference is None or self._last_result is None:
+                reason = "no_reference"
+            elif key != self._last_key or frame.shape != self._reference_shape:
+                reason = "changed_source"
+            elif now - self._last_inference_time >= self.refresh_interval:
+                reason = "refresh"
+                self.forced_refreshes += 1
+            else:
+                diff = cv2.absdiff(thumb, self._reference)
+                change = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+                if change >= self.threshold:
+                    reason = "motion"
+
+            self.last_change = change
+            run_inference = reason is not None
+            if run_inference:
+                # The reference is the frame inference ran on, so slow drift still accumulates
+                self._pending.reference = (thumb, frame.shape, key)
+            else:
+                self.frames_skipped += 1
+                self.cpu_seconds_saved += self._avg_inference_seconds
+
+            elapsed = time.perf_counter() - start
+            self.gate_seconds += elapsed
+            if not run_inference:
+                self.cpu_seconds_saved -= elapsed
+
+            return run_inference, {
+                "skipped": not run_inference,
+                "reason": reason or "static",
+                "change": round(change, 4),
+            }
+
+    def record_result(self, result: Dict[str, Any], inference_seconds: float):
+        """Store the result of inference on the frame this thread last passed to check()."""
+        pending = getattr(self._pending, "reference", None)
+        self._pending.reference = None
+        with self._lock:
+            if pending is not None:
+                self._reference, self._reference_shape, self._last_key = pending
+            self.frames_inferred += 1
+            self._last_result = result
+            self._last_inference_time = time.time()
+            # Exponential moving average of the inference cost being avoided
+            if self._avg_inference_seconds == 0.0:
+                self._avg_inference_seconds = inference_seconds
+            else:
+                self._avg_inference_seconds = 0.8 * self._avg_inference_seconds + 0.2 * inference_seconds
+
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        """Most recent inference result, or None."""
+        with self._lock:
+            return self._last_result
+
+    def reset(self):
+        """Drop the reference frame and cached result."""
+        with self._lock:
+            self._reference = None
+            self._reference_shape = None
+            self._last_result = None
+            self._last_key = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gate decision counters and estimated CPU saved."""
+        with self._lock:
+            checked = self.frames_checked or 1
+            return {
+                "frames_checked": self.frames_checked,
+                "frames_inferred": self.frames_inferred,
+                "frames_skipped": self.frames_skipped,
+                "forced_refreshes": self.forced_refreshes,
+                "skip_ratio": round(self.frames_skipped / checked, 4),
+                "avg_inference_ms": round(self._avg_inference_seconds * 1000, 2),
+                "avg_gate_ms": round(self.gate_seconds / checked * 1000, 3),
+                "cpu_seconds_saved": round(max(0.0, self.cpu_seconds_saved), 3),
+                "last_change": round(self.last_change, 4),
+            }
+
+
+class MotionGateRegistry:
+    """
+    Holds one MotionGate per stream: a /frames connection, one client's live
+    HTTP feed or a server-side camera.
+
+    A gate's cached result belongs to the frames of one stream, so streams
+    never share a gate even when they send the same camera_id. One-off
+    uploads have no stream and no gate. Gates unused for idle_seconds are
+    dropped.
+    """
+
+    def __init__(self, idle_seconds: Optional[float] = None):
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(
+            os.getenv("MOTION_GATE_IDLE_SECONDS", "60"))
+        self._gates: Dict[str, MotionGate] = {}
+        self._last_used: Dict[str, float] = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, stream: Optional[str], now: Optional[float] = None) -> Optional[MotionGate]:
+        """Return the gate for a stream, creating it on first use; None without a stream."""
+        if stream is None:
+            return None
+        now = now if now is not None else time.monotonic()
+        if now - self._last_sweep > self.idle_seconds:
+            self.evict_idle(now)
+        with self._lock:
+            gate = self._gates.get(stream)
+            if gate is None:
+                gate = MotionGate()
+                self._gates[stream] = gate
+            self._last_used[stream] = now
+            return gate
+
+    def drop(self, stream: str):
+        """Forget a stream's gate once its connection closes."""
+        with self._lock:
+            self._gates.pop(stream, None)
+            self._last_used.pop(stream, None)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop gates unused for idle_seconds; returns how many were dropped."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            idle = [stream for stream, used in self._last_used.items() if now - used > self.idle_seconds]
+            for stream in idle:
+                self._gates.pop(stream, None)
+                self._last_used.pop(stream, None)
+            self.evicted += len(idle)
+        return len(idle)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Stats for every open stream."""
+        with self._lock:
+            gates = dict(self._gates)
+        return {stream: gate.get_stats() for stream, gate in gates.items()}
@@ -0,0 +1,34 @@
+"""
+Opaque keyset cursors for paged detection listings.
+
+A cursor encodes the (timestamp, detection_id) of the last row of a page;
+the next page is the rows strictly after it in (timestamp DESC,
+detection_id DESC) order. Unlike OFFSET, every page is a single index
+range scan, and rows inserted while a client pages do not shift rows
+between pages.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(timestamp: datetime, detection_id: int) -> str:
+    payload = json.dumps([timestamp.isoformat(), detection_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Key encoded by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, detection_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(detection_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,163 @@
+"""
+Time partitioning and retention for detections and alerts.
+
+Both tables are range-partitioned on their timestamp column (migration 4),
+by month or by day. ensure_partitions() creates the partitions ahead of
+time; rows that arrive for a period with no partition land in the default
+partition and are moved out when their partition is created.
+apply_retention() detaches partitions older than the retention age,
+optionally archives each one to a gzipped CSV file, and drops it.
+"""
+
+import os
+import re
+import gzip
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES: Dict[str, str] = {"detections": "timestamp", "alerts": "created_at"}
+INTERVALS = ("month", "day")
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return datetime(moment.year, moment.month, moment.day)
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(table: str, start: datetime, interval: str) -> str:
+    suffix = start.strftime("%Y_%m_%d" if interval == "day" else "%Y_%m")
+    return f"{table}_p{suffix}"
+
+
+def list_partitions(cursor, table: str) -> List[Tuple[str, datetime, datetime]]:
+    """Range partitions of a table as (name, start, end); the default partition is left out."""
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname;
+    """, (table,))
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND.search(bound or "")
+        if match:
+            partitions.append((name, datetime.fromisoformat(match.group(1)),
+                               datetime.fromisoformat(match.group(2))))
+    return partitions
+
+
+def _create_partition(cursor, table: str, column: str, name: str, start: datetime, end: datetime):
+    """
+    Create and attach one partition.
+
+    The partition is built as a plain table, filled with the rows for its
+    range that are waiting in the default partition, then attached; creating
+    it directly as a partition would fail while those rows exist.
+    """
+    identifiers = {
+        "table": sql.Identifier(table),
+        "partition": sql.Identifier(name),
+        "default": sql.Identifier(f"{table}_default"),
+        "column": sql.Identifier(column),
+    }
+    cursor.execute(sql.SQL(
+        "CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ).format(**identifiers))
+    cursor.execute(sql.SQL("""
+        WITH moved AS (
+            DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *
+        )
+        INSERT INTO {partition} SELECT * FROM moved
+    """).format(**identifiers), (start, end))
+    cursor.execute(sql.SQL(
+        "ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)"
+    ).format(**identifiers), (start, end))
+
+
+def ensure_partitions(cursor, interval: str = "month", premake: int = 2,
+                      now: Optional[datetime] = None) -> List[str]:
+    """
+    Create missing partitions for the current period, the next premake
+    periods, and every period that has rows waiting in a default partition.
+
+    Periods overlapping an existing partition are skipped, so switching the
+    interval later leaves the old partitions in place.
+
+    Returns:
+        Names of the partitions created
+    """
+    now = now or datetime.now()
+    created = []
+    for table, column in PARTITIONED_TABLES.items():
+        existing = list_partitions(cursor, table)
+        cursor.execute(sql.SQL("SELECT DISTINCT date_trunc(%s, {column}) FROM {default}").format(
+            column=sql.Identifier(column), default=sql.Identifier(f"{table}_default")), (interval,))
+        periods = {period_start(row[0], interval) for row in cursor.fetchall() if row[0]}
+        start = period_start(now, interval)
+        for _ in range(premake + 1):
+            periods.add(start)
+            start = next_period(start, interval)
+
+        for start in sorted(periods):
+            end = next_period(start, interval)
+            if any(lo < end and start < hi for _, lo, hi in existing):
+                continue
+            name = partition_name(table, start, interval)
+            _create_partition(cursor, table, column, name, start, end)
+            existing.append((name, start, end))
+            created.append(name)
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
+
+
+def apply_retention(cursor, retention_days: float, archive_dir: Optional[str] = None,
+                    now: Optional[datetime] = None) -> List[str]:
+    """
+    Detach and drop partitions whose whole range is older than retention_days.
+
+    Args:
+        cursor: psycopg2 cursor; the caller commits
+        retention_days: Age after which a partition is removed
+        archive_dir: When set, each partition is written to
+            <archive_dir>/<partition>.csv.gz before it is dropped
+
+    Returns:
+        Names of the partitions dropped
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        for name, _, end in list_partitions(cursor, table):
+            if end > cutoff:
+                continue
+            partition = sql.Identifier(name)
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+                path = os.path.join(archive_dir, f"{name}.csv.gz")
+                with gzip.open(path, "wb") as f:
+                    cursor.copy_expert(
+                        sql.SQL("COPY {} TO STDOUT WITH CSV HEADER").format(partition).as_string(cursor), f)
+                logger.info(f"Archived partition {name} to {path}")
+            cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(sql.Identifier(table), partition))
+            cursor.execute(sql.SQL("DROP TABLE {}").format(partition))
+            dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped partitions past retention: {', '.join(dropped)}")
+    return dropped
@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+import os
+import time
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class RegionOfInterest:
+    """A polygonal inference region with normalized [0, 1] vertex coordinates."""
+
+    def __init__(self, polygon: List[List[float]], name: str = "region", region_id: Optional[int] = None):
+        self.region_id = region_id
+        self.name = name
+        self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+
+    def pixel_polygon(self, width: int, height: int) -> np.ndarray:
+        """Polygon vertices in pixel coordinates for a frame of the given size."""
+        points = self.polygon * np.array([width, height], dtype=np.float32)
+        return np.round(points).astype(np.int32)
+
+    def bounding_rect(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Bounding rectangle (x1, y1, x2, y2) clipped to the frame."""
+        points = self.pixel_polygon(width, height)
+        x1 = int(np.clip(points[:, 0].min(), 0, width))
+        y1 = int(np.clip(points[:, 1].min(), 0, height))
+        x2 = int(np.clip(points[:, 0].max(), 0, width))
+        y2 = int(np.clip(points[:, 1].max(), 0, height))
+        return x1, y1, x2, y2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "region_id": self.region_id,
+            "name": self.name,
+            "polygon": self.polygon.tolist(),
+        }
+
+
+def validate_polygon(polygon: List[List[float]]) -> Optional[str]:
+    """Return an error message if the polygon is unusable, otherwise None."""
+    if not polygon or len(polygon) < 3:
+        return "Polygon needs at least 3 points"
+    for point in polygon:
+        if not isinstance(point, (list, tuple)) or len(point) != 2:
+            return "Each point must be [x, y]"
+        try:
+            if not all(0.0 <= float(v) <= 1.0 for v in point):
+                return "Coordinates must be normalized to the range [0, 1]"
+        except (TypeError, ValueError):
+            return "Coordinates must be numbers"
+    # Repeated or collinear points enclose nothing and would never match a pixel
+    points = np.asarray(polygon, dtype=np.float64)
+    area = 0.5 * abs(np.dot(points[:, 0], np.roll(points[:, 1], 1)) - np.dot(points[:, 1], np.roll(points[:, 0], 1)))
+    if area <= 1e-6:
+        return "Polygon has no area"
+    return None
+
+
+def crop_to_region(image: np.ndarray, region: RegionOfInterest) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+    """
+    Crop an image to a region's bounding rectangle and black out pixels
+    outside the polygon.
+
+    Returns:
+        (masked crop or None if the region is empty, (x_offset, y_offset))
+    """
+    h, w = image.shape[:2]
+    x1, y1, x2, y2 = region.bounding_rect(w, h)
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None, (x1, y1)
+
+    crop = image[y1:y2, x1:x2].copy()
+    mask = np.zeros(crop.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [region.pixel_polygon(w, h) - np.array([x1, y1], dtype=np.int32)], 255)
+    crop[mask == 0] = 0
+    return crop, (x1, y1)
+
+
+def offset_detections(detections: List[Dict], offset: Tuple[int, int], region_name: str) -> List[Dict]:
+    """Map boxes detected in a crop back to full-frame coordinates."""
+    x_off, y_off = offset
+    mapped = []
+    for detection in detections:
+        box = detection["box"]
+        mapped.append({
+            **detection,
+            "box": {
+                "x1": box["x1"] + x_off,
+                "y1": box["y1"] + y_off,
+                "x2": box["x2"] + x_off,
+                "y2": box["y2"] + y_off,
+            },
+            "region": region_name,
+        })
+    return mapped
+
+
+def suppress_duplicates(detections: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
+    """Keep the most confident box among same-class boxes that overlap heavily."""
+    def iou(a, b):
+        ix1, iy1 = max(a["x1"], b["x1"]), max(a["y1"], b["y1"])
+        ix2, iy2 = min(a["x2"], b["x2"]), min(a["y2"], b["y2"])
+        inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+        area_a = (a["x2"] - a["x1"]) * (a["y2"] - a["y1"])
+        area_b = (b["x2"] - b["x1"]) * (b["y2"] - b["y1"])
+        union = area_a + area_b - inter
+        return inter / union if union > 0 else 0.0
+
+    kept = []
+    for detection in sorted(detections, key=lambda d: d["confidence"], reverse=True):
+        if all(k["class"] != detection["class"] or iou(k["box"], detection["box"]) < iou_threshold
+               for k in kept):
+            kept.append(detection)
+    return kept
+
+
+class RoiService:
+    """Loads and caches per-camera inference regions from the database."""
+
+    def __init__(self, database_manager=None):
+        self.logger = logging.getLogger(__name__)
+        self.database_manager = database_manager
+        # Regions are read on every frame, so keep them in memory for a while
+        self.cache_ttl = float(os.getenv("ROI_CACHE_TTL", "30"))
+        self._cache: Dict[str, Tuple[float, List[RegionOfInterest]]] = {}
+        self._lock = threading.Lock()
+
+    def get_regions(self, camera_id: str) -> List[RegionOfInterest]:
+        """
+        Regions configured for a camera. Cameras without a numeric database id
+        (e.g. browser feeds) or without regions analyse the full frame.
+        """
+        camera_id = str(camera_id)
+        if not camera_id.isdigit() or self.database_manager is None:
+            return []
+
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(camera_id)
+            if cached and now - cached[0] < self.cache_ttl:
+                return cached[1]
+
+        rows = self.database_manager.get_camera_regions(int(camera_id))
+        regions = [
+            RegionOfInterest(row["polygon"], row["name"], row["region_id"])
+            for row in rows if row.get("enabled", True)
+        ]
+        with self._lock:
+            self._cache[camera_id] = (now, regions)
+        return regions
+
+    def invalidate(self, camera_id: Optional[str] = None):
+        """Drop cached regions for one camera, or for all cameras."""
+        with self._lock:
+            if camera_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(str(camera_id), None)
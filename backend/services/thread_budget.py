@@ -0,0 +1,258 @@
+"""
+Central CPU thread budget for every inference framework used by the backend.
+
+Ultralytics/PyTorch, TensorFlow, OpenCV and MediaPipe each size their own
+thread pools to the full core count, so running "both" mode plus fight
+detection oversubscribes the CPU. This module splits one budget across the
+frameworks and applies it once per process.
+
+OpenMP runtimes (used by MediaPipe's TFLite delegates) only read
+OMP_NUM_THREADS when they are first loaded, so configure_environment() has
+to run at process entry, before any ML framework is imported.
+
+Configuration (environment variables):
+    CPU_THREAD_BUDGET   Total intra-op threads to hand out (default: all cores)
+    CPU_THREAD_SPLIT    Relative shares, e.g. "torch=2,tensorflow=1,opencv=1,mediapipe=1"
+    CPU_INTEROP_THREADS Inter-op threads for PyTorch and TensorFlow (default: 1)
+    CPU_AFFINITY        Cores for this process, e.g. "0-3,6"
+    CPU_WORKER_AFFINITY Core groups for worker processes, e.g. "0-3;4-7"
+"""
+
+import os
+import sys
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+FRAMEWORKS = ("torch", "tensorflow", "opencv", "mediapipe")
+
+DEFAULT_SPLIT = {"torch": 2, "tensorflow": 1, "opencv": 1, "mediapipe": 1}
+
+# Modules that load an OpenMP runtime on import
+OPENMP_MODULES = ("torch", "tensorflow", "cv2", "mediapipe")
+
+
+def parse_core_list(spec: str) -> List[int]:
+    """Parse a core list such as "0-3,6" into [0, 1, 2, 3, 6]."""
+    cores = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def parse_split(spec: str) -> Dict[str, int]:
+    """Parse "torch=2,tensorflow=1" into a share dict for known frameworks."""
+    shares = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        name = name.strip().lower()
+        if name == "tf":
+            name = "tensorflow"
+        if name == "cv2":
+            name = "opencv"
+        if name in FRAMEWORKS:
+            shares[name] = max(0, int(value))
+    return shares
+
+
+class ThreadBudget:
+    """Splits a single CPU thread budget across the inference frameworks."""
+
+    def __init__(self, total_threads: Optional[int] = None, split: Optional[Dict[str, int]] = None,
+                 interop_threads: Optional[int] = None, affinity: Optional[List[int]] = None,
+                 worker_affinity: Optional[List[List[int]]] = None):
+        self.logger = logging.getLogger(__name__)
+        cpu_count = os.cpu_count() or 1
+
+        if total_threads is None:
+            total_threads = int(os.getenv("CPU_THREAD_BUDGET", str(cpu_count)))
+        if split is None:
+            env_split = os.getenv("CPU_THREAD_SPLIT", "")
+            split = {**DEFAULT_SPLIT, **parse_split(env_split)} if env_split else dict(DEFAULT_SPLIT)
+        if interop_threads is None:
+            interop_threads = int(os.getenv("CPU_INTEROP_THREADS", "1"))
+        if affinity is None and os.getenv("CPU_AFFINITY"):
+            affinity = parse_core_list(os.getenv("CPU_AFFINITY", ""))
+        if worker_affinity is None:
+            groups = os.getenv("CPU_WORKER_AFFINITY", "")
+            worker_affinity = [parse_core_list(g) for g in groups.split(";") if g.strip()]
+
+        self.total_threads = max(1, total_threads)
+        self.split = split
+        self.interop_threads = max(1, interop_threads)
+        self.affinity = affinity
+        self.worker_affinity = worker_affinity
+        self.allocation = self._allocate()
+        # Threads handed out beyond total_threads (one per framework minimum)
+        self.overshoot = max(0, sum(self.allocation.values()) - self.total_threads)
+        if self.overshoot:
+            self.logger.warning(
+                f"Thread budget of {self.total_threads} is below one thread per framework; "
+                f"allocating {sum(self.allocation.values())} threads")
+        self.environment: Dict[str, Any] = {}
+        self.applied: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _allocate(self) -> Dict[str, int]:
+        """Divide total_threads by the configured shares (largest remainder, at least 1 each)."""
+        active = {name: share for name, share in self.split.items() if share > 0}
+        if not active:
+            return {name: 1 for name in FRAMEWORKS}
+
+        total_share = sum(active.values())
+        exact = {name: self.total_threads * share / total_share for name, share in active.items()}
+        allocation = {name: int(value) for name, value in exact.items()}
+        remaining = self.total_threads - sum(allocation.values())
+        for name in sorted(exact, key=lambda n: exact[n] - allocation[n], reverse=True)[:max(0, remaining)]:
+            allocation[name] += 1
+
+        # Every framework needs at least one thread to run at all
+        return {name: max(1, allocation.get(name, 0)) for name in FRAMEWORKS}
+
+    def threads_for(self, framework: str) -> int:
+        """Intra-op thread count assigned to a framework."""
+        return self.allocation.get(framework, 1)
+
+    def apply(self, frameworks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Apply the budget to the given frameworks (all by default).
+
+        Safe to call more than once; each framework is configured only the
+        first time. Frameworks that are not installed are skipped.
+
+        Returns:
+            Dictionary of the settings that were applied per framework
+        """
+        with self._lock:
+            if self.affinity and "affinity" not in self.applied:
+                self.applied["affinity"] = self.pin(self.affinity)
+
+            for framework in frameworks or FRAMEWORKS:
+                if framework in self.applied:
+                    continue
+                apply_fn = getattr(self, f"_apply_{framework}", None)
+                if apply_fn is None:
+                    continue
+                try:
+                    self.applied[framework] = apply_fn(self.threads_for(framework))
+                except ImportError:
+                    self.applied[framework] = {"skipped": "not installed"}
+                except Exception as e:
+                    self.logger.warning(f"Could not apply thread budget to {framework}: {e}")
+                    self.applied[framework] = {"error": str(e)}
+
+            self.logger.info(f"Thread budget applied: {self.applied}")
+            return dict(self.applied)
+
+    def configure_environment(self) -> Dict[str, Any]:
+        """
+        Export OMP_NUM_THREADS for runtimes that read it at load time.
+
+        Call at process entry, before torch, TensorFlow, OpenCV or MediaPipe
+        is imported. A value already in the environment is left alone. If an
+        OpenMP module is loaded already, the value is recorded as not in effect.
+        """
+        with self._lock:
+            preset = "OMP_NUM_THREADS" in os.environ
+            os.environ.setdefault("OMP_NUM_THREADS", str(self.threads_for("mediapipe")))
+            loaded = [name for name in OPENMP_MODULES if name in sys.modules]
+            self.environment = {
+                "OMP_NUM_THREADS": int(os.environ["OMP_NUM_THREADS"]),
+                "in_effect": preset or not loaded,
+            }
+            if not self.environment["in_effect"]:
+                self.logger.warning(f"OMP_NUM_THREADS set after {', '.join(loaded)} loaded; it has no effect")
+            return dict(self.environment)
+
+    def _apply_torch(self, threads: int) -> Dict[str, Any]:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(self.interop_threads)
+        except RuntimeError as e:
+            # Inter-op pool can only be sized before the first parallel op
+            self.logger.warning(f"PyTorch inter-op threads already fixed: {e}")
+        return {"intra_op": torch.get_num_threads(), "inter_op": torch.get_num_interop_threads()}
+
+    def _apply_tensorflow(self, threads: int) -> Dict[str, Any]:
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(self.interop_threads)
+        except RuntimeError as e:
+            # TensorFlow refuses once its runtime context has been initialised
+            self.logger.warning(f"TensorFlow threading already initialised: {e}")
+        return {
+            "intra_op": tf.config.threading.get_intra_op_parallelism_threads(),
+            "inter_op": tf.config.threading.get_inter_op_parallelism_threads(),
+        }
+
+    def _apply_opencv(self, threads: int) -> Dict[str, Any]:
+        import cv2
+        cv2.setNumThreads(threads)
+        return {"intra_op": cv2.getNumThreads()}
+
+    def _apply_mediapipe(self, threads: int) -> Dict[str, Any]:
+        # MediaPipe exposes no thread-count setting; its graph executor and
+        # TFLite delegates read OMP_NUM_THREADS at load time, which only
+        # configure_environment() can set early enough.
+        if not self.environment.get("in_effect"):
+            return {"skipped": "OMP_NUM_THREADS was not set before ML imports"}
+        return {"intra_op": self.environment["OMP_NUM_THREADS"]}
+
+    def affinity_for_worker(self, worker_index: int) -> Optional[List[int]]:
+        """Core group for a worker, cycling through CPU_WORKER_AFFINITY."""
+        if not self.worker_affinity:
+            return None
+        return self.worker_affinity[worker_index % len(self.worker_affinity)]
+
+    def pin(self, cores: List[int]) -> Optional[List[int]]:
+        """Pin the calling process/thread to the given cores (Linux only)."""
+        if not cores or not hasattr(os, "sched_setaffinity"):
+            return None
+        try:
+            os.sched_setaffinity(0, cores)
+            return sorted(os.sched_getaffinity(0))
+        except OSError as e:
+            self.logger.warning(f"Could not set CPU affinity to {cores}: {e}")
+            return None
+
+    def pin_worker(self, worker_index: int) -> Optional[List[int]]:
+        """Pin a worker process to its configured core group, if any."""
+        return self.pin(self.affinity_for_worker(worker_index) or [])
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the configured and applied budget."""
+        return {
+            "total_threads": self.total_threads,
+            "interop_threads": self.interop_threads,
+            "split": self.split,
+            "allocation": self.allocation,
+            "overshoot": self.overshoot,
+            "environment": dict(self.environment),
+            "affinity": self.affinity,
+            "worker_affinity": self.worker_affinity,
+            "applied": dict(self.applied),
+        }
+
+
+_thread_budget: Optional[ThreadBudget] = None
+
+
+def get_thread_budget() -> ThreadBudget:
+    """Process-wide ThreadBudget built from the environment."""
+    global _thread_budget
+    if _thread_budget is None:
+        _thread_budget = ThreadBudget()
+    return _thread_budget
@@ -0,0 +1,263 @@
+"""
+Offline analysis of recorded video files.
+
+The video is split into seek-based chunks that are analysed in parallel
+worker processes, each with its own copy of the selected models. Per-chunk
+observations are merged into a single event timeline with start/end
+timestamps, peak confidence and class per event.
+"""
+
+import cv2
+import os
+import math
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .thread_budget import get_thread_budget
+
+ANALYSIS_MODELS = ("weapon", "fire_smoke", "fight")
+
+# Models loaded once per worker process by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(models: Tuple[str, ...], threads: int, counter):
+    """Worker process setup: thread budget, core pinning and model loading."""
+    # Each worker gets an equal share of the budget so workers don't oversubscribe cores
+    os.environ["CPU_THREAD_BUDGET"] = str(threads)
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    budget = get_thread_budget()
+    budget.pin_worker(index)
+    budget.apply(["torch", "opencv"])
+
+    # Imported here so the API process does not need a second copy of each model
+    from ultralytics import YOLO
+    from .detection_service import DetectionService
+
+    _worker["detection"] = DetectionService()
+    if "weapon" in models:
+        _worker["weapon"] = YOLO(os.getenv("MODEL_WEAPON_PATH", "models/weapon.pt"))
+    if "fire_smoke" in models:
+        _worker["fire_smoke"] = YOLO(os.getenv("MODEL_FIRE_SMOKE_PATH", "models/fire_smoke.pt"))
+    if "fight" in models:
+        from .fight_detection_service import FightDetectionService
+        fight_service = FightDetectionService()
+        if fight_service.load_model():
+            _worker["fight"] = fight_service
+
+
+def _analyze_chunk(path: str, start_frame: int, end_frame: int, step: int, warmup_frames: int) -> Dict[str, Any]:
+    """
+    Analyse frames [start_frame, end_frame) of a video, sampling every step-th frame.
+
+    Sampling is aligned to absolute frame numbers so chunk boundaries do not
+    shift the grid. Frames between samples are grabbed without decoding. When
+    fight detection is enabled, warmup_frames before the chunk are fed to the
+    pose buffer (without reporting) so the LSTM has a full sequence at the
+    chunk start.
+
+    Returns:
+        Dictionary with observations as (class, seconds, confidence) tuples
+    """
+    cpu_start = time.process_time()
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    fight_service = _worker.get("fight")
+    detection_service = _worker["detection"]
+    yolo_models = [(name, _worker[name]) for name in ("weapon", "fire_smoke") if name in _worker]
+
+    first_frame = max(0, start_frame - warmup_frames) if fight_service else start_frame
+    capture.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+    if fight_service:
+        fight_service.reset_buffer()
+
+    observations: List[Tuple[str, float, float]] = []
+    frames_sampled = 0
+    frame_index = first_frame
+    while frame_index < end_frame:
+        if frame_index % step:
+            if not capture.grab():
+                break
+            frame_index += 1
+            continue
+
+        ok, frame = capture.read()
+        if not ok:
+            break
+        seconds = frame_index / fps
+        reporting = frame_index >= start_frame
+
+        if fight_service:
+            result = fight_service.detect_fight(frame, annotate=False)
+            if reporting and result.get("success") and result.get("is_fight"):
+                observations.append(("fight", seconds, float(result["fight_probability"])))
+
+        if reporting:
+            for _, model in yolo_models:
+                result = detection_service.detect_objects(model, frame)
+                for detection in result.get("detections", []):
+                    observations.append((detection["class"], seconds, float(detection["confidence"])))
+            frames_sampled += 1
+        frame_index += 1
+
+    capture.release()
+    return {
+        "start_frame": start_frame,
+        "end_frame": end_frame,
+        "frames_sampled": frames_sampled,
+        "observations": observations,
+        "cpu_seconds": time.process_time() - cpu_start,
+    }
+
+
+def plan_chunks(frame_count: int, fps: float, workers: int, chunk_seconds: float) -> List[Tuple[int, int]]:
+    """
+    Split a video into [start, end) frame ranges.
+
+    Chunks are at most chunk_seconds long, and short enough that every worker
+    gets at least one.
+    """
+    if frame_count <= 0:
+        return []
+    max_len = max(1, int(chunk_seconds * fps))
+    per_worker = max(1, math.ceil(frame_count / max(1, workers)))
+    length = min(max_len, per_worker)
+    return [(start, min(start + length, frame_count)) for start in range(0, frame_count, length)]
+
+
+def build_timeline(observations: List[Tuple[str, float, float]], gap_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Merge observations into events.
+
+    Observations of the same class no more than gap_seconds apart belong to
+    one event, including across chunk boundaries.
+    """
+    events: List[Dict[str, Any]] = []
+    open_events: Dict[str, Dict[str, Any]] = {}
+    for class_name, seconds, confidence in sorted(observations, key=lambda o: o[1]):
+        event = open_events.get(class_name)
+        if event is None or seconds - event["end"] > gap_seconds:
+            event = {
+                "class": class_name,
+                "start": seconds,
+                "end": seconds,
+                "peak_confidence": confidence,
+                "peak_time": seconds,
+                "samples": 0,
+            }
+            events.append(event)
+            open_events[class_name] = event
+        event["end"] = seconds
+        event["samples"] += 1
+        if confidence > event["peak_confidence"]:
+            event["peak_confidence"] = confidence
+            event["peak_time"] = seconds
+
+    for event in events:
+        for key in ("start", "end", "peak_time"):
+            event[key] = round(event[key], 3)
+        event["peak_confidence"] = round(event["peak_confidence"], 4)
+    return events
+
+
+class VideoAnalysisService:
+    """Runs chunked, multi-process analysis of recorded video files."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.workers = int(os.getenv("VIDEO_ANALYSIS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        self.chunk_seconds = float(os.getenv("VIDEO_ANALYSIS_CHUNK_SECONDS", "30"))
+        self.sample_fps = float(os.getenv("VIDEO_ANALYSIS_SAMPLE_FPS", "2"))
+        self.event_gap = float(os.getenv("VIDEO_EVENT_GAP_SECONDS", "2"))
+
+    def analyze(self, path: str, models: List[str], sample_fps: Optional[float] = None,
+                workers: Optional[int] = None,
+                progress: Optional[Callable[[float], None]] = None,
+                cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Analyse a video file with the selected models.
+
+        Args:
+            path: Video file readable by OpenCV
+            models: Any of "weapon", "fire_smoke", "fight"
+            sample_fps: Frames analysed per second of video
+            workers: Worker processes
+            progress: Called with the completed fraction after each chunk
+            cancel_event: When set, chunks not yet started are cancelled
+
+        Returns:
+            Dictionary with video info, the event timeline and throughput
+        """
+        models = [m for m in models if m in ANALYSIS_MODELS]
+        if not models:
+            return {"success": False, "error": f"No valid models. Use any of {', '.join(ANALYSIS_MODELS)}"}
+
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            return {"success": False, "error": "Could not open video file"}
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        capture.release()
+
+        sample_fps = sample_fps or self.sample_fps
+        workers = max(1, workers or self.workers)
+        step = max(1, round(fps / sample_fps)) if sample_fps > 0 else 1
+        chunks = plan_chunks(frame_count, fps, workers, self.chunk_seconds)
+        if not chunks:
+            return {"success": False, "error": "Video has no frames"}
+        # Feed a full LSTM sequence of sampled frames before each chunk
+        warmup_frames = 30 * step if "fight" in models else 0
+        threads_per_worker = max(1, get_thread_budget().total_threads // workers)
+
+        self.logger.info(f"Analysing {path}: {frame_count} frames in {len(chunks)} chunks "
+                         f"on {workers} workers, every {step} frame(s), models {models}")
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        counter = context.Value("i", 0)
+        results = []
+        cancelled = False
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(tuple(models), threads_per_worker, counter)) as pool:
+            futures = [pool.submit(_analyze_chunk, path, s, e, step, warmup_frames) for s, e in chunks]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                results.append(future.result())
+                if progress:
+                    progress(len(results) / len(chunks))
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        elapsed = time.perf_counter() - start
+        observations = [o for r in results for o in r["observations"]]
+        frames_sampled = sum(r["frames_sampled"] for r in results)
+        gap = max(self.event_gap, 2.0 * step / fps)
+        return {
+            "success": not cancelled,
+            "cancelled": cancelled,
+            "video": {
+                "fps": round(fps, 3),
+                "frames": frame_count,
+                "duration_seconds": round(frame_count / fps, 3),
+            },
+            "models": models,
+            "sample_fps": round(fps / step, 3),
+            "workers": workers,
+            "chunks": len(chunks),
+            "chunks_completed": len(results),
+            "frames_sampled": frames_sampled,
+            "timeline": build_timeline(observations, gap),
+            "wall_seconds": round(elapsed, 2),
+            "cpu_seconds": round(sum(r["cpu_seconds"] for r in results), 2),
+            "frames_per_second": round(frames_sampled / elapsed, 2) if elapsed else 0.0,
+        }
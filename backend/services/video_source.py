@@ -0,0 +1,302 @@
+"""
+File-backed capture sources for reproducible pipeline benchmarks.
+
+A recorded session is a directory of JPEG frames plus an ``index.jsonl`` file
+with one line per frame: {"frame": 0, "file": "000000.jpg", "ts": 0.0}, where
+``ts`` is seconds since the start of the session. ``SessionRecorder`` writes
+this format from a live camera and ``ReplaySource`` plays it back (or any
+video file OpenCV can open) with the same interface as ``cv2.VideoCapture``.
+"""
+
+import cv2
+import numpy as np
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Optional, Tuple, List, Dict, Any, Union
+
+INDEX_FILE = "index.jsonl"
+
+
+class ReplaySource:
+    """
+    Replays a recorded frame directory or video file as a camera.
+
+    speed=1.0 replays in real time, speed=4.0 four times faster and speed=0
+    as fast as the consumer reads. In timed modes frames the consumer was too
+    slow for are dropped, as a live camera driver would, so fps, latency and
+    dropped-frame numbers match what a physical camera would produce.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, drop_late: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.speed = max(0.0, speed)
+        self.loop = loop
+        self.drop_late = drop_late
+
+        self._capture: Optional[cv2.VideoCapture] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._position = 0
+        self._start_wall: Optional[float] = None
+        self._opened = False
+        self._fps = 0.0
+
+        self.last_timestamp = 0.0
+        self.frames_read = 0
+        self.frames_dropped = 0
+
+        if os.path.isdir(path):
+            self._open_directory(path)
+        elif os.path.isfile(path):
+            self._open_video(path)
+        else:
+            self.logger.error(f"Replay source not found: {path}")
+
+    def _open_directory(self, path: str):
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                self._entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            # Plain frame directory: assume a fixed rate from REPLAY_FPS
+            fps = float(os.getenv("REPLAY_FPS", "30"))
+            files = sorted(f for f in os.listdir(path) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+            self._entries = [{"frame": i, "file": name, "ts": i / fps} for i, name in enumerate(files)]
+
+        if len(self._entries) > 1:
+            duration = self._entries[-1]["ts"] - self._entries[0]["ts"]
+            self._fps = (len(self._entries) - 1) / duration if duration > 0 else 0.0
+        self._opened = len(self._entries) > 0
+
+    def _open_video(self, path: str):
+        self._capture = cv2.VideoCapture(path)
+        self._opened = self._capture.isOpened()
+        if self._opened:
+            self._fps = self._capture.get(cv2.CAP_PROP_FPS) or 0.0
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def _pace(self, ts: float) -> float:
+        """Elapsed replay time for a frame at ts, anchoring the clock on the first frame."""
+        now = time.monotonic()
+        if self._start_wall is None:
+            self._start_wall = now - ts / self.speed
+        return now - self._start_wall
+
+    def _wait_until(self, ts: float, elapsed: float):
+        wait = ts / self.speed - elapsed
+        if wait > 0:
+            time.sleep(wait)
+
+    def _read_directory(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        if self._position >= len(self._entries):
+            if not self.loop:
+                return False, None, 0.0
+            self._position = 0
+            self._start_wall = None
+
+        entry = self._entries[self._position]
+        if self.speed > 0:
+            elapsed = self._pace(float(entry["ts"]))
+            # Consumer fell behind: skip frames whose display time has passed
+            if self.drop_late:
+                while (self._position + 1 < len(self._entries)
+                       and float(self._entries[self._position + 1]["ts"]) / self.speed <= elapsed):
+                    self._position += 1
+                    self.frames_dropped += 1
+                entry = self._entries[self._position]
+            self._wait_until(float(entry["ts"]), elapsed)
+
+        self._position += 1
+        frame = cv2.imread(os.path.join(self.path, entry["file"]), cv2.IMREAD_COLOR)
+        return frame is not None, frame, float(entry["ts"])
+
+    def _read_video(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        if self.speed > 0 and self.drop_late and self._fps > 0 and self._start_wall is not None:
+            # Consumer fell behind: grab (without decoding) frames whose time has passed
+            elapsed = time.monotonic() - self._start_wall
+            due_frame = int(elapsed * self.speed * self._fps)
+            while self._capture.get(cv2.CAP_PROP_POS_FRAMES) < due_frame:
+                if not self._capture.grab():
+                    break
+                self.frames_dropped += 1
+
+        ret, frame = self._capture.read()
+        if not ret and self.loop:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._start_wall = None
+            ret, frame = self._capture.read()
+        if not ret:
+            return False, None, 0.0
+
+        ts = self._capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if self.speed > 0:
+            self._wait_until(ts, self._pace(ts))
+        return True, frame, ts
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Return the next frame, paced by its recorded timestamp."""
+        if not self._opened:
+            return False, None
+
+        if self._capture is not None:
+            ret, frame, ts = self._read_video()
+        else:
+            ret, frame, ts = self._read_directory()
+        if not ret:
+            return False, None
+
+        self.last_timestamp = ts
+        self.frames_read += 1
+        return True, frame
+
+    def get(self, prop: int) -> float:
+        """Subset of cv2.VideoCapture.get used by the pipeline."""
+        if self._capture is not None and prop != cv2.CAP_PROP_POS_MSEC:
+            return self._capture.get(prop)
+        if prop == cv2.CAP_PROP_FPS:
+            return self._fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._entries))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.last_timestamp * 1000.0
+        return 0.0
+
+    def release(self):
+        if self._capture is not None:
+            self._capture.release()
+        self._opened = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.path,
+            "speed": self.speed,
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
+            "last_timestamp": round(self.last_timestamp, 3),
+        }
+
+
+class SessionRecorder:
+    """
+    Records frames to disk in the format ReplaySource plays back.
+
+    write() only queues the frame; a writer thread encodes the JPEG and
+    appends the index line, so recording adds no encode time to the capture
+    loop being measured. If the writer falls more than max_queue frames
+    behind, new frames are dropped and counted rather than blocking capture.
+    Frames are not copied, so callers must not draw on them after write().
+    """
+
+    def __init__(self, path: str, jpeg_quality: int = 90, max_queue: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.max_queue = max_queue or int(os.getenv("RECORD_MAX_QUEUE", "120"))
+        os.makedirs(path, exist_ok=True)
+        self._index = open(os.path.join(path, INDEX_FILE), "w")
+        self._start: Optional[float] = None
+        self._queue: "queue.Queue[Optional[Tuple[np.ndarray, float]]]" = queue.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Queue a frame for writing.
+
+        Args:
+            frame: BGR frame
+            timestamp: Monotonic capture time; defaults to now
+        """
+        if self._closed:
+            return
+        timestamp = timestamp if timestamp is not None else time.monotonic()
+        if self._start is None:
+            self._start = timestamp
+        try:
+            self._queue.put_nowait((frame, timestamp - self._start))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, ts = item
+            name = f"{self.frames_written:06d}.jpg"
+            if not cv2.imwrite(os.path.join(self.path, name), frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]):
+                self.logger.error(f"Could not write recorded frame {name}")
+                continue
+            self._index.write(json.dumps({
+                "frame": self.frames_written,
+                "file": name,
+                "ts": round(ts, 6),
+            }) + "\n")
+            self.frames_written += 1
+
+    def close(self):
+        """Write the frames still queued, then close the index."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._index.close()
+        self.logger.info(f"Recorded {self.frames_written} frames to {self.path} ({self.frames_dropped} dropped)")
+
+
+def open_capture(source: Union[int, str, None] = None, speed: Optional[float] = None):
+    """
+    Open a capture source interchangeably.
+
+    Integers (or digit strings) open a physical camera, existing files and
+    directories are replayed, anything else (e.g. an RTSP URL) is handed to
+    OpenCV. Defaults to CAMERA_SOURCE, then CAMERA_INDEX.
+    """
+    if source is None:
+        source = os.getenv("CAMERA_SOURCE") or os.getenv("CAMERA_INDEX", "0")
+    if speed is None:
+        speed = float(os.getenv("REPLAY_SPEED", "1.0"))
+
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return cv2.VideoCapture(int(source))
+    if os.path.exists(source):
+        return ReplaySource(source, speed=speed, loop=os.getenv("REPLAY_LOOP", "false").lower() == "true")
+    return cv2.VideoCapture(source)
+
+
+# ============================================================
+# USAGE EXAMPLE: record a live session for later replay
+# ============================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record a camera session for replay")
+    parser.add_argument("output", help="Directory to write frames and index.jsonl to")
+    parser.add_argument("--source", default=os.getenv("CAMERA_INDEX", "0"))
+    parser.add_argument("--seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    capture = open_capture(args.source)
+    recorder = SessionRecorder(args.output)
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        recorder.write(frame)
+    recorder.close()
+    capture.release()
+    print(f"Recorded {recorder.frames_written} frames to {args.output}")
@@ -0,0 +1,80 @@
+"""
+Test script for inference admission control.
+Checks the per-client limit, queue-full rejection, deadline drops and
+in-order hand-off of freed slots.
+"""
+
+import asyncio
+from services.admission_control import AdmissionController, AdmissionRejected
+
+
+async def hold(controller, client, seconds, log=None, deadline_ms=None):
+    async with controller.slot(client, deadline_ms):
+        if log is not None:
+            log.append(client)
+        await asyncio.sleep(seconds)
+
+
+def test_limits_and_rejections():
+    """Client limit gives 429, a full queue and a passed deadline give 503."""
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, per_client=1, deadline_ms=50)
+        controller.enabled = True
+
+        running = asyncio.create_task(hold(controller, "a", 0.2))
+        await asyncio.sleep(0.01)
+        try:
+            await hold(controller, "a", 0)
+            assert False, "second request from the same client should be refused"
+        except AdmissionRejected as e:
+            assert e.status_code == 429 and e.retry_after >= 1
+
+        waiting = asyncio.create_task(hold(controller, "b", 0))
+        await asyncio.sleep(0.01)
+        try:
+            await hold(controller, "c", 0)
+            assert False, "request beyond the queue should be refused"
+        except AdmissionRejected as e:
+            assert e.status_code == 503
+
+        # "b" waits longer than its 50ms deadline behind the 200ms request
+        try:
+            await waiting
+            assert False, "stale request should be dropped"
+        except AdmissionRejected as e:
+            assert e.status_code == 503
+        await running
+
+        stats = controller.get_stats()
+        print(f"Admission stats: {stats}")
+        assert stats["rejected_client_limit"] == 1
+        assert stats["rejected_queue_full"] == 1
+        assert stats["deadline_drops"] == 1
+        assert stats["in_flight"] == 0 and stats["queued"] == 0 and stats["clients"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_slots_handed_over_in_order():
+    """Freed slots go to waiters in arrival order and in-flight never exceeds the limit."""
+    async def scenario():
+        controller = AdmissionController(max_in_flight=2, max_queue=8, per_client=1, deadline_ms=5000)
+        controller.enabled = True
+        log = []
+        tasks = []
+        for client in "abcdef":
+            tasks.append(asyncio.create_task(hold(controller, client, 0.02, log)))
+            await asyncio.sleep(0)
+            assert controller.in_flight <= 2
+        await asyncio.gather(*tasks)
+        assert log == list("abcdef")
+        assert controller.get_stats()["admitted"] == 6
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_limits_and_rejections()
+    test_slots_handed_over_in_order()
+    print("Test completed!")
@@ -0,0 +1,228 @@
+"""
+Test script for the analytics rollups.
+Checks the hour/day window arithmetic, then, when TEST_DATABASE_URL points
+at a PostgreSQL database, writes detections through save_detection_batch in
+a scratch schema and compares /analytics summaries and timeseries with
+counts taken from the raw detections.
+"""
+
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta
+from services.async_database_manager import (
+    AsyncDatabaseManager, MAX_TIMESERIES_BUCKETS, timeseries_bucket_count,
+    _hour_floor, _hour_ceil, _day_floor, _day_ceil,
+)
+from services.database_manager import DatabaseManager
+from services.migrations import apply_migrations
+from services.partition_manager import ensure_partitions
+from db_testing import require_test_database
+
+SEED_DETECTIONS = 200_000
+BATCH = 5000
+TYPES = ["person", "fire", "smoke", "knife", "gun"]
+
+
+def test_window_rounding():
+    moment = datetime(2026, 10, 19, 8, 30)
+    assert _hour_floor(moment) == datetime(2026, 10, 19, 8)
+    assert _hour_ceil(moment) == datetime(2026, 10, 19, 9)
+    assert _hour_ceil(datetime(2026, 10, 19, 8)) == datetime(2026, 10, 19, 8)
+    assert _day_floor(moment) == datetime(2026, 10, 19)
+    assert _day_ceil(moment) == datetime(2026, 10, 20)
+    assert _day_ceil(datetime(2026, 10, 19)) == datetime(2026, 10, 19)
+
+
+def test_timeseries_window_is_bounded():
+    """Bucket counts cover the generated series, and oversized windows are refused."""
+    since, until = datetime(2026, 10, 1, 8, 30), datetime(2026, 10, 3, 8, 30)
+    assert timeseries_bucket_count("hour", since, until) >= 49
+    assert timeseries_bucket_count("day", since, until) >= 3
+    assert timeseries_bucket_count("month", datetime(2025, 11, 30), until) == 12
+    assert timeseries_bucket_count("hour", until, since) == 0
+
+    async def request(bucket, since):
+        # Refused before any query, so no database is needed
+        return await AsyncDatabaseManager().get_detection_timeseries(bucket, since, until)
+
+    for bucket, since in (("hour", datetime(1970, 1, 1)), ("day", until - timedelta(days=400)),
+                          ("month", datetime(1970, 1, 1))):
+        assert timeseries_bucket_count(bucket, since, until) > MAX_TIMESERIES_BUCKETS
+        try:
+            asyncio.run(request(bucket, since))
+        except ValueError as e:
+            assert str(MAX_TIMESERIES_BUCKETS) in str(e)
+        else:
+            raise AssertionError(f"{bucket} window from {since} was not refused")
+    assert asyncio.run(request("hour", until - timedelta(days=7))) == []
+
+
+def seed_records(now, start_id):
+    """Detections every ~80 seconds back over six months."""
+    rng = random.Random(7)
+    records = []
+    for i in range(SEED_DETECTIONS):
+        confidence = round(rng.uniform(0.3, 1.0), 3)
+        records.append({
+            "detection_id": start_id + i,
+            "camera_id": 1,
+            "type": TYPES[min(int(rng.expovariate(1.0)), len(TYPES) - 1)],
+            "confidence": confidence,
+            "timestamp": now - timedelta(seconds=80 * i + rng.randint(0, 79)),
+            "image_url": None,
+            "severity": "high" if confidence >= 0.8 else "medium" if confidence >= 0.6 else "low",
+        })
+    return records
+
+
+def test_rollups_match_raw_counts():
+    url = require_test_database("rollup checks")
+    if not url:
+        return
+    import asyncpg
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS analytics_test CASCADE; CREATE SCHEMA analytics_test;")
+    cursor.execute("SET search_path TO analytics_test")
+    now = datetime.now().replace(microsecond=0)
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        ensure_partitions(cursor, "month", premake=8, now=now - timedelta(days=200))
+        ensure_partitions(cursor, "month", now=now)
+        connection.commit()
+        connection.autocommit = True
+
+        async def run():
+            manager = AsyncDatabaseManager()
+            manager.pool = await asyncpg.create_pool(
+                url, min_size=1, max_size=2, server_settings={"search_path": "analytics_test"})
+            try:
+                records = seed_records(now, 1)
+                for offset in range(0, len(records), BATCH):
+                    assert await manager.save_detection_batch(records[offset:offset + BATCH]) == BATCH
+                # A replayed batch is skipped and not counted twice
+                assert await manager.save_detection_batch(records[:BATCH]) == 0
+
+                window = (now - timedelta(days=90, hours=5, minutes=20), now - timedelta(days=3, minutes=10))
+                start = time.perf_counter()
+                summary = await manager.get_analytics_summary(*window)
+                summary_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                series = await manager.get_detection_timeseries("day", *window, types=["fire", "gun"])
+                series_ms = (time.perf_counter() - start) * 1000
+                hourly = await manager.get_detection_timeseries("hour", now - timedelta(hours=6), now)
+                return records, window, summary, summary_ms, series, series_ms, hourly
+            finally:
+                await manager.pool.close()
+
+        records, window, summary, summary_ms, series, series_ms, hourly = asyncio.run(run())
+        print(f"summary over 87 days in {summary_ms:.1f} ms, daily series in {series_ms:.1f} ms")
+
+        # The summary covers the window rounded out to whole hours
+        lo, hi = _hour_floor(window[0]), _hour_ceil(window[1])
+        inside = [r for r in records if lo <= r["timestamp"] < hi]
+        assert summary["total"] == len(inside)
+        for kind in TYPES:
+            assert summary["by_type"].get(kind, 0) == sum(r["type"] == kind for r in inside), kind
+        assert summary["by_severity"]["high"] == sum(r["severity"] == "high" for r in inside)
+        assert sum(summary["by_hour"]) == len(inside)
+        expected_confidence = sum(r["confidence"] for r in inside) / len(inside)
+        assert abs(summary["average_confidence"] - expected_confidence) < 1e-3
+
+        # Daily buckets start at midnight of the first day and have no gaps
+        assert series[0]["bucket"] == _day_floor(window[0]).isoformat()
+        assert len(series) == (_day_floor(window[1]) - _day_floor(window[0])).days + 1
+        day = datetime.fromisoformat(series[10]["bucket"])
+        assert series[10]["types"].get("fire", 0) == sum(
+            r["type"] == "fire" and day <= r["timestamp"] < day + timedelta(days=1) for r in records)
+        assert set().union(*(p["types"] for p in series)) <= {"fire", "gun"}
+        assert len(hourly) == 7 and sum(p["total"] for p in hourly) == sum(
+            r["timestamp"] >= _hour_floor(now - timedelta(hours=6)) for r in records)
+
+        cursor.execute("SELECT COUNT(*) FROM alerts WHERE created_at IS DISTINCT FROM "
+                       "(SELECT timestamp FROM detections d WHERE d.detection_id = alerts.detection_id)")
+        assert cursor.fetchone()[0] == 0, "alerts take their detection's timestamp"
+        assert summary_ms < 50 and series_ms < 50, (summary_ms, series_ms)
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS analytics_test CASCADE")
+        connection.close()
+
+
+def test_single_row_saves_keep_rollups_current():
+    """save_detection and save_alert, on either manager, keep the rollups equal to the raw rows."""
+    url = require_test_database("single-row rollup checks")
+    if not url:
+        return
+    import asyncpg
+    import psycopg2
+    import psycopg2.pool
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS rollup_single_test CASCADE; CREATE SCHEMA rollup_single_test;")
+    cursor.execute("SET search_path TO rollup_single_test")
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        ensure_partitions(cursor, "month")
+        connection.commit()
+        connection.autocommit = True
+
+        async def run():
+            manager = AsyncDatabaseManager()
+            manager.pool = await asyncpg.create_pool(
+                url, min_size=1, max_size=1, server_settings={"search_path": "rollup_single_test"})
+            try:
+                knife = await manager.save_detection("knife", 0.9)
+                await manager.save_detection("fire", 0.5)  # Never gets an alert
+                assert await manager.save_alert(knife, "high")
+                assert await manager.save_alert(knife, "low"), "a second alert is not counted again"
+            finally:
+                await manager.pool.close()
+
+        asyncio.run(run())
+        sync_manager = DatabaseManager()
+        sync_manager.pool = psycopg2.pool.ThreadedConnectionPool(
+            1, 1, url, options="-c search_path=rollup_single_test")
+        try:
+            gun = sync_manager.save_detection("gun", 0.7)
+            assert sync_manager.save_alert(gun, "medium")
+            sync_manager.save_detection("smoke", 0.4)
+        finally:
+            sync_manager.pool.closeall()
+
+        # Each detection counts once, under its first alert's severity or "none"
+        raw = """
+            SELECT d.type, COALESCE(a.severity, 'none'), COUNT(*), SUM(d.confidence)
+            FROM detections d
+            LEFT JOIN LATERAL (SELECT severity FROM alerts WHERE alerts.detection_id = d.detection_id
+                               ORDER BY alert_id LIMIT 1) a ON TRUE
+            GROUP BY 1, 2 ORDER BY 1, 2
+        """
+        cursor.execute(raw)
+        expected = [(kind, severity, count, round(total, 6)) for kind, severity, count, total in cursor.fetchall()]
+        assert expected == [("fire", "none", 1, 0.5), ("gun", "medium", 1, 0.7),
+                            ("knife", "high", 1, 0.9), ("smoke", "none", 1, 0.4)]
+        for table in ("detection_rollups_hourly", "detection_rollups_daily"):
+            cursor.execute(f"""
+                SELECT type, severity, SUM(count)::bigint, SUM(confidence_sum) FROM {table}
+                GROUP BY 1, 2 HAVING SUM(count) > 0 ORDER BY 1, 2
+            """)
+            assert [(k, s, c, round(t, 6)) for k, s, c, t in cursor.fetchall()] == expected, table
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS rollup_single_test CASCADE")
+        connection.close()
+
+
+if __name__ == "__main__":
+    test_window_rounding()
+    test_timeseries_window_is_bounded()
+    test_rollups_match_raw_counts()
+    test_single_row_saves_keep_rollups_current()
+    print("Test completed!")
@@ -0,0 +1,59 @@
+"""
+Test script for the streaming batch detection endpoint.
+Builds a zip of synthetic images, posts it to /detect/batch and prints
+the NDJSON lines as they arrive.
+"""
+
+import io
+import json
+import time
+import zipfile
+
+import cv2
+import numpy as np
+import requests
+
+
+def build_archive(count: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for i in range(count):
+            img = np.zeros((480, 640, 3), dtype=np.uint8)
+            cv2.rectangle(img, (50 + i % 200, 100), (200 + i % 200, 250), (255, 255, 255), -1)
+            _, encoded = cv2.imencode(".jpg", img)
+            zf.writestr(f"image_{i:04d}.jpg", encoded.tobytes())
+    return buffer.getvalue()
+
+
+def test_batch_api(count: int = 50, model: str = "weapon"):
+    base_url = "http://localhost:8000"
+    archive = build_archive(count)
+
+    start = time.perf_counter()
+    first_line = None
+    response = requests.post(
+        f"{base_url}/detect/batch",
+        files={"archive": ("images.zip", archive, "application/zip")},
+        data={"model": model},
+        stream=True,
+    )
+    for raw in response.iter_lines():
+        if not raw:
+            continue
+        if first_line is None:
+            first_line = time.perf_counter() - start
+        line = json.loads(raw)
+        if line.get("done"):
+            print(f"Summary: {line}")
+        elif "error" in line:
+            print(f"{line['filename']}: error {line['error']}")
+        else:
+            found = line.get("detections", []) + line.get("weapon_detections", []) + line.get("fire_smoke_detections", [])
+            print(f"{line['filename']}: {len(found)} detection(s)")
+
+    if first_line is not None:
+        print(f"First result after {first_line:.2f}s, total {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    test_batch_api()
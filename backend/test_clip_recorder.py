@@ -0,0 +1,105 @@
+"""
+Test script for the pre/post-event clip recorder.
+Checks FrameRing trimming by time and byte budget, clip assembly from the
+ring window, unguessable clip names and safe lookups, and that rings of
+streams that went quiet are evicted.
+"""
+
+import os
+import time
+import tempfile
+import cv2
+import numpy as np
+from services.clip_recorder import FrameRing, ClipRecorder
+
+
+def jpeg(i):
+    frame = np.full((48, 64, 3), (i * 10) % 255, dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def test_ring_trims_by_time_and_bytes():
+    ring = FrameRing(max_seconds=1.0, max_bytes=10_000)
+    for i in range(20):
+        ring.push(b"x" * 100, timestamp=100.0 + i * 0.1)
+    # Only frames within one second of the newest remain
+    assert [ts for ts, _ in ring.window(0, 1e9)] == [100.0 + i * 0.1 for i in range(9, 20)]
+    assert ring.get_stats()["frames_evicted"] == 9
+
+    small = FrameRing(max_seconds=60.0, max_bytes=250)
+    for i in range(5):
+        small.push(b"x" * 100, timestamp=float(i))
+    stats = small.get_stats()
+    assert stats["frames"] == 2 and stats["bytes"] == 200
+    assert small.window(3.0, 3.5) == [(3.0, b"x" * 100)]
+
+
+def test_clip_assembly():
+    with tempfile.TemporaryDirectory() as clip_dir:
+        recorder = ClipRecorder(clip_dir)
+        recorder.enabled = True
+        recorder.pre_seconds, recorder.post_seconds = 1.0, 0.5
+        # The ring holds pre + post + 1 seconds
+        for i in range(30):
+            recorder.push("sid-a", jpeg(i), timestamp=1000.0 + i * 0.1)
+        recorder.push("sid-b", jpeg(99), timestamp=1002.0)
+
+        recorder._write_clip("sid-a", 1002.0, "clip.avi")
+        capture = cv2.VideoCapture(os.path.join(clip_dir, "clip.avi"))
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        # 1001.0 .. 1002.5 at 10 fps from stream A only
+        assert frames == 16 and recorder.frames_encoded == 16
+
+        recorder._write_clip("unknown", 1002.0, "none.avi")
+        assert not os.path.exists(os.path.join(clip_dir, "none.avi"))
+
+
+def test_trigger_names_and_lookup():
+    with tempfile.TemporaryDirectory() as clip_dir:
+        recorder = ClipRecorder(clip_dir)
+        recorder.enabled = True
+        recorder.pre_seconds, recorder.post_seconds = 0.2, 0.1
+        assert recorder.trigger("no-frames-yet") is None
+
+        now = time.time()
+        for i in range(5):
+            recorder.push("sid-a", jpeg(i), timestamp=now - 0.1 + i * 0.05)
+        url = recorder.trigger("sid-a")
+        assert recorder.trigger("sid-a") == url, "alerts during the post window share a clip"
+        filename = url.rsplit("/", 1)[1]
+        assert url.startswith(recorder.url_prefix + "/") and "sid-a" not in filename
+        assert len(filename) >= 20
+
+        recorder.stop()
+        assert recorder.clip_path(filename) == os.path.join(clip_dir, filename)
+        for bad in ("../main.py", "..%2Fmain.avi", "clip.mp4", ".avi", "missing.avi"):
+            assert recorder.clip_path(bad) is None, bad
+
+
+def test_idle_rings_are_evicted():
+    with tempfile.TemporaryDirectory() as clip_dir:
+        recorder = ClipRecorder(clip_dir)
+        recorder.enabled = True
+        recorder.ring_idle_seconds = 60.0
+        recorder.push("quiet", jpeg(0))
+        recorder.push("busy", jpeg(1))
+        recorder.push("pending", jpeg(2))
+        recorder._pending["pending"] = (time.time(), "/clips/x.avi")
+
+        later = time.time() + 30
+        assert recorder.evict_idle(now=later) == 0
+        recorder._rings["busy"].last_push = later
+        assert recorder.evict_idle(now=time.time() + 61) == 1
+        assert set(recorder._rings) == {"busy", "pending"}, "rings with a clip pending stay"
+        assert recorder.get_stats()["rings_evicted"] == 1
+
+
+if __name__ == "__main__":
+    test_ring_trims_by_time_and_bytes()
+    test_clip_assembly()
+    test_trigger_names_and_lookup()
+    test_idle_rings_are_evicted()
+    print("Test completed!")
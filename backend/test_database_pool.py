@@ -0,0 +1,236 @@
+"""
+Test script for the DatabaseManager connection pool.
+Uses an in-memory stand-in for psycopg2's pool to check per-operation
+cursors, commit/rollback, broken-connection replacement, blocking
+checkouts and the exposed pool statistics.
+"""
+
+import time
+import threading
+import psycopg2
+from services import database_manager
+from services.database_manager import DatabaseManager, PoolExhausted
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.connection.broken:
+            self.connection.closed = 1
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.connection.queries.append(query)
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.queries = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self, size):
+        self._pool = [FakeConnection() for _ in range(size)]
+        self._used = {}
+        self.closed_connections = 0
+
+    def getconn(self):
+        connection = self._pool.pop() if self._pool else FakeConnection()
+        self._used[id(connection)] = connection
+        return connection
+
+    def putconn(self, connection, close=False):
+        self._used.pop(id(connection), None)
+        if close:
+            self.closed_connections += 1
+        else:
+            self._pool.append(connection)
+
+    def closeall(self):
+        self._pool.clear()
+
+
+def make_manager(max_connections=2, timeout=0.2):
+    manager = DatabaseManager()
+    manager.max_connections = max_connections
+    manager.acquire_timeout = timeout
+    manager._slots = threading.BoundedSemaphore(max_connections)
+    manager.pool = FakePool(max_connections)
+    return manager
+
+
+def test_operations_use_pooled_connections():
+    """Each call checks a connection out and back in and commits its work."""
+    manager = make_manager()
+    assert manager.save_alert(1, "high") is True
+    assert manager.mark_detection_read(1) is True
+
+    connection = manager.pool._pool[-1]
+    assert connection.commits == 2
+    stats = manager.get_pool_stats()
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 0
+    print(f"Pool stats after two writes: {stats}")
+
+
+def test_errors_roll_back():
+    """A failing statement rolls back and the connection goes back to the pool."""
+    manager = make_manager()
+    try:
+        with manager._cursor() as cursor:
+            cursor.execute("SELECT 1")
+            raise ValueError("bad row")
+    except ValueError:
+        pass
+    connection = manager.pool._pool[-1]
+    assert connection.rollbacks == 1 and connection.commits == 0
+    assert manager.pool.closed_connections == 0
+
+
+def test_broken_connections_are_replaced():
+    """Connection-level errors discard the connection; the next call gets a new one."""
+    manager = make_manager()
+    manager.pool._pool[-1].broken = True
+    assert manager.save_alert(1, "high") is False
+    assert manager.pool.closed_connections == 1
+    assert manager.save_alert(1, "high") is True
+    assert manager.get_pool_stats()["discarded_connections"] == 1
+
+    # Closed connections found at checkout are replaced before use
+    manager.healthcheck_interval = 0
+    manager.pool._pool[-1].closed = 1
+    assert manager.save_alert(1, "high") is True
+    assert manager.get_pool_stats()["discarded_connections"] == 2
+
+
+def test_checkout_waits_for_a_free_connection():
+    """Callers beyond the pool size block, then time out; waits are recorded."""
+    manager = make_manager(max_connections=1, timeout=0.5)
+    release = threading.Event()
+
+    def hold():
+        with manager._cursor():
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.05)
+    assert manager.get_pool_stats()["utilisation"] == 1.0
+
+    threading.Timer(0.1, release.set).start()
+    with manager._cursor() as cursor:
+        cursor.execute("SELECT 1")
+    holder.join()
+    stats = manager.get_pool_stats()
+    assert stats["max_wait_ms"] >= 50, stats
+
+    manager.acquire_timeout = 0.05
+    release.clear()
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.02)
+    try:
+        with manager._cursor():
+            raise AssertionError("checkout should have timed out")
+    except PoolExhausted:
+        pass
+    release.set()
+    holder.join()
+    assert manager.get_pool_stats()["timeouts"] == 1
+    print(f"Pool stats after contention: {manager.get_pool_stats()}")
+
+
+def test_reconnect_is_throttled():
+    """Without a pool, reconnects are attempted at most once per interval."""
+    manager = DatabaseManager()
+    attempts = []
+    manager.connect = lambda: attempts.append(1) or False
+    manager.reconnect_interval = 60
+    manager._last_connect_attempt = 0.0
+    assert manager.ensure_connected() is False
+    manager._last_connect_attempt = time.monotonic()
+    assert manager.ensure_connected() is False
+    assert manager.save_alert(1, "high") is False
+    assert len(attempts) == 1
+
+
+def test_failed_setup_closes_the_pool():
+    """A pool opened before migrations fail is closed, not leaked, on every attempt."""
+    pools = []
+
+    def open_pool(minconn, maxconn, **kwargs):
+        pool = FakePool(maxconn)
+        pool.closed = False
+        pool.closeall = lambda: setattr(pool, "closed", True)
+        pools.append(pool)
+        return pool
+
+    def fail_migrations():
+        raise psycopg2.ProgrammingError("permission denied for schema public")
+
+    manager = DatabaseManager()
+    manager._apply_migrations = fail_migrations
+    original = psycopg2.pool.ThreadedConnectionPool
+    psycopg2.pool.ThreadedConnectionPool = open_pool
+    try:
+        assert manager.connect() is False
+        assert manager.connect() is False
+    finally:
+        psycopg2.pool.ThreadedConnectionPool = original
+    assert manager.pool is None
+    assert len(pools) == 2 and all(pool.closed for pool in pools)
+
+
+def test_dropped_partitions_are_reported():
+    """Retention that drops partitions calls the hook; a pass that drops nothing does not."""
+    manager = make_manager()
+    manager.retention_days = 30
+    dropped = []
+    manager.on_partitions_dropped = dropped.append
+    originals = database_manager.ensure_partitions, database_manager.apply_retention
+    try:
+        database_manager.ensure_partitions = lambda cursor, interval, premake=2: []
+        database_manager.apply_retention = lambda cursor, days, archive_dir=None: ["detections_p2026_01"]
+        assert manager.maintain_partitions()["dropped"] == ["detections_p2026_01"]
+        database_manager.apply_retention = lambda cursor, days, archive_dir=None: []
+        manager.maintain_partitions()
+    finally:
+        database_manager.ensure_partitions, database_manager.apply_retention = originals
+    assert dropped == [["detections_p2026_01"]]
+
+
+if __name__ == "__main__":
+    test_operations_use_pooled_connections()
+    test_errors_roll_back()
+    test_broken_connections_are_replaced()
+    test_checkout_waits_for_a_free_connection()
+    test_reconnect_is_throttled()
+    test_failed_setup_closes_the_pool()
+    test_dropped_partitions_are_reported()
+    print("Test completed!")
@@ -0,0 +1,166 @@
+"""
+Test script for DetectionCache.
+Runs it against an in-memory stand-in for AsyncDatabaseManager that counts
+queries, and checks that polls are answered without touching the database,
+that writes and read-state changes go through to the cache and move the
+ETag, and that fills racing with writes are thrown away.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from services.detection_cache import DetectionCache, etag_matches
+
+START = datetime(2026, 10, 19, 8, 0)
+
+
+class FakeDatabase:
+    def __init__(self, count=5):
+        self.rows = [self.row(i) for i in range(1, count + 1)]
+        self.queries = 0
+        self.pause = None
+
+    @staticmethod
+    def row(detection_id, camera_id=1):
+        return {
+            "detection_id": detection_id, "type": "knife", "confidence": 0.9,
+            "timestamp": (START + timedelta(seconds=detection_id)).isoformat(), "image_url": None,
+            "camera_location": "Default Webcam", "camera_id": camera_id, "is_read": False,
+        }
+
+    async def ensure_connected(self):
+        return True
+
+    async def get_recent_detections(self, limit):
+        self.queries += 1
+        if self.pause:
+            await self.pause.wait()
+        return [dict(r) for r in sorted(self.rows, key=lambda r: r["detection_id"], reverse=True)[:limit]]
+
+    async def count_unread_detections(self):
+        self.queries += 1
+        return sum(not r["is_read"] for r in self.rows)
+
+    async def mark_detection_read(self, detection_id):
+        self.queries += 1
+        for r in self.rows:
+            if r["detection_id"] == detection_id:
+                r["is_read"] = True
+        return True
+
+    async def mark_all_detections_read(self):
+        self.queries += 1
+        for r in self.rows:
+            r["is_read"] = True
+        return True
+
+    def write(self, detection_ids, camera_id=1):
+        """Store rows the way save_detection_batch would and return the writer's records."""
+        records = []
+        for detection_id in detection_ids:
+            row = self.row(detection_id, camera_id)
+            self.rows.append(row)
+            records.append({
+                "detection_id": detection_id, "camera_id": camera_id, "type": row["type"],
+                "confidence": row["confidence"], "timestamp": datetime.fromisoformat(row["timestamp"]),
+                "image_url": None, "severity": "high",
+            })
+        return records
+
+
+def test_polls_do_not_query_the_database():
+    async def run():
+        database = FakeDatabase()
+        cache = DetectionCache(database, capacity=20)
+        assert await cache.prime()
+        filled = database.queries
+        for _ in range(100):
+            assert len(await cache.recent(3)) == 3
+            assert await cache.unread_count() == 5
+        assert database.queries == filled
+        assert await cache.recent(21) is None, "more rows than the cache holds"
+    asyncio.run(run())
+
+
+def test_writes_and_reads_go_through():
+    async def run():
+        database = FakeDatabase()
+        cache = DetectionCache(database, capacity=6)
+        await cache.prime()
+        etag = cache.etag
+
+        cache.record_written(database.write([6, 7]), 2)
+        recent = await cache.recent(6)
+        assert [r["detection_id"] for r in recent] == [7, 6, 5, 4, 3, 2], "capacity keeps the newest"
+        assert recent == await database.get_recent_detections(6)
+        assert await cache.unread_count() == 7
+        assert cache.etag != etag
+        etag = cache.etag
+
+        assert await cache.mark_read(6)
+        assert (await cache.recent(2))[1]["is_read"] is True
+        assert await cache.unread_count() == 6
+        assert cache.etag != etag, "read state is part of the ETag"
+
+        assert await cache.mark_all_read()
+        assert await cache.unread_count() == 0
+        assert all(r["is_read"] for r in await cache.recent(6))
+    asyncio.run(run())
+
+
+def test_unknown_rows_invalidate():
+    async def run():
+        database = FakeDatabase()
+        cache = DetectionCache(database)
+        await cache.prime()
+
+        # A replayed batch where some rows already existed
+        cache.record_written(database.write([8, 9]), 1)
+        assert not cache.primed and cache.etag is None
+        await cache.recent(5)
+        assert cache.primed
+
+        # A camera the cache has no location for
+        cache.record_written(database.write([10], camera_id=2), 1)
+        assert not cache.primed
+
+        # Late, older IDs still change the ETag
+        await cache.prime()
+        etag = cache.etag
+        database.rows = [r for r in database.rows if r["detection_id"] != 4]
+        await cache.prime()
+        cache.record_written(database.write([4]), 1)
+        assert cache.etag != etag
+    asyncio.run(run())
+
+
+def test_fill_racing_with_write_is_discarded():
+    async def run():
+        database = FakeDatabase()
+        cache = DetectionCache(database)
+        database.pause = asyncio.Event()
+        fill = asyncio.create_task(cache.prime())
+        await asyncio.sleep(0)
+        cache.record_written(database.write([6]), 1)
+        database.pause.set()
+        assert await fill is False and not cache.primed
+        database.pause = None
+        assert (await cache.recent(1))[0]["detection_id"] == 6
+    asyncio.run(run())
+
+
+def test_etag_matching():
+    assert etag_matches('"7-3"', '"7-3"')
+    assert etag_matches('W/"7-3"', '"7-3"')
+    assert etag_matches('"1-1", "7-3"', '"7-3"')
+    assert etag_matches("*", '"7-3"')
+    assert not etag_matches('"7-2"', '"7-3"')
+    assert not etag_matches(None, '"7-3"')
+
+
+if __name__ == "__main__":
+    test_polls_do_not_query_the_database()
+    test_writes_and_reads_go_through()
+    test_unknown_rows_invalidate()
+    test_fill_racing_with_write_is_discarded()
+    test_etag_matching()
+    print("Test completed!")
@@ -0,0 +1,187 @@
+"""
+Test script for the single-query detection detail.
+Checks the result shape against an in-memory connection, then, when
+TEST_DATABASE_URL points at a PostgreSQL database, compares
+get_detection_detail and get_detection_details with the old
+get_detection_by_id + get_alerts_for_detection path: same data, fewer
+statements per request and lower latency.
+"""
+
+import json
+import time
+import asyncio
+from datetime import datetime
+from services.async_database_manager import AsyncDatabaseManager
+from services.migrations import apply_migrations
+from services.partition_manager import ensure_partitions
+from db_testing import require_test_database
+
+SEED_DETECTIONS = 20_000
+RUNS = 200
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self):
+        self.calls = 0
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def row(self, detection_id):
+        return {
+            "detection_id": detection_id, "type": "gun", "confidence": 0.92,
+            "timestamp": datetime(2026, 10, 19, 8, 0), "image_url": "/clips/a.mp4", "is_read": None,
+            "camera_id": 1, "location": "Default Webcam", "ip_address": None, "camera_status": True,
+            "alerts": json.dumps([{"alert_id": 7, "severity": "high", "status": "pending",
+                                   "created_at": "2026-10-19T08:00:00"}]),
+        }
+
+    async def fetchrow(self, query, *args):
+        self.calls += 1
+        return self.row(args[0])
+
+    async def fetch(self, query, *args):
+        self.calls += 1
+        return [self.row(i) for i in args[0]]
+
+
+class FakePool:
+    def __init__(self):
+        self.connection = FakeConnection()
+
+    async def acquire(self, timeout=None):
+        return self.connection
+
+    async def release(self, connection):
+        pass
+
+
+def test_detail_shape_and_single_call():
+    async def run():
+        manager = AsyncDatabaseManager()
+        manager.pool = FakePool()
+        detail = await manager.get_detection_detail(5)
+        assert manager.pool.connection.calls == 1
+        assert detail["detection"]["detection_id"] == 5
+        assert detail["detection"]["camera_location"] == "Default Webcam"
+        assert detail["detection"]["is_read"] is False
+        assert detail["camera"] == {"camera_id": 1, "location": "Default Webcam", "ip_address": None, "status": True}
+        assert detail["alerts"][0]["severity"] == "high"
+
+        details = await manager.get_detection_details([3, 1, 2])
+        assert manager.pool.connection.calls == 2
+        assert [d["detection"]["detection_id"] for d in details] == [3, 1, 2]
+        assert await manager.get_detection_details([]) == []
+        assert manager.pool.connection.calls == 2
+    asyncio.run(run())
+
+
+def test_detail_matches_two_query_path():
+    url = require_test_database("detail query checks")
+    if not url:
+        return
+    import asyncpg
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS detail_test CASCADE; CREATE SCHEMA detail_test;")
+    cursor.execute("SET search_path TO detail_test")
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        # Every third detection has no alert, the rest one to three
+        cursor.execute("""
+            INSERT INTO detections (camera_id, type, confidence, timestamp)
+            SELECT 1, 'knife', 0.5 + (i %% 50) / 100.0, now() - (i || ' minutes')::interval
+            FROM generate_series(1, %s) AS i;
+            INSERT INTO alerts (detection_id, severity, created_at)
+            SELECT d.detection_id, (ARRAY['high', 'medium', 'low'])[n], d.timestamp + (n || ' seconds')::interval
+            FROM detections d, generate_series(1, 3) AS n
+            WHERE n <= d.detection_id %% 4;
+        """, (SEED_DETECTIONS,))
+        ensure_partitions(cursor, "month")
+        connection.commit()
+        connection.autocommit = True
+        cursor.execute("VACUUM ANALYZE detections")
+        cursor.execute("VACUUM ANALYZE alerts")
+
+        statements = []
+
+        async def log_statements(connection):
+            connection.add_query_logger(lambda record: statements.append(record.query))
+
+        async def run():
+            manager = AsyncDatabaseManager()
+            manager.pool = await asyncpg.create_pool(
+                url, min_size=1, max_size=1, init=log_statements,
+                server_settings={"search_path": "detail_test"})
+            try:
+                ids = list(range(1, SEED_DETECTIONS + 1, SEED_DETECTIONS // 50))[:50]
+                for detection_id in ids[:8]:
+                    detail = await manager.get_detection_detail(detection_id)
+                    assert detail["detection"] == await manager.get_detection_by_id(detection_id)
+                    assert detail["alerts"] == await manager.get_alerts_for_detection(detection_id)
+                    assert len(detail["alerts"]) == detection_id % 4
+                assert await manager.get_detection_detail(SEED_DETECTIONS + 1) is None
+
+                async def old_path(detection_id):
+                    detection = await manager.get_detection_by_id(detection_id)
+                    return {"detection": detection,
+                            "alerts": await manager.get_alerts_for_detection(detection_id)}
+
+                def queries():
+                    # Leave out BEGIN/COMMIT and the reset asyncpg runs when a connection is released
+                    return sum("detections" in q or "alerts" in q for q in statements), len(statements)
+
+                counts, timings = {}, {}
+                await manager.get_detection_details(ids[:2])
+                for name, call in (("two queries", old_path), ("single query", manager.get_detection_detail)):
+                    statements.clear()
+                    await call(ids[0])
+                    counts[name] = queries()
+                    start = time.perf_counter()
+                    for i in range(RUNS):
+                        await call(ids[i % len(ids)])
+                    timings[name] = (time.perf_counter() - start) / RUNS * 1000
+
+                statements.clear()
+                start = time.perf_counter()
+                details = await manager.get_detection_details(ids)
+                bulk_ms = (time.perf_counter() - start) * 1000
+                counts["bulk"] = queries()
+                assert [d["detection"]["detection_id"] for d in details] == ids
+                start = time.perf_counter()
+                for detection_id in ids:
+                    await old_path(detection_id)
+                loop_ms = (time.perf_counter() - start) * 1000
+                return counts, timings, bulk_ms, loop_ms
+            finally:
+                await manager.pool.close()
+
+        counts, timings, bulk_ms, loop_ms = asyncio.run(run())
+        print(f"(queries, statements) per request {counts}; per detail "
+              f"{timings['two queries']:.2f} ms -> {timings['single query']:.2f} ms; "
+              f"50 details {loop_ms:.1f} ms -> {bulk_ms:.1f} ms in bulk")
+        assert counts["single query"][0] == 1 and counts["two queries"][0] == 2 and counts["bulk"][0] == 1, counts
+        assert counts["single query"][1] * 2 == counts["two queries"][1], "one checkout instead of two"
+        assert timings["single query"] < timings["two queries"]
+        assert bulk_ms < loop_ms / 5
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS detail_test CASCADE")
+        connection.close()
+
+
+if __name__ == "__main__":
+    test_detail_shape_and_single_call()
+    test_detail_matches_two_query_path()
+    print("Test completed!")
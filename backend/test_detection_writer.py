@@ -0,0 +1,149 @@
+"""
+Test script for the write-behind detection writer.
+Uses an in-memory stand-in for the async database to check size- and
+time-triggered batching, reserved IDs, spooling during an outage and
+replay once the database is back.
+"""
+
+import os
+import asyncio
+import tempfile
+from services.detection_writer import DetectionWriter
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.db_connected = True
+        self.available = True
+        self.next_id = 1
+        self.rows = {}
+        self.statements = 0
+        self.delay = 0.0
+        self.reserve_delay = 0.0
+
+    async def reserve_detection_ids(self, count):
+        await asyncio.sleep(self.reserve_delay)
+        if not self.available:
+            return []
+        ids = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        return ids
+
+    async def save_detection_batch(self, records):
+        if not self.available:
+            return None
+        await asyncio.sleep(self.delay)
+        self.statements += 1
+        new = [r for r in records if r["detection_id"] not in self.rows]
+        for record in new:
+            self.rows[record["detection_id"]] = record
+        return len(new)
+
+
+def test_batches_by_size_and_time():
+    """A full batch flushes at once; a partial one after the flush interval."""
+    async def run():
+        database = FakeDatabase()
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = DetectionWriter(database, batch_size=100, flush_interval_ms=50,
+                                     spool_path=os.path.join(tmp, "spool.jsonl"), id_block=256)
+            writer.start()
+            await asyncio.sleep(0.01)  # The flush task reserves the first block
+            ids = [await writer.enqueue("knife", 0.9, "high") for _ in range(250)]
+            assert ids == list(range(1, 251)), "IDs are known before the rows are written"
+            await asyncio.sleep(0.01)
+            assert len(database.rows) >= 200, "full batches flush without waiting for the timer"
+            await asyncio.sleep(0.1)
+            assert len(database.rows) == 250
+            await writer.stop()
+            stats = writer.get_stats()
+            print(f"Writer stats: {stats}")
+            assert stats["batches"] == database.statements == 3
+            assert stats["buffered"] == 0
+    asyncio.run(run())
+
+
+def test_spools_during_outage_and_replays():
+    """Records written while the database is down are replayed in order, once."""
+    async def run():
+        database = FakeDatabase()
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = os.path.join(tmp, "spool.jsonl")
+            writer = DetectionWriter(database, batch_size=10, flush_interval_ms=1000,
+                                     spool_path=spool, id_block=4)
+            writer.start()
+            await asyncio.sleep(0.01)
+            await writer.enqueue("fire", 0.8, "high")
+            await writer.flush()
+            assert len(database.rows) == 1
+
+            database.available = False
+            ids = [await writer.enqueue("smoke", 0.6, "medium") for _ in range(5)]
+            assert ids[:3] == [2, 3, 4] and ids[3:] == [None, None], "reserved IDs run out, then None"
+            await writer.flush()
+            assert os.path.exists(spool) and writer.get_stats()["spooled"] == 5
+            assert len(database.rows) == 1
+
+            database.available = True
+            await writer.flush()
+            assert not os.path.exists(spool)
+            assert len(database.rows) == 6 and writer.get_stats()["replayed"] == 5
+            assert all(r["type"] == "smoke" for i, r in database.rows.items() if i > 1)
+            await writer.stop()
+    asyncio.run(run())
+
+
+def test_enqueue_never_waits_for_the_database():
+    """A stalled database leaves handlers with None IDs instead of blocking them."""
+    async def run():
+        database = FakeDatabase()
+        database.reserve_delay = 1.0
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = DetectionWriter(database, batch_size=100, flush_interval_ms=50,
+                                     spool_path=os.path.join(tmp, "spool.jsonl"), id_block=8)
+            writer.start()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            ids = [await writer.enqueue("knife", 0.9, "high") for _ in range(3)]
+            assert loop.time() - start < 0.1 and ids == [None, None, None]
+
+            # Once the block arrives handlers get IDs again, and the early rows are numbered on write
+            database.reserve_delay = 0.0
+            await asyncio.sleep(1.2)
+            assert await writer.enqueue("knife", 0.9, "high") is not None
+            await writer.stop()
+            assert len(database.rows) == 4 and None not in database.rows
+    asyncio.run(run())
+
+
+def test_stop_writes_buffered_records():
+    """Stopping flushes records that have not reached a trigger yet."""
+    async def run():
+        database = FakeDatabase()
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = DetectionWriter(database, batch_size=100, flush_interval_ms=60000,
+                                     spool_path=os.path.join(tmp, "spool.jsonl"))
+            writer.start()
+            await writer.enqueue("gun", 0.95, "high")
+            await writer.stop()
+            assert len(database.rows) == 1
+
+            # Records enqueued while a flush is in flight are written too
+            database.delay = 0.05
+            writer.start()
+            for _ in range(100):
+                await writer.enqueue("gun", 0.95, "high")
+            await asyncio.sleep(0.01)
+            for _ in range(5):
+                await writer.enqueue("gun", 0.95, "high")
+            await writer.stop()
+            assert len(database.rows) == 106, len(database.rows)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_batches_by_size_and_time()
+    test_spools_during_outage_and_replays()
+    test_enqueue_never_waits_for_the_database()
+    test_stop_writes_buffered_records()
+    print("Test completed!")
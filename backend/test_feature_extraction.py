@@ -0,0 +1,69 @@
+"""
+Test script for per-stream pose sequences.
+Checks that streams don't share frames, one-off frames get their own
+sequence, and idle streams are expired.
+"""
+
+import numpy as np
+from services.feature_extraction import PoseSequences
+
+
+def frame(value):
+    return np.full(132, value, dtype=np.float32)
+
+
+def test_streams_are_isolated():
+    """Frames of one stream never reach another; None is never stored."""
+    sequences = PoseSequences(sequence_length=3, idle_seconds=60)
+    for _ in range(3):
+        sequences.get("http:tab-a:live_detection", now=0).add_frame(frame(1))
+    sequences.get("http:tab-b:live_detection", now=0).add_frame(frame(2))
+
+    assert sequences.get("http:tab-a:live_detection", now=1).is_ready()
+    assert not sequences.get("http:tab-b:live_detection", now=1).is_ready()
+
+    one_off = sequences.get(None)
+    one_off.add_frame(frame(3))
+    assert sequences.get(None) is not one_off
+    assert len(sequences) == 3  # default + two tabs
+
+
+def test_idle_streams_expire_but_default_stays():
+    """Unused streams are dropped on the next sweep; default is kept."""
+    sequences = PoseSequences(sequence_length=3, idle_seconds=10)
+    sequences.get("default", now=0)
+    sequences.get("http:tab-a:live_detection", now=0)
+    sequences.get("http:tab-b:live_detection", now=5)
+
+    # Using a stream after the idle window sweeps the others
+    sequences.get("http:tab-b:live_detection", now=12)
+    assert "http:tab-a:live_detection" not in sequences
+    assert "http:tab-b:live_detection" in sequences and "default" in sequences
+    assert sequences.evicted == 1
+
+    sequences.drop("http:tab-b:live_detection")
+    sequences.drop("default")
+    assert len(sequences) == 1 and "default" in sequences
+
+
+def test_reset_by_prefix():
+    """Resetting one client's prefix leaves other clients' sequences alone."""
+    sequences = PoseSequences(sequence_length=3, idle_seconds=60)
+    sequences.get("http:tab-a:cam1", now=0).add_frame(frame(1))
+    sequences.get("http:tab-a:cam2", now=0).add_frame(frame(1))
+    sequences.get("http:tab-b:cam1", now=0).add_frame(frame(1))
+
+    sequences.reset(prefix="http:tab-a:")
+    assert len(sequences.get("http:tab-a:cam1", now=1).frame_buffer) == 0
+    assert len(sequences.get("http:tab-a:cam2", now=1).frame_buffer) == 0
+    assert len(sequences.get("http:tab-b:cam1", now=1).frame_buffer) == 1
+
+    sequences.reset()
+    assert len(sequences.get("http:tab-b:cam1", now=1).frame_buffer) == 0
+
+
+if __name__ == "__main__":
+    test_streams_are_isolated()
+    test_idle_streams_expire_but_default_stays()
+    test_reset_by_prefix()
+    print("Test completed!")
@@ -0,0 +1,104 @@
+"""
+Test script for the lane-based inference scheduler.
+Checks earliest-deadline-first order within a lane, weighted sharing
+across lanes and dropping of expired live frames.
+"""
+
+import time
+import threading
+from services.inference_scheduler import InferenceScheduler, DeadlineMissed
+
+
+def run_queued(scheduler, requests, work_seconds=0.0):
+    """Queue requests behind a held slot, release it and return the execution order."""
+    order = []
+    errors = []
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("interactive"):
+            release.wait(5)
+
+    def worker(name, lane, deadline_ms):
+        try:
+            with scheduler.slot(lane, deadline_ms):
+                order.append(name)
+                time.sleep(work_seconds)
+        except DeadlineMissed:
+            errors.append(name)
+
+    threads = [threading.Thread(target=blocker)]
+    threads[0].start()
+    time.sleep(0.02)
+    for name, lane, deadline_ms in requests:
+        thread = threading.Thread(target=worker, args=(name, lane, deadline_ms))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return order, errors
+
+
+def test_earliest_deadline_first():
+    """Within a lane the request with the nearest deadline runs first."""
+    scheduler = InferenceScheduler(concurrency=1)
+    order, _ = run_queued(scheduler, [
+        ("late", "interactive", 5000),
+        ("soon", "interactive", 1000),
+        ("middle", "interactive", 3000),
+    ])
+    assert order == ["soon", "middle", "late"]
+
+
+def test_weighted_lanes():
+    """Live gets its weighted share while bulk still makes progress."""
+    scheduler = InferenceScheduler(concurrency=1)
+    requests = [(f"bulk{i}", "bulk", None) for i in range(9)]
+    requests += [(f"live{i}", "live", 5000) for i in range(8)]
+    order, _ = run_queued(scheduler, requests)
+    # With weights 8:1 all live frames are served before the second bulk item
+    first_nine = order[:9]
+    assert sum(name.startswith("live") for name in first_nine) == 8
+    assert len(order) == 17
+
+    stats = scheduler.get_stats()
+    print(f"Scheduler stats: {stats}")
+    assert stats["lanes"]["live"]["completed"] == 8
+    assert stats["lanes"]["bulk"]["completed"] == 9
+    assert stats["running"] == 0
+
+
+def test_expired_live_frames_dropped():
+    """Live frames that wait past their deadline are dropped, bulk ones are not."""
+    scheduler = InferenceScheduler(concurrency=1)
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot("bulk"):
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.02)
+    start = time.monotonic()
+    try:
+        with scheduler.slot("live", 50):
+            assert False, "expired live frame should not run"
+    except DeadlineMissed as e:
+        assert e.status_code == 503
+    # The rejection is fast: it does not wait for the slot to free up
+    assert time.monotonic() - start < 1.0
+    release.set()
+    holder.join(5)
+
+    stats = scheduler.get_stats()["lanes"]["live"]
+    assert stats["dropped"] == 1 and stats["deadline_misses"] == 1 and stats["queued"] == 0
+
+
+if __name__ == "__main__":
+    test_earliest_deadline_first()
+    test_weighted_lanes()
+    test_expired_live_frames_dropped()
+    print("Test completed!")
@@ -0,0 +1,132 @@
+"""
+Test script for the background job service.
+Runs jobs against the local stand-in store and checks progress, results,
+cancellation and requeueing after a restart.
+"""
+
+import os
+import time
+import tempfile
+import threading
+from services.job_service import JobService, LocalJobStore
+
+
+def wait_for(service, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+def counting_job(ctx):
+    for i in range(ctx.params["count"]):
+        if ctx.cancelled:
+            break
+        ctx.items += 1
+        ctx.progress((i + 1) / ctx.params["count"])
+        time.sleep(ctx.params.get("delay", 0))
+    return {"counted": ctx.items}
+
+
+def test_job_lifecycle():
+    """Jobs complete with a result, CPU time and throughput, and are persisted."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalJobStore(os.path.join(tmp, "jobs.json"))
+        service = JobService(max_workers=1, max_queued=4)
+        service.register("count", counting_job)
+        service.start(store)
+
+        job = service.submit("count", {"count": 100})
+        assert job["status"] == "queued"
+        job = wait_for(service, job["job_id"], ("completed",))
+        assert job["result"] == {"counted": 100}
+        assert job["progress"] == 1.0 and job["items_processed"] == 100
+        assert job["cpu_seconds"] >= 0 and job["items_per_second"] > 0
+
+        # A new store on the same file sees the finished job
+        assert LocalJobStore(store.path).get_job(job["job_id"])["status"] == "completed"
+        service.stop()
+
+
+def test_job_cancel_and_queue_limit():
+    """Running jobs stop on cancel, queued ones never start, full queues refuse."""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = JobService(max_workers=1, max_queued=2)
+        service.register("count", counting_job)
+        service.start(LocalJobStore(os.path.join(tmp, "jobs.json")))
+
+        running = service.submit("count", {"count": 1000, "delay": 0.01})
+        queued = service.submit("count", {"count": 1})
+        assert service.submit("count", {"count": 1}) is None
+
+        wait_for(service, running["job_id"], ("running",))
+        assert service.cancel(queued["job_id"])["status"] == "cancelled"
+        service.cancel(running["job_id"])
+        job = wait_for(service, running["job_id"], ("cancelled",))
+        assert job["items_processed"] < 1000
+        time.sleep(0.05)
+        assert service.get(queued["job_id"])["started_at"] is None
+        service.stop()
+
+
+def test_job_requeued_after_restart():
+    """Jobs interrupted by shutdown run again when the service restarts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.json")
+        started = threading.Event()
+
+        def slow_job(ctx):
+            started.set()
+            ctx.cancel_event.wait(5)
+            return {"done": not ctx.cancelled}
+
+        service = JobService(max_workers=1)
+        service.register("slow", slow_job)
+        service.start(LocalJobStore(path))
+        job = service.submit("slow", {})
+        started.wait(5)
+        service.stop()
+        time.sleep(0.05)
+        assert LocalJobStore(path).get_job(job["job_id"])["status"] == "queued"
+
+        restarted = JobService(max_workers=1)
+        restarted.register("slow", lambda ctx: {"done": True})
+        restarted.start(LocalJobStore(path))
+        assert wait_for(restarted, job["job_id"], ("completed",))["result"] == {"done": True}
+        restarted.stop()
+
+
+def test_finished_jobs_leave_memory_and_history_is_capped():
+    """Finished jobs are served from the store, which keeps a bounded history."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalJobStore(os.path.join(tmp, "jobs.json"), max_finished=3)
+        service = JobService(max_workers=1, max_queued=8)
+        service.register("count", counting_job)
+        service.start(store)
+
+        jobs = [service.submit("count", {"count": 5}) for _ in range(5)]
+        # One worker runs them in order, so the last one finishes last
+        wait_for(service, jobs[-1]["job_id"], ("completed",))
+        deadline = time.monotonic() + 5
+        while service._jobs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert service._jobs == {} and service._cancel_events == {}
+        assert service.get(jobs[-1]["job_id"])["result"] == {"counted": 5}
+        assert service.cancel(jobs[-1]["job_id"])["status"] == "completed"
+
+        # Only the newest three finished jobs are kept, in memory and on disk
+        kept = [job["job_id"] for job in LocalJobStore(store.path).list_jobs()]
+        assert kept == [job["job_id"] for job in reversed(jobs[2:])]
+        assert service.get(jobs[0]["job_id"]) is None
+        service.stop()
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_job_cancel_and_queue_limit()
+    test_job_requeued_after_restart()
+    test_finished_jobs_leave_memory_and_history_is_capped()
+    print("Test completed!")
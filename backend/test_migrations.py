@@ -0,0 +1,208 @@
+"""
+Test script for the schema migrations.
+Checks that migrations apply once and in order, then, when TEST_DATABASE_URL
+points at a PostgreSQL database, seeds a large detections table in a scratch
+schema and verifies with EXPLAIN that the hot queries use the indexes on
+every partition they touch.
+"""
+
+import json
+import asyncio
+from services.async_database_manager import AsyncDatabaseManager
+from services.migrations import MIGRATIONS, apply_migrations, latest_version
+from services.partition_manager import ensure_partitions
+from db_testing import require_test_database
+
+SEED_DETECTIONS = 200_000
+
+
+class RecordingCursor:
+    """Collects executed SQL and remembers recorded migration versions."""
+
+    def __init__(self):
+        self.statements = []
+        self.versions = []
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+        if query.startswith("SELECT version FROM schema_migrations"):
+            self._result = [(v,) for v in self.versions]
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.versions.append(params[0])
+
+    def fetchall(self):
+        return self._result
+
+
+def test_migrations_apply_once_in_order():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(versions) and len(set(versions)) == len(versions)
+
+    cursor = RecordingCursor()
+    assert apply_migrations(cursor) == versions
+    assert "pg_advisory_xact_lock" in cursor.statements[0]
+    assert apply_migrations(cursor) == [], "a second run applies nothing"
+    assert cursor.versions[-1] == latest_version()
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def index_used(cursor, query, params=()):
+    """Indexes the plan scans; fails if it scans a populated partition sequentially."""
+    # Empty partitions (the ones made ahead of time) are cheapest to scan directly
+    cursor.execute("""
+        SELECT relname FROM pg_class
+        WHERE relname ~ '^(detections|alerts)_p' AND relkind = 'r' AND reltuples > 0
+    """)
+    populated = {row[0] for row in cursor.fetchall()}
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    raw = cursor.fetchone()[0]
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    nodes = list(plan_nodes(plan))
+    seq_scans = [n["Relation Name"] for n in nodes
+                 if n["Node Type"] == "Seq Scan" and n["Relation Name"] in populated]
+    assert not seq_scans, f"sequential scan on {seq_scans}"
+    # Report each partition's index as the index declared on the parent table
+    cursor.execute("""
+        SELECT c.relname, p.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE c.relkind = 'i'
+    """)
+    parents = dict(cursor.fetchall())
+    return {parents.get(node["Index Name"], node["Index Name"])
+            for node in nodes if "Index Name" in node}
+
+
+def test_hot_queries_use_indexes():
+    url = require_test_database("EXPLAIN checks")
+    if not url:
+        return
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS migration_test CASCADE; CREATE SCHEMA migration_test;")
+    cursor.execute("SET search_path TO migration_test")
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        connection.commit()
+        connection.autocommit = True
+
+        # Mostly read detections over a year, a few unread and a rare type, one alert each
+        cursor.execute("""
+            INSERT INTO detections (camera_id, type, confidence, timestamp, is_read)
+            SELECT 1, CASE WHEN i %% 200 = 0 THEN 'gun'
+                           ELSE (ARRAY['knife', 'fire', 'smoke', 'fight'])[1 + i %% 4] END, random(),
+                   now() - (i || ' seconds')::interval * 150, i %% 1000 <> 0
+            FROM generate_series(1, %s) AS i;
+        """, (SEED_DETECTIONS,))
+        cursor.execute("""
+            INSERT INTO alerts (detection_id, severity, created_at)
+            SELECT detection_id, 'high', timestamp FROM detections;
+        """)
+        connection.autocommit = False
+        ensure_partitions(cursor, "month")
+        connection.commit()
+        connection.autocommit = True
+        cursor.execute("VACUUM ANALYZE detections")
+        cursor.execute("VACUUM ANALYZE alerts")
+
+        recent = index_used(cursor, """
+            SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                   c.location, c.camera_id, d.is_read
+            FROM detections d JOIN cameras c ON d.camera_id = c.camera_id
+            ORDER BY d.timestamp DESC, d.detection_id DESC LIMIT 51""")
+        page = index_used(cursor, """
+            SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+                   c.location, c.camera_id, d.is_read
+            FROM detections d JOIN cameras c ON d.camera_id = c.camera_id
+            WHERE (d.timestamp, d.detection_id) < (now() - interval '300 days', 0)
+            ORDER BY d.timestamp DESC, d.detection_id DESC LIMIT 51""")
+        unread = index_used(cursor, "SELECT COUNT(*) FROM detections WHERE is_read = FALSE")
+        alerts = index_used(cursor, """
+            SELECT alert_id, severity, status, created_at FROM alerts
+            WHERE detection_id = %s ORDER BY created_at DESC""", (SEED_DETECTIONS // 2,))
+        by_type = index_used(cursor, """
+            SELECT detection_id FROM detections WHERE type = ANY(%s)
+            ORDER BY timestamp DESC, detection_id DESC LIMIT 51""", (["gun"],))
+        by_camera = index_used(cursor, """
+            SELECT detection_id FROM detections WHERE camera_id = 1
+            ORDER BY timestamp DESC, detection_id DESC LIMIT 51""")
+        print(f"Indexes: recent={sorted(recent)} unread={sorted(unread)} alerts={sorted(alerts)}")
+
+        assert "idx_detections_timestamp_id" in recent
+        assert "idx_detections_timestamp_id" in page
+        assert "idx_detections_unread_timestamp" in unread
+        assert "idx_alerts_detection_severity" in alerts
+        assert "idx_detections_type_timestamp" in by_type
+        assert "idx_detections_camera_timestamp" in by_camera
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS migration_test CASCADE")
+        connection.close()
+
+
+def test_alerts_never_predate_their_detection():
+    """Skewed alert times are backfilled, and new alerts take the detection's time."""
+    url = require_test_database("alert timestamp checks")
+    if not url:
+        return
+    import asyncpg
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS alert_time_test CASCADE; CREATE SCHEMA alert_time_test;")
+    cursor.execute("SET search_path TO alert_time_test")
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        # Rows as written before migration 8: the alert clock an hour behind the detection's
+        cursor.execute("""
+            INSERT INTO detections (detection_id, camera_id, type, confidence, timestamp)
+            VALUES (1, 1, 'knife', 0.9, now()), (2, 1, 'fire', 0.7, now());
+            INSERT INTO alerts (detection_id, severity, created_at)
+            VALUES (1, 'high', now() - interval '1 hour'), (2, 'medium', now() + interval '1 second');
+            DELETE FROM schema_migrations WHERE version = 8;
+        """)
+        assert apply_migrations(cursor) == [8]
+        connection.commit()
+        cursor.execute("""
+            SELECT a.detection_id, a.created_at = d.timestamp, a.created_at >= d.timestamp
+            FROM alerts a JOIN detections d USING (detection_id) ORDER BY a.detection_id
+        """)
+        assert cursor.fetchall() == [(1, True, True), (2, False, True)], "only skewed alerts move"
+
+        async def save_alert():
+            manager = AsyncDatabaseManager()
+            manager.pool = await asyncpg.create_pool(
+                url, min_size=1, max_size=1, server_settings={"search_path": "alert_time_test"})
+            try:
+                assert await manager.save_alert(1, "low")
+            finally:
+                await manager.pool.close()
+
+        asyncio.run(save_alert())
+        cursor.execute("""
+            SELECT a.created_at = d.timestamp FROM alerts a JOIN detections d USING (detection_id)
+            WHERE a.severity = 'low'
+        """)
+        assert cursor.fetchall() == [(True,)]
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS alert_time_test CASCADE")
+        connection.close()
+
+
+if __name__ == "__main__":
+    test_migrations_apply_once_in_order()
+    test_hot_queries_use_indexes()
+    test_alerts_never_predate_their_detection()
+    print("Test completed!")
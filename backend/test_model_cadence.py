@@ -0,0 +1,93 @@
+"""
+Test script for per-model cadence.
+Checks when each model is due, that results not due are carried forward
+with their age, that a frame of another shape always runs the models, and
+that streams get separate cadences which are dropped on disconnect.
+"""
+
+from services.model_cadence import ModelCadence, ModelCadenceRegistry
+
+SHAPE = (480, 640, 3)
+
+
+def test_due_and_record():
+    cadence = ModelCadence(rates={"weapon": 5, "fire_smoke": 1})
+    # Nothing recorded yet: every model runs
+    assert cadence.due("weapon", now=0.0, shape=SHAPE)
+    cadence.record("weapon", [{"class": "knife"}], now=0.0, shape=SHAPE)
+    cadence.record("fire_smoke", [], now=0.0, shape=SHAPE)
+
+    assert not cadence.due("weapon", now=0.1, shape=SHAPE)
+    # 5% tolerance for frame jitter
+    assert cadence.due("weapon", now=0.19, shape=SHAPE)
+    assert not cadence.due("fire_smoke", now=0.5, shape=SHAPE)
+    assert cadence.due("fire_smoke", now=1.0, shape=SHAPE)
+
+    # Rate 0 and unknown models run on every frame
+    every_frame = ModelCadence(rates={"weapon": 0})
+    every_frame.record("weapon", [], now=0.0)
+    assert every_frame.due("weapon", now=0.0)
+    assert every_frame.due("fire_smoke", now=0.0)
+    assert cadence.get_stats()["runs"] == {"weapon": 1, "fire_smoke": 1}
+
+
+def test_carry_forward():
+    cadence = ModelCadence(rates={"weapon": 5, "fire_smoke": 1})
+    detections = [{"class": "fire", "confidence": 0.8}]
+    cadence.record("fire_smoke", detections, now=10.0, shape=SHAPE)
+
+    carried, age = cadence.carry_forward("fire_smoke", now=10.25)
+    assert age == 0.25
+    assert carried == [{"class": "fire", "confidence": 0.8, "carried": True, "age_ms": 250}]
+    assert "carried" not in detections[0], "the stored result is not modified"
+    assert cadence.carry_forward("weapon", now=10.25) == ([], 0.0)
+    assert cadence.get_stats()["carried"] == {"weapon": 1, "fire_smoke": 1}
+
+
+def test_shape_change_runs_models():
+    cadence = ModelCadence(rates={"weapon": 5, "fire_smoke": 1})
+    cadence.record("fire_smoke", [{"class": "smoke"}], now=0.0, shape=SHAPE)
+    assert not cadence.due("fire_smoke", now=0.1, shape=SHAPE)
+    assert cadence.due("fire_smoke", now=0.1, shape=(720, 1280, 3))
+    cadence.record("fire_smoke", [], now=0.1, shape=(720, 1280, 3))
+    assert cadence.due("fire_smoke", now=0.2, shape=SHAPE)
+
+
+def test_registry_per_stream():
+    registry = ModelCadenceRegistry()
+    first, second = registry.get("sid-1"), registry.get("sid-2")
+    assert first is not second and registry.get("sid-1") is first
+    first.record("weapon", [{"class": "gun"}], now=0.0, shape=SHAPE)
+    assert second.due("weapon", now=0.01, shape=SHAPE), "streams never share results"
+
+    registry.drop("sid-1")
+    registry.drop("unknown")
+    assert set(registry.get_stats()) == {"sid-2"}
+    assert registry.get("sid-1") is not first
+
+
+def test_http_live_streams_and_idle_eviction():
+    """Live HTTP tabs sharing a camera_id get their own cadence, dropped when idle."""
+    registry = ModelCadenceRegistry(idle_seconds=30)
+    # Keyed like live_stream_key(x_client_id, camera_id) for /detect and /detect/both
+    tab_a = registry.get("http:tab-a:live_detection", now=0.0)
+    tab_b = registry.get("http:tab-b:live_detection", now=0.0)
+    assert tab_a is not tab_b
+
+    tab_a.record("fire_smoke", [{"class": "smoke"}], now=0.0, shape=SHAPE)
+    assert not tab_a.due("fire_smoke", now=0.2, shape=SHAPE), "the tab's next frame carries forward"
+    assert tab_b.due("fire_smoke", now=0.2, shape=SHAPE)
+
+    # Tab B keeps posting, tab A closed without telling anyone
+    assert registry.get("http:tab-b:live_detection", now=20.0) is tab_b
+    registry.get("http:tab-b:live_detection", now=40.0)
+    assert set(registry.get_stats()) == {"http:tab-b:live_detection"} and registry.evicted == 1
+
+
+if __name__ == "__main__":
+    test_due_and_record()
+    test_carry_forward()
+    test_shape_change_runs_models()
+    test_registry_per_stream()
+    test_http_live_streams_and_idle_eviction()
+    print("Test completed!")
@@ -0,0 +1,118 @@
+"""
+Test script for the frame-difference motion gate.
+Checks that static frames reuse the last result and motion triggers inference.
+"""
+
+import cv2
+import numpy as np
+from services.motion_gate import MotionGate, MotionGateRegistry
+
+
+def test_motion_gate():
+    """Static frames are skipped, moving frames and refreshes are not."""
+    gate = MotionGate(threshold=0.01, pixel_threshold=25, refresh_interval=60.0, width=160)
+    gate.enabled = True
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.rectangle(frame, (100, 100), (200, 200), (255, 255, 255), -1)
+
+    # First frame has no reference and must be inferred
+    run, info = gate.check(frame, key="weapon")
+    assert run and info["reason"] == "no_reference"
+    gate.record_result({"detections": []}, 0.05)
+
+    # Identical frame is skipped and the cached result is reused
+    run, info = gate.check(frame.copy(), key="weapon")
+    assert not run and info["reason"] == "static"
+    assert gate.last_result() == {"detections": []}
+
+    # Moving the object triggers inference
+    moved = np.zeros_like(frame)
+    cv2.rectangle(moved, (300, 200), (400, 300), (255, 255, 255), -1)
+    run, info = gate.check(moved, key="weapon")
+    assert run and info["reason"] == "motion"
+    gate.record_result({"detections": []}, 0.05)
+
+    # Switching model always forces inference
+    run, info = gate.check(moved, key="fire_smoke")
+    assert run and info["reason"] == "changed_source"
+    gate.record_result({"detections": []}, 0.05)
+
+    # Forced refresh once the interval has elapsed
+    gate.refresh_interval = 0.0
+    run, info = gate.check(moved, key="fire_smoke")
+    assert run and info["reason"] == "refresh"
+
+    stats = gate.get_stats()
+    print(f"Motion gate stats: {stats}")
+    assert stats["frames_checked"] == 5
+    assert stats["frames_skipped"] == 1
+    assert stats["forced_refreshes"] == 1
+
+
+def test_failed_inference_keeps_previous_reference():
+    """A frame whose inference failed or was dropped never becomes the reference."""
+    gate = MotionGate(threshold=0.01, pixel_threshold=25, refresh_interval=60.0, width=160)
+    gate.enabled = True
+
+    scene_a = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.rectangle(scene_a, (100, 100), (200, 200), (255, 255, 255), -1)
+    scene_b = np.zeros_like(scene_a)
+    cv2.rectangle(scene_b, (300, 200), (400, 300), (255, 255, 255), -1)
+
+    # The very first inference fails: still no reference to reuse
+    run, info = gate.check(scene_a, key="weapon")
+    assert run
+    run, info = gate.check(scene_a, key="weapon")
+    assert run and info["reason"] == "no_reference"
+    gate.record_result({"detections": ["a"]}, 0.05)
+
+    # Scene B is dropped (error or missed deadline), so it is still motion next time
+    run, info = gate.check(scene_b, key="weapon")
+    assert run and info["reason"] == "motion"
+    run, info = gate.check(scene_b, key="weapon")
+    assert run and info["reason"] == "motion", "scene A's result must not be reused for B"
+
+    # A dropped run with another model leaves the weapon reference in place
+    run, info = gate.check(scene_a, key="fire_smoke")
+    assert run and info["reason"] == "changed_source"
+    run, info = gate.check(scene_a, key="weapon")
+    assert not run and gate.last_result() == {"detections": ["a"]}
+
+
+def test_streams_sharing_a_camera_id_have_separate_gates():
+    """Two tabs sending the same camera_id never get each other's cached result."""
+    registry = MotionGateRegistry(idle_seconds=60)
+    scene = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.rectangle(scene, (100, 100), (200, 200), (255, 255, 255), -1)
+
+    # Streams are keyed like live_stream_key(x_client_id, "live_detection")
+    tab_a = registry.get("http:tab-a:live_detection", now=0)
+    tab_a.enabled = True
+    run, _ = tab_a.check(scene, key="weapon")
+    assert run
+    tab_a.record_result({"detections": ["tab a's knife"]}, 0.05)
+    run, _ = tab_a.check(scene, key="weapon")
+    assert not run
+
+    tab_b = registry.get("http:tab-b:live_detection", now=0)
+    tab_b.enabled = True
+    assert tab_b is not tab_a
+    run, info = tab_b.check(scene, key="weapon")
+    assert run and info["reason"] == "no_reference" and tab_b.last_result() is None
+
+    # One-off uploads have no stream and so no gate
+    assert registry.get(None) is None
+    assert len(registry.get_stats()) == 2
+
+    # Closed and idle streams are forgotten
+    registry.drop("http:tab-a:live_detection")
+    registry.get("sid-1", now=100)
+    assert list(registry.get_stats()) == ["sid-1"] and registry.evicted == 1
+
+
+if __name__ == "__main__":
+    test_motion_gate()
+    test_failed_inference_keeps_previous_reference()
+    test_streams_sharing_a_camera_id_have_separate_gates()
+    print("Test completed!")
@@ -0,0 +1,112 @@
+"""
+Test script for keyset pagination of /detections.
+Checks cursor encoding, then, when TEST_DATABASE_URL points at a PostgreSQL
+database, pages through a seeded scratch schema with AsyncDatabaseManager
+while new detections arrive, and compares the work done for the first and
+the last page.
+"""
+
+import json
+import asyncio
+from datetime import datetime
+from services.async_database_manager import AsyncDatabaseManager
+from services.migrations import apply_migrations
+from services.pagination import encode_cursor, decode_cursor
+from services.partition_manager import ensure_partitions
+from db_testing import require_test_database
+
+SEED_DETECTIONS = 100_000
+PAGE_SIZE = 500
+
+
+def test_cursor_round_trip():
+    key = (datetime(2026, 10, 19, 8, 30, 15, 250000), 4217)
+    cursor = encode_cursor(*key)
+    assert decode_cursor(cursor) == key
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    for bad in ("", "not-a-cursor", encode_cursor(*key)[:-3], "WyJ4Il0"):
+        try:
+            decode_cursor(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} decoded")
+
+
+def page_buffers(cursor, key):
+    """Shared buffers touched by one page query."""
+    where = "WHERE (d.timestamp, d.detection_id) < (%s, %s)" if key else ""
+    cursor.execute(f"""
+        EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+        SELECT d.detection_id, d.type, d.confidence, d.timestamp, d.image_url,
+               c.location, c.camera_id, d.is_read
+        FROM detections d JOIN cameras c ON d.camera_id = c.camera_id
+        {where}
+        ORDER BY d.timestamp DESC, d.detection_id DESC LIMIT %s
+    """, (*key, PAGE_SIZE + 1) if key else (PAGE_SIZE + 1,))
+    raw = cursor.fetchone()[0]
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    return plan["Shared Hit Blocks"] + plan["Shared Read Blocks"]
+
+
+def test_pages_are_stable_and_flat():
+    url = require_test_database("pagination checks")
+    if not url:
+        return
+    import asyncpg
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS pagination_test CASCADE; CREATE SCHEMA pagination_test;")
+    cursor.execute("SET search_path TO pagination_test")
+    try:
+        connection.autocommit = False
+        apply_migrations(cursor)
+        # Ten detections share each timestamp, so the ID has to break ties
+        cursor.execute("""
+            INSERT INTO detections (camera_id, type, confidence, timestamp)
+            SELECT 1, 'knife', 0.9, date_trunc('second', now()) - ((i / 10) || ' seconds')::interval * 60
+            FROM generate_series(1, %s) AS i;
+        """, (SEED_DETECTIONS,))
+        ensure_partitions(cursor, "month")
+        connection.commit()
+        connection.autocommit = True
+        cursor.execute("VACUUM ANALYZE detections")
+
+        async def page_through():
+            manager = AsyncDatabaseManager()
+            manager.pool = await asyncpg.create_pool(
+                url, min_size=1, max_size=2, server_settings={"search_path": "pagination_test"})
+            try:
+                seen, pages, next_cursor = [], 0, None
+                while True:
+                    page = await manager.get_detections_page(PAGE_SIZE, next_cursor)
+                    seen.extend(d["detection_id"] for d in page["detections"])
+                    pages += 1
+                    # Newer rows arriving mid-scan must not shift later pages
+                    await manager.save_detection("gun", 0.8)
+                    next_cursor = page["next"]
+                    if not next_cursor:
+                        return seen, pages, last_key
+                    last_key = decode_cursor(next_cursor)
+            finally:
+                await manager.pool.close()
+
+        seen, pages, last_key = asyncio.run(page_through())
+        assert len(seen) == len(set(seen)) == SEED_DETECTIONS
+        assert set(seen) == set(range(1, SEED_DETECTIONS + 1))
+        assert pages == SEED_DETECTIONS // PAGE_SIZE
+
+        first, deepest = page_buffers(cursor, None), page_buffers(cursor, last_key)
+        print(f"{pages} pages; buffers first page {first}, last page {deepest}")
+        assert deepest <= first * 2 + 10, (first, deepest)
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS pagination_test CASCADE")
+        connection.close()
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_pages_are_stable_and_flat()
+    print("Test completed!")
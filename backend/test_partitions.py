@@ -0,0 +1,84 @@
+"""
+Test script for detections/alerts time partitioning and retention.
+Checks period arithmetic, then, when TEST_DATABASE_URL points at a
+PostgreSQL database, creates partitions in a scratch schema, moves rows
+out of the default partition and drops (and archives) expired partitions.
+"""
+
+import os
+import csv
+import gzip
+import tempfile
+from datetime import datetime
+from services.migrations import apply_migrations
+from services.partition_manager import (
+    period_start, next_period, partition_name, list_partitions, ensure_partitions, apply_retention,
+)
+from db_testing import require_test_database
+
+
+def test_periods():
+    moment = datetime(2026, 12, 19, 15, 30)
+    assert period_start(moment, "month") == datetime(2026, 12, 1)
+    assert next_period(datetime(2026, 12, 1), "month") == datetime(2027, 1, 1)
+    assert period_start(moment, "day") == datetime(2026, 12, 19)
+    assert next_period(datetime(2026, 12, 31), "day") == datetime(2027, 1, 1)
+    assert partition_name("detections", datetime(2026, 3, 1), "month") == "detections_p2026_03"
+    assert partition_name("alerts", datetime(2026, 3, 9), "day") == "alerts_p2026_03_09"
+
+
+def test_partitions_and_retention():
+    url = require_test_database("partition checks")
+    if not url:
+        return
+    import psycopg2
+
+    connection = psycopg2.connect(url)
+    cursor = connection.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS partition_test CASCADE; CREATE SCHEMA partition_test;")
+    cursor.execute("SET search_path TO partition_test")
+    try:
+        apply_migrations(cursor)
+        now = datetime(2026, 10, 19, 12, 0)
+
+        # Rows from before any partition existed wait in the default partition
+        cursor.execute("""
+            INSERT INTO detections (camera_id, type, confidence, timestamp)
+            VALUES (1, 'fire', 0.9, '2026-06-15'), (1, 'gun', 0.8, '2026-10-02');
+            INSERT INTO alerts (detection_id, severity, created_at)
+            SELECT detection_id, 'high', timestamp FROM detections;
+        """)
+        created = ensure_partitions(cursor, "month", premake=1, now=now)
+        assert created == ["detections_p2026_06", "detections_p2026_10", "detections_p2026_11",
+                           "alerts_p2026_06", "alerts_p2026_10", "alerts_p2026_11"], created
+        cursor.execute("SELECT COUNT(*) FROM detections_default")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("SELECT COUNT(*) FROM detections_p2026_06")
+        assert cursor.fetchone()[0] == 1
+        assert ensure_partitions(cursor, "month", premake=1, now=now) == []
+
+        # Switching to daily partitions leaves the monthly ones alone
+        assert ensure_partitions(cursor, "day", premake=0, now=datetime(2026, 12, 5)) == \
+            ["detections_p2026_12_05", "alerts_p2026_12_05"]
+
+        with tempfile.TemporaryDirectory() as archive:
+            dropped = apply_retention(cursor, 90, archive, now=now)
+            assert dropped == ["detections_p2026_06", "alerts_p2026_06"], dropped
+            names = [name for name, _, _ in list_partitions(cursor, "detections")]
+            assert "detections_p2026_06" not in names and "detections_p2026_10" in names
+            with gzip.open(os.path.join(archive, "detections_p2026_06.csv.gz"), "rt") as f:
+                rows = list(csv.DictReader(f))
+            assert len(rows) == 1 and rows[0]["type"] == "fire"
+        cursor.execute("SELECT COUNT(*) FROM detections")
+        assert cursor.fetchone()[0] == 1
+    finally:
+        connection.rollback()
+        cursor.execute("DROP SCHEMA IF EXISTS partition_test CASCADE")
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    test_periods()
+    test_partitions_and_retention()
+    print("Test completed!")
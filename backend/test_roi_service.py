@@ -0,0 +1,91 @@
+"""
+Test script for the ROI helpers.
+Checks polygon validation (out-of-frame, malformed and degenerate polygons),
+the crop/mask of a region and its offset, mapping boxes back to the full
+frame, and suppression of an object reported by two overlapping regions.
+"""
+
+import numpy as np
+from services.roi_service import (
+    RegionOfInterest, validate_polygon, crop_to_region, offset_detections, suppress_duplicates,
+)
+
+
+def box(x1, y1, x2, y2):
+    return {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+
+
+def test_validate_polygon():
+    assert validate_polygon([[0.1, 0.1], [0.9, 0.1], [0.5, 0.9]]) is None
+    assert validate_polygon([[0.1, 0.1], [0.9, 0.1]]) == "Polygon needs at least 3 points"
+    assert validate_polygon([]) == "Polygon needs at least 3 points"
+    assert validate_polygon([[0.1, 0.1], [0.9], [0.5, 0.9]]) == "Each point must be [x, y]"
+    assert validate_polygon([[0.1, 0.1], [1.2, 0.1], [0.5, 0.9]]) == "Coordinates must be normalized to the range [0, 1]"
+    assert validate_polygon([[-0.1, 0.1], [0.9, 0.1], [0.5, 0.9]]) == "Coordinates must be normalized to the range [0, 1]"
+    assert validate_polygon([[0.1, 0.1], ["x", 0.1], [0.5, 0.9]]) == "Coordinates must be numbers"
+    # Degenerate: repeated and collinear points
+    assert validate_polygon([[0.5, 0.5]] * 4) == "Polygon has no area"
+    assert validate_polygon([[0.1, 0.1], [0.5, 0.5], [0.9, 0.9]]) == "Polygon has no area"
+
+
+def test_crop_and_mask_offsets():
+    image = np.full((100, 200, 3), 255, dtype=np.uint8)
+
+    # Rectangle: crop is exactly the region, offset is its top-left corner
+    rect = RegionOfInterest([[0.25, 0.2], [0.75, 0.2], [0.75, 0.8], [0.25, 0.8]], "door")
+    crop, offset = crop_to_region(image, rect)
+    assert offset == (50, 20) and crop.shape == (60, 100, 3)
+    assert crop.min() == 255
+
+    # Triangle: pixels outside the polygon are blacked out, the original is untouched
+    triangle = RegionOfInterest([[0.5, 0.0], [1.0, 1.0], [0.0, 1.0]], "ramp")
+    crop, offset = crop_to_region(image, triangle)
+    assert offset == (0, 0) and crop.shape == (100, 200, 3)
+    assert crop[2, 2].tolist() == [0, 0, 0] and crop[2, 197].tolist() == [0, 0, 0]
+    assert crop[90, 100].tolist() == [255, 255, 255]
+    assert image.min() == 255
+
+    # Vertices outside the frame (older rows) are clipped to it
+    outside = RegionOfInterest([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    assert outside.bounding_rect(200, 100) == (0, 0, 100, 50)
+    crop, offset = crop_to_region(image, outside)
+    assert offset == (0, 0) and crop.shape == (50, 100, 3)
+
+    # A region thinner than two pixels, or entirely off-frame, yields no crop
+    sliver = RegionOfInterest([[0.5, 0.1], [0.502, 0.1], [0.502, 0.9], [0.5, 0.9]])
+    assert crop_to_region(image, sliver)[0] is None
+    gone = RegionOfInterest([[1.2, 1.2], [1.5, 1.2], [1.5, 1.5]])
+    assert crop_to_region(image, gone)[0] is None
+
+
+def test_offset_detections():
+    detections = [{"class": "knife", "confidence": 0.9, "box": box(1, 2, 11, 22)}]
+    mapped = offset_detections(detections, (50, 20), "door")
+    assert mapped == [{"class": "knife", "confidence": 0.9, "box": box(51, 22, 61, 42), "region": "door"}]
+    assert detections[0]["box"] == box(1, 2, 11, 22) and "region" not in detections[0]
+
+
+def test_cross_region_duplicates():
+    # The same knife seen by two overlapping regions, mapped back to full-frame boxes
+    left = offset_detections([{"class": "knife", "confidence": 0.7, "box": box(40, 10, 60, 40)}], (50, 20), "left")
+    right = offset_detections([{"class": "knife", "confidence": 0.9, "box": box(2, 12, 22, 42)}], (90, 20), "right")
+    other_class = [{"class": "gun", "confidence": 0.5, "box": box(92, 32, 112, 62), "region": "right"}]
+    far_away = [{"class": "knife", "confidence": 0.4, "box": box(300, 300, 320, 330), "region": "left"}]
+
+    kept = suppress_duplicates(left + right + other_class + far_away)
+    assert [(d["class"], d["region"], d["confidence"]) for d in kept] == [
+        ("knife", "right", 0.9), ("gun", "right", 0.5), ("knife", "left", 0.4)]
+
+    # Below the IoU threshold both boxes stay
+    shifted = [{"class": "knife", "confidence": 0.8, "box": box(0, 0, 20, 20)},
+               {"class": "knife", "confidence": 0.6, "box": box(12, 0, 32, 20)}]
+    assert len(suppress_duplicates(shifted)) == 2
+    assert suppress_duplicates([]) == []
+
+
+if __name__ == "__main__":
+    test_validate_polygon()
+    test_crop_and_mask_offsets()
+    test_offset_detections()
+    test_cross_region_duplicates()
+    print("Test completed!")
@@ -0,0 +1,56 @@
+"""
+Test script for the CPU thread budget.
+Checks the split across frameworks, the overshoot report when the budget is
+smaller than the number of frameworks, and that OMP_NUM_THREADS is only
+reported as applied when it was exported before ML imports.
+"""
+
+import os
+import sys
+from services.thread_budget import ThreadBudget, parse_core_list, parse_split
+
+
+def test_allocation():
+    budget = ThreadBudget(total_threads=10, split={"torch": 2, "tensorflow": 1, "opencv": 1, "mediapipe": 1})
+    assert budget.allocation == {"torch": 4, "tensorflow": 2, "opencv": 2, "mediapipe": 2}
+    assert budget.overshoot == 0
+    assert parse_core_list("0-3,6") == [0, 1, 2, 3, 6]
+    assert parse_split("tf=3,cv2=0,bogus=9") == {"tensorflow": 3, "opencv": 0}
+
+
+def test_overshoot_is_reported():
+    budget = ThreadBudget(total_threads=2)
+    assert all(threads == 1 for threads in budget.allocation.values())
+    assert budget.overshoot == 2
+    assert budget.describe()["overshoot"] == 2
+
+
+def test_environment_only_counts_before_imports():
+    saved = os.environ.pop("OMP_NUM_THREADS", None)
+    saved_modules = {name: sys.modules.pop(name) for name in ("torch", "tensorflow", "cv2", "mediapipe")
+                     if name in sys.modules}
+    try:
+        budget = ThreadBudget(total_threads=10)
+        assert budget._apply_mediapipe(2) == {"skipped": "OMP_NUM_THREADS was not set before ML imports"}
+        assert budget.configure_environment() == {"OMP_NUM_THREADS": 2, "in_effect": True}
+        assert budget._apply_mediapipe(2) == {"intra_op": 2}
+
+        # Exported after an OpenMP module loaded: recorded, but not reported as applied
+        del os.environ["OMP_NUM_THREADS"]
+        sys.modules["cv2"] = object()
+        late = ThreadBudget(total_threads=10)
+        assert late.configure_environment()["in_effect"] is False
+        assert "skipped" in late._apply_mediapipe(2)
+    finally:
+        sys.modules.pop("cv2", None)
+        sys.modules.update(saved_modules)
+        os.environ.pop("OMP_NUM_THREADS", None)
+        if saved is not None:
+            os.environ["OMP_NUM_THREADS"] = saved
+
+
+if __name__ == "__main__":
+    test_allocation()
+    test_overshoot_is_reported()
+    test_environment_only_counts_before_imports()
+    print("Test completed!")
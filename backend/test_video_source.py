@@ -0,0 +1,82 @@
+"""
+Test script for session recording and replay.
+Records synthetic frames with SessionRecorder, replays them with
+ReplaySource and checks frames, timestamps and the recorder's queue
+behaviour (writes after close, frames dropped when the writer is behind).
+"""
+
+import os
+import cv2
+import json
+import time
+import tempfile
+import threading
+import numpy as np
+from services import video_source
+from services.video_source import SessionRecorder, ReplaySource, INDEX_FILE
+
+FRAMES = 12
+
+
+def frame_for(i):
+    """A 64x48 frame whose brightness encodes its index."""
+    return np.full((48, 64, 3), i * 20, dtype=np.uint8)
+
+
+def test_record_replay_round_trip():
+    with tempfile.TemporaryDirectory() as path:
+        recorder = SessionRecorder(path)
+        for i in range(FRAMES):
+            recorder.write(frame_for(i), timestamp=100.0 + i * 0.04)
+        recorder.close()
+        recorder.write(frame_for(0), timestamp=200.0)
+        assert recorder.frames_written == FRAMES and recorder.frames_dropped == 0
+
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = [json.loads(line) for line in f]
+        assert [entry["file"] for entry in index] == [f"{i:06d}.jpg" for i in range(FRAMES)]
+
+        replay = ReplaySource(path, speed=0)
+        assert replay.isOpened()
+        assert abs(replay.get(cv2.CAP_PROP_FPS) - 25.0) < 0.01, "fps from recorded timestamps"
+        for i in range(FRAMES):
+            ok, frame = replay.read()
+            assert ok and frame.shape == (48, 64, 3)
+            assert abs(float(frame.mean()) - i * 20) < 3, "JPEG round trip keeps the content"
+            assert abs(replay.last_timestamp - i * 0.04) < 1e-6
+        assert replay.read() == (False, None)
+        assert replay.get_stats()["frames_read"] == FRAMES
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    imwrite = video_source.cv2.imwrite
+
+    def slow_imwrite(*args):
+        release.wait()
+        return imwrite(*args)
+
+    video_source.cv2.imwrite = slow_imwrite
+    try:
+        with tempfile.TemporaryDirectory() as path:
+            recorder = SessionRecorder(path, max_queue=1)
+            recorder.write(frame_for(0), timestamp=0.0)
+            while not recorder._queue.empty():
+                time.sleep(0.001)
+            # The writer is busy with frame 0: one frame fits in the queue, the next is dropped
+            start = time.perf_counter()
+            recorder.write(frame_for(1), timestamp=0.04)
+            recorder.write(frame_for(2), timestamp=0.08)
+            assert time.perf_counter() - start < 0.05, "write() never waits for the disk"
+            assert recorder.frames_dropped == 1
+            release.set()
+            recorder.close()
+            assert recorder.frames_written == 2
+    finally:
+        video_source.cv2.imwrite = imwrite
+
+
+if __name__ == "__main__":
+    test_record_replay_round_trip()
+    test_full_queue_drops_instead_of_blocking()
+    print("Test completed!")
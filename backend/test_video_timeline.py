@@ -0,0 +1,41 @@
+"""
+Test script for offline video analysis chunking and timeline merging.
+"""
+
+from services.video_analysis import plan_chunks, build_timeline
+
+
+def test_plan_chunks():
+    """Chunks cover every frame once and give each worker work."""
+    chunks = plan_chunks(frame_count=900, fps=30.0, workers=4, chunk_seconds=30.0)
+    assert len(chunks) == 4
+    assert chunks[0][0] == 0 and chunks[-1][1] == 900
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+    # Long videos are capped at chunk_seconds per chunk
+    chunks = plan_chunks(frame_count=30 * 600, fps=30.0, workers=2, chunk_seconds=30.0)
+    assert all(end - start <= 900 for start, end in chunks)
+    assert plan_chunks(0, 30.0, 4, 30.0) == []
+
+
+def test_build_timeline():
+    """Same-class observations within the gap merge, across chunk boundaries too."""
+    observations = [
+        ("gun", 1.0, 0.6), ("gun", 1.5, 0.9), ("gun", 2.0, 0.7),  # one event
+        ("gun", 10.0, 0.8),                                       # gap -> new event
+        ("fire", 29.5, 0.5), ("fire", 30.0, 0.75),                # spans a chunk boundary
+    ]
+    timeline = build_timeline(observations, gap_seconds=2.0)
+    print(f"Timeline: {timeline}")
+    assert len(timeline) == 3
+    first = timeline[0]
+    assert first["class"] == "gun" and first["start"] == 1.0 and first["end"] == 2.0
+    assert first["peak_confidence"] == 0.9 and first["peak_time"] == 1.5 and first["samples"] == 3
+    assert timeline[1]["start"] == 10.0
+    assert timeline[2]["class"] == "fire" and timeline[2]["end"] == 30.0
+
+
+if __name__ == "__main__":
+    test_plan_chunks()
+    test_build_timeline()
+    print("Test completed!")
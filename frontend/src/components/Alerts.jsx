@@ -15,7 +15,11 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
   const [selectedAlert, setSelectedAlert] = useState(null);
   const [detailLoading, setDetailLoading] = useState(false);
   const [detailData, setDetailData] = useState(null);
+  const [clipUrl, setClipUrl] = useState(null);
+  const openAlertIdRef = useRef(null);
   const previousAlertIdsRef = useRef(new Set());
+  // Details prefetched in bulk after the list loads, keyed by detection ID
+  const detailsRef = useRef(new Map());
 
   const mapDetectionToAlert = (detection) => {
     const typeMap = {
@@ -64,8 +68,9 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
 
   const markAsRead = async (alertId) => {
     try {
-      // Persist to database
-      await apiEndpoints.markDetectionRead(alertId);
+      // Persist to database (alerts raised while it was unreachable have no row yet)
+      const alert = alerts.find(a => a.id === alertId);
+      if (!alert?.unsaved) await apiEndpoints.markDetectionRead(alertId);
       // Update local state
       const updated = alerts.map(a => a.id === alertId ? { ...a, status: 'Acknowledged' } : a);
       setAlerts(updated);
@@ -98,13 +103,41 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
 
   useEffect(() => { audioAlert.init(); }, []);
 
+  // Event clips are served to signed-in users only, so fetch with the token and play from a blob URL
+  const loadClip = async (url, alertId) => {
+    if (!url || !url.startsWith('/clips/')) return;
+    try {
+      const response = await apiEndpoints.getClip(url);
+      // The modal may have been closed or switched to another alert meanwhile
+      if (openAlertIdRef.current !== alertId) return;
+      setClipUrl(URL.createObjectURL(response.data));
+    } catch (err) {
+      console.error('Error fetching event clip:', err);
+    }
+  };
+
   const openDetailModal = async (alert) => {
     setSelectedAlert(alert);
+    openAlertIdRef.current = alert.id;
+    const cached = detailsRef.current.get(alert.id);
+    if (alert.unsaved) {
+      // Its detection has not been written yet; show what the alert itself carries
+      setDetailData(null);
+      setDetailLoading(false);
+      return;
+    }
+    if (cached) {
+      setDetailData(cached);
+      setDetailLoading(false);
+      loadClip(cached.detection?.image_url || alert.imageUrl, alert.id);
+      return;
+    }
     setDetailLoading(true);
     setDetailData(null);
     try {
       const response = await apiEndpoints.getDetectionById(alert.id);
       setDetailData(response.data);
+      loadClip(response.data?.detection?.image_url || alert.imageUrl, alert.id);
     } catch (err) {
       console.error('Error fetching detection details:', err);
       // Still show the modal with the data we have from the alert itself
@@ -116,6 +149,9 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
   const closeDetailModal = () => {
     setSelectedAlert(null);
     setDetailData(null);
+    openAlertIdRef.current = null;
+    if (clipUrl) URL.revokeObjectURL(clipUrl);
+    setClipUrl(null);
   };
 
   const formatExactTimestamp = (ts) => {
@@ -140,8 +176,8 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
       setAlerts(prev => {
         // Avoid duplicates
         if (prev.some(a => a.id === alertData.id)) return prev;
-        // New alerts from socket are always unread
-        const alert = { ...alertData, status: 'Active' };
+        // New alerts from socket are always unread; without a detection_id the row is not written yet
+        const alert = { ...alertData, status: 'Active', unsaved: alertData.detection_id == null };
         const newAlerts = [alert, ...prev].slice(0, 100);
         return newAlerts;
       });
@@ -173,6 +209,17 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
             .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
           return combined;
         });
+
+        // One request for every detail the modal may open; failures fall back to per-alert fetches
+        if (detections.length > 0) {
+          apiEndpoints.getDetectionDetails(detections.map(d => d.detection_id))
+            .then(res => {
+              (res.data.details || []).forEach(detail => {
+                detailsRef.current.set(detail.detection.detection_id, detail);
+              });
+            })
+            .catch(err => console.error('Error prefetching detection details:', err));
+        }
       } catch (err) {
         console.error('Error fetching alerts:', err);
         setError('Failed to load alerts');
@@ -559,8 +606,17 @@ const Alerts = ({ onLogout, onNavigate, currentPage }) => {
                       </div>
                     )}
 
+                    {/* Event clip (MJPEG AVI, which browsers cannot play inline) */}
+                    {clipUrl && (
+                      <div className="alert-modal-section">
+                        <h3 className="alert-modal-section-title">Event Clip</h3>
+                        <a href={clipUrl} download={`detection-${selectedAlert.id}.avi`}>Download clip</a>
+                      </div>
+                    )}
+
                     {/* Detection Image */}
-                    {(detailData?.detection?.image_url || selectedAlert.imageUrl) && (
+                    {(detailData?.detection?.image_url || selectedAlert.imageUrl)
+                      && !(detailData?.detection?.image_url || selectedAlert.imageUrl).startsWith('/clips/') && (
                       <div className="alert-modal-section">
                         <h3 className="alert-modal-section-title">Detection Snapshot</h3>
                         <div className="alert-modal-image">
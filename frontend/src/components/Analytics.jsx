@@ -17,6 +17,17 @@ const timeAgo = (ts) => {
 
 const pct = (n, total) => (total === 0 ? 0 : +((n / total) * 100).toFixed(1));
 
+const rangeCutoff = (dateRange) => {
+  const now = new Date();
+  switch (dateRange) {
+    case 'today': return new Date(now.getFullYear(), now.getMonth(), now.getDate());
+    case 'week': return new Date(now - 7 * 86400000);
+    case 'month': return new Date(now - 30 * 86400000);
+    case 'year': return new Date(now - 365 * 86400000);
+    default: return new Date(0);
+  }
+};
+
 const Analytics = ({ onLogout, onNavigate, currentPage }) => {
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const [dateRange, setDateRange] = useState('week');
@@ -38,70 +49,28 @@ const Analytics = ({ onLogout, onNavigate, currentPage }) => {
   const [detectionTypes, setDetectionTypes] = useState([]);
   const [recentDetections, setRecentDetections] = useState([]);
 
-  /* ── compute analytics from raw detections ───── */
-  const computeAnalytics = useCallback((detections) => {
-    if (!detections || detections.length === 0) {
-      setStats({ totalDetections: 0, averageConfidence: 0, peakHour: 'N/A', highSeverityRate: 0 });
-      setDetectionActivity([]);
-      setAlertDistribution([]);
-      setDetectionTypes([]);
-      setRecentDetections([]);
-      return;
-    }
-
-    /* ── filter by dateRange ──────────────────── */
-    const now = new Date();
-    let cutoff;
-    switch (dateRange) {
-      case 'today': cutoff = new Date(now.getFullYear(), now.getMonth(), now.getDate()); break;
-      case 'week': cutoff = new Date(now - 7 * 86400000); break;
-      case 'month': cutoff = new Date(now - 30 * 86400000); break;
-      case 'year': cutoff = new Date(now - 365 * 86400000); break;
-      default: cutoff = new Date(0);
-    }
-    const filtered = detections.filter(d => new Date(d.timestamp) >= cutoff);
-    const total = filtered.length;
-
-    /* ── stats ────────────────────────────────── */
-    const avgConf = total > 0
-      ? +(filtered.reduce((s, d) => s + (d.confidence || 0), 0) / total * 100).toFixed(1)
-      : 0;
-
-    const highCount = filtered.filter(d => (d.confidence || 0) >= 0.8).length;
+  /* ── apply server-side aggregates ───────────── */
+  const applyAnalytics = useCallback((summary, recentRows) => {
+    const total = summary.total || 0;
 
-    /* ── hourly activity ─────────────────────── */
-    const hourBuckets = Array(8).fill(0);
+    /* ── hourly activity (3-hour buckets of hour of day) ── */
+    const byHour = summary.by_hour || Array(24).fill(0);
     const hourLabels = ['00:00', '03:00', '06:00', '09:00', '12:00', '15:00', '18:00', '21:00'];
-    filtered.forEach(d => {
-      const h = new Date(d.timestamp).getHours();
-      const bucket = Math.min(Math.floor(h / 3), 7);
-      hourBuckets[bucket]++;
-    });
+    const hourBuckets = hourLabels.map((_, i) => byHour.slice(i * 3, i * 3 + 3).reduce((s, n) => s + n, 0));
     const peakIdx = hourBuckets.indexOf(Math.max(...hourBuckets));
     const activity = hourLabels.map((time, i) => ({ time, detections: hourBuckets[i] }));
 
     /* ── severity distribution ───────────────── */
-    const sev = { Critical: 0, Warning: 0, Info: 0 };
-    filtered.forEach(d => {
-      const c = d.confidence || 0;
-      if (c >= 0.8) sev.Critical++;
-      else if (c >= 0.5) sev.Warning++;
-      else sev.Info++;
-    });
+    const sev = summary.by_severity || {};
     const dist = [
-      { type: 'Critical', count: sev.Critical, percentage: pct(sev.Critical, total), color: 'rose' },
-      { type: 'Warning', count: sev.Warning, percentage: pct(sev.Warning, total), color: 'amber' },
-      { type: 'Info', count: sev.Info, percentage: pct(sev.Info, total), color: 'blue' },
+      { type: 'Critical', count: sev.high || 0, percentage: pct(sev.high || 0, total), color: 'rose' },
+      { type: 'Warning', count: sev.medium || 0, percentage: pct(sev.medium || 0, total), color: 'amber' },
+      { type: 'Info', count: sev.low || 0, percentage: pct(sev.low || 0, total), color: 'blue' },
     ];
 
     /* ── detection types ─────────────────────── */
-    const typeCounts = {};
-    filtered.forEach(d => {
-      const t = d.detection_type || d.type || 'unknown';
-      typeCounts[t] = (typeCounts[t] || 0) + 1;
-    });
     const typeLabels = { weapon: '🔫 Weapon', fire: '🔥 Fire', smoke: '💨 Smoke', fight: '👊 Fight', person: '🧍 Person' };
-    const types = Object.entries(typeCounts)
+    const types = Object.entries(summary.by_type || {})
       .sort((a, b) => b[1] - a[1])
       .map(([type, count]) => ({
         type: typeLabels[type] || type.charAt(0).toUpperCase() + type.slice(1),
@@ -110,41 +79,39 @@ const Analytics = ({ onLogout, onNavigate, currentPage }) => {
       }));
 
     /* ── recent detections list ───────────────── */
-    const recent = filtered
-      .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp))
-      .slice(0, 8)
-      .map(d => ({
-        id: d.detection_id,
-        type: d.detection_type || d.type || 'unknown',
-        confidence: d.confidence || 0,
-        time: timeAgo(d.timestamp),
-        timestamp: d.timestamp
-      }));
+    const recent = recentRows.slice(0, 8).map(d => ({
+      id: d.detection_id,
+      type: d.type || 'unknown',
+      confidence: d.confidence || 0,
+      time: timeAgo(d.timestamp),
+      timestamp: d.timestamp
+    }));
 
     /* ── commit ───────────────────────────────── */
     setStats({
       totalDetections: total,
-      averageConfidence: avgConf,
+      averageConfidence: +((summary.average_confidence || 0) * 100).toFixed(1),
       peakHour: hourBuckets[peakIdx] > 0 ? hourLabels[peakIdx] : 'N/A',
-      highSeverityRate: pct(highCount, total)
+      highSeverityRate: pct(sev.high || 0, total)
     });
     setDetectionActivity(activity);
     setAlertDistribution(dist);
     setDetectionTypes(types);
     setRecentDetections(recent);
-  }, [dateRange]);
+  }, []);
 
   /* ── fetch from API ────────────────────────── */
-  const detectionsRef = useRef([]);
-
   const fetchData = useCallback(async (showLoading = false) => {
     try {
       if (showLoading) setLoading(true);
       setError(null);
-      const response = await apiEndpoints.getDetections(1000);
-      const detections = response.data.detections || [];
-      detectionsRef.current = detections;
-      computeAnalytics(detections);
+      // Counts come from the server's rollups; only the recent list is raw rows
+      const since = rangeCutoff(dateRange).toISOString();
+      const [summaryRes, recentRes] = await Promise.all([
+        apiEndpoints.getAnalyticsSummary({ since }),
+        apiEndpoints.getDetections(8, null, { since }),
+      ]);
+      applyAnalytics(summaryRes.data, recentRes.data.detections || []);
       setLastUpdated(new Date());
     } catch (err) {
       console.error('Error fetching analytics:', err);
@@ -152,23 +119,18 @@ const Analytics = ({ onLogout, onNavigate, currentPage }) => {
     } finally {
       setLoading(false);
     }
-  }, [computeAnalytics]);
+  }, [applyAnalytics, dateRange]);
 
-  /* ── initial fetch + polling fallback ──────── */
+  /* ── initial fetch, refetch on range change + polling fallback ── */
   useEffect(() => {
     fetchData(true);
     const interval = setInterval(() => fetchData(false), 30000);
     return () => clearInterval(interval);
   }, [fetchData]);
 
-  /* ── re-compute when dateRange changes ─────── */
-  useEffect(() => {
-    if (detectionsRef.current.length > 0) {
-      computeAnalytics(detectionsRef.current);
-    }
-  }, [dateRange, computeAnalytics]);
-
   /* ── real-time Socket.IO updates ───────────── */
+  const refetchTimeout = useRef(null);
+
   useEffect(() => {
     const handleNewAlert = (alertData) => {
       console.log('[Analytics] Real-time update:', alertData);
@@ -177,25 +139,18 @@ const Analytics = ({ onLogout, onNavigate, currentPage }) => {
       if (liveTimeout.current) clearTimeout(liveTimeout.current);
       liveTimeout.current = setTimeout(() => setIsLive(false), 3000);
 
-      // Add to our local detections and recompute
-      const newDetection = {
-        detection_id: alertData.id || Date.now(),
-        detection_type: alertData.detection_type || alertData.type || 'unknown',
-        type: alertData.detection_type || alertData.type || 'unknown',
-        confidence: alertData.confidence || 0.5,
-        timestamp: alertData.timestamp || new Date().toISOString()
-      };
-      detectionsRef.current = [newDetection, ...detectionsRef.current];
-      computeAnalytics(detectionsRef.current);
-      setLastUpdated(new Date());
+      // Refetch once a burst of alerts has been written to the database
+      if (refetchTimeout.current) clearTimeout(refetchTimeout.current);
+      refetchTimeout.current = setTimeout(() => fetchData(false), 1000);
     };
 
     socket.on('new_alert', handleNewAlert);
     return () => {
       socket.off('new_alert', handleNewAlert);
       if (liveTimeout.current) clearTimeout(liveTimeout.current);
+      if (refetchTimeout.current) clearTimeout(refetchTimeout.current);
     };
-  }, [computeAnalytics]);
+  }, [fetchData]);
 
   const maxDetections = Math.max(...detectionActivity.map(d => d.detections), 1);
 
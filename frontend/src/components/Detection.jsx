@@ -1,8 +1,9 @@
 import React, { useState, useRef, useEffect } from 'react';
 import Sidebar from './Sidebar';
+import DetectionOverlay from './DetectionOverlay';
 import '../styles/LiveFeed.css';
 import '../styles/Detection.css';
-import { apiEndpoints } from '../services/api';
+import { apiEndpoints, API_BASE_URL } from '../services/api';
 import audioAlert from '../utils/audioAlert';
 
 const Detection = ({ onLogout, onNavigate, currentPage }) => {
@@ -16,7 +17,6 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
   const [isVideoMode, setIsVideoMode] = useState(false);
   const [currentModel, setCurrentModel] = useState('weapon');
   const [availableModels, setAvailableModels] = useState([]);
-  const [isSwitchingModel, setIsSwitchingModel] = useState(false);
   const [isCameraActive, setIsCameraActive] = useState(false);
   const [isDetecting, setIsDetecting] = useState(false);
 
@@ -24,22 +24,22 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
   const streamRef = useRef(null);
   const detectionIntervalRef = useRef(null);
   const isDetectingRef = useRef(false);
+  const backoffUntilRef = useRef(0);
 
   useEffect(() => {
     audioAlert.init();
-    const fetchCurrentModel = async () => {
+    // Start from the server's default; after that the selection is this tab's own
+    const fetchModels = async () => {
       try {
         const response = await apiEndpoints.getModels();
-        setCurrentModel(response.data.current_model);
+        setCurrentModel(response.data.default_model);
         setAvailableModels(response.data.models || []);
       } catch (err) {
-        console.error('Failed to fetch current model:', err);
+        console.error('Failed to fetch models:', err);
       }
     };
-    fetchCurrentModel();
-    const modelCheckInterval = setInterval(fetchCurrentModel, 5000);
+    fetchModels();
     return () => {
-      clearInterval(modelCheckInterval);
       if (detectionIntervalRef.current) clearInterval(detectionIntervalRef.current);
       if (streamRef.current) streamRef.current.getTracks().forEach(t => t.stop());
     };
@@ -130,7 +130,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
       console.log('[Detection] Video not ready, readyState:', videoRef.current?.readyState);
       return;
     }
-    if (isDetectingRef.current) return;
+    if (isDetectingRef.current || Date.now() < backoffUntilRef.current) return;
     isDetectingRef.current = true;
     setIsDetecting(true);
     try {
@@ -153,6 +153,11 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
       const formData = new FormData();
       formData.append('file', blob, 'frame.jpg');
       formData.append('camera_id', 'live_detection');
+      // The live view draws its own overlay, so skip server-side drawing and encoding
+      formData.append('image_mode', 'none');
+      formData.append('keypoints', 'true');
+      // Camera frames use the live lane so uploads and batches cannot delay them
+      formData.append('lane', 'live');
       let response, allDetections = [];
       if (currentModel === 'fight') {
         response = await apiEndpoints.detectFight(formData);
@@ -167,7 +172,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
         setDetectionResult(response.data);
         allDetections = [...(response.data.weapon_detections || []), ...(response.data.fire_smoke_detections || [])];
       } else {
-        formData.append('model_type', currentModel);
+        formData.append('model', currentModel);
         response = await apiEndpoints.detectObjects(formData);
         console.log('[Detection] Single model response:', {
           detections: response.data.detections?.length || 0,
@@ -178,13 +183,16 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
       }
       if (modelType !== 'both') {
         if (currentModel === 'fight') {
+          const poseBox = response.data.box;
           setDetectionResult({
             detections: allDetections,
-            image: response.data.image,
             model_used: 'fight',
             fight_probability: response.data.fight_probability,
             is_fight: response.data.is_fight,
-            message: response.data.message
+            message: response.data.message,
+            pose: poseBox
+              ? { box: [poseBox.x1, poseBox.y1, poseBox.x2, poseBox.y2], keypoints: response.data.keypoints }
+              : null
           });
         } else {
           setDetectionResult(response.data);
@@ -197,6 +205,12 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
         audioAlert.playAlert(max > 0.8 ? 'Critical' : max > 0.6 ? 'Warning' : 'Info');
       }
     } catch (err) {
+      const status = err.response?.status;
+      if (status === 429 || status === 503) {
+        // Server is saturated: skip frames until it says to retry
+        const retryAfter = Number(err.response.headers['retry-after']) || 1;
+        backoffUntilRef.current = Date.now() + retryAfter * 1000;
+      }
       console.error('[Detection] Camera detection error:', err.response?.data || err.message || err);
     } finally {
       isDetectingRef.current = false;
@@ -215,17 +229,8 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
     setPreviewUrl(null);
   };
 
-  const handleModelSwitch = async (newModel) => {
-    setIsSwitchingModel(true);
-    try {
-      await apiEndpoints.switchModel(newModel);
-      setCurrentModel(newModel);
-    } catch (err) {
-      console.error('Failed to switch model:', err);
-    } finally {
-      setIsSwitchingModel(false);
-    }
-  };
+  // The model is sent with each request, so switching affects only this tab
+  const handleModelSwitch = (newModel) => setCurrentModel(newModel);
 
   const handleSubmit = async (event) => {
     event.preventDefault();
@@ -237,6 +242,8 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
       const formData = new FormData();
       formData.append('file', selectedFile);
       formData.append('camera_id', isVideoMode ? 'live_video' : 'web_upload');
+      // Annotated images come back as short-lived links instead of base64
+      formData.append('image_mode', 'url');
       let response;
       let allDetections = [];
 
@@ -249,7 +256,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
         // Format fight result to match standard detection result structure
         setDetectionResult({
           detections: allDetections,
-          image: response.data.image, // annotated image with pose skeleton + bounding box
+          image_url: response.data.image_url, // annotated image with pose skeleton + bounding box
           model_used: 'fight',
           fight_probability: response.data.fight_probability,
           no_fight_probability: response.data.no_fight_probability,
@@ -264,7 +271,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
           ...(response.data.fire_smoke_detections || []),
         ];
       } else {
-        formData.append('model_type', currentModel);
+        formData.append('model', currentModel);
         response = await apiEndpoints.detectObjects(formData);
         setDetectionResult(response.data);
         allDetections = response.data.detections || [];
@@ -294,6 +301,23 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
     if (streamRef.current) stopCamera();
   };
 
+  /* Annotated image: short-lived server link, or inline base64 from older responses */
+  const resultImageSrc = (result, key) => {
+    if (result[`${key}_url`]) return `${API_BASE_URL}${result[`${key}_url`]}`;
+    if (result[key]) return `data:${result.image_media_type || 'image/jpeg'};base64,${result[key]}`;
+    return null;
+  };
+
+  /* Boxes drawn over the live video; weapon boxes red in dual-model mode */
+  const overlayDetections = () => {
+    if (!detectionResult) return [];
+    return [
+      ...(detectionResult.detections || []),
+      ...(detectionResult.weapon_detections || []).map(d => ({ ...d, source: 'weapon' })),
+      ...(detectionResult.fire_smoke_detections || []),
+    ];
+  };
+
   /* Live overlay label */
   const liveOverlayText = () => {
     if (!detectionResult) return null;
@@ -382,7 +406,6 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
                   <select
                     value={currentModel}
                     onChange={(e) => handleModelSwitch(e.target.value)}
-                    disabled={isSwitchingModel}
                     className="detection-select"
                   >
                     {availableModels.filter(m => m !== 'both').map((model) => (
@@ -393,10 +416,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
                       </option>
                     ))}
                   </select>
-                  {isSwitchingModel
-                    ? <p className="detection-switching-hint">Switching model…</p>
-                    : <p className="detection-model-hint">Select the model that matches your image content</p>
-                  }
+                  <p className="detection-model-hint">Select the model that matches your image content</p>
                 </div>
               )}
 
@@ -445,6 +465,7 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
                   </div>
                   <div className="detection-live-wrap">
                     <video ref={videoRef} autoPlay playsInline muted className="detection-video" />
+                    <DetectionOverlay mediaRef={videoRef} detections={overlayDetections()} pose={detectionResult?.pose} />
                     {detectionResult && isCameraActive && (
                       <div className="detection-live-overlay">{liveOverlayText()}</div>
                     )}
@@ -569,29 +590,29 @@ const Detection = ({ onLogout, onNavigate, currentPage }) => {
                 )}
 
                 {/* Processed images */}
-                {detectionResult.image && (
+                {resultImageSrc(detectionResult, 'image') && (
                   <div className="detection-image-section">
                     <h3 className="detection-image-heading">Processed Image:</h3>
                     <div className="detection-image-wrap">
-                      <img src={`data:image/jpeg;base64,${detectionResult.image}`} alt="Detection result" className="detection-result-img" />
+                      <img src={resultImageSrc(detectionResult, 'image')} alt="Detection result" className="detection-result-img" />
                     </div>
                   </div>
                 )}
 
-                {detectionResult.weapon_image && (
+                {resultImageSrc(detectionResult, 'weapon_image') && (
                   <div className="detection-image-section">
                     <h3 className="detection-image-heading-weapon">Weapon Detection Result:</h3>
                     <div className="detection-image-wrap-weapon">
-                      <img src={`data:image/jpeg;base64,${detectionResult.weapon_image}`} alt="Weapon result" className="detection-result-img" />
+                      <img src={resultImageSrc(detectionResult, 'weapon_image')} alt="Weapon result" className="detection-result-img" />
                     </div>
                   </div>
                 )}
 
-                {detectionResult.fire_smoke_image && (
+                {resultImageSrc(detectionResult, 'fire_smoke_image') && (
                   <div className="detection-image-section">
                     <h3 className="detection-image-heading-fire">Fire/Smoke Detection Result:</h3>
                     <div className="detection-image-wrap-fire">
-                      <img src={`data:image/jpeg;base64,${detectionResult.fire_smoke_image}`} alt="Fire/Smoke result" className="detection-result-img" />
+                      <img src={resultImageSrc(detectionResult, 'fire_smoke_image')} alt="Fire/Smoke result" className="detection-result-img" />
                     </div>
                   </div>
                 )}
@@ -0,0 +1,116 @@
+import React, { useEffect, useRef } from 'react';
+
+// BlazePose landmark pairs drawn as the skeleton
+const POSE_CONNECTIONS = [
+  [11, 12], [11, 13], [13, 15], [12, 14], [14, 16],
+  [11, 23], [12, 24], [23, 24], [23, 25], [25, 27], [24, 26], [26, 28],
+  [27, 29], [29, 31], [28, 30], [30, 32], [15, 17], [16, 18], [0, 11], [0, 12],
+];
+
+const FIRE_SMOKE_CLASSES = ['fire', 'smoke', 'flame', 'blaze'];
+
+const colorFor = (detection) => {
+  if (detection.color) return detection.color;
+  const name = (detection.class || '').toLowerCase();
+  if (FIRE_SMOKE_CLASSES.includes(name)) return '#3b82f6';
+  if (name === 'fight' || detection.source === 'weapon') return '#ef4444';
+  return '#22c55e';
+};
+
+/*
+ * Draws detection boxes and the fight pose on a canvas laid over a <video>
+ * or <img>, so the server only has to return annotations. Boxes are in
+ * source-frame pixels; pose keypoints are normalized [x, y, visibility].
+ */
+const DetectionOverlay = ({ mediaRef, detections = [], pose = null }) => {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    const media = mediaRef.current;
+    if (!canvas || !media) return;
+
+    const width = media.clientWidth;
+    const height = media.clientHeight;
+    const dpr = window.devicePixelRatio || 1;
+    canvas.style.left = `${media.offsetLeft}px`;
+    canvas.style.top = `${media.offsetTop}px`;
+    canvas.style.width = `${width}px`;
+    canvas.style.height = `${height}px`;
+    canvas.width = Math.round(width * dpr);
+    canvas.height = Math.round(height * dpr);
+
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    ctx.clearRect(0, 0, width, height);
+
+    const srcW = media.videoWidth || media.naturalWidth;
+    const srcH = media.videoHeight || media.naturalHeight;
+    if (!srcW || !srcH) return;
+
+    // Match the element's object-fit so boxes line up with the picture
+    const fit = window.getComputedStyle(media).objectFit;
+    const scale = fit === 'cover'
+      ? Math.max(width / srcW, height / srcH)
+      : Math.min(width / srcW, height / srcH);
+    const offsetX = (width - srcW * scale) / 2;
+    const offsetY = (height - srcH * scale) / 2;
+    const toX = (x) => offsetX + x * scale;
+    const toY = (y) => offsetY + y * scale;
+
+    ctx.lineWidth = 2;
+    ctx.font = '12px sans-serif';
+    detections.forEach((detection) => {
+      const box = detection.box;
+      if (!box || box.x2 === undefined) return;
+      const color = colorFor(detection);
+      const x = toX(box.x1);
+      const y = toY(box.y1);
+      ctx.strokeStyle = color;
+      ctx.strokeRect(x, y, toX(box.x2) - x, toY(box.y2) - y);
+
+      const label = `${detection.class} ${(detection.confidence * 100).toFixed(0)}%`;
+      const labelWidth = ctx.measureText(label).width + 8;
+      const labelY = Math.max(y - 18, 0);
+      ctx.fillStyle = color;
+      ctx.fillRect(x, labelY, labelWidth, 18);
+      ctx.fillStyle = '#ffffff';
+      ctx.fillText(label, x + 4, labelY + 13);
+    });
+
+    if (pose?.keypoints) {
+      const visible = (p) => p && p[2] > 0.3;
+      ctx.strokeStyle = '#facc15';
+      POSE_CONNECTIONS.forEach(([a, b]) => {
+        const p = pose.keypoints[a];
+        const q = pose.keypoints[b];
+        if (!visible(p) || !visible(q)) return;
+        ctx.beginPath();
+        ctx.moveTo(toX(p[0] * srcW), toY(p[1] * srcH));
+        ctx.lineTo(toX(q[0] * srcW), toY(q[1] * srcH));
+        ctx.stroke();
+      });
+      ctx.fillStyle = '#f97316';
+      pose.keypoints.forEach((p) => {
+        if (!visible(p)) return;
+        ctx.beginPath();
+        ctx.arc(toX(p[0] * srcW), toY(p[1] * srcH), 3, 0, 2 * Math.PI);
+        ctx.fill();
+      });
+    }
+    if (pose?.box && !detections.some((d) => d.class === 'fight')) {
+      const [x1, y1, x2, y2] = pose.box;
+      ctx.strokeStyle = '#22c55e';
+      ctx.strokeRect(toX(x1), toY(y1), toX(x2) - toX(x1), toY(y2) - toY(y1));
+    }
+  }, [mediaRef, detections, pose]);
+
+  return (
+    <canvas
+      ref={canvasRef}
+      style={{ position: 'absolute', left: 0, top: 0, pointerEvents: 'none' }}
+    />
+  );
+};
+
+export default DetectionOverlay;
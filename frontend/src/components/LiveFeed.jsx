@@ -1,24 +1,39 @@
 import React, { useState, useRef, useEffect } from 'react';
 import Sidebar from './Sidebar';
+import DetectionOverlay from './DetectionOverlay';
 import '../styles/LiveFeed.css';
 import { apiEndpoints } from '../services/api';
+import { frameSocket } from '../services/socket';
 import audioAlert from '../utils/audioAlert';
 
+// Upper bound on frames sent per second; each server reply paces the next frame
+const MAX_FRAME_RATE = 10;
+// Send a new frame if a reply never arrives (e.g. across a reconnect)
+const FRAME_TIMEOUT_MS = 5000;
+// Keep local alerts and sounds at the old once-per-second rate
+const ALERT_INTERVAL_MS = 1000;
+
 const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
   const [viewMode, setViewMode] = useState('grid');
   const [selectedCamera, setSelectedCamera] = useState(null);
   const [isStreaming, setIsStreaming] = useState(false);
   const [detectedObjects, setDetectedObjects] = useState([]);
+  const [pose, setPose] = useState(null);
   const [lastDetectionTime, setLastDetectionTime] = useState(null);
   const [isDetecting, setIsDetecting] = useState(false);
   const [currentModel, setCurrentModel] = useState('weapon');
   const [availableModels, setAvailableModels] = useState([]);
-  const [isSwitchingModel, setIsSwitchingModel] = useState(false);
   const [sidebarOpen, setSidebarOpen] = useState(false);
 
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
-  const detectionIntervalRef = useRef(null);
+  const streamingRef = useRef(false);
+  const modelRef = useRef('weapon');
+  const frameTimerRef = useRef(null);
+  const frameSeqRef = useRef(0);
+  const frameSentAtRef = useRef(0);
+  const lastAlertRef = useRef(0);
+  const captureCanvasRef = useRef(null);
 
   const [cameras] = useState([
     { id: 1, name: 'Entrance',      location: 'Building A - Floor 1', status: 'Active', fps: 30, resolution: '1920x1080' },
@@ -34,7 +49,7 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
     const fetchModels = async () => {
       try {
         const response = await apiEndpoints.getModels();
-        setCurrentModel(response.data.current_model);
+        setCurrentModel(response.data.default_model);
         setAvailableModels(response.data.models || []);
       } catch (err) {
         console.error('Failed to fetch models:', err);
@@ -43,17 +58,8 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
     fetchModels();
   }, []);
 
-  const handleModelSwitch = async (newModel) => {
-    setIsSwitchingModel(true);
-    try {
-      await apiEndpoints.switchModel(newModel);
-      setCurrentModel(newModel);
-    } catch (err) {
-      console.error('Failed to switch model:', err);
-    } finally {
-      setIsSwitchingModel(false);
-    }
-  };
+  // Each frame names its model, so switching affects only this tab
+  const handleModelSwitch = (newModel) => setCurrentModel(newModel);
 
   const startCamera = async () => {
     try {
@@ -77,65 +83,119 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
       videoRef.current.srcObject.getTracks().forEach(t => t.stop());
       videoRef.current.srcObject = null;
       setIsStreaming(false);
-      if (detectionIntervalRef.current) {
-        clearInterval(detectionIntervalRef.current);
-        detectionIntervalRef.current = null;
-      }
+      stopDetectionLoop();
     }
   };
 
+  useEffect(() => {
+    modelRef.current = currentModel;
+  }, [currentModel]);
+
+  // Frames go over the /frames socket with one frame in flight: the next
+  // frame is captured only once the previous one has been answered.
   const startDetectionLoop = () => {
-    if (detectionIntervalRef.current) clearInterval(detectionIntervalRef.current);
-    detectionIntervalRef.current = setInterval(async () => {
-      if (isStreaming && videoRef.current) await detectFromFrame();
-    }, 1000);
+    streamingRef.current = true;
+    frameSocket.connect();
+    scheduleNextFrame(0);
   };
 
-  const detectFromFrame = async () => {
-    if (!videoRef.current || videoRef.current.readyState !== 4) return;
-    setIsDetecting(true);
+  const stopDetectionLoop = () => {
+    streamingRef.current = false;
+    clearTimeout(frameTimerRef.current);
+    frameTimerRef.current = null;
+    frameSocket.disconnect();
+    setIsDetecting(false);
+    setDetectedObjects([]);
+    setPose(null);
+  };
+
+  const scheduleNextFrame = (delay) => {
+    clearTimeout(frameTimerRef.current);
+    frameTimerRef.current = setTimeout(sendFrame, delay);
+  };
+
+  const sendFrame = () => {
+    if (!streamingRef.current) return;
+    const video = videoRef.current;
+    if (!video || video.readyState !== 4 || !frameSocket.connected) {
+      scheduleNextFrame(250);
+      return;
+    }
     try {
-      const canvas = document.createElement('canvas');
-      canvas.width = videoRef.current.videoWidth;
-      canvas.height = videoRef.current.videoHeight;
-      canvas.getContext('2d').drawImage(videoRef.current, 0, 0, canvas.width, canvas.height);
+      const canvas = captureCanvasRef.current || (captureCanvasRef.current = document.createElement('canvas'));
+      canvas.width = video.videoWidth;
+      canvas.height = video.videoHeight;
+      canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height);
       canvas.toBlob(async (blob) => {
-        const formData = new FormData();
-        formData.append('file', blob, 'frame.jpg');
-        formData.append('camera_id', 'live_feed');
-        try {
-          let response, allDetections = [];
-          if (currentModel === 'fight') {
-            response = await apiEndpoints.detectFight(formData);
-            if (response.data.is_fight) {
-              allDetections = [{ class: 'fight', confidence: response.data.fight_probability || response.data.confidence || 0.8 }];
-            }
-          } else if (currentModel === 'both') {
-            response = await apiEndpoints.detectBoth(formData);
-            allDetections = [...(response.data.weapon_detections || []), ...(response.data.fire_smoke_detections || [])];
-          } else {
-            response = await apiEndpoints.detectObjects(formData);
-            allDetections = response.data.detections || [];
-          }
-          if (allDetections.length > 0) {
-            setDetectedObjects(allDetections);
-            setLastDetectionTime(new Date());
-            createAlertFromDetection(allDetections);
-          } else {
-            setDetectedObjects([]);
-          }
-        } catch (err) {
-          console.error('Detection error:', err);
-        } finally {
-          setIsDetecting(false);
+        if (!blob || !streamingRef.current) {
+          scheduleNextFrame(250);
+          return;
         }
+        const image = await blob.arrayBuffer();
+        frameSeqRef.current += 1;
+        frameSentAtRef.current = performance.now();
+        setIsDetecting(true);
+        frameSocket.emit('frame', {
+          seq: frameSeqRef.current,
+          image,
+          model: modelRef.current,
+          camera_id: 'live_feed',
+        });
+        scheduleNextFrame(FRAME_TIMEOUT_MS);
       }, 'image/jpeg', 0.8);
     } catch (err) {
       console.error('Frame capture error:', err);
-      setIsDetecting(false);
+      scheduleNextFrame(1000);
     }
   };
 
+  useEffect(() => {
+    const onDetections = (result) => {
+      // Ignore replies to frames superseded by a timeout resend
+      if (result.seq !== frameSeqRef.current) return;
+      setIsDetecting(false);
+      setPose(result.pose || null);
+      if (result.error) {
+        console.error('Detection error:', result.error);
+      } else {
+        // Each box is [class, confidence, x1, y1, x2, y2]
+        const allDetections = (result.boxes || []).map(([cls, confidence, x1, y1, x2, y2]) => ({
+          class: cls,
+          confidence,
+          box: x1 === undefined ? null : { x1, y1, x2, y2 },
+        }));
+        if (allDetections.length > 0) {
+          setDetectedObjects(allDetections);
+          setLastDetectionTime(new Date());
+          if (Date.now() - lastAlertRef.current >= ALERT_INTERVAL_MS) {
+            lastAlertRef.current = Date.now();
+            createAlertFromDetection(allDetections);
+          }
+        } else {
+          setDetectedObjects([]);
+        }
+      }
+      if (streamingRef.current) {
+        // An overloaded server asks us to back off instead of queueing frames
+        if (result.retry_after) {
+          scheduleNextFrame(result.retry_after * 1000);
+          return;
+        }
+        const elapsed = performance.now() - frameSentAtRef.current;
+        scheduleNextFrame(Math.max(0, 1000 / MAX_FRAME_RATE - elapsed));
+      }
+    };
+    // Results are annotations only; ask for pose keypoints so the fight
+    // skeleton can be drawn locally
+    const onConnect = () => frameSocket.emit('configure', { keypoints: true });
+    frameSocket.on('connect', onConnect);
+    frameSocket.on('detections', onDetections);
+    return () => {
+      frameSocket.off('connect', onConnect);
+      frameSocket.off('detections', onDetections);
+    };
+  }, []);
+
   const createAlertFromDetection = (detections) => {
     detections.forEach(detection => {
       const severity = detection.confidence > 0.8 ? 'Critical' : detection.confidence > 0.6 ? 'Warning' : 'Info';
@@ -158,8 +218,8 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
 
   useEffect(() => {
     return () => {
-      if (detectionIntervalRef.current) clearInterval(detectionIntervalRef.current);
-      if (isStreaming) stopCamera();
+      stopCamera();
+      if (streamingRef.current) stopDetectionLoop();
     };
   }, []);
 
@@ -313,7 +373,6 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
               <select
                 value={currentModel}
                 onChange={(e) => handleModelSwitch(e.target.value)}
-                disabled={isSwitchingModel}
                 className="livefeed-model-select"
               >
                 {availableModels.filter(m => m !== 'both').map((model) => (
@@ -325,7 +384,6 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
                 ))}
                 <option value="both">🔄 All Models (Weapon + Fire/Smoke)</option>
               </select>
-              {isSwitchingModel && <span className="livefeed-switching-label">Switching…</span>}
             </div>
           </div>
 
@@ -339,6 +397,9 @@ const LiveFeed = ({ onLogout, onNavigate, currentPage }) => {
               className="livefeed-video"
               style={{ display: isStreaming ? 'block' : 'none' }}
             />
+            {isStreaming && (
+              <DetectionOverlay mediaRef={videoRef} detections={detectedObjects} pose={pose} />
+            )}
             {!isStreaming && (
               <div className="livefeed-video-placeholder">
                 <svg className="w-12 h-12 sm:w-16 sm:h-16 mx-auto mb-3 opacity-50" viewBox="0 0 24 24" fill="none">
@@ -38,7 +38,7 @@ const Settings = ({ onLogout, onNavigate, currentPage }) => {
       try {
         const response = await apiEndpoints.getModels();
         setModels(response.data.models || []);
-        setCurrentModel(response.data.current_model || '');
+        setCurrentModel(response.data.default_model || '');
       } catch (err) {
         console.error('Error fetching models:', err);
         setError('Failed to load models');
@@ -52,8 +52,8 @@ const Settings = ({ onLogout, onNavigate, currentPage }) => {
       setLoading(true);
       setError(null);
       const response = await apiEndpoints.switchModel(modelName);
-      setCurrentModel(response.data.current_model);
-      alert(`Successfully switched to ${modelName} model`);
+      setCurrentModel(response.data.default_model);
+      alert(`Default model set to ${modelName}`);
     } catch (err) {
       console.error('Error switching model:', err);
       setError(err.response?.data?.error || err.message || 'Failed to switch model');
@@ -223,11 +223,11 @@ const Settings = ({ onLogout, onNavigate, currentPage }) => {
               <div className="settings-card">
                 <div className="settings-card-header">
                   <h3 className="settings-card-title">AI Models</h3>
-                  <p className="settings-card-description">Switch between different detection models</p>
+                  <p className="settings-card-description">Model used by clients that don't choose one themselves</p>
                 </div>
                 <div className="settings-items">
                   <div className="mb-4 sm:mb-6 p-3 sm:p-4 bg-gray-800/50 rounded-lg">
-                    <p className="text-xs sm:text-sm text-gray-300 mb-1">Current Model:</p>
+                    <p className="text-xs sm:text-sm text-gray-300 mb-1">Default Model:</p>
                     <p className="text-base sm:text-lg font-semibold capitalize text-blue-400">{currentModel || 'None'}</p>
                   </div>
 
@@ -249,7 +249,7 @@ const Settings = ({ onLogout, onNavigate, currentPage }) => {
                           onClick={() => handleModelSwitch(model)}
                           disabled={loading || currentModel === model}
                         >
-                          {currentModel === model ? 'Active' : 'Switch'}
+                          {currentModel === model ? 'Default' : 'Set Default'}
                         </button>
                       </div>
                     ))}
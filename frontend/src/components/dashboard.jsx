@@ -118,14 +118,14 @@ const Dashboard = ({ onLogout, onNavigate, currentPage }) => {
       try {
         setLoading(true);
         setError(null);
-        const detectionsRes = await apiEndpoints.getDetections(100);
-        const detections = detectionsRes.data.detections || [];
-        const peopleDetections = detections.filter(d =>
-          d.type === 'person' || (d.type && d.type.includes('person'))
-        ).length;
-        const recentDetections = detections.filter(d =>
-          new Date(d.timestamp) > new Date(Date.now() - 24 * 60 * 60 * 1000)
-        ).length;
+        // Last 24 hours, counted by the server from its rollups
+        const since = new Date(Date.now() - 24 * 60 * 60 * 1000).toISOString();
+        const summaryRes = await apiEndpoints.getAnalyticsSummary({ since });
+        const byType = summaryRes.data.by_type || {};
+        const peopleDetections = Object.entries(byType)
+          .filter(([type]) => type.includes('person'))
+          .reduce((sum, [, count]) => sum + count, 0);
+        const recentDetections = summaryRes.data.total || 0;
         setSystemStats(prev => ({
           activeCameras: 6,
           activeAlerts: Math.max(prev.activeAlerts, recentDetections),
@@ -1,7 +1,7 @@
 import axios from 'axios';
 
 // Base API configuration
-const API_BASE_URL = 'http://localhost:8000';
+export const API_BASE_URL = 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -11,9 +11,13 @@ const api = axios.create({
   },
 });
 
+// Identifies this browser tab for the server's per-client request limit
+const CLIENT_ID = Math.random().toString(36).slice(2);
+
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
+    config.headers['X-Client-Id'] = CLIENT_ID;
     // Add auth token if available
     const token = localStorage.getItem('authToken');
     if (token) {
@@ -72,8 +76,19 @@ export const apiEndpoints = {
   resetFightBuffer: () => api.post('/fight/reset'),
 
   // Detections
-  getDetections: (limit = 50) => api.get(`/detections?limit=${limit}`),
+  // filters: { type, camera_id, min_confidence, max_confidence, severity, is_read, since, until }
+  getDetections: (limit = 50, cursor = null, filters = {}) => api.get('/detections', {
+    params: { limit, cursor, ...filters },
+  }),
   getDetectionById: (id) => api.get(`/detections/${id}`),
+  // Event clips need the auth header, so they are fetched as blobs rather than linked
+  getClip: (url) => api.get(url, { responseType: 'blob' }),
+  // Detection, camera and alerts for up to 200 IDs in one request
+  getDetectionDetails: (ids) => api.get('/detections/details', { params: { ids: ids.join(',') } }),
+
+  // Analytics (served from rollups): { since, until, camera_id }, timeseries also { bucket, type }
+  getAnalyticsSummary: (params = {}) => api.get('/analytics/summary', { params }),
+  getAnalyticsTimeseries: (params = {}) => api.get('/analytics/timeseries', { params }),
 
   // Mark as read
   markDetectionRead: (id) => api.patch(`/detections/${id}/read`),
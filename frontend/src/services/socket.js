@@ -25,3 +25,13 @@ socket.on('connect_error', (err) => {
 });
 
 export default socket;
+
+// Binary frame channel for live detection. Connected only while a camera
+// is streaming; the server answers each frame with a 'detections' event.
+export const frameSocket = io(`${SOCKET_URL}/frames`, {
+    autoConnect: false,
+    reconnection: true,
+    reconnectionDelay: 1000,
+    reconnectionDelayMax: 5000,
+    transports: ['websocket'],
+});